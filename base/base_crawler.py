@@ -8,13 +8,26 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
+import asyncio
+import importlib.util
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
 
+import httpx
 from playwright.async_api import BrowserContext, BrowserType, Playwright
 
+import config
+from tools import utils
+from tools.comment_pipeline import CommentPipeline
+from tools.crawl_checkpoint import CrawlCheckpoint, get_crawl_checkpoint
+from tools.crawl_dedup import ContentDedup, get_content_dedup
+from tools.crawl_index import get_crawl_index
+from tools.media_writer import MediaSource
+
 
 class AbstractCrawler(ABC):
+    # 搜索等主循环因请求失败（如登录失效、被风控）提前退出时置为 True，结束时保留断点
+    aborted: bool = False
 
     @abstractmethod
     async def start(self):
@@ -54,6 +67,53 @@ class AbstractCrawler(ABC):
         # 默认实现：回退到标准模式
         return await self.launch_browser(playwright.chromium, playwright_proxy, user_agent, headless)
 
+    @property
+    def checkpoint(self) -> CrawlCheckpoint:
+        """
+        本次爬取的断点，search 中用 checkpoint.iter_tasks 遍历关键词，每获取一页调用 save_page，处理完一页调用 finish_page
+        """
+        return get_crawl_checkpoint()
+
+    @property
+    def content_dedup(self) -> ContentDedup:
+        """
+        本次运行内的内容去重，多个关键词搜到同一内容时详情和评论只请求一次
+        """
+        return get_content_dedup()
+
+    def get_comment_state(self, platform: str, content_id: str) -> Tuple[Optional[str], bool]:
+        """
+        合并增量索引和断点中记录的评论进度
+        :param platform: 平台
+        :param content_id: 内容 ID
+        :return: (开始抓取的游标，None 表示从头开始, 评论是否已全部抓取)
+        """
+        cursor, done = get_crawl_index().get_comment_state(platform, content_id)
+        if done:
+            return cursor, done
+        checkpoint_cursor, checkpoint_done = self.checkpoint.get_comment_state(content_id)
+        return cursor or checkpoint_cursor, checkpoint_done
+
+    def comment_cursor_callback(self, platform: str, content_id: str, callback: Optional[Callable] = None) -> Callable:
+        """
+        传给客户端 get_xxx_all_comments 的 cursor_callback，每页评论后同时更新增量索引和断点
+        :param platform: 平台
+        :param content_id: 内容 ID
+        :param callback: 评论存储回调，为 CommentPipeline 时等此前的评论页全部写入成功后才保存游标
+        :return:
+        """
+        crawl_index = get_crawl_index()
+        checkpoint = self.checkpoint
+
+        def save_comment_cursor(cursor, has_more: bool):
+            crawl_index.save_comment_cursor(platform, content_id, cursor, has_more)
+            checkpoint.save_comment_cursor(content_id, cursor, has_more)
+
+        if isinstance(callback, CommentPipeline):
+            pipeline = callback
+            return lambda cursor, has_more: pipeline.after_written(lambda: save_comment_cursor(cursor, has_more))
+        return save_comment_cursor
+
 
 class AbstractLogin(ABC):
 
@@ -75,6 +135,9 @@ class AbstractLogin(ABC):
 
 
 class AbstractStore(ABC):
+    # store_content 按内容 ID 覆盖已有记录（数据库存储）时为 True，重复保存同一内容不会产生重复的行；
+    # csv/json 存储只能追加，重复保存会多出一行
+    upserts_content: bool = False
 
     @abstractmethod
     async def store_content(self, content_item: Dict):
@@ -84,18 +147,34 @@ class AbstractStore(ABC):
     async def store_comment(self, comment_item: Dict):
         pass
 
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        批量保存评论，默认逐条调用 store_comment，数据库存储会覆盖为批量写入
+        """
+        for comment_item in comment_items:
+            await self.store_comment(comment_item)
+
     # TODO support all platform
     # only xhs is supported, so @abstractmethod is commented
     @abstractmethod
     async def store_creator(self, creator: Dict):
         pass
 
+    async def flush(self):
+        """
+        将缓冲中尚未写入的数据落盘，爬虫结束时调用
+        """
+        pass
+
 
 class AbstractStoreImage(ABC):
     # TODO: support all platform
     # only weibo is supported
     # @abstractmethod
     async def store_image(self, image_content_item: Dict):
+        """
+        图片内容可以是 bytes，也可以是 AbstractApiClient.stream_media 返回的分块流
+        """
         pass
 
 
@@ -104,10 +183,17 @@ class AbstractStoreVideo(ABC):
     # only weibo is supported
     # @abstractmethod
     async def store_video(self, video_content_item: Dict):
+        """
+        视频内容可以是 bytes，也可以是 AbstractApiClient.stream_media 返回的分块流
+        """
         pass
 
 
 class AbstractApiClient(ABC):
+    """
+    API 客户端基类，子类通过 get_http_client 获取共享的 httpx 连接池，
+    同一个代理在客户端生命周期内只创建一个 httpx.AsyncClient，爬虫结束时由 close 统一关闭
+    """
 
     @abstractmethod
     async def request(self, method, url, **kwargs):
@@ -116,3 +202,144 @@ class AbstractApiClient(ABC):
     @abstractmethod
     async def update_cookies(self, browser_context: BrowserContext):
         pass
+
+    def get_http_client(self, proxy: Optional[str] = None) -> httpx.AsyncClient:
+        """
+        获取（必要时创建）指定代理对应的共享 httpx.AsyncClient
+        Args:
+            proxy: httpx 代理地址，None 表示直连
+
+        Returns:
+            httpx.AsyncClient
+        """
+        # 子类大多没有调用 super().__init__，这里惰性初始化连接池相关属性
+        if "_http_clients" not in self.__dict__:
+            # 按最近使用的顺序排列，最后一个是当前代理的连接池
+            self._http_clients: Dict[Optional[str], httpx.AsyncClient] = {}
+            self._http_closing: Set[asyncio.Task] = set()
+            self._http_stats: Dict[str, int] = {"requests": 0, "connections_opened": 0}
+        clients = self._http_clients
+        client = clients.pop(proxy, None)
+        if client is None or client.is_closed:
+            # 代理切换后保留上一个代理的连接池，其中可能还有进行中的请求（如媒体下载），更早的连接池关闭，
+            # 避免按代理地址缓存的连接池随代理轮换无限增长
+            while len(clients) > 1:
+                self._close_http_client(clients.pop(next(iter(clients))))
+            client = httpx.AsyncClient(
+                proxy=proxy,
+                http2=_http2_enabled(),
+                limits=httpx.Limits(
+                    max_connections=config.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+                ),
+                event_hooks={"request": [self._on_http_request]},
+            )
+        clients[proxy] = client
+        return client
+
+    def _close_http_client(self, client: httpx.AsyncClient):
+        """
+        在后台关闭被淘汰的连接池，close 时等待关闭完成
+        """
+        if client.is_closed:
+            return
+        task = asyncio.get_running_loop().create_task(client.aclose())
+        self._http_closing.add(task)
+        task.add_done_callback(self._http_closing.discard)
+
+    async def _on_http_request(self, request: httpx.Request):
+        """
+        请求事件钩子，通过 httpcore 的 trace 扩展统计新建连接数
+        """
+        self._http_stats["requests"] += 1
+        origin_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict):
+            if event_name == "connection.connect_tcp.complete":
+                self._http_stats["connections_opened"] += 1
+            if origin_trace is not None:
+                await origin_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+
+    async def stream_media(self, url: str, offset: int = 0, **kwargs) -> AsyncIterator[bytes]:
+        """
+        以分块方式下载媒体文件，配合 tools.media_writer.write_media_file 边下载边写入磁盘，
+        避免把整个视频读入内存。请求在开始迭代时才会发出，出错时在迭代过程中抛出 httpx.HTTPError
+        Args:
+            url: 媒体地址
+            offset: 从第 offset 个字节开始下载，通过 Range 请求续传；服务端不支持 Range 时丢弃前 offset 个字节
+            **kwargs: 透传给 httpx 的请求参数，例如 headers、follow_redirects
+
+        Returns:
+            分块数据的异步迭代器
+        """
+        client = self.get_http_client(getattr(self, "proxy", None))
+        kwargs.setdefault("timeout", getattr(self, "timeout", None))
+        if offset:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "Range": f"bytes={offset}-"}
+        async with client.stream("GET", url, **kwargs) as response:
+            response.raise_for_status()
+            skip = offset if response.status_code != 206 else 0
+            async for chunk in response.aiter_bytes(config.MEDIA_DOWNLOAD_CHUNK_SIZE):
+                if skip:
+                    if len(chunk) <= skip:
+                        skip -= len(chunk)
+                        continue
+                    chunk, skip = chunk[skip:], 0
+                yield chunk
+
+    def media_source(self, url: str, **kwargs) -> MediaSource:
+        """
+        创建可续传的媒体来源，交给媒体存储后由 tools.media_store 决定跳过、续传或从头下载
+        Args:
+            url: 媒体地址
+            **kwargs: 透传给 stream_media 的请求参数
+
+        Returns:
+            MediaSource
+        """
+        return MediaSource(url, lambda offset: self.stream_media(url, offset=offset, **kwargs))
+
+    def get_http_stats(self) -> Dict[str, int]:
+        """
+        获取连接池统计信息
+        Returns:
+            requests: 发出的请求数, connections_opened: 新建的 TCP 连接数, connections_reused: 复用已有连接的请求数
+        """
+        stats = dict(self.__dict__.get("_http_stats") or {"requests": 0, "connections_opened": 0})
+        stats["connections_reused"] = max(stats["requests"] - stats["connections_opened"], 0)
+        return stats
+
+    async def close(self):
+        """
+        关闭客户端持有的所有 httpx 连接池
+        """
+        clients = self.__dict__.get("_http_clients") or {}
+        for client in clients.values():
+            if not client.is_closed:
+                await client.aclose()
+        clients.clear()
+        closing = self.__dict__.get("_http_closing")
+        if closing:
+            await asyncio.gather(*closing)
+        utils.logger.info(f"[{self.__class__.__name__}.close] http client closed, stats: {self.get_http_stats()}")
+
+
+def _http2_enabled() -> bool:
+    """
+    ENABLE_HTTP2 开启且安装了 h2 依赖时才启用 HTTP/2
+    """
+    global _HTTP2_WARNED
+    if not config.ENABLE_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is not None:
+        return True
+    if not _HTTP2_WARNED:
+        _HTTP2_WARNED = True
+        utils.logger.warning("[AbstractApiClient] ENABLE_HTTP2 is on but h2 is not installed, fall back to HTTP/1.1")
+    return False
+
+
+_HTTP2_WARNED = False
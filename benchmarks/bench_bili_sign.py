@@ -0,0 +1,93 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : B 站 WBI 签名吞吐对比：每次请求读取 localStorage 并构造 BilibiliSign 与缓存密钥复用签名实例
+#            用法（项目根目录下执行）: python -m benchmarks.bench_bili_sign --count 20000 --evaluate-ms 2
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.bilibili.help import BilibiliSign
+
+IMG_KEY = "7cd084941338484aae1ad9425b84077c"
+SUB_KEY = "4932caff0ff746eab6f01bf08b70ac45"
+
+
+class FakePage:
+    """
+    模拟 playwright_page.evaluate，evaluate_ms 为一次浏览器往返的耗时
+    """
+
+    def __init__(self, evaluate_ms: float):
+        self.evaluate_ms = evaluate_ms
+        self.evaluate_count = 0
+
+    async def evaluate(self, expression: str):
+        self.evaluate_count += 1
+        await asyncio.sleep(self.evaluate_ms / 1000)
+        return {
+            "wbi_img_urls": f"https://i0.hdslb.com/bfs/wbi/{IMG_KEY}.png-https://i0.hdslb.com/bfs/wbi/{SUB_KEY}.png"
+        }
+
+
+def fake_params(i: int) -> dict:
+    return {"keyword": f"python {i}", "page": i % 50 + 1, "page_size": 20, "search_type": "video", "order": "click"}
+
+
+def bench_sign(count: int):
+    begin = time.perf_counter()
+    for i in range(count):
+        BilibiliSign(IMG_KEY, SUB_KEY).sign(fake_params(i))
+    cost = time.perf_counter() - begin
+    print(f"[sign, new BilibiliSign per call]  {count:>7} signs  {count / cost:12.1f} signs/sec")
+
+    signer = BilibiliSign(IMG_KEY, SUB_KEY)
+    begin = time.perf_counter()
+    for i in range(count):
+        signer.sign(fake_params(i))
+    cost = time.perf_counter() - begin
+    print(f"[sign, reused BilibiliSign]        {count:>7} signs  {count / cost:12.1f} signs/sec")
+
+
+async def bench_pre_request_data(count: int, evaluate_ms: float, cache_ttl: float):
+    page = FakePage(evaluate_ms)
+    client = BilibiliClient(headers={}, playwright_page=page, cookie_dict={})
+    client._wbi_key_cache.ttl = cache_ttl
+    begin = time.perf_counter()
+    for i in range(count):
+        await client.pre_request_data(fake_params(i))
+    cost = time.perf_counter() - begin
+    label = "key cache on " if cache_ttl else "key cache off"
+    print(f"[pre_request_data, {label}]  {count:>7} signs  {count / cost:12.1f} signs/sec  "
+          f"evaluate calls={page.evaluate_count}  avoided={client._wbi_key_cache.stats['evaluations_avoided']}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20000, help="签名次数")
+    parser.add_argument("--evaluate-count", type=int, default=500, help="不使用密钥缓存时的签名次数（每次都要等待 evaluate）")
+    parser.add_argument("--evaluate-ms", type=float, default=2, help="模拟一次 Playwright evaluate 的耗时（毫秒）")
+    args = parser.parse_args()
+
+    bench_sign(args.count)
+    await bench_pre_request_data(args.evaluate_count, args.evaluate_ms, cache_ttl=0)
+    await bench_pre_request_data(args.count, args.evaluate_ms, cache_ttl=3600)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : SQLite 评论写入速度对比：逐条 SELECT + INSERT/UPDATE vs 按页批量 upsert
+#            用法: python -m benchmarks.bench_bulk_upsert --count 5000 --page-size 20
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from config.db_config import sqlite_db_config
+from database import db_session
+from store.bilibili._store_impl import BiliSqliteStoreImplement
+
+
+def fake_comment(i: int):
+    return {
+        "comment_id": str(i),
+        "parent_comment_id": "0",
+        "create_time": 1700000000 + i,
+        "video_id": "1",
+        "content": f"这是第 {i} 条评论",
+        "user_id": str(i % 1000),
+        "nickname": "测试用户",
+        "sex": "保密",
+        "sign": "",
+        "avatar": "",
+        "sub_comment_count": "0",
+        "like_count": i % 100,
+        "last_modify_ts": 1700000000000,
+    }
+
+
+async def bench(store: BiliSqliteStoreImplement, offset: int, count: int, page_size: int, batch: bool) -> float:
+    begin = time.perf_counter()
+    for page_start in range(offset, offset + count, page_size):
+        page = [fake_comment(i) for i in range(page_start, min(page_start + page_size, offset + count))]
+        if batch:
+            await store.store_comments(page)
+        else:
+            for item in page:
+                await store.store_comment(item)
+    return count / (time.perf_counter() - begin)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=20, help="每页评论数，与接口单页返回数量一致")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config.SAVE_DATA_OPTION = "sqlite"
+        sqlite_db_config["db_path"] = os.path.join(tmp_dir, "bench.db")
+        await db_session.create_tables("sqlite")
+        store = BiliSqliteStoreImplement()
+
+        per_item = await bench(store, 0, args.count, args.page_size, batch=False)
+        bulk = await bench(store, args.count, args.count, args.page_size, batch=True)
+        # 重复写入同一批数据，全部走更新分支
+        per_item_update = await bench(store, 0, args.count, args.page_size, batch=False)
+        bulk_update = await bench(store, args.count, args.count, args.page_size, batch=True)
+
+        print(f"insert  per item: {per_item:10.0f} rows/s   bulk upsert: {bulk:10.0f} rows/s   x{bulk / per_item:.1f}")
+        print(f"update  per item: {per_item_update:10.0f} rows/s   bulk upsert: {bulk_update:10.0f} rows/s   x{bulk_update / per_item_update:.1f}")
+        await db_session.get_async_engine("sqlite").dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
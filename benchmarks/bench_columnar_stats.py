@@ -0,0 +1,158 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 商城商品统计和快手视频统计耗时对比：逐条 Python 循环（按分类重复扫描、整表排序取 Top10）与列式统计
+#            用法（项目根目录下执行）: python -m benchmarks.bench_columnar_stats --count 1000000 --categories 50
+
+import argparse
+import os
+import random
+import sys
+import time
+from statistics import mean, median
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media_platform.kuaishou.field import VideoStats
+from media_platform.kuaishou.stats_analyzer import StatsAnalyzer
+from media_platform.kuaishou.video_stats_extractor import VideoStatsExtractor
+from media_platform.xhs.mall import XiaoHongShuMallDataProcessor
+
+
+def fake_products(count: int, categories: int) -> List[Dict]:
+    rng = random.Random(0)
+    return [
+        {
+            "product_id": f"p{i}",
+            "title": f"product {i}",
+            "price": round(rng.uniform(0, 800), 2),
+            "sales_count": rng.randint(0, 100000),
+            "rating": round(rng.uniform(1, 5), 1),
+            "category": f"category_{rng.randrange(categories)}",
+        }
+        for i in range(count)
+    ]
+
+
+def fake_video_stats(count: int) -> List[VideoStats]:
+    rng = random.Random(0)
+    return [
+        VideoStats(
+            video_id=str(i),
+            like_count=rng.randint(0, 100000),
+            real_like_count=0,
+            comment_count=rng.randint(0, 5000),
+            share_count=rng.randint(0, 5000),
+            collect_count=rng.randint(0, 5000),
+            view_count=rng.randint(0, 1000000),
+            duration=0,
+            timestamp=0,
+        )
+        for i in range(count)
+    ]
+
+
+def loop_product_metrics(products: List[Dict]) -> Dict:
+    """
+    改造前的 calculate_product_metrics：多次遍历并对整表排序两次取 Top10
+    """
+    price_ranges = {"0-50": 0, "50-100": 0, "100-200": 0, "200-500": 0, "500+": 0}
+    for product in products:
+        price = product.get("price", 0)
+        if price <= 50:
+            price_ranges["0-50"] += 1
+        elif price <= 100:
+            price_ranges["50-100"] += 1
+        elif price <= 200:
+            price_ranges["100-200"] += 1
+        elif price <= 500:
+            price_ranges["200-500"] += 1
+        else:
+            price_ranges["500+"] += 1
+    return {
+        "total_sales": sum(p.get("sales_count", 0) for p in products),
+        "avg_price": sum(p.get("price", 0) for p in products) / len(products),
+        "avg_rating": sum(p.get("rating", 0) for p in products) / len(products),
+        "price_distribution": price_ranges,
+        "top_selling": sorted(products, key=lambda x: x.get("sales_count", 0), reverse=True)[:10],
+        "highest_rated": sorted(products, key=lambda x: x.get("rating", 0), reverse=True)[:10],
+    }
+
+
+def loop_category_stats(products: List[Dict]) -> Dict:
+    """
+    改造前的 generate_category_stats：每个分类重新扫描一遍全部商品求均价
+    """
+    category_stats = {}
+    for product in products:
+        category = product.get("category", "未分类")
+        stats = category_stats.setdefault(category, {"count": 0, "total_sales": 0, "avg_price": 0, "product_ids": []})
+        stats["count"] += 1
+        stats["total_sales"] += product.get("sales_count", 0)
+        stats["product_ids"].append(product.get("product_id", ""))
+    for category, stats in category_stats.items():
+        prices = [p.get("price", 0) for p in products if p.get("category") == category and p.get("price")]
+        if prices:
+            stats["avg_price"] = sum(prices) / len(prices)
+    return category_stats
+
+
+def loop_video_performance(video_stats_list: List[VideoStats]) -> Dict:
+    """
+    改造前的 analyze_video_performance：每个指标单独遍历，statistics.median 排序求中位数，逐条构造字典算互动率
+    """
+    result = {}
+    for field in ("like_count", "comment_count", "share_count", "collect_count", "view_count"):
+        values = [getattr(stats, field) for stats in video_stats_list]
+        result[field] = {
+            "total": sum(values), "average": round(mean(values), 2), "median": median(values),
+            "max": max(values), "min": min(values),
+        }
+    engagement_rates = [VideoStatsExtractor.get_engagement_rate(stats._asdict()) for stats in video_stats_list]
+    result["engagement"] = {"average": round(mean(engagement_rates), 2), "median": round(median(engagement_rates), 2)}
+    return result
+
+
+def timed(label: str, count: int, fn: Callable, *args) -> float:
+    begin = time.perf_counter()
+    fn(*args)
+    cost = time.perf_counter() - begin
+    print(f"[{label:<42}] {count:>8} records  {cost:8.3f} s")
+    return cost
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1000000, help="记录数")
+    parser.add_argument("--categories", type=int, default=50, help="商品分类数")
+    parser.add_argument("--skip-loop", action="store_true", help="不运行逐条循环的旧实现（分类多时非常慢）")
+    args = parser.parse_args()
+
+    products = fake_products(args.count, args.categories)
+    video_stats_list = fake_video_stats(args.count)
+
+    if not args.skip_loop:
+        timed("product metrics, python loops", args.count, loop_product_metrics, products)
+    timed("product metrics, columnar", args.count, XiaoHongShuMallDataProcessor.calculate_product_metrics, products)
+    if not args.skip_loop:
+        timed(f"category stats ({args.categories}), rescan per category", args.count, loop_category_stats, products)
+    timed(f"category stats ({args.categories}), columnar", args.count, XiaoHongShuMallDataProcessor.generate_category_stats, products)
+    timed("analytics report, columnar", args.count, XiaoHongShuMallDataProcessor.create_analytics_report, products)
+    if not args.skip_loop:
+        timed("kuaishou video performance, python loops", args.count, loop_video_performance, video_stats_list)
+    timed("kuaishou video performance, columnar", args.count, StatsAnalyzer.analyze_video_performance, video_stats_list)
+    timed("kuaishou top 10 by engagement, columnar", args.count, StatsAnalyzer.find_top_performing_videos, video_stats_list, "engagement_rate", 10)
+
+
+if __name__ == '__main__':
+    main()
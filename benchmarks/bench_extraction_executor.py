@@ -0,0 +1,94 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 贴吧页面解析：在事件循环中直接解析与放到解析进程池的对比，统计吞吐和事件循环的停顿（心跳协程的延迟）
+#            用法（项目根目录下执行）: python -m benchmarks.bench_extraction_executor --rounds 10 --workers 1 2 4
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Callable, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media_platform.tieba.help import TieBaExtractor
+from model.m_baidu_tieba import TiebaComment
+from tools.extraction_executor import ExtractionExecutor
+from tools.latency_histogram import LatencyHistogram
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media_platform", "tieba", "test_data")
+# 心跳间隔（秒），心跳实际间隔超出的部分即事件循环被阻塞的时长
+HEARTBEAT_INTERVAL = 0.005
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(TEST_DATA_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def build_tasks(extractor: TieBaExtractor) -> List[Tuple[Callable, tuple]]:
+    parent_comment = TiebaComment(comment_id="123456", content="content", note_id="note_id", note_url="note_url",
+                                  tieba_id="tieba_id", tieba_name="tieba_name", tieba_link="tieba_link")
+    return [
+        (extractor.extract_search_note_list, (read_fixture("search_keyword_notes.html"),)),
+        (extractor.extract_note_detail, (read_fixture("note_detail.html"),)),
+        (extractor.extract_tieba_note_parment_comments, (read_fixture("note_comments.html"), "123456")),
+        (extractor.extract_tieba_note_sub_comments, (read_fixture("note_sub_comments.html"), parent_comment)),
+        (extractor.extract_tieba_note_list, (read_fixture("tieba_note_list.html"),)),
+    ]
+
+
+async def heartbeat(histogram: LatencyHistogram, stop: asyncio.Event):
+    while not stop.is_set():
+        begin = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        histogram.record(max(time.perf_counter() - begin - HEARTBEAT_INTERVAL, 0))
+
+
+async def bench(label: str, executor: ExtractionExecutor, tasks: List[Tuple[Callable, tuple]], rounds: int):
+    # 预热，排除进程启动和模块导入的耗时
+    await asyncio.gather(*[executor.run(func, *args) for func, args in tasks * max(executor.max_workers, 1)])
+
+    histogram = LatencyHistogram("loop_stall")
+    stop = asyncio.Event()
+    heartbeat_task = asyncio.create_task(heartbeat(histogram, stop))
+    await asyncio.sleep(HEARTBEAT_INTERVAL * 2)
+
+    begin = time.perf_counter()
+    await asyncio.gather(*[executor.run(func, *args) for func, args in tasks * rounds])
+    cost = time.perf_counter() - begin
+    stop.set()
+    await heartbeat_task
+    executor.shutdown()
+
+    pages = len(tasks) * rounds
+    stall = histogram.summary()
+    print(f"[{label:<18}] {pages:>5} pages  {pages / cost:8.1f} pages/sec  "
+          f"loop stall p50={stall['p50_ms']}ms p99={stall['p99_ms']}ms max={stall['max_ms']}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=10, help="每个测试页面解析的次数")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="解析进程数")
+    args = parser.parse_args()
+
+    tasks = build_tasks(TieBaExtractor())
+    await bench("event loop", ExtractionExecutor(max_workers=0), tasks, args.rounds)
+    for workers in args.workers:
+        await bench(f"pool workers={workers}", ExtractionExecutor(max_workers=workers), tasks, args.rounds)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
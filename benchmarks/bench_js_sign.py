@@ -0,0 +1,78 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 抖音 a_bogus 签名吞吐对比：execjs（每次调用启动 node）与常驻 node 进程池
+#            用法（项目根目录下执行）: python -m benchmarks.bench_js_sign --count 200 --workers 1 2 4
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from media_platform.douyin.help import get_a_bogus_from_js, get_sign_js_name
+from tools.js_worker_pool import JsWorkerPool
+
+URI = "/aweme/v1/web/comment/list/reply/"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+
+
+def fake_params(i: int) -> str:
+    return f"device_platform=webapp&aid=6383&channel=channel_pc_web&item_id=73{i:017d}&cursor={i * 20}&count=20"
+
+
+def bench_execjs(count: int):
+    begin = time.perf_counter()
+    for i in range(count):
+        get_a_bogus_from_js(URI, fake_params(i), USER_AGENT)
+    cost = time.perf_counter() - begin
+    print(f"[execjs]            {count:>6} signs  {count / cost:10.1f} signs/sec")
+
+
+async def bench_pool(count: int, workers: int, concurrency: int):
+    pool = JsWorkerPool("libs/douyin.js", size=workers, name=f"bench_{workers}")
+    await pool.start()
+    # 预热，排除进程启动和 JIT 编译的耗时
+    await pool.call(get_sign_js_name(URI), fake_params(0), USER_AGENT)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await pool.call(get_sign_js_name(URI), fake_params(i), USER_AGENT)
+
+    begin = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(count)])
+    cost = time.perf_counter() - begin
+    latency = pool.latency.summary()
+    print(f"[pool workers={workers}]  {count:>6} signs  {count / cost:10.1f} signs/sec  "
+          f"p50={latency['p50_ms']}ms p99={latency['p99_ms']}ms")
+    await pool.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200, help="签名次数")
+    parser.add_argument("--execjs-count", type=int, default=20, help="execjs 签名次数（每次启动进程，不宜过大）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="进程池大小")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发签名请求数")
+    args = parser.parse_args()
+
+    bench_execjs(args.execjs_count)
+    for workers in args.workers:
+        await bench_pool(args.count, workers, args.concurrency)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
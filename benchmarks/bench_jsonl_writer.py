@@ -0,0 +1,73 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : JSON、JSON Lines 以及开启写入缓冲后的单条写入耗时对比
+#            用法: python -m benchmarks.bench_jsonl_writer --count 1000000 --legacy-count 2000
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.async_file_writer import AsyncFileWriter, flush_all_file_writers
+
+
+def fake_comment(i: int):
+    return {
+        "comment_id": str(i),
+        "create_time": 1700000000000 + i,
+        "ip_location": "上海",
+        "note_id": "66fad51c000000001b0224b8",
+        "content": f"这是第 {i} 条评论，用于测试写入性能",
+        "user_id": f"user_{i % 1000}",
+        "nickname": "测试用户",
+        "like_count": i % 100,
+    }
+
+
+async def run(writer: AsyncFileWriter, count: int, report_every: int):
+    """写入 count 条评论，每 report_every 条打印一次这一段的平均单条耗时"""
+    begin = time.perf_counter()
+    for i in range(count):
+        await writer.write_single_item_to_json(fake_comment(i), "comments")
+        if (i + 1) % report_every == 0:
+            now = time.perf_counter()
+            print(f"  items={i + 1:>9}  avg per item={(now - begin) / report_every * 1e6:9.1f} us")
+            begin = now
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000, help="jsonl 模式写入条数")
+    parser.add_argument("--legacy-count", type=int, default=2000, help="旧 json 数组模式写入条数（O(n²)，不宜过大）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        print(f"[json array] {args.legacy_count} items")
+        await run(AsyncFileWriter("bench", "search", json_lines=False, buffered=False), args.legacy_count,
+                  max(args.legacy_count // 10, 1))
+        print(f"[json lines] {args.count} items")
+        await run(AsyncFileWriter("bench", "search", json_lines=True, buffered=False), args.count,
+                  max(args.count // 10, 1))
+        print(f"[json lines + buffer] {args.count} items")
+        await run(AsyncFileWriter("bench_buffered", "search", json_lines=True, buffered=True), args.count,
+                  max(args.count // 10, 1))
+        await flush_all_file_writers(close=True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
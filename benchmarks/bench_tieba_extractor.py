@@ -0,0 +1,115 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 贴吧一级评论解析耗时随评论数的变化：改造前每条评论都在整个文档上查询吧名、序列化 post-tail-wrap 后重新编译正则，
+#            耗时随评论数平方增长；改造后每条评论只查询自己的子树，耗时线性增长。测试页面由 test_data/note_comments.html
+#            中的评论复制得到
+#            用法（项目根目录下执行）: python -m benchmarks.bench_tieba_extractor --counts 30 120 480 1920
+
+import argparse
+import copy
+import os
+import re
+import sys
+import time
+from typing import Callable, List
+
+from lxml import etree
+from parsel import Selector
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constant import baidu_tieba as const
+from media_platform.tieba.help import COMMENT_POST_XPATH, TieBaExtractor
+from model.m_baidu_tieba import TiebaComment
+from tools import utils
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media_platform", "tieba", "test_data")
+
+
+def build_comment_page(comment_count: int) -> str:
+    """
+    复制 note_comments.html 中的评论，生成包含 comment_count 条评论的页面
+    """
+    with open(os.path.join(TEST_DATA_DIR, "note_comments.html"), "r", encoding="utf-8") as f:
+        root = Selector(text=f.read()).root
+    comments = COMMENT_POST_XPATH(root)
+    parent = comments[0].getparent()
+    anchor = comments[-1]
+    for i in range(comment_count - len(comments)):
+        clone = copy.deepcopy(comments[i % len(comments)])
+        anchor.addnext(clone)
+        anchor = clone
+    for comment in comments[comment_count:]:
+        parent.remove(comment)
+    return etree.tostring(root, method="html", encoding="unicode")
+
+
+def legacy_parment_comments(page_content: str, note_id: str) -> List[TiebaComment]:
+    """
+    改造前的 extract_tieba_note_parment_comments
+    """
+    def extract_ip_and_pub_time(html_content: str):
+        pattern_pub_time = re.compile(r'<span class="tail-info">(\d{4}-\d{2}-\d{2} \d{2}:\d{2})</span>')
+        time_match = pattern_pub_time.search(html_content)
+        pattern_ip = re.compile(r'IP属地:(\S+)</span>')
+        ip_match = pattern_ip.search(html_content)
+        return ip_match.group(1) if ip_match else "", time_match.group(1) if time_match else ""
+
+    comment_list = Selector(text=page_content).xpath("//div[@class='l_post l_post_bright j_l_post clearfix  ']")
+    result: List[TiebaComment] = []
+    for comment_selector in comment_list:
+        comment_field_value = TieBaExtractor.extract_data_field_value(comment_selector)
+        if not comment_field_value:
+            continue
+        tieba_name = comment_selector.xpath("//a[@class='card_title_fname']/text()").get(default='').strip()
+        other_info_content = comment_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
+        ip_location, publish_time = extract_ip_and_pub_time(other_info_content)
+        result.append(TiebaComment(
+            comment_id=str(comment_field_value.get("content").get("post_id")),
+            sub_comment_count=comment_field_value.get("content").get("comment_num"),
+            content=utils.extract_text_from_html(comment_field_value.get("content").get("content")),
+            note_url=const.TIEBA_URL + f"/p/{note_id}",
+            user_link=const.TIEBA_URL + comment_selector.xpath(".//a[@class='p_author_face ']/@href").get(default='').strip(),
+            user_nickname=comment_selector.xpath(".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
+            user_avatar=comment_selector.xpath(".//a[@class='p_author_face ']/img/@src").get(default='').strip(),
+            tieba_id=str(comment_field_value.get("content").get("forum_id", "")),
+            tieba_name=tieba_name, tieba_link=f"https://tieba.baidu.com/f?kw={tieba_name}",
+            ip_location=ip_location, publish_time=publish_time, note_id=note_id,
+        ))
+    return result
+
+
+def timed(label: str, count: int, fn: Callable, page_content: str) -> List[TiebaComment]:
+    begin = time.perf_counter()
+    result = fn(page_content, "123456")
+    cost = time.perf_counter() - begin
+    print(f"[{label:<11}] {count:>6} comments  {cost:8.3f} s  {cost / count * 1000:8.3f} ms/comment")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[30, 120, 480], help="页面中的评论数")
+    parser.add_argument("--skip-legacy", action="store_true", help="不运行改造前的实现（评论多时非常慢）")
+    args = parser.parse_args()
+
+    extractor = TieBaExtractor()
+    for count in args.counts:
+        page_content = build_comment_page(count)
+        result = timed("single-pass", count, extractor.extract_tieba_note_parment_comments, page_content)
+        if not args.skip_legacy:
+            assert timed("legacy", count, legacy_parment_comments, page_content) == result
+
+
+if __name__ == '__main__':
+    main()
@@ -16,7 +16,7 @@
 # @Desc    : 抽象类
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 
 class AbstractCache(ABC):
@@ -43,6 +43,26 @@ class AbstractCache(ABC):
         """
         raise NotImplementedError
 
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取键的值，返回值与 keys 一一对应，不存在的为 None
+        子类可以覆盖为一次批量读取
+        :param keys: 键列表
+        :return:
+        """
+        return [self.get(key) for key in keys]
+
+    def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置键的值，所有键使用相同的过期时间
+        子类可以覆盖为一次批量写入
+        :param mapping: 键值对
+        :param expire_time: 过期时间
+        :return:
+        """
+        for key, value in mapping.items():
+            self.set(key, value, expire_time)
+
     @abstractmethod
     def keys(self, pattern: str) -> List[str]:
         """
@@ -51,3 +71,39 @@ class AbstractCache(ABC):
         :return:
         """
         raise NotImplementedError
+
+
+class AbstractAsyncCache(ABC):
+    """
+    异步缓存接口，方法与 AbstractCache 一一对应，供 asyncio 代码使用，避免阻塞事件循环
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        raise NotImplementedError
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        return [await self.get(key) for key in keys]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        for key, value in mapping.items():
+            await self.set(key, value, expire_time)
+
+    @abstractmethod
+    def iter_keys(self, pattern: str) -> AsyncIterator[str]:
+        """
+        增量遍历所有符合pattern的key
+        :param pattern: 匹配模式
+        :return:
+        """
+        raise NotImplementedError
+
+    async def keys(self, pattern: str) -> List[str]:
+        return [key async for key in self.iter_keys(pattern)]
+
+    async def close(self) -> None:
+        pass
@@ -31,10 +31,25 @@ class CacheFactory:
         :return:
         """
         if cache_type == 'memory':
-            from .local_cache import ExpiringLocalCache
-            return ExpiringLocalCache(*args, **kwargs)
+            from .lru_cache import LRUExpiringCache
+            return LRUExpiringCache(*args, **kwargs)
         elif cache_type == 'redis':
             from .redis_cache import RedisCache
             return RedisCache()
         else:
             raise ValueError(f'Unknown cache type: {cache_type}')
+
+    @staticmethod
+    def create_async_cache(cache_type: str, *args, **kwargs):
+        """
+        创建异步缓存对象，目前支持 redis
+        :param cache_type: 缓存类型
+        :param args: 参数
+        :param kwargs: 关键字参数
+        :return:
+        """
+        if cache_type == 'redis':
+            from .redis_cache import AsyncRedisCache
+            return AsyncRedisCache(*args, **kwargs)
+        else:
+            raise ValueError(f'Unknown async cache type: {cache_type}')
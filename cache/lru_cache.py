@@ -0,0 +1,154 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 有容量上限的本地缓存：LRU 淘汰 + 最小堆过期，keys 支持 glob 通配符并通过有序 key 列表按前缀查找
+
+import bisect
+import fnmatch
+import functools
+import heapq
+import re
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from cache.abs_cache import AbstractCache
+from config import db_config
+
+# glob 中的通配字符，第一个通配字符之前的部分作为前缀查找范围
+_GLOB_SPECIAL_CHARS = re.compile(r"[*?\[]")
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_pattern(pattern: str) -> re.Pattern:
+    return re.compile(fnmatch.translate(pattern))
+
+
+class LRUExpiringCache(AbstractCache):
+    """
+    - 超过 max_size 时淘汰最久未访问的 key，长时间运行的爬虫内存占用不会持续增长
+    - 过期时间放入最小堆，每次读写时只弹出已经到期的堆顶，不需要定时任务扫描全部 key
+    - 有序 key 列表作为前缀索引，keys("prefix_*") 只匹配前缀范围内的 key
+    """
+
+    def __init__(self, max_size: int = db_config.LOCAL_CACHE_MAX_SIZE):
+        """
+        初始化本地缓存
+        :param max_size: 最多缓存的 key 数量
+        :return:
+        """
+        self._max_size = max_size
+        self._cache_container: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._expire_heap: List[Tuple[float, str]] = []
+        self._sorted_keys: List[str] = []
+
+    def __len__(self) -> int:
+        self._clear_expired()
+        return len(self._cache_container)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值
+        :param key:
+        :return:
+        """
+        self._clear_expired()
+        item = self._cache_container.get(key)
+        if item is None:
+            return None
+        self._cache_container.move_to_end(key)
+        return item[0]
+
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取，返回值与 keys 一一对应，不存在或已过期的为 None
+        :param keys:
+        :return:
+        """
+        self._clear_expired()
+        values = []
+        for key in keys:
+            item = self._cache_container.get(key)
+            if item is None:
+                values.append(None)
+                continue
+            self._cache_container.move_to_end(key)
+            values.append(item[0])
+        return values
+
+    def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中
+        :param key:
+        :param value:
+        :param expire_time: 过期时间（秒）
+        :return:
+        """
+        self._clear_expired()
+        expire_at = time.monotonic() + expire_time
+        if key in self._cache_container:
+            self._cache_container.move_to_end(key)
+        else:
+            bisect.insort(self._sorted_keys, key)
+        self._cache_container[key] = (value, expire_at)
+        heapq.heappush(self._expire_heap, (expire_at, key))
+        while len(self._cache_container) > self._max_size:
+            evicted_key, _ = self._cache_container.popitem(last=False)
+            self._remove_sorted_key(evicted_key)
+        # 覆盖写入和 LRU 淘汰会在堆里留下失效的条目，失效条目过多时重建堆
+        if len(self._expire_heap) > 2 * len(self._cache_container) + 64:
+            self._expire_heap = [(expire, k) for k, (_, expire) in self._cache_container.items()]
+            heapq.heapify(self._expire_heap)
+
+    def delete(self, key: str) -> None:
+        """
+        删除键，堆中的过期条目在到期时跳过
+        :param key:
+        :return:
+        """
+        if self._cache_container.pop(key, None) is not None:
+            self._remove_sorted_key(key)
+
+    def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合 glob pattern 的key，支持 * ? [] 通配符
+        :param pattern: 匹配模式
+        :return:
+        """
+        self._clear_expired()
+        match = _GLOB_SPECIAL_CHARS.search(pattern)
+        if match is None:
+            return [pattern] if pattern in self._cache_container else []
+        prefix = pattern[:match.start()]
+        begin = bisect.bisect_left(self._sorted_keys, prefix)
+        end = bisect.bisect_left(self._sorted_keys, prefix + "\U0010ffff") if prefix else len(self._sorted_keys)
+        regex = _compile_pattern(pattern)
+        return [key for key in self._sorted_keys[begin:end] if regex.match(key)]
+
+    def _remove_sorted_key(self, key: str):
+        index = bisect.bisect_left(self._sorted_keys, key)
+        if index < len(self._sorted_keys) and self._sorted_keys[index] == key:
+            del self._sorted_keys[index]
+
+    def _clear_expired(self):
+        """
+        弹出堆顶所有已到期的条目，只删除过期时间与当前值一致的 key（被覆盖写入的旧条目直接丢弃）
+        :return:
+        """
+        now = time.monotonic()
+        heap = self._expire_heap
+        while heap and heap[0][0] <= now:
+            expire_at, key = heapq.heappop(heap)
+            item = self._cache_container.get(key)
+            if item is not None and item[1] == expire_at:
+                del self._cache_container[key]
+                self._remove_sorted_key(key)
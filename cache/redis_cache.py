@@ -14,21 +14,23 @@
 # @Name    : 程序员阿江-Relakkes
 # @Time    : 2024/5/29 22:57
 # @Desc    : RedisCache实现
-import pickle
 import time
-from typing import Any, List
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from redis import Redis
+from redis import asyncio as aioredis
 
-from cache.abs_cache import AbstractCache
+from cache.abs_cache import AbstractAsyncCache, AbstractCache
+from cache.serializer import CacheSerializer, get_serializer
 from config import db_config
 
 
 class RedisCache(AbstractCache):
 
-    def __init__(self) -> None:
+    def __init__(self, serializer: Optional[CacheSerializer] = None) -> None:
         # 连接redis, 返回redis客户端
         self._redis_client = self._connet_redis()
+        self._serializer = serializer or get_serializer(db_config.REDIS_CACHE_SERIALIZER)
 
     @staticmethod
     def _connet_redis() -> Redis:
@@ -41,6 +43,7 @@ class RedisCache(AbstractCache):
             port=db_config.REDIS_DB_PORT,
             db=db_config.REDIS_DB_NUM,
             password=db_config.REDIS_DB_PWD,
+            max_connections=db_config.REDIS_MAX_CONNECTIONS,
         )
 
     def get(self, key: str) -> Any:
@@ -52,7 +55,7 @@ class RedisCache(AbstractCache):
         value = self._redis_client.get(key)
         if value is None:
             return None
-        return pickle.loads(value)
+        return self._serializer.loads(value)
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
@@ -62,13 +65,89 @@ class RedisCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._redis_client.set(key, pickle.dumps(value), ex=expire_time)
+        self._redis_client.set(key, self._serializer.dumps(value), ex=expire_time)
+
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        使用 MGET 一次取回多个键的值
+        """
+        if not keys:
+            return []
+        return [None if value is None else self._serializer.loads(value) for value in self._redis_client.mget(keys)]
+
+    def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        使用 pipeline 一次往返写入多个带过期时间的键
+        """
+        pipeline = self._redis_client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipeline.set(key, self._serializer.dumps(value), ex=expire_time)
+        pipeline.execute()
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key，使用 SCAN 增量遍历，不会像 KEYS 一样阻塞 redis
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        return [key.decode() for key in self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT)]
+
+
+class AsyncRedisCache(AbstractAsyncCache):
+    """
+    基于 redis.asyncio 连接池的异步缓存，读写不会阻塞事件循环
+    """
+
+    def __init__(
+        self,
+        host: str = db_config.REDIS_DB_HOST,
+        port: int = db_config.REDIS_DB_PORT,
+        db: int = db_config.REDIS_DB_NUM,
+        password: Optional[str] = db_config.REDIS_DB_PWD,
+        max_connections: int = db_config.REDIS_MAX_CONNECTIONS,
+        serializer: Optional[CacheSerializer] = None,
+    ) -> None:
+        self._pool = aioredis.ConnectionPool(
+            host=host,
+            port=int(port),
+            db=int(db),
+            password=password,
+            max_connections=max_connections,
+        )
+        self._redis_client = aioredis.Redis(connection_pool=self._pool)
+        self._serializer = serializer or get_serializer(db_config.REDIS_CACHE_SERIALIZER)
+
+    async def get(self, key: str) -> Any:
+        value = await self._redis_client.get(key)
+        if value is None:
+            return None
+        return self._serializer.loads(value)
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        await self._redis_client.set(key, self._serializer.dumps(value), ex=expire_time)
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        if not keys:
+            return []
+        values = await self._redis_client.mget(keys)
+        return [None if value is None else self._serializer.loads(value) for value in values]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        async with self._redis_client.pipeline(transaction=False) as pipeline:
+            for key, value in mapping.items():
+                pipeline.set(key, self._serializer.dumps(value), ex=expire_time)
+            await pipeline.execute()
+
+    async def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return await self._redis_client.delete(*keys)
+
+    async def iter_keys(self, pattern: str) -> AsyncIterator[str]:
+        async for key in self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT):
+            yield key.decode()
+
+    async def close(self) -> None:
+        await self._redis_client.close()
+        await self._pool.disconnect()
 
 
 if __name__ == '__main__':
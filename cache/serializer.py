@@ -0,0 +1,98 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Redis 缓存值的序列化方式：pickle、json（安装了 orjson 时使用 orjson）、msgpack
+
+import importlib.util
+import json
+import pickle
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Type
+
+
+class CacheSerializer(ABC):
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class PickleSerializer(CacheSerializer):
+    """
+    支持任意 Python 对象，但体积较大，且不能被其他语言读取
+    """
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class JsonSerializer(CacheSerializer):
+    """
+    只支持 JSON 类型的值，安装了 orjson 时使用 orjson，否则使用标准库 json
+    """
+
+    def __init__(self):
+        if importlib.util.find_spec("orjson") is not None:
+            import orjson
+            self._dumps = orjson.dumps
+            self._loads = orjson.loads
+        else:
+            self._dumps = lambda value: json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._loads = json.loads
+
+    def dumps(self, value: Any) -> bytes:
+        return self._dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return self._loads(data)
+
+
+class MsgpackSerializer(CacheSerializer):
+    """
+    需要安装 msgpack: pip install msgpack
+    """
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def dumps(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+
+SERIALIZERS: Dict[str, Type[CacheSerializer]] = {
+    "pickle": PickleSerializer,
+    "json": JsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+
+def get_serializer(name: str) -> CacheSerializer:
+    """
+    按名称创建序列化器
+    :param name: pickle、json 或 msgpack
+    :return:
+    """
+    serializer_class = SERIALIZERS.get(name)
+    if serializer_class is None:
+        raise ValueError(f"Unknown cache serializer: {name}, optional: {list(SERIALIZERS)}")
+    return serializer_class()
@@ -186,6 +186,24 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 show_default=True,
             ),
         ] = str(config.ENABLE_GET_SUB_COMMENTS),
+        incremental: Annotated[
+            str,
+            typer.Option(
+                "--incremental",
+                help="是否增量爬取，跳过之前已爬取过的内容，支持 yes/true/t/y/1 或 no/false/f/n/0",
+                rich_help_panel="基础配置",
+                show_default=True,
+            ),
+        ] = str(config.ENABLE_INCREMENTAL_CRAWL),
+        resume: Annotated[
+            str,
+            typer.Option(
+                "--resume",
+                help="是否从上次中断的位置继续爬取，支持 yes/true/t/y/1 或 no/false/f/n/0",
+                rich_help_panel="基础配置",
+                show_default=True,
+            ),
+        ] = str(config.RESUME_CRAWL),
         save_data_option: Annotated[
             SaveDataOptionEnum,
             typer.Option(
@@ -217,6 +235,8 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
 
         enable_comment = _to_bool(get_comment)
         enable_sub_comment = _to_bool(get_sub_comment)
+        enable_incremental = _to_bool(incremental)
+        enable_resume = _to_bool(resume)
         init_db_value = init_db.value if init_db else None
 
         # override global config
@@ -227,6 +247,8 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         config.KEYWORDS = keywords
         config.ENABLE_GET_COMMENTS = enable_comment
         config.ENABLE_GET_SUB_COMMENTS = enable_sub_comment
+        config.ENABLE_INCREMENTAL_CRAWL = enable_incremental
+        config.RESUME_CRAWL = enable_resume
         config.SAVE_DATA_OPTION = save_data_option.value
         config.COOKIES = cookies
 
@@ -238,6 +260,8 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             keywords=config.KEYWORDS,
             get_comment=config.ENABLE_GET_COMMENTS,
             get_sub_comment=config.ENABLE_GET_SUB_COMMENTS,
+            incremental=config.ENABLE_INCREMENTAL_CRAWL,
+            resume=config.RESUME_CRAWL,
             save_data_option=config.SAVE_DATA_OPTION,
             init_db=init_db_value,
             cookies=config.COOKIES,
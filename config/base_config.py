@@ -64,6 +64,104 @@ AUTO_CLOSE_BROWSER = True
 # 数据保存类型选项配置,支持四种类型：csv、db、json、sqlite, 最好保存到DB，有排重的功能。
 SAVE_DATA_OPTION = "json"
 
+# json 保存方式下是否使用 JSON Lines 格式（每行一个对象，追加写入，单条写入开销不随文件变大而增加）
+# 开启后数据保存到 data/{platform}/jsonl 目录，需要旧版 JSON 数组格式时可执行:
+# python -m tools.async_file_writer data/xhs/jsonl
+ENABLE_JSONL_MODE = False
+
+# csv/json 保存方式下是否开启写入缓冲：数据先缓存在内存中，文件句柄保持打开，
+# 缓存条数达到 FILE_WRITE_BUFFER_SIZE 或距上次写入超过 FILE_WRITE_FLUSH_INTERVAL 秒时批量写入文件，爬虫结束时写入剩余数据
+# 注意：JSON 数组格式（ENABLE_JSONL_MODE = False）每次批量写入仍要读取并重写整个文件，开销随文件变大线性增长，
+# 缓冲只减少了重写次数；数据量大时请开启 ENABLE_JSONL_MODE
+ENABLE_FILE_WRITE_BUFFER = True
+
+# 单个文件缓冲的最大条数
+FILE_WRITE_BUFFER_SIZE = 100
+
+# 缓冲数据的最长停留时间（秒）
+FILE_WRITE_FLUSH_INTERVAL = 5
+
+# 各平台 API 客户端复用同一个 httpx 连接池，以下为连接池的 keep-alive 配置
+# 连接池最大连接数
+HTTP_MAX_CONNECTIONS = 20
+
+# 连接池最大空闲（keep-alive）连接数
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+
+# 空闲连接的保持时间（秒）
+HTTP_KEEPALIVE_EXPIRY = 30
+
+# 是否开启 HTTP/2，需要额外安装 h2 依赖: pip install httpx[http2]，未安装时自动回退到 HTTP/1.1
+ENABLE_HTTP2 = False
+
+# 签名 JS（抖音 a_bogus、知乎 x-zse-96）是否使用常驻的 Node.js 进程池执行，
+# 关闭或找不到 node 时回退到 execjs（每次调用启动一个新进程）
+ENABLE_JS_WORKER_POOL = True
+
+# node 可执行文件路径
+JS_WORKER_NODE_PATH = "node"
+
+# 每个签名脚本的常驻 node 进程数
+JS_WORKER_POOL_SIZE = 2
+
+# 等待签名的请求队列长度，队列满时新的签名请求会等待
+JS_WORKER_QUEUE_SIZE = 100
+
+# 单次签名调用的超时时间（秒），超时后重启对应的 node 进程
+JS_WORKER_CALL_TIMEOUT = 10
+
+# 调用方等待签名结果（包含排队时间）的最长时间（秒），超时后抛出异常，调用方回退到 execjs
+JS_WORKER_WAIT_TIMEOUT = 30
+
+# node 进程重启失败后下次重启前的最长等待时间（秒），连续失败时等待时间从 0.5 秒开始翻倍
+JS_WORKER_RESTART_MAX_BACKOFF = 10
+
+# 评论流水线：抓取到的评论页先放入有界队列，由写入协程批量存储，抓取与存储并行进行
+# 评论队列最多缓存的评论页数，队列满时抓取协程等待存储
+COMMENT_PIPELINE_QUEUE_SIZE = 100
+
+# 写入协程数量，设置为 0 时抓取协程直接调用存储（不使用流水线）
+COMMENT_PIPELINE_WRITERS = 2
+
+# 写入协程单次最多合并的评论页数
+COMMENT_PIPELINE_BATCH_SIZE = 10
+
+# 媒体文件（图片、视频）流式下载时每次读取写入的分块大小（字节）
+MEDIA_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# 是否启用内容寻址的媒体库：媒体文件按内容哈希保存一份，各笔记目录下的文件以硬链接指向它，
+# 已下载过的 URL / 文件直接跳过，中断的下载通过 HTTP Range 续传
+ENABLE_MEDIA_STORE = True
+
+# 媒体库目录，包含按哈希命名的文件、未完成的下载以及 SQLite 索引
+MEDIA_STORE_DIR = "data/.media_store"
+
+# 媒体下载调度器：爬虫把图片、视频下载任务放入后台队列后继续抓取，由下载协程并发下载，爬虫结束前等待全部完成
+# 下载协程数量，设置为 0 时在爬虫协程中直接下载（与原来的行为一致）
+MEDIA_DOWNLOAD_WORKERS = 4
+
+# 同一个域名同时进行的下载数
+MEDIA_DOWNLOAD_PER_HOST = 2
+
+# 等待下载的任务队列长度，队列满时爬虫协程等待
+MEDIA_DOWNLOAD_QUEUE_SIZE = 200
+
+# 下载失败（网络错误、5xx、429）后的最大重试次数，重试间隔按 2 的指数增长
+MEDIA_DOWNLOAD_MAX_RETRIES = 3
+
+# 第一次重试前等待的秒数
+MEDIA_DOWNLOAD_RETRY_BACKOFF_SEC = 1
+
+# 同一个域名两次下载之间最多随机等待的秒数
+MEDIA_DOWNLOAD_MAX_SLEEP_SEC = 1
+
+# 页面解析进程池：贴吧、知乎、小红书等 HTML 页面的解析（lxml/parsel、正则、大段 JSON 的解析和转换）
+# 在子进程中执行，不阻塞事件循环。进程数，设置为 0 时在事件循环中直接解析（与原来的行为一致）
+EXTRACTION_WORKERS = 2
+
+# 页面内容小于该字符数时直接在事件循环中解析，进程间传输的开销大于解析本身
+EXTRACTION_MIN_PAGE_SIZE = 32 * 1024
+
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"
 
@@ -89,6 +187,22 @@ CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = 10
 # 老版本项目使用了 db, 则需参考 schema/tables.sql line 287 增加表字段
 ENABLE_GET_SUB_COMMENTS = True
 
+# 是否开启增量爬取：已在之前的运行中爬取过的内容不再获取详情，评论从上次抓取到的位置继续，
+# 已全部抓取完评论的内容不再抓取评论
+ENABLE_INCREMENTAL_CRAWL = False
+
+# 增量爬取索引文件路径
+CRAWL_INDEX_PATH = "data/.crawl_index.db"
+
+# 是否从上次中断的位置继续爬取（关键词、页码、待抓取评论的内容及评论游标），命令行 --resume 开启
+RESUME_CRAWL = False
+
+# 断点文件目录，每个平台和爬取类型一个文件，爬取正常结束后删除
+CRAWL_CHECKPOINT_DIR = "data/.checkpoints"
+
+# 评论游标变化时断点文件的最短写入间隔（秒），翻页时总是立即写入
+CRAWL_CHECKPOINT_INTERVAL_SEC = 5
+
 # 词云相关
 # 是否开启生成评论词云图
 ENABLE_GET_WORDCLOUD = True
@@ -105,9 +219,24 @@ STOP_WORDS_FILE = "./docs/hit_stopwords.txt"
 # 中文字体文件路径
 FONT_PATH = "./docs/STZHONGS.TTF"
 
+# 评论分词使用的进程数，0 表示使用 CPU 核数
+WORD_FREQ_WORKERS = 0
+
+# 待分词的评论不少于该数量时才使用进程池，评论少时在当前进程分词，避免进程启动和加载词典的开销
+WORD_FREQ_PARALLEL_MIN_COMMENTS = 2000
+
+# 按评论 ID 缓存分词结果的最大评论数，超出时丢弃最早缓存的评论
+WORD_FREQ_CACHE_SIZE = 200000
+
 # 爬取间隔时间
 CRAWLER_MAX_SLEEP_SEC = 2
 
+# 内容预览窗口
+# 后台加载数据文件时每批读取的行数
+PREVIEW_CHUNK_ROWS = 20000
+# 是否在数据文件旁缓存解析后的快照（安装了 pyarrow 时为 Parquet，否则为 pickle），源文件修改后自动失效
+PREVIEW_SNAPSHOT_ENABLED = True
+
 from .bilibili_config import *
 from .xhs_config import *
 from .dy_config import *
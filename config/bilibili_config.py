@@ -39,6 +39,10 @@ BILI_SEARCH_MODE = "normal"
 # 注意：更高清晰度需要账号/视频本身支持
 BILI_QN = 80
 
+# WBI 签名密钥（img_key、sub_key）的缓存时间（秒），密钥每天轮换一次，
+# 缓存期内签名不再通过 Playwright 读取 localStorage
+BILI_WBI_KEY_CACHE_TTL = 3600
+
 # 是否爬取用户信息
 CREATOR_MODE = True
 
@@ -33,13 +33,51 @@ REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
 REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
 REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
 
+# redis 缓存值的序列化方式，可选 json（安装 orjson 后更快）、msgpack（需要安装 msgpack）、pickle
+REDIS_CACHE_SERIALIZER = "json"
+
+# redis 连接池最大连接数
+REDIS_MAX_CONNECTIONS = 20
+
+# SCAN 遍历 key 时每次返回的数量提示
+REDIS_SCAN_COUNT = 500
+
 # cache type
 CACHE_TYPE_REDIS = "redis"
 CACHE_TYPE_MEMORY = "memory"
 
+# 本地缓存（memory）最多保存的 key 数量，超出后淘汰最久未访问的 key
+LOCAL_CACHE_MAX_SIZE = 10000
+
 # sqlite config
 SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "sqlite_tables.db")
 
 sqlite_db_config = {
     "db_path": SQLITE_DB_PATH
-}
\ No newline at end of file
+}
+
+# 数据库连接池配置（MySQL）
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))  # 连接池常驻连接数
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))  # 连接池满时允许额外创建的连接数
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 3600))  # 连接最大存活时间（秒），避免被 MySQL wait_timeout 断开
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))  # 获取连接的最长等待时间（秒）
+
+db_pool_config = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_timeout": DB_POOL_TIMEOUT,
+}
+
+# SQLite 连接参数，每个连接建立时执行对应的 PRAGMA
+# WAL 模式下读写互不阻塞，synchronous=NORMAL 在 WAL 模式下仍然安全且写入更快，cache_size 为负数时单位为 KiB
+sqlite_pragma_config = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,
+    "busy_timeout": 5000,
+}
+
+# 是否使用单个长连接会话批量写入数据库（db、sqlite 保存方式生效）
+# 开启后所有写入复用同一个会话和连接，适合大批量评论入库，写入会被串行化
+ENABLE_DB_WRITER_SESSION = False
\ No newline at end of file
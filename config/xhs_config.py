@@ -58,3 +58,11 @@ VIDEO_COVER_RETRY_COUNT = 3
 
 # 是否在数据中包含封面图URL
 INCLUDE_COVER_URL_IN_DATA = True
+
+# ==================== 请求签名配置 ====================
+
+# 签名请求的合并窗口（毫秒），窗口内的并发签名请求合并成一次浏览器 evaluate 调用
+XHS_SIGN_BATCH_WINDOW_MS = 2
+
+# 单次 evaluate 最多签名的请求数
+XHS_SIGN_MAX_BATCH_SIZE = 16
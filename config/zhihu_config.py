@@ -23,3 +23,9 @@ ZHIHU_SPECIFIED_ID_LIST = [
     "https://zhuanlan.zhihu.com/p/673461588",  # 文章
     "https://www.zhihu.com/zvideo/1539542068422144000",  # 视频
 ]
+
+# 相同 (url, d_c0) 的 x-zse-96 签名结果缓存时间（秒），翻页重试等重复请求直接复用签名，设置为 0 关闭缓存
+ZHIHU_SIGN_CACHE_TTL = 60
+
+# 签名缓存最大条数
+ZHIHU_SIGN_CACHE_MAX_SIZE = 1000
@@ -12,7 +12,8 @@ if str(project_root) not in sys.path:
     sys.path.append(str(project_root))
 
 from tools import utils
-from database.db_session import create_tables
+import config
+from database.db_session import create_tables, dispose_engines, get_pool_metrics, start_writer_session
 
 async def init_table_schema(db_type: str):
     """
@@ -28,8 +29,19 @@ async def init_table_schema(db_type: str):
 async def init_db(db_type: str = None):
     await init_table_schema(db_type)
 
+async def open_writer_session():
+    """
+    Enable the long-lived writer session when ENABLE_DB_WRITER_SESSION is set.
+    """
+    if config.ENABLE_DB_WRITER_SESSION and config.SAVE_DATA_OPTION in ["db", "sqlite"]:
+        utils.logger.info("[open_writer_session] db writer session enabled")
+        await start_writer_session()
+
 async def close():
     """
-    Placeholder for closing database connections if needed in the future.
+    Commit the writer session (if any) and dispose all database engines.
     """
-    pass
+    metrics = get_pool_metrics()
+    if metrics:
+        utils.logger.info(f"[db.close] db pool metrics: {metrics}")
+    await dispose_engines()
@@ -1,13 +1,33 @@
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, insert, inspect as sqlalchemy_inspect, select, text, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession
 from contextlib import asynccontextmanager
 from .models import Base
 import config
-from config.db_config import mysql_db_config, sqlite_db_config
+from config.db_config import db_pool_config, mysql_db_config, sqlite_db_config, sqlite_pragma_config
+from tools.time_util import get_current_timestamp
 
 # Keep a cache of engines
 _engines = {}
+# 每种数据库的会话工厂只创建一次
+_session_factories: Dict[str, async_sessionmaker] = {}
+# 连接获取次数与等待时间统计
+_pool_metrics: Dict[str, Dict] = {}
+
+# 长连接写入模式下共享的会话，AsyncSession 不支持并发使用，通过锁串行化
+_writer_session: Optional[AsyncSession] = None
+_writer_lock = asyncio.Lock()
+
+# 单条 INSERT 语句包含的最大行数，避免超出 SQLite 的变量个数上限 / MySQL 的 max_allowed_packet
+BULK_UPSERT_BATCH_SIZE = 500
+
+# (数据库url, 表名, 列名) -> 该列上是否存在唯一索引
+_unique_key_cache: Dict[Tuple[str, str, str], bool] = {}
 
 
 async def create_database_if_not_exists(db_type: str):
@@ -20,6 +40,14 @@ async def create_database_if_not_exists(db_type: str):
         await engine.dispose()
 
 
+def _on_sqlite_connect(dbapi_connection, connection_record):
+    """每个 SQLite 连接建立时设置 PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in sqlite_pragma_config.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
 def get_async_engine(db_type: str = None):
     if db_type is None:
         db_type = config.SAVE_DATA_OPTION
@@ -32,16 +60,71 @@ def get_async_engine(db_type: str = None):
 
     if db_type == "sqlite":
         db_url = f"sqlite+aiosqlite:///{sqlite_db_config['db_path']}"
+        engine = create_async_engine(db_url, echo=False)
+        event.listen(engine.sync_engine, "connect", _on_sqlite_connect)
     elif db_type == "mysql" or db_type == "db":
         db_url = f"mysql+asyncmy://{mysql_db_config['user']}:{mysql_db_config['password']}@{mysql_db_config['host']}:{mysql_db_config['port']}/{mysql_db_config['db_name']}"
+        engine = create_async_engine(db_url, echo=False, pool_pre_ping=True, **db_pool_config)
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
 
-    engine = create_async_engine(db_url, echo=False)
     _engines[db_type] = engine
+    _pool_metrics[db_type] = {"checkouts": 0, "wait_total": 0.0, "wait_max": 0.0}
     return engine
 
 
+def get_session_factory(db_type: str = None) -> Optional[async_sessionmaker]:
+    """
+    获取缓存的会话工厂，每种数据库只创建一次
+    """
+    if db_type is None:
+        db_type = config.SAVE_DATA_OPTION
+    if db_type not in _session_factories:
+        engine = get_async_engine(db_type)
+        if not engine:
+            return None
+        _session_factories[db_type] = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return _session_factories[db_type]
+
+
+def _record_wait(db_type: str, wait_seconds: float):
+    metrics = _pool_metrics.get(db_type)
+    if metrics is None:
+        return
+    metrics["checkouts"] += 1
+    metrics["wait_total"] += wait_seconds
+    metrics["wait_max"] = max(metrics["wait_max"], wait_seconds)
+
+
+def get_pool_metrics(db_type: str = None) -> Dict:
+    """
+    连接池监控数据，用于调整连接池参数
+    Returns:
+        checked_out: 当前被占用的连接数
+        pool_size: 连接池当前持有的连接数
+        overflow: 当前超出 pool_size 的连接数
+        checkouts: 累计获取连接（会话）的次数
+        avg_wait_ms / max_wait_ms: 获取连接的平均/最长等待时间（毫秒）
+    """
+    if db_type is None:
+        db_type = config.SAVE_DATA_OPTION
+    engine = _engines.get(db_type)
+    metrics = _pool_metrics.get(db_type)
+    if engine is None or metrics is None:
+        return {}
+    pool = engine.sync_engine.pool
+    checkouts = metrics["checkouts"]
+    return {
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "pool_size": pool.size() if hasattr(pool, "size") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        "checkouts": checkouts,
+        "avg_wait_ms": round(metrics["wait_total"] / checkouts * 1000, 3) if checkouts else 0.0,
+        "max_wait_ms": round(metrics["wait_max"] * 1000, 3),
+        "writer_session": _writer_session is not None,
+    }
+
+
 async def create_tables(db_type: str = None):
     if db_type is None:
         db_type = config.SAVE_DATA_OPTION
@@ -54,17 +137,209 @@ async def create_tables(db_type: str = None):
 
 @asynccontextmanager
 async def get_session() -> AsyncSession:
-    engine = get_async_engine(config.SAVE_DATA_OPTION)
-    if not engine:
+    db_type = config.SAVE_DATA_OPTION
+    if _writer_session is not None:
+        # 长连接写入模式：所有调用方串行复用同一个会话，每个代码块结束时提交一次
+        begin = time.perf_counter()
+        async with _writer_lock:
+            _record_wait(db_type, time.perf_counter() - begin)
+            try:
+                yield _writer_session
+                await _writer_session.commit()
+            except Exception as e:
+                await _writer_session.rollback()
+                raise e
+        return
+
+    session_factory = get_session_factory(db_type)
+    if not session_factory:
         yield None
         return
-    AsyncSessionFactory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    session = AsyncSessionFactory()
+    session = session_factory()
     try:
+        begin = time.perf_counter()
+        await session.connection()
+        _record_wait(db_type, time.perf_counter() - begin)
         yield session
         await session.commit()
     except Exception as e:
         await session.rollback()
         raise e
     finally:
-        await session.close()
\ No newline at end of file
+        await session.close()
+
+
+async def start_writer_session():
+    """
+    开启长连接写入模式，之后 get_session() 都复用同一个会话和数据库连接，
+    省去每次写入从连接池获取连接、创建会话的开销
+    """
+    global _writer_session
+    if _writer_session is not None:
+        return
+    session_factory = get_session_factory(config.SAVE_DATA_OPTION)
+    if session_factory:
+        _writer_session = session_factory()
+
+
+async def close_writer_session():
+    """提交并关闭长连接写入会话"""
+    global _writer_session
+    if _writer_session is None:
+        return
+    session, _writer_session = _writer_session, None
+    async with _writer_lock:
+        try:
+            await session.commit()
+        finally:
+            await session.close()
+
+
+@asynccontextmanager
+async def writer_session():
+    """
+    在代码块内使用长连接写入模式:
+        async with writer_session():
+            await store.store_comments(...)
+    """
+    await start_writer_session()
+    try:
+        yield
+    finally:
+        await close_writer_session()
+
+
+async def dispose_engines():
+    """关闭写入会话并释放所有数据库连接"""
+    await close_writer_session()
+    for engine in list(_engines.values()):
+        await engine.dispose()
+    _engines.clear()
+    _session_factories.clear()
+
+
+async def _has_unique_key(session: AsyncSession, table_name: str, key: str) -> bool:
+    """
+    检查数据库中的表在 key 列上是否有唯一索引，旧版本建的表可能只有普通索引，
+    这种情况下 ON CONFLICT / ON DUPLICATE KEY 无法生效
+    """
+    cache_key = (str(session.bind.url), table_name, key)
+    if cache_key not in _unique_key_cache:
+        def _inspect(sync_conn) -> bool:
+            inspector = sqlalchemy_inspect(sync_conn)
+            for index in inspector.get_indexes(table_name):
+                if index.get("unique") and list(index.get("column_names") or []) == [key]:
+                    return True
+            for constraint in inspector.get_unique_constraints(table_name):
+                if list(constraint.get("column_names") or []) == [key]:
+                    return True
+            return False
+
+        conn = await session.connection()
+        _unique_key_cache[cache_key] = await conn.run_sync(_inspect)
+    return _unique_key_cache[cache_key]
+
+
+def _normalize_rows(table, rows: List[Dict], conflict_key: str) -> List[List[Dict]]:
+    """
+    过滤掉表中不存在的字段、按 conflict_key 去重（保留最后一条），并按字段集合分组，
+    每组内各行字段一致，缺失的字段不补 None，避免更新时把已有的值覆盖成 NULL
+    """
+    column_names = set(table.columns.keys())
+    unique_rows: Dict[str, Dict] = {}
+    for row in rows:
+        if row.get(conflict_key) is None:
+            continue
+        unique_rows[str(row[conflict_key])] = {k: v for k, v in row.items() if k in column_names}
+
+    add_ts = get_current_timestamp()
+    groups: Dict[frozenset, List[Dict]] = {}
+    for row in unique_rows.values():
+        if "add_ts" in column_names and row.get("add_ts") is None:
+            row["add_ts"] = add_ts
+        groups.setdefault(frozenset(row.keys()), []).append(row)
+    return list(groups.values())
+
+
+async def bulk_upsert(session: AsyncSession, model, rows: List[Dict], conflict_key: str,
+                      update_columns: Optional[List[str]] = None) -> int:
+    """
+    批量插入或更新数据，每批数据只需要一次数据库往返:
+    MySQL 使用 INSERT ... ON DUPLICATE KEY UPDATE，SQLite 使用 INSERT ... ON CONFLICT DO UPDATE。
+    如果表在 conflict_key 上没有唯一索引（旧版本建的表），回退为 一次 SELECT + 批量 INSERT + 批量 UPDATE
+    Args:
+        session: 数据库会话
+        model: ORM 模型类
+        rows: 数据列表，字段名与模型的列名一致
+        conflict_key: 用于判断数据是否已存在的列，如 comment_id
+        update_columns: 数据已存在时需要更新的列，默认为除 conflict_key 和 add_ts 之外的所有列
+
+    Returns:
+        处理的数据条数
+    """
+    table = model.__table__
+    groups = _normalize_rows(table, rows, conflict_key)
+    if not groups:
+        return 0
+
+    dialect_name = session.bind.dialect.name
+    use_native_upsert = dialect_name in ("mysql", "sqlite") and await _has_unique_key(session, table.name, conflict_key)
+    total = 0
+    for group in groups:
+        # 每组只更新该组数据中带有的字段
+        if update_columns is None:
+            group_update_columns = [k for k in group[0].keys() if k not in (conflict_key, "add_ts", "id")]
+        else:
+            group_update_columns = [k for k in update_columns if k in group[0]]
+        for i in range(0, len(group), BULK_UPSERT_BATCH_SIZE):
+            batch = group[i:i + BULK_UPSERT_BATCH_SIZE]
+            if use_native_upsert:
+                await _native_upsert(session, table, batch, conflict_key, group_update_columns, dialect_name)
+            else:
+                await _fallback_upsert(session, table, batch, conflict_key, group_update_columns)
+        total += len(group)
+    return total
+
+
+async def _native_upsert(session: AsyncSession, table, rows: List[Dict], conflict_key: str,
+                         update_columns: List[str], dialect_name: str):
+    if dialect_name == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        if update_columns:
+            stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+        else:
+            stmt = stmt.prefix_with("IGNORE")
+    else:
+        stmt = sqlite_insert(table).values(rows)
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[conflict_key],
+                set_={c: stmt.excluded[c] for c in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[conflict_key])
+    await session.execute(stmt)
+
+
+async def _fallback_upsert(session: AsyncSession, table, rows: List[Dict], conflict_key: str,
+                           update_columns: List[str]):
+    key_column = table.c[conflict_key]
+    result = await session.execute(select(key_column).where(key_column.in_([row[conflict_key] for row in rows])))
+    existing_keys = {str(key) for key in result.scalars().all()}
+
+    new_rows = [row for row in rows if str(row[conflict_key]) not in existing_keys]
+    if new_rows:
+        await session.execute(insert(table), new_rows)
+
+    exist_rows = [row for row in rows if str(row[conflict_key]) in existing_keys]
+    if exist_rows and update_columns:
+        # bindparam 的名字不能与 SET 的列名相同，统一加前缀
+        stmt = update(table).where(key_column == bindparam("_b_key")).values(
+            {c: bindparam(f"_b_{c}") for c in update_columns}
+        )
+        params = []
+        for row in exist_rows:
+            param = {f"_b_{c}": row.get(c) for c in update_columns}
+            param["_b_key"] = row[conflict_key]
+            params.append(param)
+        await session.execute(stmt, params)
@@ -11,6 +11,7 @@ import re
 import subprocess
 import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
 from typing import Dict, List, Optional
@@ -31,13 +32,14 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import seaborn as sns
 from collections import Counter
-import jieba
 from wordcloud import WordCloud
 import numpy as np
 
 import config
 from cmd_arg.arg import PlatformEnum, LoginTypeEnum, CrawlerTypeEnum, SaveDataOptionEnum
 from config_editor_gui import ConfigEditor
+from tools.preview_dataset import PreviewDataset, PreviewLoader
+from tools.words import close_word_frequency_service, get_word_frequency_service
 
 
 
@@ -2449,10 +2451,14 @@ class ContentPreviewWindow:
         self.center_window()
         
         # 数据存储
-        self.content_data = []
-        self.comment_data = []
+        self.dataset = PreviewDataset()
+        self.loader = None
         self.current_content = None
         
+        # 词云在后台线程中生成
+        self.wordcloud_executor = ThreadPoolExecutor(max_workers=1)
+        self.wordcloud_future = None
+        
         # 创建界面变量
         self.title_var = tk.StringVar()
         self.author_var = tk.StringVar()
@@ -2467,6 +2473,8 @@ class ContentPreviewWindow:
         # 创建界面
         self.create_interface()
         
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # 界面创建完成后，自动调整窗口大小
         self.window.after(100, self.auto_resize_window)
     
@@ -2538,6 +2546,17 @@ class ContentPreviewWindow:
         
     def create_interface(self):
         """创建界面"""
+        # 底部加载状态栏
+        status_frame = ttk.Frame(self.window)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 5))
+        
+        self.load_status_var = tk.StringVar(value="")
+        self.load_progress = ttk.Progressbar(status_frame, mode='determinate', length=200)
+        self.load_progress.pack(side=tk.LEFT)
+        ttk.Label(status_frame, textvariable=self.load_status_var).pack(side=tk.LEFT, padx=10)
+        self.cancel_load_button = ttk.Button(status_frame, text="取消加载", command=self.cancel_load, state=tk.DISABLED)
+        self.cancel_load_button.pack(side=tk.RIGHT)
+        
         # 主框架
         main_frame = ttk.Frame(self.window)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -2715,189 +2734,118 @@ class ContentPreviewWindow:
         self.chart_frame.pack(fill=tk.BOTH, expand=True)
         
     def load_data(self):
-        """加载数据"""
-        try:
-            # 使用绝对路径
-            current_dir = Path(__file__).parent
-            data_dir = current_dir / "data"
+        """在后台线程加载数据，分批显示到界面"""
+        # 使用绝对路径
+        current_dir = Path(__file__).parent
+        data_dir = current_dir / "data"
+        
+        print(f"数据目录: {data_dir}")
+        
+        if not data_dir.exists():
+            messagebox.showwarning("警告", f"数据目录不存在: {data_dir}")
+            return
             
-            print(f"当前目录: {current_dir}")
-            print(f"数据目录: {data_dir}")
-            print(f"数据目录是否存在: {data_dir.exists()}")
+        # 取消正在进行的加载并清空现有数据
+        self.cancel_load()
+        self.dataset.clear()
+        self.current_content = None
+        for item in self.content_tree.get_children():
+            self.content_tree.delete(item)
             
-            if not data_dir.exists():
-                messagebox.showwarning("警告", f"数据目录不存在: {data_dir}")
-                return
-                
-            # 清空现有数据
-            self.content_data.clear()
-            self.comment_data.clear()
-            
-            # 加载内容数据
-            loaded_files = 0
-            platform_dirs = list(data_dir.iterdir())
-            print(f"找到的平台目录: {[d.name for d in platform_dirs if d.is_dir()]}")
-            
-            for platform_dir in platform_dirs:
-                if platform_dir.is_dir():
-                    print(f"正在处理平台目录: {platform_dir}")
-                    files_count = self.load_platform_data(platform_dir)
-                    loaded_files += files_count
-                    print(f"从 {platform_dir.name} 加载了 {files_count} 个文件")
-                    
-            print(f"总共加载了 {loaded_files} 个数据文件")
-            print(f"内容数据数量: {len(self.content_data)}")
-            print(f"评论数据数量: {len(self.comment_data)}")
-                    
-            if loaded_files == 0:
-                messagebox.showinfo("提示", "未找到任何数据文件")
-            else:
-                messagebox.showinfo("成功", f"成功加载 {loaded_files} 个数据文件")
-                    
-            self.update_content_list()
+        self.loader = PreviewLoader(data_dir)
+        self.loader.start()
+        self.load_status_var.set("正在扫描数据文件...")
+        self.load_progress.configure(value=0, maximum=1)
+        self.cancel_load_button.configure(state=tk.NORMAL)
+        self.window.after(100, self.poll_loader, self.loader)
+        
+    def cancel_load(self):
+        """取消后台加载"""
+        if self.loader is not None:
+            self.loader.cancel()
+            self.load_status_var.set("正在取消加载...")
+            
+    def on_close(self):
+        """关闭窗口时停止后台加载"""
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+        self.wordcloud_future = None
+        self.wordcloud_executor.shutdown(wait=False, cancel_futures=True)
+        # 等正在生成的词云结束后关闭分词进程池并释放评论分词缓存，不阻塞窗口关闭
+        threading.Thread(target=self.release_word_frequency, daemon=True).start()
+        self.window.destroy()
+        
+    def release_word_frequency(self):
+        """等待词云线程退出后关闭词频服务（后台线程）"""
+        self.wordcloud_executor.shutdown(wait=True)
+        close_word_frequency_service()
+        
+    def poll_loader(self, loader):
+        """在主线程中取出后台加载的数据，合并后追加到内容列表"""
+        if loader is not self.loader or not self.window.winfo_exists():
+            return
             
-        except Exception as e:
-            print(f"加载数据异常: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            messagebox.showerror("错误", f"加载数据失败: {str(e)}")
-            
-    def load_platform_data(self, platform_dir):
-        """加载平台数据"""
-        platform_name = platform_dir.name
-        loaded_files = 0
-        
-        print(f"开始加载平台 {platform_name} 的数据")
-        
-        # 递归查找所有内容和评论文件
-        content_csv_files = list(platform_dir.rglob("*contents*.csv"))
-        content_json_files = list(platform_dir.rglob("*contents*.json"))
-        comment_csv_files = list(platform_dir.rglob("*comments*.csv"))
-        comment_json_files = list(platform_dir.rglob("*comments*.json"))
-        
-        print(f"找到的CSV内容文件: {[f.name for f in content_csv_files]}")
-        print(f"找到的JSON内容文件: {[f.name for f in content_json_files]}")
-        print(f"找到的CSV评论文件: {[f.name for f in comment_csv_files]}")
-        print(f"找到的JSON评论文件: {[f.name for f in comment_json_files]}")
-        
-        # 加载内容文件 (CSV)
-        for file_path in content_csv_files:
-            try:
-                df = pd.read_csv(file_path, encoding='utf-8')
-                print(f"CSV文件 {file_path.name} 包含 {len(df)} 行数据")
-                for _, row in df.iterrows():
-                    content_item = {
-                        'platform': platform_name,
-                        'id': row.get('note_id', row.get('aweme_id', '')),
-                        'title': row.get('title', row.get('desc', ''))[:50] if row.get('title', row.get('desc', '')) else '',
-                        'desc': row.get('desc', ''),
-                        'author': row.get('nickname', ''),
-                        'create_time': row.get('create_time', ''),
-                        'ip_location': row.get('ip_location', ''),
-                        'file_path': str(file_path)
-                    }
-                    self.content_data.append(content_item)
-                loaded_files += 1
-                print(f"成功加载内容文件: {file_path}")
-            except Exception as e:
-                print(f"加载内容文件失败 {file_path}: {e}")
-                
-        # 加载内容文件 (JSON)
-        for file_path in content_json_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        print(f"JSON文件 {file_path.name} 包含 {len(data)} 条数据")
-                        for item in data:
-                            content_item = {
-                                'platform': platform_name,
-                                'id': item.get('note_id', item.get('aweme_id', '')),
-                                'title': item.get('title', item.get('desc', ''))[:50] if item.get('title', item.get('desc', '')) else '',
-                                'desc': item.get('desc', ''),
-                                'author': item.get('nickname', ''),
-                                'create_time': item.get('create_time', ''),
-                                'ip_location': item.get('ip_location', ''),
-                                'file_path': str(file_path)
-                            }
-                            self.content_data.append(content_item)
-                loaded_files += 1
-                print(f"成功加载内容文件: {file_path}")
-            except Exception as e:
-                print(f"加载内容文件失败 {file_path}: {e}")
-                
-        # 加载评论文件 (CSV)
-        for file_path in comment_csv_files:
-            try:
-                df = pd.read_csv(file_path, encoding='utf-8')
-                print(f"CSV评论文件 {file_path.name} 包含 {len(df)} 行数据")
-                for _, row in df.iterrows():
-                    # 处理IP位置字段：抖音使用ip_label，其他平台使用ip_location
-                    ip_location = row.get('ip_location', '')
-                    if not ip_location and platform_name == 'douyin':
-                        ip_location = row.get('ip_label', '')
-                    
-                    comment_item = {
-                        'platform': platform_name,
-                        'content_id': row.get('note_id', row.get('aweme_id', '')),
-                        'comment_id': row.get('comment_id', ''),
-                        'content': row.get('content', ''),
-                        'nickname': row.get('nickname', ''),
-                        'create_time': row.get('create_time', ''),
-                        'ip_location': ip_location,
-                        'like_count': row.get('like_count', 0),
-                        'file_path': str(file_path)
-                    }
-                    self.comment_data.append(comment_item)
-                loaded_files += 1
-                print(f"成功加载评论文件: {file_path}")
-            except Exception as e:
-                print(f"加载评论文件失败 {file_path}: {e}")
-                
-        # 加载评论文件 (JSON)
-        for file_path in comment_json_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        print(f"JSON评论文件 {file_path.name} 包含 {len(data)} 条数据")
-                        for item in data:
-                            # 处理IP位置字段：抖音使用ip_label，其他平台使用ip_location
-                            ip_location = item.get('ip_location', '')
-                            if not ip_location and platform_name == 'douyin':
-                                ip_location = item.get('ip_label', '')
-                            
-                            comment_item = {
-                                'platform': platform_name,
-                                'content_id': item.get('note_id', item.get('aweme_id', '')),
-                                'comment_id': item.get('comment_id', ''),
-                                'content': item.get('content', ''),
-                                'nickname': item.get('nickname', ''),
-                                'create_time': item.get('create_time', ''),
-                                'ip_location': ip_location,
-                                'like_count': item.get('like_count', 0),
-                                'file_path': str(file_path)
-                            }
-                            self.comment_data.append(comment_item)
-                loaded_files += 1
-                print(f"成功加载评论文件: {file_path}")
-            except Exception as e:
-                print(f"加载评论文件失败 {file_path}: {e}")
-                
-        print(f"平台 {platform_name} 总共加载了 {loaded_files} 个文件")
-        return loaded_files
+        done = None
+        comment_rows = len(self.dataset.comments)
+        for message in loader.drain():
+            kind = message[0]
+            if kind == 'contents':
+                self.dataset.add_contents(message[1])
+            elif kind == 'comments':
+                self.dataset.add_comments(message[1])
+            elif kind == 'files':
+                self.load_progress.configure(maximum=max(message[1], 1))
+            elif kind == 'progress':
+                _, done_files, total_files, file_path = message
+                self.load_progress.configure(value=done_files)
+                if not loader.cancelled:
+                    self.load_status_var.set(f"正在加载 {done_files}/{total_files}: {Path(file_path).name}")
+            elif kind == 'done':
+                done = message
                 
+        content_rows = len(self.dataset.contents)
+        self.dataset.build(partial=done is None)
+        self.append_content_rows(content_rows)
+        
+        # 当前选中内容的评论可能有新增
+        if self.current_content and len(self.dataset.comments) != comment_rows:
+            self.update_comment_analysis()
+            self.update_ip_analysis()
+            
+        if done is None:
+            self.window.after(100, self.poll_loader, loader)
+            return
+            
+        self.loader = None
+        self.cancel_load_button.configure(state=tk.DISABLED)
+        _, loaded_files, cancelled = done
+        summary = f"{loaded_files} 个文件, {len(self.dataset.contents)} 条内容, {len(self.dataset.comments)} 条评论"
+        print(f"加载完成: {summary}")
+        if cancelled:
+            self.load_status_var.set(f"已取消加载，已加载 {summary}")
+        elif loaded_files == 0:
+            self.load_status_var.set("未找到任何数据文件")
+            messagebox.showinfo("提示", "未找到任何数据文件")
+        else:
+            self.load_status_var.set(f"已加载 {summary}")
+            
     def update_content_list(self):
         """更新内容列表"""
         for item in self.content_tree.get_children():
             self.content_tree.delete(item)
             
-        for i, content in enumerate(self.content_data):
+        self.append_content_rows(0)
+        
+    def append_content_rows(self, start):
+        """把第 start 条之后的内容追加到内容列表"""
+        for i, content in enumerate(self.dataset.iter_contents(start), start):
             # 处理create_time字段，确保它是字符串类型
             create_time = str(content.get('create_time', ''))
             create_time_display = create_time[:10] if create_time else ''
             
-            self.content_tree.insert('', 'end', 
+            # 行号作为节点ID，选中时直接按行号取内容
+            self.content_tree.insert('', 'end', iid=str(i),
                                    text=str(content.get('id', ''))[:10],
                                    values=(content.get('platform', ''), 
                                           content.get('title', ''), 
@@ -2909,15 +2857,7 @@ class ContentPreviewWindow:
         if not selection:
             return
             
-        item = self.content_tree.item(selection[0])
-        content_id = item['text']
-        
-        # 查找对应的内容
-        self.current_content = None
-        for content in self.content_data:
-            if content['id'].startswith(content_id):
-                self.current_content = content
-                break
+        self.current_content = self.dataset.content_at(int(selection[0]))
                 
         if self.current_content:
             self.update_content_details()
@@ -2946,18 +2886,13 @@ class ContentPreviewWindow:
             self.avg_length_var.set("平均长度: 0")
             return
             
-        # 获取当前内容的评论
-        content_comments = [c for c in self.comment_data 
-                          if c['content_id'] == self.current_content['id']]
+        # 计算统计信息
+        comment_count, avg_length = self.dataset.comment_summary(self.current_content['id'])
         
-        if not content_comments:
+        if not comment_count:
             self.comment_count_var.set("评论数量: 0")
             self.avg_length_var.set("平均长度: 0")
             return
-            
-        # 计算统计信息
-        comment_count = len(content_comments)
-        avg_length = sum(len(c['content']) for c in content_comments) / comment_count
         
         self.comment_count_var.set(f"评论数量: {comment_count}")
         self.avg_length_var.set(f"平均长度: {avg_length:.1f}")
@@ -2967,7 +2902,8 @@ class ContentPreviewWindow:
             for item in self.comment_tree.get_children():
                 self.comment_tree.delete(item)
                 
-            for comment in content_comments[:50]:  # 只显示前50条评论
+            # 只显示前50条评论
+            for comment in self.dataset.comments_of(self.current_content['id'], limit=50).to_dict('records'):
                 self.comment_tree.insert('', 'end', values=(
                     comment['nickname'],
                     comment['content'][:100] + '...' if len(comment['content']) > 100 else comment['content'],
@@ -2980,16 +2916,8 @@ class ContentPreviewWindow:
         if not self.current_content:
             return
             
-        # 获取当前内容的评论
-        content_comments = [c for c in self.comment_data 
-                          if c['content_id'] == self.current_content['id']]
-        
         # 统计IP分布
-        ip_counter = Counter()
-        for comment in content_comments:
-            ip_location = comment.get('ip_location', '未知')
-            if ip_location:
-                ip_counter[ip_location] += 1
+        ip_counter = self.dataset.ip_counter(self.current_content['id'])
                 
         unique_ips = len(ip_counter)
         top_region = ip_counter.most_common(1)[0][0] if ip_counter else "未知"
@@ -3001,7 +2929,7 @@ class ContentPreviewWindow:
         for item in self.ip_tree.get_children():
             self.ip_tree.delete(item)
             
-        total_comments = len(content_comments)
+        total_comments = self.dataset.comment_count(self.current_content['id'])
         for region, count in ip_counter.most_common(20):
             percentage = (count / total_comments * 100) if total_comments > 0 else 0
             self.ip_tree.insert('', 'end', values=(
@@ -3009,44 +2937,63 @@ class ContentPreviewWindow:
             ))
             
     def generate_wordcloud(self):
-        """生成词云"""
+        """生成词云，分词和词云布局在后台线程中完成，完成后在主线程中显示"""
         if not self.current_content:
             messagebox.showwarning("警告", "请先选择内容")
             return
             
-        try:
-            # 清除之前的图表
-            for widget in self.chart_frame.winfo_children():
-                widget.destroy()
-                
-            # 获取评论文本
-            content_comments = [c for c in self.comment_data 
-                              if c['content_id'] == self.current_content['id']]
+        # 获取评论文本
+        comments = self.dataset.comment_items(self.current_content['id'])
+        
+        if not comments:
+            messagebox.showinfo("提示", "没有评论数据")
+            return
             
-            if not content_comments:
-                messagebox.showinfo("提示", "没有评论数据")
-                return
-                
-            # 合并所有评论文本
-            text = ' '.join([c['content'] for c in content_comments])
+        # 清除之前的图表
+        for widget in self.chart_frame.winfo_children():
+            widget.destroy()
+            
+        content_key = f"{self.current_content['platform']}:{self.current_content['id']}"
+        self.wordcloud_future = self.wordcloud_executor.submit(self.build_wordcloud, comments, content_key)
+        ttk.Label(self.chart_frame, text="正在生成词云...").pack(pady=20)
+        self.window.after(100, self.show_wordcloud, self.wordcloud_future)
+        
+    def build_wordcloud(self, comments, content_key):
+        """统计词频并生成词云布局（后台线程），每条评论只分词一次"""
+        word_freq = get_word_frequency_service().word_frequency(comments, key=content_key)
+        word_freq = {word: count for word, count in word_freq.items() if len(word) > 1}
+        
+        if not word_freq:
+            return None
+            
+        return WordCloud(
+            font_path='C:/Windows/Fonts/simhei.ttf',  # 中文字体
+            width=800, height=400,
+            background_color='white',
+            max_words=100
+        ).generate_from_frequencies(word_freq)
+        
+    def show_wordcloud(self, future):
+        """显示后台生成的词云"""
+        # 窗口已关闭或已切换到其他图表
+        if future is not self.wordcloud_future or not self.window.winfo_exists():
+            return
+            
+        if not future.done():
+            self.window.after(100, self.show_wordcloud, future)
+            return
             
-            # 使用jieba分词
-            words = jieba.cut(text)
-            word_list = [word for word in words if len(word) > 1]
-            word_text = ' '.join(word_list)
+        self.wordcloud_future = None
+        for widget in self.chart_frame.winfo_children():
+            widget.destroy()
+            
+        try:
+            wordcloud = future.result()
             
-            if not word_text.strip():
+            if wordcloud is None:
                 messagebox.showinfo("提示", "没有有效的文本数据")
                 return
                 
-            # 生成词云
-            wordcloud = WordCloud(
-                font_path='C:/Windows/Fonts/simhei.ttf',  # 中文字体
-                width=800, height=400,
-                background_color='white',
-                max_words=100
-            ).generate(word_text)
-            
             # 显示词云
             fig, ax = plt.subplots(figsize=(10, 5))
             ax.imshow(wordcloud, interpolation='bilinear')
@@ -3071,19 +3018,14 @@ class ContentPreviewWindow:
             for widget in self.chart_frame.winfo_children():
                 widget.destroy()
                 
+            self.wordcloud_future = None
+                
             # 获取IP数据
-            content_comments = [c for c in self.comment_data 
-                              if c['content_id'] == self.current_content['id']]
-            
-            if not content_comments:
+            if not self.dataset.comment_count(self.current_content['id']):
                 messagebox.showinfo("提示", "没有评论数据")
                 return
                 
-            ip_counter = Counter()
-            for comment in content_comments:
-                ip_location = comment.get('ip_location', '未知')
-                if ip_location:
-                    ip_counter[ip_location] += 1
+            ip_counter = self.dataset.ip_counter(self.current_content['id'])
                     
             if not ip_counter:
                 messagebox.showinfo("提示", "没有IP数据")
@@ -3128,18 +3070,18 @@ class ContentPreviewWindow:
             for widget in self.chart_frame.winfo_children():
                 widget.destroy()
                 
+            self.wordcloud_future = None
+                
             # 获取时间数据
-            content_comments = [c for c in self.comment_data 
-                              if c['content_id'] == self.current_content['id']]
+            create_times = self.dataset.comments_of(self.current_content['id'])['create_time'].tolist()
             
-            if not content_comments:
+            if not create_times:
                 messagebox.showinfo("提示", "没有评论数据")
                 return
                 
             # 解析时间并按小时统计
             hour_counter = Counter()
-            for comment in content_comments:
-                create_time = comment.get('create_time', '')
+            for create_time in create_times:
                 if create_time:
                     try:
                         # 尝试解析时间格式
@@ -17,6 +17,8 @@ import cmd_arg
 import config
 from database import db
 from base.base_crawler import AbstractCrawler
+from store.store_registry import store_registry
+from tools import async_file_writer, crawl_checkpoint, crawl_dedup, crawl_index, extraction_executor, media_store, utils
 from media_platform.bilibili import BilibiliCrawler
 from media_platform.douyin import DouYinCrawler
 from media_platform.kuaishou import KuaishouCrawler
@@ -48,6 +50,8 @@ class CrawlerFactory:
 
 
 crawler: Optional[AbstractCrawler] = None
+# main 的 finally 中已经关闭数据库时为 True，cleanup 中不再重复关闭
+db_closed = False
 
 
 # persist-1<persist1@126.com>
@@ -56,7 +60,7 @@ crawler: Optional[AbstractCrawler] = None
 # 回滚策略：还原此文件。
 async def main():
     # Init crawler
-    global crawler
+    global crawler, db_closed
 
     # parse cmd
     args = await cmd_arg.parse_cmd()
@@ -70,14 +74,41 @@ async def main():
 
 
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+    await db.open_writer_session()
+    # 本次爬取中各平台的存储实例只创建一次，结束时统一 flush
+    store_registry.open()
+    try:
+        await crawler.start()
+        # 完整跑完时删除断点，异常中断或主循环因请求失败提前退出时保留，下次可以 --resume 继续
+        if crawler.aborted:
+            utils.logger.warning("[main] Crawler aborted before completion, keep checkpoint for --resume")
+        else:
+            crawl_checkpoint.finish_crawl_checkpoint()
+    finally:
+        await store_registry.close()
+        media_store.close_media_store()
+        crawl_index.close_crawl_index()
+        crawl_checkpoint.close_crawl_checkpoint()
+        crawl_dedup.close_content_dedup()
+        extraction_executor.close_extraction_executor()
+        # 将 csv/json 写入缓冲中剩余的数据落盘
+        await async_file_writer.flush_all_file_writers(close=True)
+        if config.SAVE_DATA_OPTION in ["db", "sqlite"]:
+            await db.close()
+            db_closed = True
 
 
 def cleanup():
+    # 事件循环被中断（如 Ctrl+C）时，main 中的 finally 不会执行，这里同步写入剩余的缓冲数据
+    async_file_writer.close_all_file_writers_sync()
+    media_store.close_media_store()
+    crawl_index.close_crawl_index()
+    crawl_checkpoint.close_crawl_checkpoint()
+    extraction_executor.close_extraction_executor()
     if crawler:
         # asyncio.run(crawler.close())
         pass
-    if config.SAVE_DATA_OPTION in ["db", "sqlite"]:
+    if config.SAVE_DATA_OPTION in ["db", "sqlite"] and not db_closed:
         asyncio.run(db.close())
 
 
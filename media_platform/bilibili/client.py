@@ -27,7 +27,7 @@ from tools import utils
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
-from .help import BilibiliSign
+from .help import BilibiliSign, BilibiliWbiKeyCache
 
 
 class BilibiliClient(AbstractApiClient):
@@ -47,10 +47,12 @@ class BilibiliClient(AbstractApiClient):
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self._wbi_key_cache = BilibiliWbiKeyCache()
+        self._wbi_key_lock = asyncio.Lock()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        client = self.get_http_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
         try:
             data: Dict = response.json()
         except json.JSONDecodeError:
@@ -71,8 +73,23 @@ class BilibiliClient(AbstractApiClient):
         """
         if not req_data:
             return {}
-        img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        signer = await self.get_wbi_signer()
+        return signer.sign(req_data)
+
+    async def get_wbi_signer(self) -> BilibiliSign:
+        """
+        获取缓存的签名实例，缓存过期时重新读取 WBI 密钥，并发请求只读取一次
+        :return:
+        """
+        signer = self._wbi_key_cache.get()
+        if signer is not None:
+            return signer
+        async with self._wbi_key_lock:
+            signer = self._wbi_key_cache.get()
+            if signer is None:
+                img_key, sub_key = await self.get_wbi_keys()
+                signer = self._wbi_key_cache.set(img_key, sub_key)
+        return signer
 
     async def get_wbi_keys(self) -> Tuple[str, str]:
         """
@@ -129,6 +146,12 @@ class BilibiliClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # 登录状态变化后 localStorage 中的密钥可能更新
+        self._wbi_key_cache.invalidate()
+
+    async def close(self):
+        utils.logger.info(f"[BilibiliClient.close] wbi key cache stats: {self._wbi_key_cache.stats}")
+        await super().close()
 
     async def search_video_by_keyword(
         self,
@@ -201,21 +224,27 @@ class BilibiliClient(AbstractApiClient):
 
         return await self.get(uri, params, enable_params_sign=True)
 
+    def stream_video_media(self, url: str):
+        """
+        流式下载视频，配合 store 边下载边写入，支持断点续传
+        """
+        return self.media_source(url, headers=self.headers, follow_redirects=True)
+
     async def get_video_media(self, url: str) -> Union[bytes, None]:
         # Follow CDN 302 redirects and treat any 2xx as success (some endpoints return 206)
-        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=True) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-                response.raise_for_status()
-                if 200 <= response.status_code < 300:
-                    return response.content
-                utils.logger.error(
-                    f"[BilibiliClient.get_video_media] Unexpected status {response.status_code} for {url}"
-                )
-                return None
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
-                return None
+        client = self.get_http_client(self.proxy)
+        try:
+            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers, follow_redirects=True)
+            response.raise_for_status()
+            if 200 <= response.status_code < 300:
+                return response.content
+            utils.logger.error(
+                f"[BilibiliClient.get_video_media] Unexpected status {response.status_code} for {url}"
+            )
+            return None
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+            return None
 
     async def get_video_comments(
         self,
@@ -240,6 +269,8 @@ class BilibiliClient(AbstractApiClient):
         is_fetch_sub_comments=False,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: int = 0,
+        cursor_callback: Optional[Callable] = None,
     ):
         """
         get video all comments include sub comments
@@ -248,12 +279,14 @@ class BilibiliClient(AbstractApiClient):
         :param is_fetch_sub_comments:
         :param callback:
         max_count: 一次笔记爬取的最大评论数量
+        :param cursor: 从该页开始抓取，用于增量爬取时继续上次的进度
+        :param cursor_callback: 每页评论及其二级评论都交给 callback 后以 (下一页, 是否还有更多) 调用，被截断的页不调用
 
         :return:
         """
         result = []
         is_end = False
-        next_page = 0
+        next_page = cursor
         max_retries = 3
         while not is_end and len(result) < max_count:
             comments_res = None
@@ -296,10 +329,14 @@ class BilibiliClient(AbstractApiClient):
                     comment_id = comment['rpid']
                     if (comment.get("rcount", 0) > 0):
                         {await self.get_video_all_level_two_comments(video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval, callback)}
-            if len(result) + len(comment_list) > max_count:
+            truncated = len(result) + len(comment_list) > max_count
+            if truncated:
                 comment_list = comment_list[:max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(video_id, comment_list)
+            # 被截断的页剩余评论未抓取，游标停在该页，下次增量爬取从该页重新开始
+            if cursor_callback and not truncated:
+                cursor_callback(next_page, not is_end)
             await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
                 result.extend(comment_list)
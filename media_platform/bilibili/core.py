@@ -14,10 +14,11 @@
 # @Desc    : B站爬虫
 
 import asyncio
+import functools
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 import pandas as pd
 
@@ -36,6 +37,9 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.comment_pipeline import CommentPipeline
+from tools.crawl_index import get_crawl_index
+from tools.media_scheduler import drain_media_downloads, get_media_scheduler
 from var import crawler_type_var, source_keyword_var
 
 from .client import BilibiliClient
@@ -63,53 +67,57 @@ class BilibiliCrawler(AbstractCrawler):
             playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(ip_proxy_info)
 
         async with async_playwright() as playwright:
-            # 根据配置选择启动模式
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[BilibiliCrawler] 使用CDP模式启动浏览器")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    self.user_agent,
-                    headless=config.CDP_HEADLESS,
-                )
-            else:
-                utils.logger.info("[BilibiliCrawler] 使用标准模式启动浏览器")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(chromium, None, self.user_agent, headless=config.HEADLESS)
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
-
-            # Create a client to interact with the xiaohongshu website.
-            self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
-            if not await self.bili_client.pong():
-                login_obj = BilibiliLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.bili_client.update_cookies(browser_context=self.browser_context)
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
-            elif config.CRAWLER_TYPE == "creator":
-                if config.CREATOR_MODE:
-                    for creator_id in config.BILI_CREATOR_ID_LIST:
-                        await self.get_creator_videos(int(creator_id))
+            try:
+                # 根据配置选择启动模式
+                if config.ENABLE_CDP_MODE:
+                    utils.logger.info("[BilibiliCrawler] 使用CDP模式启动浏览器")
+                    self.browser_context = await self.launch_browser_with_cdp(
+                        playwright,
+                        playwright_proxy_format,
+                        self.user_agent,
+                        headless=config.CDP_HEADLESS,
+                    )
                 else:
-                    await self.get_all_creator_details(config.BILI_CREATOR_ID_LIST)
-            else:
-                pass
-            utils.logger.info("[BilibiliCrawler.start] Bilibili Crawler finished ...")
+                    utils.logger.info("[BilibiliCrawler] 使用标准模式启动浏览器")
+                    # Launch a browser context.
+                    chromium = playwright.chromium
+                    self.browser_context = await self.launch_browser(chromium, None, self.user_agent, headless=config.HEADLESS)
+                # stealth.min.js is a js script to prevent the website from detecting the crawler.
+                await self.browser_context.add_init_script(path="libs/stealth.min.js")
+                self.context_page = await self.browser_context.new_page()
+                await self.context_page.goto(self.index_url)
+
+                # Create a client to interact with the xiaohongshu website.
+                self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
+                if not await self.bili_client.pong():
+                    login_obj = BilibiliLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    await login_obj.begin()
+                    await self.bili_client.update_cookies(browser_context=self.browser_context)
+
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
+                elif config.CRAWLER_TYPE == "creator":
+                    if config.CREATOR_MODE:
+                        for creator_id in self.checkpoint.iter_tasks(config.BILI_CREATOR_ID_LIST):
+                            await self.get_creator_videos(int(creator_id))
+                    else:
+                        await self.get_all_creator_details(config.BILI_CREATOR_ID_LIST)
+                else:
+                    pass
+                utils.logger.info("[BilibiliCrawler.start] Bilibili Crawler finished ...")
+            finally:
+                # 爬取中途出错也要等待媒体下载完成并关闭 API 客户端的连接池和浏览器
+                await self.close()
 
     async def search(self):
         """
@@ -168,10 +176,10 @@ class BilibiliCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in self.checkpoint.iter_tasks(config.KEYWORDS.split(",")):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
-            page = 1
+            page = self.checkpoint.resume_page(1)
             while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Skip page: {page}")
@@ -195,18 +203,38 @@ class BilibiliCrawler(AbstractCrawler):
                     break
 
                 semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                crawl_index = get_crawl_index()
                 task_list = []
                 try:
-                    task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
+                    # 增量爬取：之前已获取过详情的视频不再请求详情，只继续抓取未完成的评论
+                    for video_item in video_list:
+                        if crawl_index.is_seen("bilibili", video_item.get("aid")):
+                            video_id_list.append(video_item.get("aid"))
+                            continue
+                        # 其他关键词已经获取过的视频直接复用详情
+                        task_list.append(
+                            self.content_dedup.run_once(
+                                "detail",
+                                video_item.get("aid"),
+                                functools.partial(self.get_video_info_task, aid=video_item.get("aid"), bvid="", semaphore=semaphore),
+                            )
+                        )
                 except Exception as e:
                     utils.logger.warning(f"[BilibiliCrawler.search_by_keywords] error in the task list. The video for this page will not be included. {e}")
                 video_items = await asyncio.gather(*task_list)
-                for video_item in video_items:
+                upserts_content = bilibili_store.BiliStoreFactory.create_store().upserts_content
+                for video_item, fetched in video_items:
                     if video_item:
                         video_id_list.append(video_item.get("View").get("aid"))
-                        await bilibili_store.update_bilibili_video(video_item)
-                        await bilibili_store.update_up_info(video_item)
-                        await self.get_bilibili_video(video_item, semaphore)
+                        with self.content_dedup.source_keywords(video_item.get("View").get("aid")):
+                            # 重复命中时只有数据库存储重新保存以更新关键词，csv/json 只能追加，会多出重复的行
+                            if fetched or upserts_content:
+                                await bilibili_store.update_bilibili_video(video_item)
+                        if fetched:
+                            await bilibili_store.update_up_info(video_item)
+                            await self.get_bilibili_video(video_item, semaphore)
+                            crawl_index.mark_seen("bilibili", video_item.get("View").get("aid"))
+                self.checkpoint.save_page(page, video_id_list)
                 page += 1
                 
                 # Sleep after page navigation
@@ -214,6 +242,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
                 
                 await self.batch_get_video_comments(video_id_list)
+                self.checkpoint.finish_page(page)
 
     async def search_by_keywords_in_time_range(self, daily_limit: bool):
         """
@@ -224,7 +253,8 @@ class BilibiliCrawler(AbstractCrawler):
         bili_limit_count = 20
         start_page = config.START_PAGE
 
-        for keyword in config.KEYWORDS.split(","):
+        # 按天搜索时断点只恢复到关键词和未抓取完的评论，不恢复天数和页码
+        for keyword in self.checkpoint.iter_tasks(config.KEYWORDS.split(",")):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Current search keyword: {keyword}")
             total_notes_crawled_for_keyword = 0
@@ -270,10 +300,18 @@ class BilibiliCrawler(AbstractCrawler):
                             break
 
                         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                        task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
+                        task_list = [
+                            self.content_dedup.run_once(
+                                "detail",
+                                video_item.get("aid"),
+                                functools.partial(self.get_video_info_task, aid=video_item.get("aid"), bvid="", semaphore=semaphore),
+                            )
+                            for video_item in video_list
+                        ]
                         video_items = await asyncio.gather(*task_list)
+                        upserts_content = bilibili_store.BiliStoreFactory.create_store().upserts_content
 
-                        for video_item in video_items:
+                        for video_item, fetched in video_items:
                             if video_item:
                                 if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
                                     break
@@ -284,10 +322,14 @@ class BilibiliCrawler(AbstractCrawler):
                                 notes_count_this_day += 1
                                 total_notes_crawled_for_keyword += 1
                                 video_id_list.append(video_item.get("View").get("aid"))
-                                await bilibili_store.update_bilibili_video(video_item)
-                                await bilibili_store.update_up_info(video_item)
-                                await self.get_bilibili_video(video_item, semaphore)
-
+                                with self.content_dedup.source_keywords(video_item.get("View").get("aid")):
+                                    if fetched or upserts_content:
+                                        await bilibili_store.update_bilibili_video(video_item)
+                                if fetched:
+                                    await bilibili_store.update_up_info(video_item)
+                                    await self.get_bilibili_video(video_item, semaphore)
+
+                        self.checkpoint.save_page(page, video_id_list)
                         page += 1
                         
                         # Sleep after page navigation
@@ -295,9 +337,11 @@ class BilibiliCrawler(AbstractCrawler):
                         utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
                         
                         await self.batch_get_video_comments(video_id_list)
+                        self.checkpoint.finish_page(page)
 
                     except Exception as e:
                         utils.logger.error(f"[BilibiliCrawler.search] Error searching on {day.ctime()}: {e}")
+                        self.aborted = True
                         break
 
     async def batch_get_video_comments(self, video_id_list: List[str]):
@@ -312,38 +356,52 @@ class BilibiliCrawler(AbstractCrawler):
 
         utils.logger.info(f"[BilibiliCrawler.batch_get_video_comments] video ids:{video_id_list}")
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for video_id in video_id_list:
-            task = asyncio.create_task(self.get_comments(video_id, semaphore), name=video_id)
-            task_list.append(task)
-        await asyncio.gather(*task_list)
+        # 评论页经由流水线队列交给写入协程存储，抓取下一页时不必等待存储完成
+        async with CommentPipeline(bilibili_store.batch_update_bilibili_video_comments, name="bilibili_comments") as pipeline:
+            task_list: List[Task] = []
+            for video_id in video_id_list:
+                task = asyncio.create_task(self.get_comments(video_id, semaphore, callback=pipeline), name=video_id)
+                task_list.append(task)
+            await asyncio.gather(*task_list)
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore, callback: Optional[Callable] = None):
         """
         get comment for video id
         :param video_id:
         :param semaphore:
         :return:
         """
-        async with semaphore:
-            try:
-                utils.logger.info(f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching comments for video {video_id}")
-                await self.bili_client.get_video_all_comments(
-                    video_id=video_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
-                    is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
-                    callback=bilibili_store.batch_update_bilibili_video_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
+        cursor, comments_done = self.get_comment_state("bilibili", video_id)
+        if comments_done:
+            utils.logger.info(f"[BilibiliCrawler.get_comments] All comments of video {video_id} were crawled before, skip")
+            return
 
-            except DataFetchError as ex:
-                utils.logger.error(f"[BilibiliCrawler.get_comments] get video_id: {video_id} comment error: {ex}")
-            except Exception as e:
-                utils.logger.error(f"[BilibiliCrawler.get_comments] may be been blocked, err:{e}")
-                # Propagate the exception to be caught by the main loop
-                raise
+        async def fetch_comments():
+            async with semaphore:
+                try:
+                    utils.logger.info(f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[BilibiliCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching comments for video {video_id}")
+                    await self.bili_client.get_video_all_comments(
+                        video_id=video_id,
+                        crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                        is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
+                        callback=callback or bilibili_store.batch_update_bilibili_video_comments,
+                        max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                        cursor=int(cursor or 0),
+                        cursor_callback=self.comment_cursor_callback("bilibili", video_id, callback),
+                    )
+                    return True
+
+                except DataFetchError as ex:
+                    utils.logger.error(f"[BilibiliCrawler.get_comments] get video_id: {video_id} comment error: {ex}")
+                except Exception as e:
+                    utils.logger.error(f"[BilibiliCrawler.get_comments] may be been blocked, err:{e}")
+                    # Propagate the exception to be caught by the main loop
+                    raise
+
+        # 多个关键词命中同一视频时评论只抓取一次
+        await self.content_dedup.run_once("comments", video_id, fetch_comments)
 
     async def get_creator_videos(self, creator_id: int):
         """
@@ -518,12 +576,17 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # 媒体下载使用 API 客户端的连接池，先等待队列中的下载完成
+        await drain_media_downloads()
+        # 关闭 API 客户端持有的 httpx 连接池
+        if getattr(self, "bili_client", None):
+            await self.bili_client.close()
         try:
             # 如果使用CDP模式，需要特殊处理
             if self.cdp_manager:
                 await self.cdp_manager.cleanup()
                 self.cdp_manager = None
-            elif self.browser_context:
+            elif getattr(self, "browser_context", None):
                 await self.browser_context.close()
             utils.logger.info("[BilibiliCrawler.close] Browser context closed ...")
         except TargetClosedError:
@@ -560,13 +623,11 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video url failed")
             return
 
-        content = await self.bili_client.get_video_media(video_url)
-        await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-        utils.logger.info(f"[BilibiliCrawler.get_bilibili_video] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video {aid}")
-        if content is None:
-            return
         extension_file_name = f"video.mp4"
-        await bilibili_store.store_video(aid, content, extension_file_name)
+        # 放入后台下载队列，不阻塞视频信息的抓取
+        await get_media_scheduler().submit(
+            bilibili_store.store_video, aid, self.bili_client.stream_video_media(video_url), extension_file_name
+        )
 
     async def get_all_creator_details(self, creator_id_list: List[int]):
         """
@@ -14,34 +14,41 @@
 # @Time    : 2023/12/2 23:26
 # @Desc    : bilibili 请求参数签名
 # 逆向实现参考：https://socialsisteryi.github.io/bilibili-API-collect/docs/misc/sign/wbi.html#wbi%E7%AD%BE%E5%90%8D%E7%AE%97%E6%B3%95
+import time
 import urllib.parse
 from hashlib import md5
-from typing import Dict
+from typing import Dict, Optional
 
+import config
 from tools import utils
 
+# 生成 mixin key 时 img_key + sub_key 的取字符顺序
+MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+]
+
+# 签名前需要从参数值中过滤的字符
+_FILTER_CHARS_TABLE = str.maketrans("", "", "!'()*")
+
 
 class BilibiliSign:
     def __init__(self, img_key: str, sub_key: str):
         self.img_key = img_key
         self.sub_key = sub_key
-        self.map_table = [
-            46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
-            33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
-            61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
-            36, 20, 34, 44, 52
-        ]
+        self.map_table = MIXIN_KEY_ENC_TAB
+        # salt 只与 img_key、sub_key 有关，构造时计算一次
+        self.salt = self.get_salt()
 
     def get_salt(self) -> str:
         """
         获取加盐的 key
         :return:
         """
-        salt = ""
         mixin_key = self.img_key + self.sub_key
-        for mt in self.map_table:
-            salt += mixin_key[mt]
-        return salt[:32]
+        return "".join(mixin_key[mt] for mt in self.map_table)[:32]
 
     def sign(self, req_data: Dict) -> Dict:
         """
@@ -52,20 +59,53 @@ class BilibiliSign:
         """
         current_ts = utils.get_unix_timestamp()
         req_data.update({"wts": current_ts})
-        req_data = dict(sorted(req_data.items()))
         req_data = {
             # 过滤 value 中的 "!'()*" 字符
-            k: ''.join(filter(lambda ch: ch not in "!'()*", str(v)))
+            k: str(v).translate(_FILTER_CHARS_TABLE)
             for k, v
-            in req_data.items()
+            in sorted(req_data.items())
         }
         query = urllib.parse.urlencode(req_data)
-        salt = self.get_salt()
-        wbi_sign = md5((query + salt).encode()).hexdigest()  # 计算 w_rid
+        wbi_sign = md5((query + self.salt).encode()).hexdigest()  # 计算 w_rid
         req_data['w_rid'] = wbi_sign
         return req_data
 
 
+class BilibiliWbiKeyCache:
+    """
+    缓存由 WBI 密钥构造的 BilibiliSign，过期前所有请求复用同一个签名实例，
+    每次命中都省去一次 Playwright 读取 localStorage 的调用
+    """
+
+    def __init__(self, ttl: float = config.BILI_WBI_KEY_CACHE_TTL):
+        self.ttl = ttl
+        self._signer: Optional[BilibiliSign] = None
+        self._expire_at = 0.0
+        self.stats: Dict[str, int] = {"evaluations_avoided": 0, "refreshes": 0}
+
+    def get(self) -> Optional[BilibiliSign]:
+        """
+        获取未过期的签名实例，没有或已过期时返回 None
+        """
+        if self._signer is None or time.monotonic() >= self._expire_at:
+            return None
+        self.stats["evaluations_avoided"] += 1
+        return self._signer
+
+    def set(self, img_key: str, sub_key: str) -> BilibiliSign:
+        """
+        用新的密钥构造签名实例并缓存 ttl 秒
+        """
+        if self._signer is None or (self._signer.img_key, self._signer.sub_key) != (img_key, sub_key):
+            self._signer = BilibiliSign(img_key, sub_key)
+        self._expire_at = time.monotonic() + self.ttl
+        self.stats["refreshes"] += 1
+        return self._signer
+
+    def invalidate(self):
+        self._expire_at = 0.0
+
+
 if __name__ == '__main__':
     _img_key = "7cd084941338484aae1ad9425b84077c"
     _sub_key = "4932caff0ff746eab6f01bf08b70ac45"
@@ -43,6 +43,8 @@ class DouYinClient(AbstractApiClient):
         self._host = "https://www.douyin.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # localStorage（msToken 等）缓存，cookie 更新后失效
+        self._local_storage: Optional[Dict] = None
 
     async def __process_req_params(
         self,
@@ -55,7 +57,9 @@ class DouYinClient(AbstractApiClient):
         if not params:
             return
         headers = headers or self.headers
-        local_storage: Dict = await self.playwright_page.evaluate("() => window.localStorage")  # type: ignore
+        if self._local_storage is None:
+            self._local_storage = await self.playwright_page.evaluate("() => window.localStorage")  # type: ignore
+        local_storage: Dict = self._local_storage
         common_params = {
             "device_platform": "webapp",
             "aid": "6383",
@@ -95,8 +99,8 @@ class DouYinClient(AbstractApiClient):
         params["a_bogus"] = a_bogus
 
     async def request(self, method, url, **kwargs):
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        client = self.get_http_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
@@ -130,6 +134,14 @@ class DouYinClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self._local_storage = None
+
+    async def close(self):
+        """
+        关闭 a_bogus 签名进程池与 httpx 连接池
+        """
+        await close_sign_pool()
+        await super().close()
 
     async def search_info_by_keyword(
         self,
@@ -222,6 +234,8 @@ class DouYinClient(AbstractApiClient):
         is_fetch_sub_comments=False,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: int = 0,
+        cursor_callback: Optional[Callable] = None,
     ):
         """
         获取帖子的所有评论，包括子评论
@@ -230,11 +244,13 @@ class DouYinClient(AbstractApiClient):
         :param is_fetch_sub_comments: 是否抓取子评论
         :param callback: 回调函数，用于处理抓取到的评论
         :param max_count: 一次帖子爬取的最大评论数量
+        :param cursor: 从该游标开始抓取，用于增量爬取时继续上次的进度
+        :param cursor_callback: 每页评论及其子评论都交给 callback 后以 (下一页游标, 是否还有更多) 调用，被截断的页不调用
         :return: 评论列表
         """
         result = []
         comments_has_more = 1
-        comments_cursor = 0
+        comments_cursor = cursor
         while comments_has_more and len(result) < max_count:
             comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
             comments_has_more = comments_res.get("has_more", 0)
@@ -242,36 +258,39 @@ class DouYinClient(AbstractApiClient):
             comments = comments_res.get("comments", [])
             if not comments:
                 continue
-            if len(result) + len(comments) > max_count:
+            truncated = len(result) + len(comments) > max_count
+            if truncated:
                 comments = comments[:max_count - len(result)]
             result.extend(comments)
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(aweme_id, comments)
 
             await asyncio.sleep(crawl_interval)
-            if not is_fetch_sub_comments:
-                continue
-            # 获取二级评论
-            for comment in comments:
-                reply_comment_total = comment.get("reply_comment_total")
-
-                if reply_comment_total > 0:
-                    comment_id = comment.get("cid")
-                    sub_comments_has_more = 1
-                    sub_comments_cursor = 0
-
-                    while sub_comments_has_more:
-                        sub_comments_res = await self.get_sub_comments(aweme_id, comment_id, sub_comments_cursor)
-                        sub_comments_has_more = sub_comments_res.get("has_more", 0)
-                        sub_comments_cursor = sub_comments_res.get("cursor", 0)
-                        sub_comments = sub_comments_res.get("comments", [])
-
-                        if not sub_comments:
-                            continue
-                        result.extend(sub_comments)
-                        if callback:  # 如果有回调函数，就执行回调函数
-                            await callback(aweme_id, sub_comments)
-                        await asyncio.sleep(crawl_interval)
+            if is_fetch_sub_comments:
+                # 获取二级评论
+                for comment in comments:
+                    reply_comment_total = comment.get("reply_comment_total")
+
+                    if reply_comment_total > 0:
+                        comment_id = comment.get("cid")
+                        sub_comments_has_more = 1
+                        sub_comments_cursor = 0
+
+                        while sub_comments_has_more:
+                            sub_comments_res = await self.get_sub_comments(aweme_id, comment_id, sub_comments_cursor)
+                            sub_comments_has_more = sub_comments_res.get("has_more", 0)
+                            sub_comments_cursor = sub_comments_res.get("cursor", 0)
+                            sub_comments = sub_comments_res.get("comments", [])
+
+                            if not sub_comments:
+                                continue
+                            result.extend(sub_comments)
+                            if callback:  # 如果有回调函数，就执行回调函数
+                                await callback(aweme_id, sub_comments)
+                            await asyncio.sleep(crawl_interval)
+            # 被截断的页剩余评论未抓取，游标停在该页，下次增量爬取从该页重新开始
+            if cursor_callback and not truncated:
+                cursor_callback(comments_cursor, bool(comments_has_more))
         return result
 
     async def get_user_info(self, sec_user_id: str):
@@ -311,16 +330,22 @@ class DouYinClient(AbstractApiClient):
             result.extend(aweme_list)
         return result
 
+    def stream_aweme_media(self, url: str):
+        """
+        流式下载图片或视频，配合 store 边下载边写入，支持断点续传
+        """
+        return self.media_source(url, follow_redirects=True)
+
     async def get_aweme_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, follow_redirects=True)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[DouYinClient.get_aweme_media] request {url} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+        client = self.get_http_client(self.proxy)
+        try:
+            response = await client.request("GET", url, timeout=self.timeout, follow_redirects=True)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
+                utils.logger.error(f"[DouYinClient.get_aweme_media] request {url} err, res:{response.text}")
                 return None
+            else:
+                return response.content
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+            return None
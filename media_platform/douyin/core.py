@@ -9,10 +9,10 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 import asyncio
+import functools
 import os
-import random
 from asyncio import Task
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Callable, Any, Dict, List, Optional, Tuple
 
 from playwright.async_api import (
     BrowserContext,
@@ -28,6 +28,9 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.comment_pipeline import CommentPipeline
+from tools.crawl_index import get_crawl_index
+from tools.media_scheduler import drain_media_downloads, get_media_scheduler
 from var import crawler_type_var, source_keyword_var
 
 from .client import DouYinClient
@@ -54,53 +57,57 @@ class DouYinCrawler(AbstractCrawler):
             playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(ip_proxy_info)
 
         async with async_playwright() as playwright:
-            # 根据配置选择启动模式
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[DouYinCrawler] 使用CDP模式启动浏览器")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    None,
-                    headless=config.CDP_HEADLESS,
-                )
-            else:
-                utils.logger.info("[DouYinCrawler] 使用标准模式启动浏览器")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(
-                    chromium,
-                    playwright_proxy_format,
-                    user_agent=None,
-                    headless=config.HEADLESS,
-                )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
-
-            self.dy_client = await self.create_douyin_client(httpx_proxy_format)
-            if not await self.dy_client.pong(browser_context=self.browser_context):
-                login_obj = DouYinLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # you phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.dy_client.update_cookies(browser_context=self.browser_context)
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_awemes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get the information and comments of the specified creator
-                await self.get_creators_and_videos()
-
-            utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
+            try:
+                # 根据配置选择启动模式
+                if config.ENABLE_CDP_MODE:
+                    utils.logger.info("[DouYinCrawler] 使用CDP模式启动浏览器")
+                    self.browser_context = await self.launch_browser_with_cdp(
+                        playwright,
+                        playwright_proxy_format,
+                        None,
+                        headless=config.CDP_HEADLESS,
+                    )
+                else:
+                    utils.logger.info("[DouYinCrawler] 使用标准模式启动浏览器")
+                    # Launch a browser context.
+                    chromium = playwright.chromium
+                    self.browser_context = await self.launch_browser(
+                        chromium,
+                        playwright_proxy_format,
+                        user_agent=None,
+                        headless=config.HEADLESS,
+                    )
+                # stealth.min.js is a js script to prevent the website from detecting the crawler.
+                await self.browser_context.add_init_script(path="libs/stealth.min.js")
+                self.context_page = await self.browser_context.new_page()
+                await self.context_page.goto(self.index_url)
+
+                self.dy_client = await self.create_douyin_client(httpx_proxy_format)
+                if not await self.dy_client.pong(browser_context=self.browser_context):
+                    login_obj = DouYinLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # you phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    await login_obj.begin()
+                    await self.dy_client.update_cookies(browser_context=self.browser_context)
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_awemes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get the information and comments of the specified creator
+                    await self.get_creators_and_videos()
+
+                utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
+            finally:
+                # 爬取中途出错也要等待媒体下载完成并关闭 API 客户端的连接池和浏览器
+                await self.close()
 
     async def search(self) -> None:
         utils.logger.info("[DouYinCrawler.search] Begin search douyin keywords")
@@ -109,12 +116,13 @@ class DouYinCrawler(AbstractCrawler):
         if max_notes_count < dy_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = dy_limit_count
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in self.checkpoint.iter_tasks(config.KEYWORDS.split(",")):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
-            aweme_list: List[str] = []
-            page = 0
-            dy_search_id = ""
+            # 评论在关键词的所有页抓取完后统一获取，恢复断点时取回中断前已收集的作品
+            aweme_list: List[str] = self.checkpoint.pending_ids
+            page = self.checkpoint.resume_page(0)
+            dy_search_id = self.checkpoint.resume_search_id("")
             while (page - start_page + 1) * dy_limit_count <= max_notes_count:
                 if page < start_page:
                     utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
@@ -133,21 +141,36 @@ class DouYinCrawler(AbstractCrawler):
                         break
                 except DataFetchError:
                     utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed")
+                    self.aborted = True
                     break
 
                 page += 1
                 if "data" not in posts_res:
                     utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
+                    self.aborted = True
                     break
                 dy_search_id = posts_res.get("extra", {}).get("logid", "")
+                crawl_index = get_crawl_index()
+                upserts_content = douyin_store.DouyinStoreFactory.create_store().upserts_content
                 for post_item in posts_res.get("data"):
                     try:
                         aweme_info: Dict = (post_item.get("aweme_info") or post_item.get("aweme_mix_info", {}).get("mix_items")[0])
                     except TypeError:
                         continue
                     aweme_list.append(aweme_info.get("aweme_id", ""))
-                    await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
-                    await self.get_aweme_media(aweme_item=aweme_info)
+                    # 增量爬取：之前已保存过的作品不再保存和下载媒体，只继续抓取未完成的评论
+                    if crawl_index.is_seen("douyin", aweme_info.get("aweme_id")):
+                        continue
+                    # 多个关键词命中同一作品时记录所有关键词，媒体只下载一次
+                    _, fetched = await self.content_dedup.run_once(
+                        "media", aweme_info.get("aweme_id"), functools.partial(self.get_aweme_media, aweme_item=aweme_info)
+                    )
+                    with self.content_dedup.source_keywords(aweme_info.get("aweme_id")):
+                        # 重复命中时只有数据库存储重新保存以更新关键词，csv/json 只能追加，会多出重复的行
+                        if fetched or upserts_content:
+                            await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+                    crawl_index.mark_seen("douyin", aweme_info.get("aweme_id"))
+                self.checkpoint.save_page(page, aweme_list, dy_search_id)
                 # Sleep after each page navigation
                 await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 utils.logger.info(f"[DouYinCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
@@ -189,40 +212,54 @@ class DouYinCrawler(AbstractCrawler):
             utils.logger.info(f"[DouYinCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
             return
 
-        task_list: List[Task] = []
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        for aweme_id in aweme_list:
-            task = asyncio.create_task(self.get_comments(aweme_id, semaphore), name=aweme_id)
-            task_list.append(task)
-        if len(task_list) > 0:
-            await asyncio.wait(task_list)
+        # 评论页经由流水线队列交给写入协程存储，抓取下一页时不必等待存储完成
+        async with CommentPipeline(douyin_store.batch_update_dy_aweme_comments, name="douyin_comments") as pipeline:
+            task_list: List[Task] = []
+            semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+            for aweme_id in aweme_list:
+                task = asyncio.create_task(self.get_comments(aweme_id, semaphore, callback=pipeline), name=aweme_id)
+                task_list.append(task)
+            if len(task_list) > 0:
+                await asyncio.wait(task_list)
+
+    async def get_comments(self, aweme_id: str, semaphore: asyncio.Semaphore, callback: Optional[Callable] = None) -> None:
+        cursor, comments_done = self.get_comment_state("douyin", aweme_id)
+        if comments_done:
+            utils.logger.info(f"[DouYinCrawler.get_comments] All comments of aweme {aweme_id} were crawled before, skip")
+            return
 
-    async def get_comments(self, aweme_id: str, semaphore: asyncio.Semaphore) -> None:
-        async with semaphore:
-            try:
-                # 将关键词列表传递给 get_aweme_all_comments 方法
-                # Use fixed crawling interval
-                crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
-                await self.dy_client.get_aweme_all_comments(
-                    aweme_id=aweme_id,
-                    crawl_interval=crawl_interval,
-                    is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
-                    callback=douyin_store.batch_update_dy_aweme_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
-                # Sleep after fetching comments
-                await asyncio.sleep(crawl_interval)
-                utils.logger.info(f"[DouYinCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for aweme {aweme_id}")
-                utils.logger.info(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} comments have all been obtained and filtered ...")
-            except DataFetchError as e:
-                utils.logger.error(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} get comments failed, error: {e}")
+        async def fetch_comments():
+            async with semaphore:
+                try:
+                    # 将关键词列表传递给 get_aweme_all_comments 方法
+                    # Use fixed crawling interval
+                    crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
+                    await self.dy_client.get_aweme_all_comments(
+                        aweme_id=aweme_id,
+                        crawl_interval=crawl_interval,
+                        is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
+                        callback=callback or douyin_store.batch_update_dy_aweme_comments,
+                        max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                        cursor=int(cursor or 0),
+                        cursor_callback=self.comment_cursor_callback("douyin", aweme_id, callback),
+                    )
+                    # Sleep after fetching comments
+                    await asyncio.sleep(crawl_interval)
+                    utils.logger.info(f"[DouYinCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for aweme {aweme_id}")
+                    utils.logger.info(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} comments have all been obtained and filtered ...")
+                    return True
+                except DataFetchError as e:
+                    utils.logger.error(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} get comments failed, error: {e}")
+
+        # 多个关键词命中同一作品时评论只抓取一次
+        await self.content_dedup.run_once("comments", aweme_id, fetch_comments)
 
     async def get_creators_and_videos(self) -> None:
         """
         Get the information and videos of the specified creator
         """
         utils.logger.info("[DouYinCrawler.get_creators_and_videos] Begin get douyin creators")
-        for user_id in config.DY_CREATOR_ID_LIST:
+        for user_id in self.checkpoint.iter_tasks(config.DY_CREATOR_ID_LIST):
             creator_info: Dict = await self.dy_client.get_user_info(user_id)
             if creator_info:
                 await douyin_store.save_creator(user_id, creator=creator_info)
@@ -231,6 +268,7 @@ class DouYinCrawler(AbstractCrawler):
             all_video_list = await self.dy_client.get_all_user_aweme_posts(sec_user_id=user_id, callback=self.fetch_creator_video_detail)
 
             video_ids = [video_item.get("aweme_id") for video_item in all_video_list]
+            self.checkpoint.save_page(1, video_ids)
             await self.batch_get_note_comments(video_ids)
 
     async def fetch_creator_video_detail(self, video_list: List[Dict]):
@@ -327,11 +365,16 @@ class DouYinCrawler(AbstractCrawler):
 
     async def close(self) -> None:
         """Close browser context"""
+        # 媒体下载使用 API 客户端的连接池，先等待队列中的下载完成
+        await drain_media_downloads()
+        # 关闭 API 客户端持有的 httpx 连接池
+        if getattr(self, "dy_client", None):
+            await self.dy_client.close()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
-        else:
+        elif getattr(self, "browser_context", None):
             await self.browser_context.close()
         utils.logger.info("[DouYinCrawler.close] Browser context closed ...")
 
@@ -341,10 +384,13 @@ class DouYinCrawler(AbstractCrawler):
 
         Args:
             aweme_item (Dict): 抖音作品详情
+
+        Returns:
+            媒体下载任务提交后（或无需下载时）返回 True，供 ContentDedup 缓存，同一作品只提交一次
         """
         if not config.ENABLE_GET_MEIDAS:
             utils.logger.info(f"[DouYinCrawler.get_aweme_media] Crawling image mode is not enabled")
-            return
+            return True
         # 笔记 urls 列表，若为短视频类型则返回为空列表
         note_download_url: List[str] = douyin_store._extract_note_image_list(aweme_item)
         # 视频 url，永远存在，但为短视频类型时的文件其实是音频文件
@@ -354,6 +400,7 @@ class DouYinCrawler(AbstractCrawler):
             await self.get_aweme_images(aweme_item)
         else:
             await self.get_aweme_video(aweme_item)
+        return True
 
     async def get_aweme_images(self, aweme_item: Dict):
         """
@@ -374,13 +421,12 @@ class DouYinCrawler(AbstractCrawler):
         for url in note_download_url:
             if not url:
                 continue
-            content = await self.dy_client.get_aweme_media(url)
-            await asyncio.sleep(random.random())
-            if content is None:
-                continue
             extension_file_name = f"{picNum:>03d}.jpeg"
             picNum += 1
-            await douyin_store.update_dy_aweme_image(aweme_id, content, extension_file_name)
+            # 放入后台下载队列，不阻塞作品的抓取
+            await get_media_scheduler().submit(
+                douyin_store.update_dy_aweme_image, aweme_id, self.dy_client.stream_aweme_media(url), extension_file_name
+            )
 
     async def get_aweme_video(self, aweme_item: Dict):
         """
@@ -398,9 +444,7 @@ class DouYinCrawler(AbstractCrawler):
 
         if not video_download_url:
             return
-        content = await self.dy_client.get_aweme_media(video_download_url)
-        await asyncio.sleep(random.random())
-        if content is None:
-            return
         extension_file_name = f"video.mp4"
-        await douyin_store.update_dy_aweme_video(aweme_id, content, extension_file_name)
+        await get_media_scheduler().submit(
+            douyin_store.update_dy_aweme_video, aweme_id, self.dy_client.stream_aweme_media(video_download_url), extension_file_name
+        )
@@ -16,12 +16,20 @@
 # @Desc    : 获取 a_bogus 参数, 学习交流使用，请勿用作商业用途，侵权联系作者删除
 
 import random
+from typing import Optional
 
 import execjs
 from playwright.async_api import Page
 
+import config
+from tools import utils
+from tools.js_worker_pool import JsWorkerPool
+
 douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
 
+# 常驻 node 进程池，首次签名时启动
+_douyin_sign_pool: Optional[JsWorkerPool] = None
+
 def get_web_id():
     """
     生成随机的webid
@@ -47,9 +55,38 @@ def get_web_id():
 async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, page: Page = None):
     """
     获取 a_bogus 参数, 目前不支持post请求类型的签名
+    优先使用常驻 node 进程池签名，进程池不可用或出错时回退到 execjs
     """
+    global _douyin_sign_pool
+    if config.ENABLE_JS_WORKER_POOL and JsWorkerPool.is_available():
+        if _douyin_sign_pool is None:
+            _douyin_sign_pool = JsWorkerPool("libs/douyin.js", name="douyin_sign")
+        try:
+            return await _douyin_sign_pool.call(get_sign_js_name(url), params, user_agent)
+        except Exception as e:
+            utils.logger.warning(f"[get_a_bogus] js worker pool sign failed, fall back to execjs: {e}")
     return get_a_bogus_from_js(url, params, user_agent)
 
+
+async def close_sign_pool():
+    """
+    关闭签名使用的 node 进程池
+    """
+    global _douyin_sign_pool
+    if _douyin_sign_pool is not None:
+        await _douyin_sign_pool.close()
+        _douyin_sign_pool = None
+
+
+def get_sign_js_name(url: str) -> str:
+    """
+    根据请求路径选择签名函数
+    """
+    if "/reply" in url:
+        return "sign_reply"
+    return "sign_datail"
+
+
 def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     """
     通过js获取 a_bogus 参数
@@ -61,10 +98,7 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     Returns:
 
     """
-    sign_js_name = "sign_datail"
-    if "/reply" in url:
-        sign_js_name = "sign_reply"
-    return douyin_sign_obj.call(sign_js_name, params, user_agent)
+    return douyin_sign_obj.call(get_sign_js_name(url), params, user_agent)
 
 
 
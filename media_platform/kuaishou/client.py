@@ -45,8 +45,8 @@ class KuaiShouClient(AbstractApiClient):
         self.graphql = KuaiShouGraphQL()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        client = self.get_http_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
         data: Dict = response.json()
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
@@ -249,6 +249,8 @@ class KuaiShouClient(AbstractApiClient):
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: str = "",
+        cursor_callback: Optional[Callable] = None,
     ):
         """
         get video all comments include sub comments
@@ -256,18 +258,21 @@ class KuaiShouClient(AbstractApiClient):
         :param crawl_interval:
         :param callback:
         :param max_count:
+        :param cursor: 从该游标开始抓取，用于增量爬取时继续上次的进度
+        :param cursor_callback: 每页评论及其二级评论都交给 callback 后以 (下一页游标, 是否还有更多) 调用，被截断的页不调用
         :return:
         """
 
         result = []
-        pcursor = ""
+        pcursor = cursor
 
         while pcursor != "no_more" and len(result) < max_count:
             comments_res = await self.get_video_comments(photo_id, pcursor)
             vision_commen_list = comments_res.get("visionCommentList", {})
             pcursor = vision_commen_list.get("pcursor", "")
             comments = vision_commen_list.get("rootComments", [])
-            if len(result) + len(comments) > max_count:
+            truncated = len(result) + len(comments) > max_count
+            if truncated:
                 comments = comments[: max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(photo_id, comments)
@@ -277,6 +282,9 @@ class KuaiShouClient(AbstractApiClient):
                 comments, photo_id, crawl_interval, callback
             )
             result.extend(sub_comments)
+            # 被截断的页剩余评论未抓取，游标停在该页，下次增量爬取从该页重新开始
+            if cursor_callback and not truncated:
+                cursor_callback(pcursor, pcursor != "no_more")
         return result
 
     async def get_comments_all_sub_comments(
@@ -14,7 +14,7 @@ import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 import time
 from asyncio import Task
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from playwright.async_api import (
     BrowserContext,
@@ -30,6 +30,8 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.comment_pipeline import CommentPipeline
+from tools.crawl_index import get_crawl_index
 from var import comment_tasks_var, crawler_type_var, source_keyword_var
 
 from .client import KuaiShouClient
@@ -61,56 +63,60 @@ class KuaishouCrawler(AbstractCrawler):
             )
 
         async with async_playwright() as playwright:
-            # 根据配置选择启动模式
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[KuaishouCrawler] 使用CDP模式启动浏览器")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    self.user_agent,
-                    headless=config.CDP_HEADLESS,
-                )
-            else:
-                utils.logger.info("[KuaishouCrawler] 使用标准模式启动浏览器")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(
-                    chromium, None, self.user_agent, headless=config.HEADLESS
-                )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(f"{self.index_url}?isHome=1")
-
-            # Create a client to interact with the kuaishou website.
-            self.ks_client = await self.create_ks_client(httpx_proxy_format)
-            if not await self.ks_client.pong():
-                login_obj = KuaishouLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone=httpx_proxy_format,
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.ks_client.update_cookies(
-                    browser_context=self.browser_context
-                )
+            try:
+                # 根据配置选择启动模式
+                if config.ENABLE_CDP_MODE:
+                    utils.logger.info("[KuaishouCrawler] 使用CDP模式启动浏览器")
+                    self.browser_context = await self.launch_browser_with_cdp(
+                        playwright,
+                        playwright_proxy_format,
+                        self.user_agent,
+                        headless=config.CDP_HEADLESS,
+                    )
+                else:
+                    utils.logger.info("[KuaishouCrawler] 使用标准模式启动浏览器")
+                    # Launch a browser context.
+                    chromium = playwright.chromium
+                    self.browser_context = await self.launch_browser(
+                        chromium, None, self.user_agent, headless=config.HEADLESS
+                    )
+                # stealth.min.js is a js script to prevent the website from detecting the crawler.
+                await self.browser_context.add_init_script(path="libs/stealth.min.js")
+                self.context_page = await self.browser_context.new_page()
+                await self.context_page.goto(f"{self.index_url}?isHome=1")
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for videos and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_videos()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their videos and comments
-                await self.get_creators_and_videos()
-            else:
-                pass
-
-            utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
+                # Create a client to interact with the kuaishou website.
+                self.ks_client = await self.create_ks_client(httpx_proxy_format)
+                if not await self.ks_client.pong():
+                    login_obj = KuaishouLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone=httpx_proxy_format,
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    await login_obj.begin()
+                    await self.ks_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
+
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for videos and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_videos()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their videos and comments
+                    await self.get_creators_and_videos()
+                else:
+                    pass
+
+                utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
+            finally:
+                # 爬取中途出错也要关闭 API 客户端的连接池和浏览器
+                await self.close()
 
     async def search(self):
         utils.logger.info("[KuaishouCrawler.search] Begin search kuaishou keywords")
@@ -118,13 +124,13 @@ class KuaishouCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            search_session_id = ""
+        for keyword in self.checkpoint.iter_tasks(config.KEYWORDS.split(",")):
+            search_session_id = self.checkpoint.resume_search_id("")
             source_keyword_var.set(keyword)
             utils.logger.info(
                 f"[KuaishouCrawler.search] Current search keyword: {keyword}"
             )
-            page = 1
+            page = self.checkpoint.resume_page(1)
             while (
                 page - start_page + 1
             ) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -154,11 +160,20 @@ class KuaishouCrawler(AbstractCrawler):
                     )
                     continue
                 search_session_id = vision_search_photo.get("searchSessionId", "")
+                crawl_index = get_crawl_index()
                 for video_detail in vision_search_photo.get("feeds"):
-                    video_id_list.append(video_detail.get("photo", {}).get("id"))
-                    await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+                    video_id = video_detail.get("photo", {}).get("id")
+                    video_id_list.append(video_id)
+                    # 增量爬取：之前已保存过的视频不再保存，只继续抓取未完成的评论
+                    if crawl_index.is_seen("kuaishou", video_id):
+                        continue
+                    # 多个关键词命中同一视频时记录所有关键词
+                    with self.content_dedup.source_keywords(video_id):
+                        await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+                    crawl_index.mark_seen("kuaishou", video_id)
 
                 # batch fetch video comments
+                self.checkpoint.save_page(page, video_id_list, search_session_id)
                 page += 1
                 
                 # Sleep after page navigation
@@ -166,6 +181,7 @@ class KuaishouCrawler(AbstractCrawler):
                 utils.logger.info(f"[KuaishouCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
                 
                 await self.batch_get_video_comments(video_id_list)
+                self.checkpoint.finish_page(page)
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
@@ -239,57 +255,71 @@ class KuaishouCrawler(AbstractCrawler):
             f"[KuaishouCrawler.batch_get_video_comments] video ids:{video_id_list}"
         )
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for video_id in video_id_list:
-            task = asyncio.create_task(
-                self.get_comments(video_id, semaphore), name=video_id
-            )
-            task_list.append(task)
+        # 评论页经由流水线队列交给写入协程存储，抓取下一页时不必等待存储完成
+        async with CommentPipeline(kuaishou_store.batch_update_ks_video_comments, name="kuaishou_comments") as pipeline:
+            task_list: List[Task] = []
+            for video_id in video_id_list:
+                task = asyncio.create_task(
+                    self.get_comments(video_id, semaphore, callback=pipeline), name=video_id
+                )
+                task_list.append(task)
 
-        comment_tasks_var.set(task_list)
-        await asyncio.gather(*task_list)
+            comment_tasks_var.set(task_list)
+            await asyncio.gather(*task_list)
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore, callback: Optional[Callable] = None):
         """
         get comment for video id
         :param video_id:
         :param semaphore:
         :return:
         """
-        async with semaphore:
-            try:
-                utils.logger.info(
-                    f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
-                )
+        cursor, comments_done = self.get_comment_state("kuaishou", video_id)
+        if comments_done:
+            utils.logger.info(f"[KuaishouCrawler.get_comments] All comments of video {video_id} were crawled before, skip")
+            return
+
+        async def fetch_comments():
+            async with semaphore:
+                try:
+                    utils.logger.info(
+                        f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
+                    )
                 
-                # Sleep before fetching comments
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for video {video_id}")
+                    # Sleep before fetching comments
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[KuaishouCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for video {video_id}")
                 
-                await self.ks_client.get_video_all_comments(
-                    photo_id=video_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
-                    callback=kuaishou_store.batch_update_ks_video_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}"
-                )
-            except Exception as e:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}"
-                )
-                # use time.sleeep block main coroutine instead of asyncio.sleep and cacel running comment task
-                # maybe kuaishou block our request, we will take a nap and update the cookie again
-                current_running_tasks = comment_tasks_var.get()
-                for task in current_running_tasks:
-                    task.cancel()
-                time.sleep(20)
-                await self.context_page.goto(f"{self.index_url}?isHome=1")
-                await self.ks_client.update_cookies(
-                    browser_context=self.browser_context
-                )
+                    await self.ks_client.get_video_all_comments(
+                        photo_id=video_id,
+                        crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                        callback=callback or kuaishou_store.batch_update_ks_video_comments,
+                        max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                        cursor=cursor or "",
+                        cursor_callback=self.comment_cursor_callback("kuaishou", video_id, callback),
+                    )
+                    return True
+                except DataFetchError as ex:
+                    utils.logger.error(
+                        f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}"
+                    )
+                except Exception as e:
+                    utils.logger.error(
+                        f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}"
+                    )
+                    # use time.sleeep block main coroutine instead of asyncio.sleep and cacel running comment task
+                    # maybe kuaishou block our request, we will take a nap and update the cookie again
+                    current_running_tasks = comment_tasks_var.get()
+                    for task in current_running_tasks:
+                        task.cancel()
+                    time.sleep(20)
+                    await self.context_page.goto(f"{self.index_url}?isHome=1")
+                    await self.ks_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
+
+        # 多个关键词命中同一视频时评论只抓取一次
+        await self.content_dedup.run_once("comments", video_id, fetch_comments)
 
     async def create_ks_client(self, httpx_proxy: Optional[str]) -> KuaiShouClient:
         """Create ks client"""
@@ -384,7 +414,7 @@ class KuaishouCrawler(AbstractCrawler):
         utils.logger.info(
             "[KuaiShouCrawler.get_creators_and_videos] Begin get kuaishou creators"
         )
-        for user_id in config.KS_CREATOR_ID_LIST:
+        for user_id in self.checkpoint.iter_tasks(config.KS_CREATOR_ID_LIST):
             # get creator detail info from web html content
             createor_info: Dict = await self.ks_client.get_creator_info(user_id=user_id)
             if createor_info:
@@ -407,22 +437,28 @@ class KuaishouCrawler(AbstractCrawler):
         Concurrently obtain the specified post list and save the data
         """
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        crawl_index = get_crawl_index()
         task_list = [
             self.get_video_info_task(post_item.get("photo", {}).get("id"), semaphore)
             for post_item in video_list
+            if not crawl_index.is_seen("kuaishou", post_item.get("photo", {}).get("id"))
         ]
 
         video_details = await asyncio.gather(*task_list)
         for video_detail in video_details:
             if video_detail is not None:
                 await kuaishou_store.update_kuaishou_video(video_detail)
+                crawl_index.mark_seen("kuaishou", video_detail.get("photo", {}).get("id"))
 
     async def close(self):
         """Close browser context"""
+        # 关闭 API 客户端持有的 httpx 连接池
+        if getattr(self, "ks_client", None):
+            await self.ks_client.close()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
-        else:
+        elif getattr(self, "browser_context", None):
             await self.browser_context.close()
         utils.logger.info("[KuaishouCrawler.close] Browser context closed ...")
@@ -12,10 +12,22 @@
 # -*- coding: utf-8 -*-
 
 from typing import Dict, List, Optional, Tuple
-from statistics import mean, median
+
+import numpy as np
+
 from tools import utils
+from tools.columnar_stats import RecordColumns
 from .field import VideoStats
 
+# 参与汇总的视频指标及其在分析结果中的键名
+VIDEO_METRIC_STATS = {
+    "like_count": "like_stats",
+    "comment_count": "comment_stats",
+    "share_count": "share_stats",
+    "collect_count": "collect_stats",
+    "view_count": "view_stats",
+}
+
 
 class StatsAnalyzer:
     """视频统计数据分析器"""
@@ -35,75 +47,21 @@ class StatsAnalyzer:
             return {"error": "No video stats data provided"}
         
         try:
-            # 基础统计
+            # 基础统计，所有指标一次读入列式数组后按列汇总
             total_videos = len(video_stats_list)
-            
-            # 各项指标的统计
-            like_counts = [stats.like_count for stats in video_stats_list]
-            comment_counts = [stats.comment_count for stats in video_stats_list]
-            share_counts = [stats.share_count for stats in video_stats_list]
-            collect_counts = [stats.collect_count for stats in video_stats_list]
-            view_counts = [stats.view_count for stats in video_stats_list]
-            
-            # 计算平均值和中位数
-            analysis_result = {
-                "total_videos": total_videos,
-                "like_stats": {
-                    "total": sum(like_counts),
-                    "average": round(mean(like_counts), 2),
-                    "median": median(like_counts),
-                    "max": max(like_counts),
-                    "min": min(like_counts)
-                },
-                "comment_stats": {
-                    "total": sum(comment_counts),
-                    "average": round(mean(comment_counts), 2),
-                    "median": median(comment_counts),
-                    "max": max(comment_counts),
-                    "min": min(comment_counts)
-                },
-                "share_stats": {
-                    "total": sum(share_counts),
-                    "average": round(mean(share_counts), 2),
-                    "median": median(share_counts),
-                    "max": max(share_counts),
-                    "min": min(share_counts)
-                },
-                "collect_stats": {
-                    "total": sum(collect_counts),
-                    "average": round(mean(collect_counts), 2),
-                    "median": median(collect_counts),
-                    "max": max(collect_counts),
-                    "min": min(collect_counts)
-                },
-                "view_stats": {
-                    "total": sum(view_counts),
-                    "average": round(mean(view_counts), 2),
-                    "median": median(view_counts),
-                    "max": max(view_counts),
-                    "min": min(view_counts)
-                }
-            }
+            columns = RecordColumns(video_stats_list, tuple(VIDEO_METRIC_STATS))
+            summary = columns.summary()
+            analysis_result = {"total_videos": total_videos}
+            for field, stats_key in VIDEO_METRIC_STATS.items():
+                analysis_result[stats_key] = summary[field]
             
             # 计算互动率统计
-            from .video_stats_extractor import VideoStatsExtractor
-            engagement_rates = []
-            for stats in video_stats_list:
-                stats_dict = {
-                    "video_id": stats.video_id,
-                    "like_count": stats.like_count,
-                    "comment_count": stats.comment_count,
-                    "share_count": stats.share_count,
-                    "collect_count": stats.collect_count,
-                    "view_count": stats.view_count
-                }
-                engagement_rates.append(VideoStatsExtractor.get_engagement_rate(stats_dict))
-                
+            engagement_rates = StatsAnalyzer._engagement_rates(columns)
             analysis_result["engagement_stats"] = {
-                "average": round(mean(engagement_rates), 2),
-                "median": round(median(engagement_rates), 2),
-                "max": round(max(engagement_rates), 2),
-                "min": round(min(engagement_rates), 2)
+                "average": round(float(engagement_rates.mean()), 2),
+                "median": round(float(np.median(engagement_rates)), 2),
+                "max": round(float(engagement_rates.max()), 2),
+                "min": round(float(engagement_rates.min()), 2)
             }
             
             utils.logger.info(f"[StatsAnalyzer] Analyzed {total_videos} videos performance")
@@ -113,6 +71,19 @@ class StatsAnalyzer:
             utils.logger.error(f"[StatsAnalyzer] Error analyzing video performance: {e}")
             return {"error": str(e)}
     
+    @staticmethod
+    def _engagement_rates(columns: RecordColumns) -> np.ndarray:
+        """
+        向量化计算每个视频的互动率（百分比，保留两位小数），与 VideoStatsExtractor.get_engagement_rate 一致
+        """
+        view_counts = columns.column("view_count")
+        total_engagement = (
+            columns.column("like_count") + columns.column("comment_count") +
+            columns.column("share_count") + columns.column("collect_count")
+        )
+        rates = np.divide(total_engagement, view_counts, out=np.zeros_like(view_counts), where=view_counts != 0)
+        return np.round(rates * 100, 2)
+    
     @staticmethod
     def find_top_performing_videos(video_stats_list: List[VideoStats], 
                                  metric: str = "like_count", 
@@ -132,22 +103,13 @@ class StatsAnalyzer:
             return []
         
         try:
-            # 根据指定指标排序
+            # 根据指定指标取前 top_n 个，不对整个列表排序
             if metric == "engagement_rate":
-                from .video_stats_extractor import VideoStatsExtractor
-                sorted_videos = sorted(
-                    video_stats_list, 
-                    key=lambda x: VideoStatsExtractor.get_engagement_rate(x), 
-                    reverse=True
-                )
+                columns = RecordColumns(video_stats_list, tuple(VIDEO_METRIC_STATS))
+                top_videos = columns.top_k(StatsAnalyzer._engagement_rates(columns), top_n)
             else:
-                sorted_videos = sorted(
-                    video_stats_list, 
-                    key=lambda x: getattr(x, metric, 0), 
-                    reverse=True
-                )
-            
-            top_videos = sorted_videos[:top_n]
+                columns = RecordColumns(video_stats_list, (metric,))
+                top_videos = columns.top_k(metric, top_n)
             utils.logger.info(f"[StatsAnalyzer] Found top {len(top_videos)} videos by {metric}")
             return top_videos
             
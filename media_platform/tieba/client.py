@@ -22,6 +22,7 @@ from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
 from tools import utils
+from tools.extraction_executor import get_extraction_executor
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
@@ -43,6 +44,7 @@ class BaiduTieBaClient(AbstractApiClient):
         }
         self._host = "https://tieba.baidu.com"
         self._page_extractor = TieBaExtractor()
+        self._extraction_executor = get_extraction_executor()
         self.default_ip_proxy = default_ip_proxy
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
@@ -60,8 +62,8 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         actual_proxy = proxy if proxy else self.default_ip_proxy
-        async with httpx.AsyncClient(proxy=actual_proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, headers=self.headers, **kwargs)
+        client = self.get_http_client(actual_proxy)
+        response = await client.request(method, url, timeout=self.timeout, headers=self.headers, **kwargs)
 
         if response.status_code != 200:
             utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
@@ -180,7 +182,7 @@ class BaiduTieBaClient(AbstractApiClient):
             "only_thread": note_type.value,
         }
         page_content = await self.get(uri, params=params, return_ori_content=True)
-        return self._page_extractor.extract_search_note_list(page_content)
+        return await self._extraction_executor.run(self._page_extractor.extract_search_note_list, page_content)
 
     async def get_note_by_id(self, note_id: str) -> TiebaNote:
         """
@@ -193,7 +195,7 @@ class BaiduTieBaClient(AbstractApiClient):
         """
         uri = f"/p/{note_id}"
         page_content = await self.get(uri, return_ori_content=True)
-        return self._page_extractor.extract_note_detail(page_content)
+        return await self._extraction_executor.run(self._page_extractor.extract_note_detail, page_content)
 
     async def get_note_all_comments(
         self,
@@ -201,6 +203,8 @@ class BaiduTieBaClient(AbstractApiClient):
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: int = 1,
+        cursor_callback: Optional[Callable] = None,
     ) -> List[TiebaComment]:
         """
         获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
@@ -209,21 +213,26 @@ class BaiduTieBaClient(AbstractApiClient):
             crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
             max_count: 一次帖子爬取的最大评论数量
+            cursor: 从该页开始抓取，用于增量爬取时继续上次的进度
+            cursor_callback: 每页评论及其子评论都交给 callback 后以 (下一页, 是否还有更多) 调用，被截断的页不调用
         Returns:
 
         """
         uri = f"/p/{note_detail.note_id}"
         result: List[TiebaComment] = []
-        current_page = 1
+        current_page = cursor
         while note_detail.total_replay_page >= current_page and len(result) < max_count:
             params = {
                 "pn": current_page,
             }
             page_content = await self.get(uri, params=params, return_ori_content=True)
-            comments = self._page_extractor.extract_tieba_note_parment_comments(page_content, note_id=note_detail.note_id)
+            comments = await self._extraction_executor.run(
+                self._page_extractor.extract_tieba_note_parment_comments, page_content, note_detail.note_id
+            )
             if not comments:
                 break
-            if len(result) + len(comments) > max_count:
+            truncated = len(result) + len(comments) > max_count
+            if truncated:
                 comments = comments[:max_count - len(result)]
             if callback:
                 await callback(note_detail.note_id, comments)
@@ -232,6 +241,9 @@ class BaiduTieBaClient(AbstractApiClient):
             await self.get_comments_all_sub_comments(comments, crawl_interval=crawl_interval, callback=callback)
             await asyncio.sleep(crawl_interval)
             current_page += 1
+            # 被截断的页剩余评论未抓取，游标停在该页，下次增量爬取从该页重新开始
+            if cursor_callback and not truncated:
+                cursor_callback(current_page, note_detail.total_replay_page >= current_page)
         return result
 
     async def get_comments_all_sub_comments(
@@ -273,7 +285,9 @@ class BaiduTieBaClient(AbstractApiClient):
                     "pn": current_page  # 页码
                 }
                 page_content = await self.get(uri, params=params, return_ori_content=True)
-                sub_comments = self._page_extractor.extract_tieba_note_sub_comments(page_content, parent_comment=parment_comment)
+                sub_comments = await self._extraction_executor.run(
+                    self._page_extractor.extract_tieba_note_sub_comments, page_content, parment_comment
+                )
 
                 if not sub_comments:
                     break
@@ -296,7 +310,7 @@ class BaiduTieBaClient(AbstractApiClient):
         """
         uri = f"/f?kw={tieba_name}&pn={page_num}"
         page_content = await self.get(uri, return_ori_content=True)
-        return self._page_extractor.extract_tieba_note_list(page_content)
+        return await self._extraction_executor.run(self._page_extractor.extract_tieba_note_list, page_content)
 
     async def get_creator_info_by_url(self, creator_url: str) -> str:
         """
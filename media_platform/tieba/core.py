@@ -13,7 +13,7 @@ import asyncio
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from playwright.async_api import (
     BrowserContext,
@@ -30,6 +30,9 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.comment_pipeline import CommentPipeline
+from tools.crawl_index import get_crawl_index
+from tools.extraction_executor import get_extraction_executor
 from var import crawler_type_var, source_keyword_var
 
 from .client import BaiduTieBaClient
@@ -75,21 +78,25 @@ class TieBaCrawler(AbstractCrawler):
             ip_pool=ip_proxy_pool,
             default_ip_proxy=httpx_proxy_format,
         )
-        crawler_type_var.set(config.CRAWLER_TYPE)
-        if config.CRAWLER_TYPE == "search":
-            # Search for notes and retrieve their comment information.
-            await self.search()
-            await self.get_specified_tieba_notes()
-        elif config.CRAWLER_TYPE == "detail":
-            # Get the information and comments of the specified post
-            await self.get_specified_notes()
-        elif config.CRAWLER_TYPE == "creator":
-            # Get creator's information and their notes and comments
-            await self.get_creators_and_notes()
-        else:
-            pass
+        try:
+            crawler_type_var.set(config.CRAWLER_TYPE)
+            if config.CRAWLER_TYPE == "search":
+                # Search for notes and retrieve their comment information.
+                await self.search()
+                await self.get_specified_tieba_notes()
+            elif config.CRAWLER_TYPE == "detail":
+                # Get the information and comments of the specified post
+                await self.get_specified_notes()
+            elif config.CRAWLER_TYPE == "creator":
+                # Get creator's information and their notes and comments
+                await self.get_creators_and_notes()
+            else:
+                pass
 
-        utils.logger.info("[BaiduTieBaCrawler.start] Tieba Crawler finished ...")
+            utils.logger.info("[BaiduTieBaCrawler.start] Tieba Crawler finished ...")
+        finally:
+            # 爬取中途出错也要关闭 API 客户端的连接池
+            await self.close()
 
     async def search(self) -> None:
         """
@@ -104,12 +111,12 @@ class TieBaCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in self.checkpoint.iter_tasks(config.KEYWORDS.split(",")):
             source_keyword_var.set(keyword)
             utils.logger.info(
                 f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}"
             )
-            page = 1
+            page = self.checkpoint.resume_page(1)
             while (
                 page - start_page + 1
             ) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -138,19 +145,21 @@ class TieBaCrawler(AbstractCrawler):
                     utils.logger.info(
                         f"[BaiduTieBaCrawler.search] Note list len: {len(notes_list)}"
                     )
-                    await self.get_specified_notes(
-                        note_id_list=[note_detail.note_id for note_detail in notes_list]
-                    )
+                    note_id_list = [note_detail.note_id for note_detail in notes_list]
+                    self.checkpoint.save_page(page, note_id_list)
+                    await self.get_specified_notes(note_id_list=note_id_list)
                     
                     # Sleep after page navigation
                     await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
                     utils.logger.info(f"[TieBaCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page}")
                     
                     page += 1
+                    self.checkpoint.finish_page(page)
                 except Exception as ex:
                     utils.logger.error(
                         f"[BaiduTieBaCrawler.search] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}"
                     )
+                    self.aborted = True
                     break
 
     async def get_specified_tieba_notes(self):
@@ -202,16 +211,23 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        crawl_index = get_crawl_index()
+        # 增量爬取：评论已全部抓取的帖子直接跳过，评论未抓取完的帖子仍需请求详情获取评论页数
         task_list = [
             self.get_note_detail_async_task(note_id=note_id, semaphore=semaphore)
             for note_id in note_id_list
+            if not self.get_comment_state("tieba", note_id)[1]
         ]
         note_details = await asyncio.gather(*task_list)
         note_details_model: List[TiebaNote] = []
         for note_detail in note_details:
             if note_detail is not None:
                 note_details_model.append(note_detail)
+                # 之前已保存过的帖子不再保存
+                if crawl_index.is_seen("tieba", note_detail.note_id):
+                    continue
                 await tieba_store.update_tieba_note(note_detail)
+                crawl_index.mark_seen("tieba", note_detail.note_id)
         await self.batch_get_note_comments(note_details_model)
 
     async def get_note_detail_async_task(
@@ -267,17 +283,19 @@ class TieBaCrawler(AbstractCrawler):
             return
 
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for note_detail in note_detail_list:
-            task = asyncio.create_task(
-                self.get_comments_async_task(note_detail, semaphore),
-                name=note_detail.note_id,
-            )
-            task_list.append(task)
-        await asyncio.gather(*task_list)
+        # 评论页经由流水线队列交给写入协程存储，抓取下一页时不必等待存储完成
+        async with CommentPipeline(tieba_store.batch_update_tieba_note_comments, name="tieba_comments") as pipeline:
+            task_list: List[Task] = []
+            for note_detail in note_detail_list:
+                task = asyncio.create_task(
+                    self.get_comments_async_task(note_detail, semaphore, callback=pipeline),
+                    name=note_detail.note_id,
+                )
+                task_list.append(task)
+            await asyncio.gather(*task_list)
 
     async def get_comments_async_task(
-        self, note_detail: TiebaNote, semaphore: asyncio.Semaphore
+        self, note_detail: TiebaNote, semaphore: asyncio.Semaphore, callback: Optional[Callable] = None
     ):
         """
         Get comments async task
@@ -288,6 +306,13 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
+        cursor, comments_done = self.get_comment_state("tieba", note_detail.note_id)
+        if comments_done:
+            utils.logger.info(
+                f"[BaiduTieBaCrawler.get_comments] All comments of note {note_detail.note_id} were crawled before, skip"
+            )
+            return
+
         async with semaphore:
             utils.logger.info(
                 f"[BaiduTieBaCrawler.get_comments] Begin get note id comments {note_detail.note_id}"
@@ -300,8 +325,10 @@ class TieBaCrawler(AbstractCrawler):
             await self.tieba_client.get_note_all_comments(
                 note_detail=note_detail,
                 crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
-                callback=tieba_store.batch_update_tieba_note_comments,
+                callback=callback or tieba_store.batch_update_tieba_note_comments,
                 max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                cursor=int(cursor or 1),
+                cursor_callback=self.comment_cursor_callback("tieba", note_detail.note_id, callback),
             )
 
     async def get_creators_and_notes(self) -> None:
@@ -313,12 +340,12 @@ class TieBaCrawler(AbstractCrawler):
         utils.logger.info(
             "[WeiboCrawler.get_creators_and_notes] Begin get weibo creators"
         )
-        for creator_url in config.TIEBA_CREATOR_URL_LIST:
+        for creator_url in self.checkpoint.iter_tasks(config.TIEBA_CREATOR_URL_LIST):
             creator_page_html_content = await self.tieba_client.get_creator_info_by_url(
                 creator_url=creator_url
             )
-            creator_info: TiebaCreator = self._page_extractor.extract_creator_info(
-                creator_page_html_content
+            creator_info: TiebaCreator = await get_extraction_executor().run(
+                self._page_extractor.extract_creator_info, creator_page_html_content
             )
             if creator_info:
                 utils.logger.info(
@@ -334,7 +361,7 @@ class TieBaCrawler(AbstractCrawler):
                     await self.tieba_client.get_all_notes_by_creator_user_name(
                         user_name=creator_info.user_name,
                         crawl_interval=0,
-                        callback=tieba_store.batch_update_tieba_notes,
+                        callback=self.save_creator_notes,
                         max_note_count=config.CRAWLER_MAX_NOTES_COUNT,
                         creator_page_html_content=creator_page_html_content,
                     )
@@ -347,6 +374,21 @@ class TieBaCrawler(AbstractCrawler):
                     f"[WeiboCrawler.get_creators_and_notes] get creator info error, creator_url:{creator_url}"
                 )
 
+    async def save_creator_notes(self, note_list: List[TiebaNote]):
+        """
+        保存创作者的一页帖子，增量爬取时跳过之前已保存过的帖子
+        Args:
+            note_list:
+
+        Returns:
+
+        """
+        crawl_index = get_crawl_index()
+        note_list = [note for note in note_list if not crawl_index.is_seen("tieba", note.note_id)]
+        await tieba_store.batch_update_tieba_notes(note_list)
+        for note in note_list:
+            crawl_index.mark_seen("tieba", note.note_id)
+
     async def launch_browser(
         self,
         chromium: BrowserType,
@@ -429,10 +471,13 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
+        # 关闭 API 客户端持有的 httpx 连接池
+        if getattr(self, "tieba_client", None):
+            await self.tieba_client.close()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
-        else:
+        elif getattr(self, "browser_context", None):
             await self.browser_context.close()
         utils.logger.info("[BaiduTieBaCrawler.close] Browser context closed ...")
@@ -10,12 +10,16 @@
 
 
 # -*- coding: utf-8 -*-
+# @Desc    : 贴吧页面解析。XPath 和正则在模块加载时编译一次；页面级字段（吧名、吧链接）每页只取一次，
+#            评论的 IP 属地和发布时间直接从 post-tail-wrap 元素的文本节点读取，不再把元素序列化成 HTML 后跑正则，
+#            每条评论只在自己的子树内查询，解析耗时与评论数成线性关系
 import html
 import json
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 from urllib.parse import parse_qs, unquote
 
+from lxml import etree
 from parsel import Selector
 
 from constant import baidu_tieba as const
@@ -25,6 +29,98 @@ from tools import utils
 GENDER_MALE = "sex_male"
 GENDER_FEMALE = "sex_female"
 
+PUB_TIME_PATTERN = re.compile(r'<span class="tail-info">(\d{4}-\d{2}-\d{2} \d{2}:\d{2})</span>')
+TAIL_PUB_TIME_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}")
+IP_PATTERN = re.compile(r"IP属地:(\S+)</span>")
+TAIL_IP_PATTERN = re.compile(r"IP属地:(\S+)$")
+FOLLOW_FANS_PATTERN = re.compile(r'<span class="concern_num">\(<a[^>]*>(\d+)</a>\)</span>')
+REGISTRATION_DURATION_PATTERN = re.compile(r"<span>吧龄:(\S+)</span>")
+
+
+def _xpath(expression: str) -> etree.XPath:
+    # smart_strings=False：返回普通字符串，不持有对文档树的引用
+    return etree.XPath(expression, smart_strings=False)
+
+
+# 页面级字段
+TIEBA_NAME_XPATH = _xpath("//a[@class='card_title_fname']/text()")
+TIEBA_HREF_XPATH = _xpath("//a[@class='card_title_fname']/@href")
+
+# 关键词搜索结果
+SEARCH_POST_XPATH = _xpath("//div[@class='s_post']")
+SEARCH_NOTE_ID_XPATH = _xpath(".//span[@class='p_title']/a/@data-tid")
+SEARCH_TITLE_XPATH = _xpath(".//span[@class='p_title']/a/text()")
+SEARCH_DESC_XPATH = _xpath(".//div[@class='p_content']/text()")
+SEARCH_NOTE_HREF_XPATH = _xpath(".//span[@class='p_title']/a/@href")
+SEARCH_USER_NICKNAME_XPATH = _xpath(".//a[starts-with(@href, '/home/main')]/font/text()")
+SEARCH_USER_HREF_XPATH = _xpath(".//a[starts-with(@href, '/home/main')]/@href")
+SEARCH_TIEBA_NAME_XPATH = _xpath(".//a[@class='p_forum']/font/text()")
+SEARCH_TIEBA_HREF_XPATH = _xpath(".//a[@class='p_forum']/@href")
+SEARCH_PUBLISH_TIME_XPATH = _xpath(".//font[@class='p_green p_date']/text()")
+
+# 贴吧帖子列表
+THREAD_LIST_XPATH = _xpath("//ul[@id='thread_list']/li")
+THREAD_TITLE_XPATH = _xpath(".//a[@class='j_th_tit ']/text()")
+THREAD_DESC_XPATH = _xpath(".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()")
+THREAD_AUTHOR_HREF_XPATH = _xpath(".//a[@class='frs-author-name j_user_card ']/@href")
+
+# 帖子详情和一级评论
+FIRST_FLOOR_XPATH = _xpath("//div[@class='p_postlist'][1]")
+ONLY_VIEW_AUTHOR_HREF_XPATH = _xpath("//*[@id='lzonly_cntn']/@href")
+THREAD_NUM_INFO_XPATH = _xpath("//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+TEXT_XPATH = _xpath("./text()")
+TITLE_XPATH = _xpath("//title/text()")
+DESCRIPTION_XPATH = _xpath("//meta[@name='description']/@content")
+COMMENT_POST_XPATH = _xpath("//div[@class='l_post l_post_bright j_l_post clearfix  ']")
+AUTHOR_FACE_HREF_XPATH = _xpath(".//a[@class='p_author_face ']/@href")
+AUTHOR_AVATAR_XPATH = _xpath(".//a[@class='p_author_face ']/img/@src")
+AUTHOR_NAME_XPATH = _xpath(".//a[@class='p_author_name j_user_card']/text()")
+POST_TAIL_WRAP_XPATH = _xpath(".//div[@class='post-tail-wrap']")
+# 与 IP_PATTERN / PUB_TIME_PATTERN 对应：紧挨着 </span> 的文本节点，只有文本的 tail-info span
+TAIL_IP_TEXT_XPATH = _xpath(".//span/text()[last()][contains(., 'IP属地:')]")
+TAIL_INFO_TEXT_XPATH = _xpath(".//span[@class='tail-info'][not(*)]/text()")
+
+# 二级评论
+SUB_COMMENT_FIRST_XPATH = _xpath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
+SUB_COMMENT_XPATH = _xpath("//li[@class='lzl_single_post j_lzl_s_p ']")
+SUB_COMMENT_USER_XPATH = _xpath("./a[@class='j_user_card lzl_p_p']")
+SUB_COMMENT_CONTENT_XPATH = _xpath(".//span[@class='lzl_content_main']")
+SUB_COMMENT_TIME_XPATH = _xpath(".//span[@class='lzl_time']/text()")
+HREF_XPATH = _xpath("./@href")
+IMG_SRC_XPATH = _xpath("./img/@src")
+
+# 创作者主页的帖子列表
+CREATOR_THREAD_HREF_XPATH = _xpath("//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href")
+
+
+def _first(values: List, default: str = "") -> str:
+    return values[0] if values else default
+
+
+def _first_in(elements: List[etree._Element], xpath: etree.XPath, default: str = "") -> str:
+    """
+    依次在多个元素中查询，返回第一个结果，与 SelectorList.xpath(...).get() 一致
+    """
+    for element in elements:
+        values = xpath(element)
+        if values:
+            return values[0]
+    return default
+
+
+def _outer_html(elements: List[etree._Element]) -> str:
+    """
+    第一个元素的 HTML，与 Selector.get() 的序列化方式一致
+    """
+    if not elements:
+        return ""
+    return etree.tostring(elements[0], method="html", encoding="unicode", with_tail=False)
+
+
+def _parse_root(page_content: str) -> etree._Element:
+    # 使用 parsel 解析，保持与原来相同的 HTML 解析器设置
+    return Selector(text=page_content).root
+
 
 class TieBaExtractor:
     def __init__(self):
@@ -40,23 +136,17 @@ class TieBaExtractor:
         Returns:
             包含帖子信息的字典列表
         """
-        xpath_selector = "//div[@class='s_post']"
-        post_list = Selector(text=page_content).xpath(xpath_selector)
         result: List[TiebaNote] = []
-        for post in post_list:
-            tieba_note = TiebaNote(note_id=post.xpath(".//span[@class='p_title']/a/@data-tid").get(default='').strip(),
-                                   title=post.xpath(".//span[@class='p_title']/a/text()").get(default='').strip(),
-                                   desc=post.xpath(".//div[@class='p_content']/text()").get(default='').strip(),
-                                   note_url=const.TIEBA_URL + post.xpath(".//span[@class='p_title']/a/@href").get(
-                                       default=''),
-                                   user_nickname=post.xpath(".//a[starts-with(@href, '/home/main')]/font/text()").get(
-                                       default='').strip(), user_link=const.TIEBA_URL + post.xpath(
-                    ".//a[starts-with(@href, '/home/main')]/@href").get(default=''),
-                                   tieba_name=post.xpath(".//a[@class='p_forum']/font/text()").get(default='').strip(),
-                                   tieba_link=const.TIEBA_URL + post.xpath(".//a[@class='p_forum']/@href").get(
-                                       default=''),
-                                   publish_time=post.xpath(".//font[@class='p_green p_date']/text()").get(
-                                       default='').strip(), )
+        for post in SEARCH_POST_XPATH(_parse_root(page_content)):
+            tieba_note = TiebaNote(note_id=_first(SEARCH_NOTE_ID_XPATH(post)).strip(),
+                                   title=_first(SEARCH_TITLE_XPATH(post)).strip(),
+                                   desc=_first(SEARCH_DESC_XPATH(post)).strip(),
+                                   note_url=const.TIEBA_URL + _first(SEARCH_NOTE_HREF_XPATH(post)),
+                                   user_nickname=_first(SEARCH_USER_NICKNAME_XPATH(post)).strip(),
+                                   user_link=const.TIEBA_URL + _first(SEARCH_USER_HREF_XPATH(post)),
+                                   tieba_name=_first(SEARCH_TIEBA_NAME_XPATH(post)).strip(),
+                                   tieba_link=const.TIEBA_URL + _first(SEARCH_TIEBA_HREF_XPATH(post)),
+                                   publish_time=_first(SEARCH_PUBLISH_TIME_XPATH(post)).strip(), )
             result.append(tieba_note)
         return result
 
@@ -69,28 +159,24 @@ class TieBaExtractor:
         Returns:
 
         """
-        page_content = page_content.replace('<!--', "")
-        content_selector = Selector(text=page_content)
-        xpath_selector = "//ul[@id='thread_list']/li"
-        post_list = content_selector.xpath(xpath_selector)
+        root = _parse_root(page_content.replace('<!--', ""))
+        # 吧名和吧链接是页面级字段，每页只取一次
+        tieba_name = _first(TIEBA_NAME_XPATH(root)).strip()
+        tieba_link = const.TIEBA_URL + _first(TIEBA_HREF_XPATH(root))
         result: List[TiebaNote] = []
-        for post_selector in post_list:
-            post_field_value: Dict = self.extract_data_field_value(post_selector)
+        for post in THREAD_LIST_XPATH(root):
+            post_field_value: Dict = self.extract_data_field_value(post)
             if not post_field_value:
                 continue
             note_id = str(post_field_value.get("id"))
             tieba_note = TiebaNote(note_id=note_id,
-                                   title=post_selector.xpath(".//a[@class='j_th_tit ']/text()").get(default='').strip(),
-                                   desc=post_selector.xpath(
-                                       ".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()").get(
-                                       default='').strip(), note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                   user_link=const.TIEBA_URL + post_selector.xpath(
-                                       ".//a[@class='frs-author-name j_user_card ']/@href").get(default='').strip(),
+                                   title=_first(THREAD_TITLE_XPATH(post)).strip(),
+                                   desc=_first(THREAD_DESC_XPATH(post)).strip(),
+                                   note_url=const.TIEBA_URL + f"/p/{note_id}",
+                                   user_link=const.TIEBA_URL + _first(THREAD_AUTHOR_HREF_XPATH(post)).strip(),
                                    user_nickname=post_field_value.get("authoer_nickname") or post_field_value.get(
                                        "author_name"),
-                                   tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                                       default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                    "//a[@class='card_title_fname']/@href").get(default=''),
+                                   tieba_name=tieba_name, tieba_link=tieba_link,
                                    total_replay_num=post_field_value.get("reply_num", 0))
             result.append(tieba_note)
         return result
@@ -104,31 +190,25 @@ class TieBaExtractor:
         Returns:
 
         """
-        content_selector = Selector(text=page_content)
-        first_floor_selector = content_selector.xpath("//div[@class='p_postlist'][1]")
-        only_view_author_link = content_selector.xpath("//*[@id='lzonly_cntn']/@href").get(default='').strip()
+        root = _parse_root(page_content)
+        first_floors = FIRST_FLOOR_XPATH(root)
+        only_view_author_link = _first(ONLY_VIEW_AUTHOR_HREF_XPATH(root)).strip()
         note_id = only_view_author_link.split("?")[0].split("/")[-1]
         # 帖子回复数、回复页数
-        thread_num_infos = content_selector.xpath(
-            "//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+        thread_num_infos = THREAD_NUM_INFO_XPATH(root)
         # IP地理位置、发表时间
-        other_info_content = content_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
-        ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
-        note = TiebaNote(note_id=note_id, title=content_selector.xpath("//title/text()").get(default='').strip(),
-                         desc=content_selector.xpath("//meta[@name='description']/@content").get(default='').strip(),
+        ip_location, publish_time = self.extract_tail_ip_and_pub_time(root)
+        note = TiebaNote(note_id=note_id, title=_first(TITLE_XPATH(root)).strip(),
+                         desc=_first(DESCRIPTION_XPATH(root)).strip(),
                          note_url=const.TIEBA_URL + f"/p/{note_id}",
-                         user_link=const.TIEBA_URL + first_floor_selector.xpath(
-                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                         user_nickname=first_floor_selector.xpath(
-                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                         user_avatar=first_floor_selector.xpath(".//a[@class='p_author_face ']/img/@src").get(
-                             default='').strip(),
-                         tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                             default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                "//a[@class='card_title_fname']/@href").get(default=''), ip_location=ip_location,
+                         user_link=const.TIEBA_URL + _first_in(first_floors, AUTHOR_FACE_HREF_XPATH).strip(),
+                         user_nickname=_first_in(first_floors, AUTHOR_NAME_XPATH).strip(),
+                         user_avatar=_first_in(first_floors, AUTHOR_AVATAR_XPATH).strip(),
+                         tieba_name=_first(TIEBA_NAME_XPATH(root)).strip(),
+                         tieba_link=const.TIEBA_URL + _first(TIEBA_HREF_XPATH(root)), ip_location=ip_location,
                          publish_time=publish_time,
-                         total_replay_num=thread_num_infos[0].xpath("./text()").get(default='').strip(),
-                         total_replay_page=thread_num_infos[1].xpath("./text()").get(default='').strip(), )
+                         total_replay_num=_first(TEXT_XPATH(thread_num_infos[0])).strip(),
+                         total_replay_page=_first(TEXT_XPATH(thread_num_infos[1])).strip(), )
         note.title = note.title.replace(f"【{note.tieba_name}】_百度贴吧", "")
         return note
 
@@ -142,29 +222,27 @@ class TieBaExtractor:
         Returns:
 
         """
-        xpath_selector = "//div[@class='l_post l_post_bright j_l_post clearfix  ']"
-        comment_list = Selector(text=page_content).xpath(xpath_selector)
+        root = _parse_root(page_content)
+        # 吧名是页面级字段，每页只取一次
+        tieba_name = _first(TIEBA_NAME_XPATH(root)).strip()
+        tieba_link = f"https://tieba.baidu.com/f?kw={tieba_name}"
+        note_url = const.TIEBA_URL + f"/p/{note_id}"
         result: List[TiebaComment] = []
-        for comment_selector in comment_list:
-            comment_field_value: Dict = self.extract_data_field_value(comment_selector)
+        for comment in COMMENT_POST_XPATH(root):
+            comment_field_value: Dict = self.extract_data_field_value(comment)
             if not comment_field_value:
                 continue
-            tieba_name = comment_selector.xpath("//a[@class='card_title_fname']/text()").get(default='').strip()
-            other_info_content = comment_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
-            ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
-            tieba_comment = TiebaComment(comment_id=str(comment_field_value.get("content").get("post_id")),
-                                         sub_comment_count=comment_field_value.get("content").get("comment_num"),
-                                         content=utils.extract_text_from_html(
-                                             comment_field_value.get("content").get("content")),
-                                         note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                         user_link=const.TIEBA_URL + comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                                         user_nickname=comment_selector.xpath(
-                                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                                         user_avatar=comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/img/@src").get(default='').strip(),
-                                         tieba_id=str(comment_field_value.get("content").get("forum_id", "")),
-                                         tieba_name=tieba_name, tieba_link=f"https://tieba.baidu.com/f?kw={tieba_name}",
+            content_value: Dict = comment_field_value.get("content")
+            ip_location, publish_time = self.extract_tail_ip_and_pub_time(comment)
+            tieba_comment = TiebaComment(comment_id=str(content_value.get("post_id")),
+                                         sub_comment_count=content_value.get("comment_num"),
+                                         content=utils.extract_text_from_html(content_value.get("content")),
+                                         note_url=note_url,
+                                         user_link=const.TIEBA_URL + _first(AUTHOR_FACE_HREF_XPATH(comment)).strip(),
+                                         user_nickname=_first(AUTHOR_NAME_XPATH(comment)).strip(),
+                                         user_avatar=_first(AUTHOR_AVATAR_XPATH(comment)).strip(),
+                                         tieba_id=str(content_value.get("forum_id", "")),
+                                         tieba_name=tieba_name, tieba_link=tieba_link,
                                          ip_location=ip_location, publish_time=publish_time, note_id=note_id, )
             result.append(tieba_comment)
         return result
@@ -179,23 +257,21 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(page_content)
+        root = _parse_root(page_content)
         comments = []
-        comment_ele_list = selector.xpath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
-        comment_ele_list.extend(selector.xpath("//li[@class='lzl_single_post j_lzl_s_p ']"))
+        comment_ele_list = SUB_COMMENT_FIRST_XPATH(root) + SUB_COMMENT_XPATH(root)
         for comment_ele in comment_ele_list:
             comment_value = self.extract_data_field_value(comment_ele)
             if not comment_value:
                 continue
-            comment_user_a_selector = comment_ele.xpath("./a[@class='j_user_card lzl_p_p']")[0]
-            content = utils.extract_text_from_html(
-                comment_ele.xpath(".//span[@class='lzl_content_main']").get(default=""))
+            comment_user_a = SUB_COMMENT_USER_XPATH(comment_ele)[0]
+            content = utils.extract_text_from_html(_outer_html(SUB_COMMENT_CONTENT_XPATH(comment_ele)))
             comment = TiebaComment(
                 comment_id=str(comment_value.get("spid")), content=content,
-                user_link=comment_user_a_selector.xpath("./@href").get(default=""),
+                user_link=_first(HREF_XPATH(comment_user_a)),
                 user_nickname=comment_value.get("showname"),
-                user_avatar=comment_user_a_selector.xpath("./img/@src").get(default=""),
-                publish_time=comment_ele.xpath(".//span[@class='lzl_time']/text()").get(default="").strip(),
+                user_avatar=_first(IMG_SRC_XPATH(comment_user_a)),
+                publish_time=_first(SUB_COMMENT_TIME_XPATH(comment_ele)).strip(),
                 parent_comment_id=parent_comment.comment_id,
                 note_id=parent_comment.note_id, note_url=parent_comment.note_url,
                 tieba_id=parent_comment.tieba_id, tieba_name=parent_comment.tieba_name,
@@ -249,12 +325,8 @@ class TieBaExtractor:
         Returns:
 
         """
-        selector = Selector(text=html_content)
         thread_id_list = []
-        xpath_selector = (
-            "//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href"
-        )
-        thread_url_list = selector.xpath(xpath_selector).getall()
+        thread_url_list = CREATOR_THREAD_HREF_XPATH(_parse_root(html_content))
         for thread_url in thread_url_list:
             thread_id = thread_url.split("?")[0].split("/")[-1]
             thread_id_list.append(thread_id)
@@ -262,18 +334,39 @@ class TieBaExtractor:
 
     def extract_ip_and_pub_time(self, html_content: str) -> Tuple[str, str]:
         """
-        提取IP位置和发布时间
+        从 post-tail-wrap 的 HTML 中提取IP位置和发布时间
         Args:
             html_content:
 
         Returns:
 
         """
-        pattern_pub_time = re.compile(r'<span class="tail-info">(\d{4}-\d{2}-\d{2} \d{2}:\d{2})</span>')
-        time_match = pattern_pub_time.search(html_content)
+        time_match = PUB_TIME_PATTERN.search(html_content)
         pub_time = time_match.group(1) if time_match else ""
         return self.extract_ip(html_content), pub_time
 
+    @staticmethod
+    def extract_tail_ip_and_pub_time(element: etree._Element) -> Tuple[str, str]:
+        """
+        在元素内第一个 post-tail-wrap 中提取IP位置和发布时间，直接读取文本节点，结果与 extract_ip_and_pub_time 一致
+        Args:
+            element: 评论元素或整个页面
+
+        Returns:
+
+        """
+        tail_wraps = POST_TAIL_WRAP_XPATH(element)
+        if not tail_wraps:
+            return "", ""
+        ip = ""
+        for text in TAIL_IP_TEXT_XPATH(tail_wraps[0]):
+            ip_match = TAIL_IP_PATTERN.search(text)
+            if ip_match:
+                ip = ip_match.group(1)
+                break
+        pub_time = next((text for text in TAIL_INFO_TEXT_XPATH(tail_wraps[0]) if TAIL_PUB_TIME_PATTERN.fullmatch(text)), "")
+        return ip, pub_time
+
     @staticmethod
     def extract_ip(html_content: str) -> str:
         """
@@ -284,8 +377,7 @@ class TieBaExtractor:
         Returns:
 
         """
-        pattern_ip = re.compile(r'IP属地:(\S+)</span>')
-        ip_match = pattern_ip.search(html_content)
+        ip_match = IP_PATTERN.search(html_content)
         ip = ip_match.group(1) if ip_match else ""
         return ip
 
@@ -315,9 +407,8 @@ class TieBaExtractor:
         Returns:
 
         """
-        pattern = re.compile(r'<span class="concern_num">\(<a[^>]*>(\d+)</a>\)</span>')
-        follow_match = pattern.findall(selectors[0].get())
-        fans_match = pattern.findall(selectors[1].get())
+        follow_match = FOLLOW_FANS_PATTERN.findall(selectors[0].get())
+        fans_match = FOLLOW_FANS_PATTERN.findall(selectors[1].get())
         follows = follow_match[0] if follow_match else 0
         fans = fans_match[0] if fans_match else 0
         return follows, fans
@@ -329,21 +420,21 @@ class TieBaExtractor:
         Returns: 1.9年
 
         """
-        pattern = re.compile(r'<span>吧龄:(\S+)</span>')
-        match = pattern.search(html_content)
+        match = REGISTRATION_DURATION_PATTERN.search(html_content)
         return match.group(1) if match else ""
 
     @staticmethod
-    def extract_data_field_value(selector: Selector) -> Dict:
+    def extract_data_field_value(selector: Union[Selector, etree._Element]) -> Dict:
         """
         提取data-field的值
         Args:
-            selector:
+            selector: parsel Selector 或 lxml 元素
 
         Returns:
 
         """
-        data_field_value = selector.xpath("./@data-field").get(default='').strip()
+        element = selector.root if isinstance(selector, Selector) else selector
+        data_field_value = (element.get("data-field") or "").strip()
         if not data_field_value or data_field_value == "{}":
             return {}
         try:
@@ -25,13 +25,14 @@ from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
 import config
+from base.base_crawler import AbstractApiClient
 from tools import utils
 
 from .exception import DataFetchError
 from .field import SearchType
 
 
-class WeiboClient:
+class WeiboClient(AbstractApiClient):
 
     def __init__(
         self,
@@ -52,8 +53,8 @@ class WeiboClient:
 
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        client = self.get_http_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
         if enable_return_response:
             return response
@@ -153,6 +154,8 @@ class WeiboClient:
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: str = "",
+        cursor_callback: Optional[Callable] = None,
     ):
         """
         get note all comments include sub comments
@@ -160,19 +163,24 @@ class WeiboClient:
         :param crawl_interval:
         :param callback:
         :param max_count:
+        :param cursor: 从该游标开始抓取，用于增量爬取时继续上次的进度，格式为 "max_id:max_id_type"
+        :param cursor_callback: 每页评论及其二级评论都交给 callback 后以 (下一页游标, 是否还有更多) 调用，被截断的页不调用
         :return:
         """
         result = []
         is_end = False
         max_id = -1
         max_id_type = 0
+        if cursor:
+            max_id, max_id_type = (int(value) for value in cursor.split(":"))
         while not is_end and len(result) < max_count:
             comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
             max_id: int = comments_res.get("max_id")
             max_id_type: int = comments_res.get("max_id_type")
             comment_list: List[Dict] = comments_res.get("data", [])
             is_end = max_id == 0
-            if len(result) + len(comment_list) > max_count:
+            truncated = len(result) + len(comment_list) > max_count
+            if truncated:
                 comment_list = comment_list[:max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(note_id, comment_list)
@@ -180,6 +188,9 @@ class WeiboClient:
             result.extend(comment_list)
             sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
             result.extend(sub_comment_result)
+            # 被截断的页剩余评论未抓取，游标停在该页，下次增量爬取从该页重新开始
+            if cursor_callback and not truncated:
+                cursor_callback(f"{max_id or 0}:{max_id_type or 0}", not is_end)
         return result
 
     @staticmethod
@@ -217,22 +228,25 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {"mblog": note_detail}
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
-
-    async def get_note_image(self, image_url: str) -> bytes:
+        client = self.get_http_client(self.proxy)
+        response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {"mblog": note_detail}
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+            return dict()
+
+    def _get_image_agent_url(self, image_url: str) -> str:
+        """
+        将微博图片地址转换为高清大图的图片代理地址
+        """
         image_url = image_url[8:]  # 去掉 https://
         sub_url = image_url.split("/")
         image_url = ""
@@ -247,18 +261,28 @@ class WeiboClient:
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
         final_uri = (f"{self._image_agent_host}"
                      f"{image_url}")
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", final_uri, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")    # 保留原始异常类型名称，以便开发者调试
+        return final_uri
+
+    def stream_note_image(self, image_url: str):
+        """
+        流式下载微博图片，配合 store 边下载边写入，支持断点续传
+        """
+        return self.media_source(self._get_image_agent_url(image_url))
+
+    async def get_note_image(self, image_url: str) -> bytes:
+        final_uri = self._get_image_agent_url(image_url)
+        client = self.get_http_client(self.proxy)
+        try:
+            response = await client.request("GET", final_uri, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
+                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
                 return None
+            else:
+                return response.content
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")    # 保留原始异常类型名称，以便开发者调试
+            return None
 
     async def get_creator_container_info(self, creator_id: str) -> Dict:
         """
@@ -21,11 +21,13 @@ from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.extraction_executor import get_extraction_executor
 from html import unescape
 
 from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
 from .help import get_search_id, sign
+from .signer import XiaoHongShuSignService
 from .extractor import XiaoHongShuExtractor
 
 
@@ -52,6 +54,8 @@ class XiaoHongShuClient(AbstractApiClient):
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
         self._extractor = XiaoHongShuExtractor()
+        self._extraction_executor = get_extraction_executor()
+        self._sign_service = XiaoHongShuSignService(playwright_page)
 
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
@@ -63,10 +67,8 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        encrypt_params = await self.playwright_page.evaluate(
-            "([url, data]) => window._webmsxyw(url,data)", [url, data]
-        )
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+        # 并发请求的签名由签名服务合并为一次 evaluate，localStorage 使用缓存值
+        encrypt_params, local_storage = await self._sign_service.sign(url, data)
         signs = sign(
             a1=self.cookie_dict.get("a1", ""),
             b1=local_storage.get("b1", ""),
@@ -80,8 +82,8 @@ class XiaoHongShuClient(AbstractApiClient):
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
-        self.headers.update(headers)
-        return self.headers
+        # 返回新的请求头字典，避免并发请求之间互相覆盖签名
+        return {**self.headers, **headers}
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -97,8 +99,8 @@ class XiaoHongShuClient(AbstractApiClient):
         """
         # return response.text
         return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        client = self.get_http_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code == 471 or response.status_code == 461:
             # someday someone maybe will bypass captcha
@@ -156,25 +158,31 @@ class XiaoHongShuClient(AbstractApiClient):
             **kwargs,
         )
 
+    def stream_note_media(self, url: str):
+        """
+        流式下载图片或视频，配合 store 边下载边写入，支持断点续传
+        """
+        return self.media_source(url)
+
     async def get_note_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(
-                        f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                    )
-                    return None
-                else:
-                    return response.content
-            except (
-                httpx.HTTPError
-            ) as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+        client = self.get_http_client(self.proxy)
+        try:
+            response = await client.request("GET", url, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
                 utils.logger.error(
-                    f"[XiaoHongShuClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}"
-                )  # 保留原始异常类型名称，以便开发者调试
+                    f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
+                )
                 return None
+            else:
+                return response.content
+        except (
+            httpx.HTTPError
+        ) as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(
+                f"[XiaoHongShuClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}"
+            )  # 保留原始异常类型名称，以便开发者调试
+            return None
 
     async def pong(self) -> bool:
         """
@@ -208,6 +216,14 @@ class XiaoHongShuClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self._sign_service.invalidate()
+
+    async def close(self):
+        """
+        关闭签名服务与 httpx 连接池
+        """
+        await self._sign_service.close()
+        await super().close()
 
     async def get_note_by_keyword(
         self,
@@ -343,6 +359,8 @@ class XiaoHongShuClient(AbstractApiClient):
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: str = "",
+        cursor_callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
         获取指定笔记下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
@@ -352,12 +370,14 @@ class XiaoHongShuClient(AbstractApiClient):
             crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
             max_count: 一次笔记爬取的最大评论数量
+            cursor: 从该游标开始抓取，用于增量爬取时继续上次的进度
+            cursor_callback: 每页评论及其二级评论都交给 callback 后以 (下一页游标, 是否还有更多) 调用，被截断的页不调用
         Returns:
 
         """
         result = []
         comments_has_more = True
-        comments_cursor = ""
+        comments_cursor = cursor
         while comments_has_more and len(result) < max_count:
             comments_res = await self.get_note_comments(
                 note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
@@ -370,7 +390,8 @@ class XiaoHongShuClient(AbstractApiClient):
                 )
                 break
             comments = comments_res["comments"]
-            if len(result) + len(comments) > max_count:
+            truncated = len(result) + len(comments) > max_count
+            if truncated:
                 comments = comments[: max_count - len(result)]
             if callback:
                 await callback(note_id, comments)
@@ -383,6 +404,9 @@ class XiaoHongShuClient(AbstractApiClient):
                 callback=callback,
             )
             result.extend(sub_comments)
+            # 被截断的页剩余评论未抓取，游标停在该页，下次增量爬取从该页重新开始
+            if cursor_callback and not truncated:
+                cursor_callback(comments_cursor, comments_has_more)
         return result
 
     async def get_comments_all_sub_comments(
@@ -461,7 +485,7 @@ class XiaoHongShuClient(AbstractApiClient):
         html_content = await self.request(
             "GET", self._domain + uri, return_response=True, headers=self.headers
         )
-        return self._extractor.extract_creator_info_from_html(html_content)
+        return await self._extraction_executor.run(self._extractor.extract_creator_info_from_html, html_content)
 
     async def get_notes_by_creator(
         self,
@@ -591,4 +615,4 @@ class XiaoHongShuClient(AbstractApiClient):
             method="GET", url=url, return_response=True, headers=copy_headers
         )
 
-        return self._extractor.extract_note_detail_from_html(note_id, html)
+        return await self._extraction_executor.run(self._extractor.extract_note_detail_from_html, note_id, html)
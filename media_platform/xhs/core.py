@@ -9,10 +9,10 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 import asyncio
+import functools
 import os
-import random
 from asyncio import Task
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from playwright.async_api import (
     BrowserContext,
@@ -31,6 +31,9 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.comment_pipeline import CommentPipeline
+from tools.crawl_index import get_crawl_index
+from tools.media_scheduler import drain_media_downloads, get_media_scheduler
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
@@ -63,64 +66,68 @@ class XiaoHongShuCrawler(AbstractCrawler):
             playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(ip_proxy_info)
 
         async with async_playwright() as playwright:
-            # 根据配置选择启动模式
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[XiaoHongShuCrawler] 使用CDP模式启动浏览器")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    self.user_agent,
-                    headless=config.CDP_HEADLESS,
-                )
-            else:
-                utils.logger.info("[XiaoHongShuCrawler] 使用标准模式启动浏览器")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(
-                    chromium,
-                    playwright_proxy_format,
-                    self.user_agent,
-                    headless=config.HEADLESS,
-                )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
-
-            # Create a client to interact with the xiaohongshu website.
-            self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
-            if not await self.xhs_client.pong():
-                login_obj = XiaoHongShuLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.xhs_client.update_cookies(browser_context=self.browser_context)
-
-            # Initialize mall manager for e-commerce data
-            self.mall_manager = XiaoHongShuMallManager(self.xhs_client, self.context_page)
-            utils.logger.info("[XiaoHongShuCrawler.start] Mall manager initialized")
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            elif config.CRAWLER_TYPE == "mall":
-                # Get mall product data
-                await self.get_mall_products()
-            else:
-                pass
-
-            utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
+            try:
+                # 根据配置选择启动模式
+                if config.ENABLE_CDP_MODE:
+                    utils.logger.info("[XiaoHongShuCrawler] 使用CDP模式启动浏览器")
+                    self.browser_context = await self.launch_browser_with_cdp(
+                        playwright,
+                        playwright_proxy_format,
+                        self.user_agent,
+                        headless=config.CDP_HEADLESS,
+                    )
+                else:
+                    utils.logger.info("[XiaoHongShuCrawler] 使用标准模式启动浏览器")
+                    # Launch a browser context.
+                    chromium = playwright.chromium
+                    self.browser_context = await self.launch_browser(
+                        chromium,
+                        playwright_proxy_format,
+                        self.user_agent,
+                        headless=config.HEADLESS,
+                    )
+                # stealth.min.js is a js script to prevent the website from detecting the crawler.
+                await self.browser_context.add_init_script(path="libs/stealth.min.js")
+                self.context_page = await self.browser_context.new_page()
+                await self.context_page.goto(self.index_url)
+
+                # Create a client to interact with the xiaohongshu website.
+                self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
+                if not await self.xhs_client.pong():
+                    login_obj = XiaoHongShuLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # input your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    await login_obj.begin()
+                    await self.xhs_client.update_cookies(browser_context=self.browser_context)
+
+                # Initialize mall manager for e-commerce data
+                self.mall_manager = XiaoHongShuMallManager(self.xhs_client, self.context_page)
+                utils.logger.info("[XiaoHongShuCrawler.start] Mall manager initialized")
+
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                elif config.CRAWLER_TYPE == "mall":
+                    # Get mall product data
+                    await self.get_mall_products()
+                else:
+                    pass
+
+                utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
+            finally:
+                # 爬取中途出错也要等待媒体下载完成并关闭 API 客户端的连接池和浏览器
+                await self.close()
 
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
@@ -129,11 +136,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in self.checkpoint.iter_tasks(config.KEYWORDS.split(",")):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            search_id = get_search_id()
+            page = self.checkpoint.resume_page(1)
+            search_id = self.checkpoint.resume_search_id(get_search_id())
             while (page - start_page + 1) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
@@ -155,36 +162,61 @@ class XiaoHongShuCrawler(AbstractCrawler):
                         utils.logger.info("No more content!")
                         break
                     semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = [
-                        self.get_note_detail_async_task(
-                            note_id=post_item.get("id"),
-                            xsec_source=post_item.get("xsec_source"),
-                            xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
-                        ) for post_item in notes_res.get("items", {}) if post_item.get("model_type") not in ("rec_query", "hot_query")
-                    ]
+                    crawl_index = get_crawl_index()
+                    task_list = []
+                    for post_item in notes_res.get("items", {}):
+                        if post_item.get("model_type") in ("rec_query", "hot_query"):
+                            continue
+                        # 增量爬取：之前已爬取过的笔记不再获取详情，只继续抓取未完成的评论
+                        if crawl_index.is_seen("xhs", post_item.get("id")):
+                            note_ids.append(post_item.get("id"))
+                            xsec_tokens.append(post_item.get("xsec_token"))
+                            continue
+                        # 其他关键词已经获取过的笔记直接复用详情
+                        task_list.append(
+                            self.content_dedup.run_once(
+                                "detail",
+                                post_item.get("id"),
+                                functools.partial(
+                                    self.get_note_detail_async_task,
+                                    note_id=post_item.get("id"),
+                                    xsec_source=post_item.get("xsec_source"),
+                                    xsec_token=post_item.get("xsec_token"),
+                                    semaphore=semaphore,
+                                ),
+                            )
+                        )
                     note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
+                    upserts_content = xhs_store.XhsStoreFactory.create_store().upserts_content
+                    for note_detail, fetched in note_details:
                         if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
+                            with self.content_dedup.source_keywords(note_detail.get("note_id")):
+                                # 重复命中时只有数据库存储重新保存以更新关键词，csv/json 只能追加，会多出重复的行
+                                if fetched or upserts_content:
+                                    await xhs_store.update_xhs_note(note_detail)
+                            if fetched:
+                                await self.get_notice_media(note_detail)
+                                crawl_index.mark_seen("xhs", note_detail.get("note_id"))
                             note_ids.append(note_detail.get("note_id"))
                             xsec_tokens.append(note_detail.get("xsec_token"))
+                    self.checkpoint.save_page(page, note_ids, search_id)
                     page += 1
                     utils.logger.info(f"[XiaoHongShuCrawler.search] Note details: {note_details}")
                     await self.batch_get_note_comments(note_ids, xsec_tokens)
+                    self.checkpoint.finish_page(page)
                     
                     # Sleep after each page navigation
                     await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
                     utils.logger.info(f"[XiaoHongShuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
                 except DataFetchError:
                     utils.logger.error("[XiaoHongShuCrawler.search] Get note detail error")
+                    self.aborted = True
                     break
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
         utils.logger.info("[XiaoHongShuCrawler.get_creators_and_notes] Begin get xiaohongshu creators")
-        for user_id in config.XHS_CREATOR_ID_LIST:
+        for user_id in self.checkpoint.iter_tasks(config.XHS_CREATOR_ID_LIST):
             # get creator detail info from web html content
             createor_info: Dict = await self.xhs_client.get_creator_info(user_id=user_id)
             if createor_info:
@@ -204,6 +236,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             for note_item in all_notes_list:
                 note_ids.append(note_item.get("note_id"))
                 xsec_tokens.append(note_item.get("xsec_token"))
+            self.checkpoint.save_page(1, note_ids)
             await self.batch_get_note_comments(note_ids, xsec_tokens)
 
     async def fetch_creator_notes_detail(self, note_list: List[Dict]):
@@ -211,13 +244,14 @@ class XiaoHongShuCrawler(AbstractCrawler):
         Concurrently obtain the specified post list and save the data
         """
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        crawl_index = get_crawl_index()
         task_list = [
             self.get_note_detail_async_task(
                 note_id=post_item.get("note_id"),
                 xsec_source=post_item.get("xsec_source"),
                 xsec_token=post_item.get("xsec_token"),
                 semaphore=semaphore,
-            ) for post_item in note_list
+            ) for post_item in note_list if not crawl_index.is_seen("xhs", post_item.get("note_id"))
         ]
 
         note_details = await asyncio.gather(*task_list)
@@ -225,6 +259,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             if note_detail:
                 await xhs_store.update_xhs_note(note_detail)
                 await self.get_notice_media(note_detail)
+                crawl_index.mark_seen("xhs", note_detail.get("note_id"))
 
     async def get_specified_notes(self):
         """
@@ -312,32 +347,46 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
         utils.logger.info(f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}")
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for index, note_id in enumerate(note_list):
-            task = asyncio.create_task(
-                self.get_comments(note_id=note_id, xsec_token=xsec_tokens[index], semaphore=semaphore),
-                name=note_id,
-            )
-            task_list.append(task)
-        await asyncio.gather(*task_list)
+        # 评论页经由流水线队列交给写入协程存储，抓取下一页时不必等待存储完成
+        async with CommentPipeline(xhs_store.batch_update_xhs_note_comments, name="xhs_comments") as pipeline:
+            task_list: List[Task] = []
+            for index, note_id in enumerate(note_list):
+                task = asyncio.create_task(
+                    self.get_comments(note_id=note_id, xsec_token=xsec_tokens[index], semaphore=semaphore, callback=pipeline),
+                    name=note_id,
+                )
+                task_list.append(task)
+            await asyncio.gather(*task_list)
 
-    async def get_comments(self, note_id: str, xsec_token: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, note_id: str, xsec_token: str, semaphore: asyncio.Semaphore, callback: Optional[Callable] = None):
         """Get note comments with keyword filtering and quantity limitation"""
-        async with semaphore:
-            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}")
-            # Use fixed crawling interval
-            crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
-            await self.xhs_client.get_note_all_comments(
-                note_id=note_id,
-                xsec_token=xsec_token,
-                crawl_interval=crawl_interval,
-                callback=xhs_store.batch_update_xhs_note_comments,
-                max_count=CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-            )
-            
-            # Sleep after fetching comments
-            await asyncio.sleep(crawl_interval)
-            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for note {note_id}")
+        cursor, comments_done = self.get_comment_state("xhs", note_id)
+        if comments_done:
+            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] All comments of note {note_id} were crawled before, skip")
+            return
+
+        async def fetch_comments():
+            async with semaphore:
+                utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}")
+                # Use fixed crawling interval
+                crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
+                await self.xhs_client.get_note_all_comments(
+                    note_id=note_id,
+                    xsec_token=xsec_token,
+                    crawl_interval=crawl_interval,
+                    callback=callback or xhs_store.batch_update_xhs_note_comments,
+                    max_count=CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                    cursor=cursor or "",
+                    cursor_callback=self.comment_cursor_callback("xhs", note_id, callback),
+                )
+                
+                # Sleep after fetching comments
+                await asyncio.sleep(crawl_interval)
+                utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for note {note_id}")
+                return True
+
+        # 多个关键词命中同一笔记时评论只抓取一次
+        await self.content_dedup.run_once("comments", note_id, fetch_comments)
 
     async def create_xhs_client(self, httpx_proxy: Optional[str]) -> XiaoHongShuClient:
         """Create xhs client"""
@@ -431,11 +480,16 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # 媒体下载使用 API 客户端的连接池，先等待队列中的下载完成
+        await drain_media_downloads()
+        # 关闭 API 客户端持有的 httpx 连接池
+        if getattr(self, "xhs_client", None):
+            await self.xhs_client.close()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
-        else:
+        elif getattr(self, "browser_context", None):
             await self.browser_context.close()
         utils.logger.info("[XiaoHongShuCrawler.close] Browser context closed ...")
 
@@ -468,16 +522,12 @@ class XiaoHongShuCrawler(AbstractCrawler):
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.xhs_client.get_note_media(url)
-            await asyncio.sleep(random.random())
-            if content is None:
-                continue
-            extension = ".mp4"
-            file_name = f"{note_id}_{videoNum}{extension}"
-            file_path = os.path.join(utils.get_videos_path(), file_name)
-            with open(file_path, "wb") as f:
-                f.write(content)
-            videoNum += 1
+            extension_file_name = f"{picNum}.jpg"
+            picNum += 1
+            # 放入后台下载队列，不阻塞笔记的抓取
+            await get_media_scheduler().submit(
+                xhs_store.update_xhs_note_image, note_id, self.xhs_client.stream_note_media(url), extension_file_name
+            )
 
     async def get_mall_products(self) -> None:
         """Get mall product data"""
@@ -550,10 +600,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
             return
         videoNum = 0
         for url in videos:
-            content = await self.xhs_client.get_note_media(url)
-            await asyncio.sleep(random.random())
-            if content is None:
-                continue
             extension_file_name = f"{videoNum}.mp4"
             videoNum += 1
-            await xhs_store.update_xhs_note_video(note_id, content, extension_file_name)
+            await get_media_scheduler().submit(
+                xhs_store.update_xhs_note_video, note_id, self.xhs_client.stream_note_media(url), extension_file_name
+            )
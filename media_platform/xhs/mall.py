@@ -15,10 +15,12 @@ import time
 from typing import Dict, List, Optional, Any, Callable
 from urllib.parse import urlencode
 
+import numpy as np
 from playwright.async_api import Page, BrowserContext
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 from tools import utils
+from tools.columnar_stats import RecordColumns, group_by, group_members, to_number
 from .client import XiaoHongShuClient
 from .exception import DataFetchError
 
@@ -267,6 +269,13 @@ class XiaoHongShuMallClient:
         return all_products
 
 
+# 商品统计用到的数值字段，统计时一次读入列式数组
+PRODUCT_METRIC_FIELDS = ("price", "sales_count", "rating")
+# 价格区间（左开右闭）
+PRICE_RANGE_EDGES = (50, 100, 200, 500)
+PRICE_RANGE_LABELS = ("0-50", "50-100", "100-200", "200-500", "500+")
+
+
 class XiaoHongShuMallDataProcessor:
     """小红书商城数据处理器"""
     
@@ -343,41 +352,16 @@ class XiaoHongShuMallDataProcessor:
             return {}
         
         try:
-            total_products = len(products)
-            total_sales = sum(p.get("sales_count", 0) for p in products)
-            avg_price = sum(p.get("price", 0) for p in products) / total_products
-            avg_rating = sum(p.get("rating", 0) for p in products) / total_products
-            
-            # 价格区间分布
-            price_ranges = {
-                "0-50": 0,
-                "50-100": 0,
-                "100-200": 0,
-                "200-500": 0,
-                "500+": 0
-            }
-            
-            for product in products:
-                price = product.get("price", 0)
-                if price <= 50:
-                    price_ranges["0-50"] += 1
-                elif price <= 100:
-                    price_ranges["50-100"] += 1
-                elif price <= 200:
-                    price_ranges["100-200"] += 1
-                elif price <= 500:
-                    price_ranges["200-500"] += 1
-                else:
-                    price_ranges["500+"] += 1
-            
+            columns = RecordColumns(products, PRODUCT_METRIC_FIELDS)
+            summary = columns.summary()
             return {
-                "total_products": total_products,
-                "total_sales": total_sales,
-                "avg_price": round(avg_price, 2),
-                "avg_rating": round(avg_rating, 2),
-                "price_distribution": price_ranges,
-                "top_selling": sorted(products, key=lambda x: x.get("sales_count", 0), reverse=True)[:10],
-                "highest_rated": sorted(products, key=lambda x: x.get("rating", 0), reverse=True)[:10]
+                "total_products": len(columns),
+                "total_sales": summary["sales_count"]["total"],
+                "avg_price": summary["price"]["average"],
+                "avg_rating": summary["rating"]["average"],
+                "price_distribution": columns.histogram("price", PRICE_RANGE_EDGES, PRICE_RANGE_LABELS),
+                "top_selling": columns.top_k("sales_count", 10),
+                "highest_rated": columns.top_k("rating", 10)
             }
         except Exception as e:
             utils.logger.error(f"[XiaoHongShuMallDataProcessor.calculate_product_metrics] 计算商品指标失败: {e}")
@@ -396,18 +380,21 @@ class XiaoHongShuMallDataProcessor:
         """
         if not products_data:
             return {}
-        
-        prices = [product.get('price', 0) for product in products_data if product.get('price')]
-        
-        if not prices:
+        return XiaoHongShuMallDataProcessor._price_trends(RecordColumns(products_data, PRODUCT_METRIC_FIELDS))
+
+    @staticmethod
+    def _price_trends(columns: RecordColumns) -> Dict:
+        prices = columns.column("price")
+        prices = prices[prices != 0]
+        if not len(prices):
             return {}
-        
+        min_price, max_price = prices.min(), prices.max()
         return {
-            'min_price': min(prices),
-            'max_price': max(prices),
-            'avg_price': sum(prices) / len(prices),
-            'price_range': max(prices) - min(prices),
-            'total_products': len(products_data)
+            'min_price': to_number(min_price),
+            'max_price': to_number(max_price),
+            'avg_price': float(prices.mean()),
+            'price_range': to_number(max_price - min_price),
+            'total_products': len(columns)
         }
 
     @staticmethod
@@ -423,30 +410,33 @@ class XiaoHongShuMallDataProcessor:
         """
         if not products_data:
             return {}
-        
+        return XiaoHongShuMallDataProcessor._category_stats(
+            RecordColumns(products_data, PRODUCT_METRIC_FIELDS, key_fields={'category': '未分类', 'product_id': ''})
+        )
+
+    @staticmethod
+    def _category_stats(columns: RecordColumns) -> Dict:
+        """
+        分类编码后用 bincount 一次算出各分类的数量、销量和有价格商品的均价
+        """
+        categories, codes = group_by(columns.keys['category'])
+        group_count = len(categories)
+        counts = np.bincount(codes, minlength=group_count)
+        total_sales = np.bincount(codes, weights=columns.column('sales_count'), minlength=group_count)
+        prices = columns.column('price')
+        priced = prices != 0
+        price_sums = np.bincount(codes[priced], weights=prices[priced], minlength=group_count)
+        price_counts = np.bincount(codes[priced], minlength=group_count)
+        product_ids = group_members(codes, group_count, columns.keys['product_id'])
+
         category_stats = {}
-        
-        for product in products_data:
-            category = product.get('category', '未分类')
-            if category not in category_stats:
-                category_stats[category] = {
-                    'count': 0,
-                    'total_sales': 0,
-                    'avg_price': 0,
-                    'product_ids': []
-                }
-            
-            category_stats[category]['count'] += 1
-            category_stats[category]['total_sales'] += product.get('sales_count', 0)
-            category_stats[category]['product_ids'].append(product.get('product_id', ''))
-        
-        # 计算平均价格
-        for category, stats in category_stats.items():
-            category_products = [p for p in products_data if p.get('category') == category]
-            prices = [p.get('price', 0) for p in category_products if p.get('price')]
-            if prices:
-                stats['avg_price'] = sum(prices) / len(prices)
-        
+        for index, category in enumerate(categories):
+            category_stats[category] = {
+                'count': int(counts[index]),
+                'total_sales': to_number(total_sales[index]),
+                'avg_price': float(price_sums[index] / price_counts[index]) if price_counts[index] else 0,
+                'product_ids': product_ids[index]
+            }
         return category_stats
 
     @staticmethod
@@ -471,29 +461,23 @@ class XiaoHongShuMallDataProcessor:
                 'report_time': time.time()
             }
         
-        # 基础统计
-        total_products = len(products_data)
-        total_sales = sum(product.get('sales_count', 0) for product in products_data)
-        prices = [product.get('price', 0) for product in products_data if product.get('price')]
-        avg_price = sum(prices) / len(prices) if prices else 0
+        # 商品只读入一次，各项统计共用同一份列式数组
+        columns = RecordColumns(products_data, PRODUCT_METRIC_FIELDS, key_fields={'category': '未分类', 'product_id': ''})
+        summary = columns.summary()
         
         # 价格趋势分析
-        price_trends = XiaoHongShuMallDataProcessor.analyze_price_trends(products_data)
+        price_trends = XiaoHongShuMallDataProcessor._price_trends(columns)
         
         # 分类统计
-        category_stats = XiaoHongShuMallDataProcessor.generate_category_stats(products_data)
+        category_stats = XiaoHongShuMallDataProcessor._category_stats(columns)
         
         # 热门商品（按销量排序）
-        top_products = sorted(
-            products_data, 
-            key=lambda x: x.get('sales_count', 0), 
-            reverse=True
-        )[:10]
+        top_products = columns.top_k('sales_count', 10)
         
         return {
-            'total_products': total_products,
-            'total_sales': total_sales,
-            'avg_price': avg_price,
+            'total_products': len(columns),
+            'total_sales': summary['sales_count']['total'],
+            'avg_price': price_trends.get('avg_price', 0),
             'price_trends': price_trends,
             'category_stats': category_stats,
             'top_products': [
@@ -0,0 +1,164 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书请求签名服务，合并并发的签名请求，一次 evaluate 完成一批签名
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from playwright.async_api import Page
+
+import config
+from tools import utils
+from tools.latency_histogram import LatencyHistogram
+
+# 一次 evaluate 对一批 (url, data) 调用 window._webmsxyw，localStorage 只在缓存失效时随批次一起读取
+BATCH_SIGN_JS = """
+([items, withStorage]) => {
+    const results = items.map(([url, data]) => {
+        try {
+            return {ok: window._webmsxyw(url, data)};
+        } catch (e) {
+            return {error: String(e)};
+        }
+    });
+    return {results: results, storage: withStorage ? {...window.localStorage} : null};
+}
+"""
+
+
+class XiaoHongShuSignService:
+    """
+    签名服务：
+    1. localStorage（b1 等）缓存在本地，cookie 更新时通过 invalidate 失效
+    2. 同一时间窗口内的签名请求合并成一次 evaluate，避免每个请求两次浏览器往返
+    3. 记录每个请求从提交到拿到签名的耗时直方图
+    """
+
+    def __init__(
+        self,
+        playwright_page: Page,
+        batch_window_ms: float = config.XHS_SIGN_BATCH_WINDOW_MS,
+        max_batch_size: int = config.XHS_SIGN_MAX_BATCH_SIZE,
+    ):
+        self.playwright_page = playwright_page
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._local_storage: Optional[Dict[str, str]] = None
+        # invalidate 的次数，evaluate 期间 localStorage 被失效时不缓存这一批读到的旧值
+        self._storage_version = 0
+        self._pending: List[Tuple[str, Any, asyncio.Future]] = []
+        self._worker: Optional[asyncio.Task] = None
+        self.latency = LatencyHistogram("xhs_sign")
+        self.evaluate_count = 0
+        self.sign_count = 0
+
+    def invalidate(self):
+        """
+        cookie 更新后调用，下一批签名时重新读取 localStorage
+        """
+        self._local_storage = None
+        self._storage_version += 1
+
+    async def sign(self, url: str, data=None) -> Tuple[Dict, Dict[str, str]]:
+        """
+        提交一个签名请求，等待所在批次完成
+        Args:
+            url: 请求路由（包含查询参数）
+            data: 请求体
+
+        Returns:
+            (window._webmsxyw 的返回值, 所在批次签名时使用的 localStorage)
+        """
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((url, data, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        try:
+            return await future
+        finally:
+            self.latency.record(time.perf_counter() - start)
+
+    async def _run(self):
+        """
+        批次循环：等待一个时间窗口收集请求，每次最多取 max_batch_size 个做一次 evaluate，直到没有待签名请求
+        """
+        while self._pending:
+            if len(self._pending) < self.max_batch_size:
+                await asyncio.sleep(self.batch_window)
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            await self._sign_batch(batch)
+
+    async def _sign_batch(self, batch: List[Tuple[str, Any, asyncio.Future]]):
+        """
+        签名一批请求，evaluate 失败或返回结果格式不对时把异常设置到这一批的所有 future 上，不让调用方一直等待
+        """
+        try:
+            await self._evaluate_batch(batch)
+        except asyncio.CancelledError:
+            for _, _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _evaluate_batch(self, batch: List[Tuple[str, Any, asyncio.Future]]):
+        with_storage = self._local_storage is None
+        local_storage = self._local_storage
+        storage_version = self._storage_version
+        res = await self.playwright_page.evaluate(
+            BATCH_SIGN_JS, [[[url, data] for url, data, _ in batch], with_storage]
+        )
+        if not isinstance(res, dict):
+            raise Exception(f"[XiaoHongShuSignService] unexpected batch sign result: {res!r}")
+        self.evaluate_count += 1
+        self.sign_count += len(batch)
+        if with_storage:
+            local_storage = res.get("storage") or {}
+            if storage_version == self._storage_version:
+                self._local_storage = local_storage
+        for (url, _, future), result in zip(batch, res.get("results") or []):
+            if future.done():
+                continue
+            if not isinstance(result, dict):
+                future.set_exception(Exception(f"[XiaoHongShuSignService] sign {url} error: unexpected result {result!r}"))
+            elif "error" in result:
+                future.set_exception(Exception(f"[XiaoHongShuSignService] sign {url} error: {result['error']}"))
+            else:
+                future.set_result((result.get("ok") or {}, local_storage))
+        for url, _, future in batch:
+            if not future.done():
+                future.set_exception(Exception(f"[XiaoHongShuSignService] sign {url} error: missing result"))
+
+    def get_stats(self) -> Dict:
+        """
+        签名统计：签名数、evaluate 次数、平均批大小以及耗时分布
+        """
+        return {
+            "signs": self.sign_count,
+            "evaluates": self.evaluate_count,
+            "avg_batch_size": round(self.sign_count / self.evaluate_count, 2) if self.evaluate_count else 0,
+            "latency": self.latency.summary(),
+        }
+
+    async def close(self):
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+        for _, _, future in self._pending:
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        utils.logger.info(f"[XiaoHongShuSignService.close] sign stats: {self.get_stats()}")
@@ -24,10 +24,11 @@ from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
+from tools.extraction_executor import get_extraction_executor
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
-from .help import ZhihuExtractor, sign
+from .help import ZhihuExtractor, async_sign, close_sign_pool, get_sign_stats
 
 
 class ZhiHuClient(AbstractApiClient):
@@ -46,6 +47,7 @@ class ZhiHuClient(AbstractApiClient):
         self.default_headers = headers
         self.cookie_dict = cookie_dict
         self._extractor = ZhihuExtractor()
+        self._extraction_executor = get_extraction_executor()
 
     async def _pre_headers(self, url: str) -> Dict:
         """
@@ -58,7 +60,7 @@ class ZhiHuClient(AbstractApiClient):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await async_sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
@@ -79,8 +81,8 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        client = self.get_http_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code != 200:
             utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
@@ -153,6 +155,14 @@ class ZhiHuClient(AbstractApiClient):
         self.default_headers["cookie"] = cookie_str
         self.cookie_dict = cookie_dict
 
+    async def close(self):
+        """
+        关闭签名进程池与 httpx 连接池
+        """
+        utils.logger.info(f"[ZhiHuClient.close] sign stats: {get_sign_stats()}")
+        await close_sign_pool()
+        await super().close()
+
     async def get_current_user_info(self) -> Dict:
         """
         获取当前登录用户信息
@@ -266,6 +276,8 @@ class ZhiHuClient(AbstractApiClient):
         content: ZhihuContent,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        cursor: str = "",
+        cursor_callback: Optional[Callable] = None,
     ) -> List[ZhihuComment]:
         """
         获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
@@ -273,13 +285,15 @@ class ZhiHuClient(AbstractApiClient):
             content: 内容详情对象(问题｜文章｜视频)
             crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
+            cursor: 从该游标开始抓取，用于增量爬取时继续上次的进度
+            cursor_callback: 每页评论及其子评论都交给 callback 后以 (下一页游标, 是否还有更多) 调用
 
         Returns:
 
         """
         result: List[ZhihuComment] = []
         is_end: bool = False
-        offset: str = ""
+        offset: str = cursor
         limit: int = 10
         while not is_end:
             root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, limit)
@@ -299,6 +313,8 @@ class ZhiHuClient(AbstractApiClient):
             result.extend(comments)
             await self.get_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval, callback=callback)
             await asyncio.sleep(crawl_interval)
+            if cursor_callback:
+                cursor_callback(offset, not is_end)
         return result
 
     async def get_comments_all_sub_comments(
@@ -360,7 +376,7 @@ class ZhiHuClient(AbstractApiClient):
         """
         uri = f"/people/{url_token}"
         html_content: str = await self.get(uri, return_response=True)
-        return self._extractor.extract_creator(url_token, html_content)
+        return await self._extraction_executor.run(self._extractor.extract_creator, url_token, html_content)
 
     async def get_creator_answers(self, url_token: str, offset: int = 0, limit: int = 20) -> Dict:
         """
@@ -539,7 +555,7 @@ class ZhiHuClient(AbstractApiClient):
         """
         uri = f"/question/{question_id}/answer/{answer_id}"
         response_html = await self.get(uri, return_response=True)
-        return self._extractor.extract_answer_content_from_html(response_html)
+        return await self._extraction_executor.run(self._extractor.extract_answer_content_from_html, response_html)
 
     async def get_article_info(self, article_id: str) -> Optional[ZhihuContent]:
         """
@@ -552,7 +568,7 @@ class ZhiHuClient(AbstractApiClient):
         """
         uri = f"/p/{article_id}"
         response_html = await self.get(uri, return_response=True)
-        return self._extractor.extract_article_content_from_html(response_html)
+        return await self._extraction_executor.run(self._extractor.extract_article_content_from_html, response_html)
 
     async def get_video_info(self, video_id: str) -> Optional[ZhihuContent]:
         """
@@ -565,4 +581,4 @@ class ZhiHuClient(AbstractApiClient):
         """
         uri = f"/zvideo/{video_id}"
         response_html = await self.get(uri, return_response=True)
-        return self._extractor.extract_zvideo_content_from_html(response_html)
+        return await self._extraction_executor.run(self._extractor.extract_zvideo_content_from_html, response_html)
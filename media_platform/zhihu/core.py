@@ -14,7 +14,7 @@ import asyncio
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
-from typing import Dict, List, Optional, Tuple, cast
+from typing import Callable, Dict, List, Optional, Tuple, cast
 
 from playwright.async_api import (
     BrowserContext,
@@ -32,6 +32,8 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.comment_pipeline import CommentPipeline
+from tools.crawl_index import get_crawl_index
 from var import crawler_type_var, source_keyword_var
 
 from .client import ZhiHuClient
@@ -70,67 +72,71 @@ class ZhihuCrawler(AbstractCrawler):
             )
 
         async with async_playwright() as playwright:
-            # 根据配置选择启动模式
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[ZhihuCrawler] 使用CDP模式启动浏览器")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    self.user_agent,
-                    headless=config.CDP_HEADLESS,
-                )
-            else:
-                utils.logger.info("[ZhihuCrawler] 使用标准模式启动浏览器")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(
-                    chromium, None, self.user_agent, headless=config.HEADLESS
-                )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url, wait_until="domcontentloaded")
-
-            # Create a client to interact with the zhihu website.
-            self.zhihu_client = await self.create_zhihu_client(httpx_proxy_format)
-            if not await self.zhihu_client.pong():
-                login_obj = ZhiHuLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
+            try:
+                # 根据配置选择启动模式
+                if config.ENABLE_CDP_MODE:
+                    utils.logger.info("[ZhihuCrawler] 使用CDP模式启动浏览器")
+                    self.browser_context = await self.launch_browser_with_cdp(
+                        playwright,
+                        playwright_proxy_format,
+                        self.user_agent,
+                        headless=config.CDP_HEADLESS,
+                    )
+                else:
+                    utils.logger.info("[ZhihuCrawler] 使用标准模式启动浏览器")
+                    # Launch a browser context.
+                    chromium = playwright.chromium
+                    self.browser_context = await self.launch_browser(
+                        chromium, None, self.user_agent, headless=config.HEADLESS
+                    )
+                # stealth.min.js is a js script to prevent the website from detecting the crawler.
+                await self.browser_context.add_init_script(path="libs/stealth.min.js")
+
+                self.context_page = await self.browser_context.new_page()
+                await self.context_page.goto(self.index_url, wait_until="domcontentloaded")
+
+                # Create a client to interact with the zhihu website.
+                self.zhihu_client = await self.create_zhihu_client(httpx_proxy_format)
+                if not await self.zhihu_client.pong():
+                    login_obj = ZhiHuLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # input your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    await login_obj.begin()
+                    await self.zhihu_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
+
+                # 知乎的搜索接口需要打开搜索页面之后cookies才能访问API，单独的首页不行
+                utils.logger.info(
+                    "[ZhihuCrawler.start] Zhihu跳转到搜索页面获取搜索页面的Cookies，该过程需要5秒左右"
                 )
-                await login_obj.begin()
-                await self.zhihu_client.update_cookies(
-                    browser_context=self.browser_context
+                await self.context_page.goto(
+                    f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content"
                 )
-
-            # 知乎的搜索接口需要打开搜索页面之后cookies才能访问API，单独的首页不行
-            utils.logger.info(
-                "[ZhihuCrawler.start] Zhihu跳转到搜索页面获取搜索页面的Cookies，该过程需要5秒左右"
-            )
-            await self.context_page.goto(
-                f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content"
-            )
-            await asyncio.sleep(5)
-            await self.zhihu_client.update_cookies(browser_context=self.browser_context)
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
-
-            utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
+                await asyncio.sleep(5)
+                await self.zhihu_client.update_cookies(browser_context=self.browser_context)
+
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+
+                utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
+            finally:
+                # 爬取中途出错也要关闭 API 客户端的连接池和浏览器
+                await self.close()
 
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
@@ -139,12 +145,12 @@ class ZhihuCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < zhihu_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = zhihu_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in self.checkpoint.iter_tasks(config.KEYWORDS.split(",")):
             source_keyword_var.set(keyword)
             utils.logger.info(
                 f"[ZhihuCrawler.search] Current search keyword: {keyword}"
             )
-            page = 1
+            page = self.checkpoint.resume_page(1)
             while (
                 page - start_page + 1
             ) * zhihu_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -174,13 +180,21 @@ class ZhihuCrawler(AbstractCrawler):
                     await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
                     utils.logger.info(f"[ZhihuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
                     
+                    self.checkpoint.save_page(page, [content.content_id for content in content_list])
                     page += 1
+                    crawl_index = get_crawl_index()
                     for content in content_list:
+                        # 增量爬取：之前已保存过的内容不再保存，只继续抓取未完成的评论
+                        if crawl_index.is_seen("zhihu", content.content_id):
+                            continue
                         await zhihu_store.update_zhihu_content(content)
+                        crawl_index.mark_seen("zhihu", content.content_id)
 
                     await self.batch_get_content_comments(content_list)
+                    self.checkpoint.finish_page(page)
                 except DataFetchError:
                     utils.logger.error("[ZhihuCrawler.search] Search content error")
+                    self.aborted = True
                     return
 
     async def batch_get_content_comments(self, content_list: List[ZhihuContent]):
@@ -199,16 +213,18 @@ class ZhihuCrawler(AbstractCrawler):
             return
 
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list: List[Task] = []
-        for content_item in content_list:
-            task = asyncio.create_task(
-                self.get_comments(content_item, semaphore), name=content_item.content_id
-            )
-            task_list.append(task)
-        await asyncio.gather(*task_list)
+        # 评论页经由流水线队列交给写入协程存储，抓取下一页时不必等待存储完成
+        async with CommentPipeline(zhihu_store.batch_update_zhihu_note_comments, name="zhihu_comments") as pipeline:
+            task_list: List[Task] = []
+            for content_item in content_list:
+                task = asyncio.create_task(
+                    self.get_comments(content_item, semaphore, callback=pipeline), name=content_item.content_id
+                )
+                task_list.append(task)
+            await asyncio.gather(*task_list)
 
     async def get_comments(
-        self, content_item: ZhihuContent, semaphore: asyncio.Semaphore
+        self, content_item: ZhihuContent, semaphore: asyncio.Semaphore, callback: Optional[Callable] = None
     ):
         """
         Get note comments with keyword filtering and quantity limitation
@@ -219,6 +235,13 @@ class ZhihuCrawler(AbstractCrawler):
         Returns:
 
         """
+        cursor, comments_done = self.get_comment_state("zhihu", content_item.content_id)
+        if comments_done:
+            utils.logger.info(
+                f"[ZhihuCrawler.get_comments] All comments of content {content_item.content_id} were crawled before, skip"
+            )
+            return
+
         async with semaphore:
             utils.logger.info(
                 f"[ZhihuCrawler.get_comments] Begin get note id comments {content_item.content_id}"
@@ -231,7 +254,9 @@ class ZhihuCrawler(AbstractCrawler):
             await self.zhihu_client.get_note_all_comments(
                 content=content_item,
                 crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
-                callback=zhihu_store.batch_update_zhihu_note_comments,
+                callback=callback or zhihu_store.batch_update_zhihu_note_comments,
+                cursor=cursor or "",
+                cursor_callback=self.comment_cursor_callback("zhihu", content_item.content_id, callback),
             )
 
     async def get_creators_and_notes(self) -> None:
@@ -243,7 +268,7 @@ class ZhihuCrawler(AbstractCrawler):
         utils.logger.info(
             "[ZhihuCrawler.get_creators_and_notes] Begin get xiaohongshu creators"
         )
-        for user_link in config.ZHIHU_CREATOR_URL_LIST:
+        for user_link in self.checkpoint.iter_tasks(config.ZHIHU_CREATOR_URL_LIST):
             utils.logger.info(
                 f"[ZhihuCrawler.get_creators_and_notes] Begin get creator {user_link}"
             )
@@ -269,7 +294,7 @@ class ZhihuCrawler(AbstractCrawler):
             all_content_list = await self.zhihu_client.get_all_anwser_by_creator(
                 creator=createor_info,
                 crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
-                callback=zhihu_store.batch_update_zhihu_contents,
+                callback=self.save_creator_contents,
             )
 
             # Get all articles of the creator's contents
@@ -289,6 +314,21 @@ class ZhihuCrawler(AbstractCrawler):
             # Get all comments of the creator's contents
             await self.batch_get_content_comments(all_content_list)
 
+    async def save_creator_contents(self, content_list: List[ZhihuContent]):
+        """
+        保存创作者的一页内容，增量爬取时跳过之前已保存过的内容
+        Args:
+            content_list:
+
+        Returns:
+
+        """
+        crawl_index = get_crawl_index()
+        content_list = [content for content in content_list if not crawl_index.is_seen("zhihu", content.content_id)]
+        await zhihu_store.batch_update_zhihu_contents(content_list)
+        for content in content_list:
+            crawl_index.mark_seen("zhihu", content.content_id)
+
     async def get_note_detail(
         self, full_note_url: str, semaphore: asyncio.Semaphore
     ) -> Optional[ZhihuContent]:
@@ -473,10 +513,13 @@ class ZhihuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # 关闭 API 客户端持有的 httpx 连接池
+        if getattr(self, "zhihu_client", None):
+            await self.zhihu_client.close()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
-        else:
+        elif getattr(self, "browser_context", None):
             await self.browser_context.close()
         utils.logger.info("[ZhihuCrawler.close] Browser context closed ...")
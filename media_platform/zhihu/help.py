@@ -11,19 +11,32 @@
 
 # -*- coding: utf-8 -*-
 import json
-from typing import Dict, List, Optional
+import re
+import time
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import parse_qs, urlparse
 
 import execjs
 from parsel import Selector
 
+import config
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
 from tools.crawler_util import extract_text_from_html
+from tools.js_worker_pool import JsWorkerPool
 
 ZHIHU_SGIN_JS = None
 
+# 常驻 node 进程池，首次签名时启动
+_zhihu_sign_pool: Optional[JsWorkerPool] = None
+
+# (url, d_c0) -> (过期时间, 签名结果)
+_sign_memo: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+_sign_memo_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+_D_C0_PATTERN = re.compile(r"d_c0=([^;]+)")
+
 
 def sign(url: str, cookies: str) -> Dict:
     """
@@ -43,6 +56,70 @@ def sign(url: str, cookies: str) -> Dict:
     return ZHIHU_SGIN_JS.call("get_sign", url, cookies)
 
 
+async def async_sign(url: str, cookies: str) -> Dict:
+    """
+    zhihu sign algorithm, 优先使用常驻 node 进程池，失败时回退到 execjs。
+    签名只依赖 url 和 d_c0，相同 (url, d_c0) 在 ZHIHU_SIGN_CACHE_TTL 秒内直接复用上次的签名结果
+    Args:
+        url: request url with query string
+        cookies: request cookies with d_c0 key
+
+    Returns:
+
+    """
+    global _zhihu_sign_pool
+    match = _D_C0_PATTERN.search(cookies or "")
+    memo_key = (url, match.group(1) if match else "")
+    now = time.monotonic()
+    cached = _sign_memo.get(memo_key)
+    if cached and cached[0] > now:
+        _sign_memo_stats["hits"] += 1
+        return cached[1]
+    _sign_memo_stats["misses"] += 1
+
+    sign_res = None
+    if config.ENABLE_JS_WORKER_POOL and JsWorkerPool.is_available():
+        if _zhihu_sign_pool is None:
+            _zhihu_sign_pool = JsWorkerPool("libs/zhihu.js", name="zhihu_sign")
+        try:
+            sign_res = await _zhihu_sign_pool.call("get_sign", url, cookies)
+        except Exception as e:
+            utils.logger.warning(f"[async_sign] js worker pool sign failed, fall back to execjs: {e}")
+    if sign_res is None:
+        sign_res = sign(url, cookies)
+
+    if config.ZHIHU_SIGN_CACHE_TTL > 0:
+        if len(_sign_memo) >= config.ZHIHU_SIGN_CACHE_MAX_SIZE:
+            # 先清理过期项，仍然超出时丢弃最早写入的一半
+            for key in [key for key, (expire_at, _) in _sign_memo.items() if expire_at <= now]:
+                del _sign_memo[key]
+            if len(_sign_memo) >= config.ZHIHU_SIGN_CACHE_MAX_SIZE:
+                for key in list(_sign_memo)[: len(_sign_memo) // 2 + 1]:
+                    del _sign_memo[key]
+        _sign_memo[memo_key] = (now + config.ZHIHU_SIGN_CACHE_TTL, sign_res)
+    return sign_res
+
+
+def get_sign_stats() -> Dict:
+    """
+    签名缓存命中情况以及进程池统计
+    """
+    stats: Dict = {**_sign_memo_stats, "memo_size": len(_sign_memo)}
+    if _zhihu_sign_pool is not None:
+        stats["pool"] = _zhihu_sign_pool.get_stats()
+    return stats
+
+
+async def close_sign_pool():
+    """
+    关闭签名使用的 node 进程池
+    """
+    global _zhihu_sign_pool
+    if _zhihu_sign_pool is not None:
+        await _zhihu_sign_pool.close()
+        _zhihu_sign_pool = None
+
+
 class ZhihuExtractor:
     def __init__(self):
         pass
@@ -17,6 +17,7 @@ from typing import List
 
 import config
 from var import source_keyword_var
+from store.store_registry import store_registry
 
 from ._store_impl import *
 from .bilibilli_store_media import *
@@ -35,7 +36,7 @@ class BiliStoreFactory:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError("[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+        return store_registry.get_store(store_class)
 
 
 async def update_bilibili_video(video_item: Dict):
@@ -91,11 +92,21 @@ async def update_up_info(video_item: Dict):
 async def batch_update_bilibili_video_comments(video_id: str, comments: List[Dict]):
     if not comments:
         return
+    save_comment_items = []
     for comment_item in comments:
-        await update_bilibili_video_comment(video_id, comment_item)
+        save_comment_item = _build_bilibili_video_comment_item(video_id, comment_item)
+        utils.logger.info(f"[store.bilibili.batch_update_bilibili_video_comments] Bilibili video comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
+        save_comment_items.append(save_comment_item)
+    await BiliStoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _build_bilibili_video_comment_item(video_id, comment_item)
+    utils.logger.info(f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
+    await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+
+
+def _build_bilibili_video_comment_item(video_id: str, comment_item: Dict) -> Dict:
     comment_id = str(comment_item.get("rpid"))
     parent_comment_id = str(comment_item.get("parent", 0))
     content: Dict = comment_item.get("content")
@@ -116,8 +127,7 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
         "like_count": like_count,
         "last_modify_ts": utils.get_current_timestamp(),
     }
-    utils.logger.info(f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def store_video(aid, video_content, extension_file_name):
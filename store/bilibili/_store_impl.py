@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -26,7 +26,7 @@ from sqlalchemy.orm import sessionmaker
 
 import config
 from base.base_crawler import AbstractStore
-from database.db_session import get_session
+from database.db_session import bulk_upsert, get_session
 from database.models import BilibiliVideoComment, BilibiliVideo, BilibiliUpInfo, BilibiliUpDynamic, BilibiliContactInfo
 from tools.async_file_writer import AsyncFileWriter
 from tools import utils, words
@@ -110,8 +110,18 @@ class BiliCsvStoreImplement(AbstractStore):
             item_type="dynamics"
         )
 
+    async def flush(self):
+        """
+        flush buffered data to csv file
+        Returns:
+
+        """
+        await self.file_writer.flush()
+
 
 class BiliDbStoreImplement(AbstractStore):
+    upserts_content = True
+
     async def store_content(self, content_item: Dict):
         """
         Bilibili content DB storage implementation
@@ -152,6 +162,17 @@ class BiliDbStoreImplement(AbstractStore):
                     setattr(comment_detail, key, value)
             await session.commit()
 
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Bilibili comments DB batch storage implementation, one upsert statement per batch
+        Args:
+            comment_items: comment item dict list
+        """
+        if not comment_items:
+            return
+        async with get_session() as session:
+            await bulk_upsert(session, BilibiliVideoComment, comment_items, conflict_key="comment_id")
+
     async def store_creator(self, creator: Dict):
         """
         Bilibili creator DB storage implementation
@@ -293,6 +314,13 @@ class BiliJsonStoreImplement(AbstractStore):
             item_type="dynamics"
         )
 
+    async def flush(self):
+        """
+        flush buffered data to json file
+        Returns:
+
+        """
+        await self.file_writer.flush()
 
 
 class BiliSqliteStoreImplement(BiliDbStoreImplement):
@@ -12,10 +12,11 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 18:46
 # @Desc    :
-from typing import List
+from typing import List, Optional
 
 import config
 from var import source_keyword_var
+from store.store_registry import store_registry
 
 from ._store_impl import *
 from .douyin_store_media import *
@@ -34,7 +35,7 @@ class DouyinStoreFactory:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+        return store_registry.get_store(store_class)
 
 
 def _extract_note_image_list(aweme_detail: Dict) -> List[str]:
@@ -178,15 +179,30 @@ async def update_douyin_aweme(aweme_item: Dict):
 async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
     if not comments:
         return
+    save_comment_items = []
     for comment_item in comments:
-        await update_dy_aweme_comment(aweme_id, comment_item)
+        save_comment_item = _build_dy_aweme_comment_item(aweme_id, comment_item)
+        if not save_comment_item:
+            continue
+        utils.logger.info(f"[store.douyin.batch_update_dy_aweme_comments] douyin aweme comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
+        save_comment_items.append(save_comment_item)
+    await DouyinStoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+    save_comment_item = _build_dy_aweme_comment_item(aweme_id, comment_item)
+    if not save_comment_item:
+        return
+    utils.logger.info(f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
+
+    await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+
+
+def _build_dy_aweme_comment_item(aweme_id: str, comment_item: Dict) -> Optional[Dict]:
     comment_aweme_id = comment_item.get("aweme_id")
     if aweme_id != comment_aweme_id:
         utils.logger.error(f"[store.douyin.update_dy_aweme_comment] comment_aweme_id: {comment_aweme_id} != aweme_id: {aweme_id}")
-        return
+        return None
     user_info = comment_item.get("user", {})
     comment_id = comment_item.get("cid")
     parent_comment_id = comment_item.get("reply_id", "0")
@@ -210,9 +226,7 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
         "parent_comment_id": parent_comment_id,
         "pictures": ",".join(_extract_comment_image_list(comment_item)),
     }
-    utils.logger.info(f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}")
-
-    await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def save_creator(user_id: str, creator: Dict):
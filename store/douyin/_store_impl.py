@@ -17,13 +17,13 @@ import asyncio
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
-from database.db_session import get_session
+from database.db_session import bulk_upsert, get_session
 from database.models import DouyinAweme, DouyinAwemeComment, DyCreator
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
@@ -79,8 +79,18 @@ class DouyinCsvStoreImplement(AbstractStore):
             item_type="creators"
         )
 
+    async def flush(self):
+        """
+        flush buffered data to csv file
+        Returns:
+
+        """
+        await self.file_writer.flush()
+
 
 class DouyinDbStoreImplement(AbstractStore):
+    upserts_content = True
+
     async def store_content(self, content_item: Dict):
         """
         Douyin content DB storage implementation
@@ -122,6 +132,17 @@ class DouyinDbStoreImplement(AbstractStore):
                     setattr(comment_detail, key, value)
             await session.commit()
 
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Douyin comments DB batch storage implementation, one upsert statement per batch
+        Args:
+            comment_items: comment item dict list
+        """
+        if not comment_items:
+            return
+        async with get_session() as session:
+            await bulk_upsert(session, DouyinAwemeComment, comment_items, conflict_key="comment_id")
+
     async def store_creator(self, creator: Dict):
         """
         Douyin creator DB storage implementation
@@ -192,6 +213,13 @@ class DouyinJsonStoreImplement(AbstractStore):
             item_type="creators"
         )
 
+    async def flush(self):
+        """
+        flush buffered data to json file
+        Returns:
+
+        """
+        await self.file_writer.flush()
 
 
 class DouyinSqliteStoreImplement(DouyinDbStoreImplement):
@@ -11,10 +11,10 @@
 import pathlib
 from typing import Dict
 
-import aiofiles
-
 from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
 from tools import utils
+from tools.media_store import save_media
+from tools.media_writer import MediaContent
 
 
 class DouYinImage(AbstractStoreImage):
@@ -45,7 +45,7 @@ class DouYinImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{aweme_id}/{extension_file_name}"
 
-    async def save_image(self, aweme_id: str, pic_content: str, extension_file_name):
+    async def save_image(self, aweme_id: str, pic_content: MediaContent, extension_file_name):
         """
         save image to local
         
@@ -59,9 +59,8 @@ class DouYinImage(AbstractStoreImage):
         """
         pathlib.Path(self.image_store_path + "/" + aweme_id).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(aweme_id, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(pic_content)
-            utils.logger.info(f"[DouYinImageStoreImplement.save_image] save image {save_file_name} success ...")
+        await save_media(save_file_name, pic_content)
+        utils.logger.info(f"[DouYinImageStoreImplement.save_image] save image {save_file_name} success ...")
 
 
 class DouYinVideo(AbstractStoreVideo):
@@ -92,7 +91,7 @@ class DouYinVideo(AbstractStoreVideo):
         """
         return f"{self.video_store_path}/{aweme_id}/{extension_file_name}"
 
-    async def save_video(self, aweme_id: str, video_content: str, extension_file_name):
+    async def save_video(self, aweme_id: str, video_content: MediaContent, extension_file_name):
         """
         save video to local
         
@@ -106,6 +105,5 @@ class DouYinVideo(AbstractStoreVideo):
         """
         pathlib.Path(self.video_store_path + "/" + aweme_id).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(aweme_id, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(video_content)
-            utils.logger.info(f"[DouYinVideoStoreImplement.save_video] save video {save_file_name} success ...")
+        await save_media(save_file_name, video_content)
+        utils.logger.info(f"[DouYinVideoStoreImplement.save_video] save video {save_file_name} success ...")
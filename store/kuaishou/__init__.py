@@ -17,6 +17,7 @@ from typing import List
 
 import config
 from var import source_keyword_var
+from store.store_registry import store_registry
 
 from ._store_impl import *
 
@@ -35,7 +36,7 @@ class KuaishouStoreFactory:
         if not store_class:
             raise ValueError(
                 "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+        return store_registry.get_store(store_class)
 
 
 async def update_kuaishou_video(video_item: Dict):
@@ -70,11 +71,18 @@ async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
     utils.logger.info(f"[store.kuaishou.batch_update_ks_video_comments] video_id:{video_id}, comments:{comments}")
     if not comments:
         return
-    for comment_item in comments:
-        await update_ks_video_comment(video_id, comment_item)
+    save_comment_items = [_build_ks_video_comment_item(video_id, comment_item) for comment_item in comments]
+    await KuaishouStoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_ks_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _build_ks_video_comment_item(video_id, comment_item)
+    utils.logger.info(
+        f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
+    await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+
+
+def _build_ks_video_comment_item(video_id: str, comment_item: Dict) -> Dict:
     comment_id = comment_item.get("commentId")
     save_comment_item = {
         "comment_id": comment_id,
@@ -87,9 +95,7 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
         "sub_comment_count": str(comment_item.get("subCommentCount", 0)),
         "last_modify_ts": utils.get_current_timestamp(),
     }
-    utils.logger.info(
-        f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 async def save_creator(user_id: str, creator: Dict):
     ownerCount = creator.get('ownerCount', {})
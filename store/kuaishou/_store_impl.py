@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 from tools.async_file_writer import AsyncFileWriter
 
 import aiofiles
@@ -26,7 +26,7 @@ from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
-from database.db_session import get_session
+from database.db_session import bulk_upsert, get_session
 from database.models import KuaishouVideo, KuaishouVideoComment
 from tools import utils, words
 from var import crawler_type_var
@@ -77,8 +77,18 @@ class KuaishouCsvStoreImplement(AbstractStore):
     async def store_creator(self, creator: Dict):
         pass
 
+    async def flush(self):
+        """
+        flush buffered data to csv file
+        Returns:
+
+        """
+        await self.writer.flush()
+
 
 class KuaishouDbStoreImplement(AbstractStore):
+    upserts_content = True
+
     async def store_creator(self, creator: Dict):
         pass
 
@@ -124,6 +134,17 @@ class KuaishouDbStoreImplement(AbstractStore):
             await session.commit()
 
 
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Kuaishou comments DB batch storage implementation, one upsert statement per batch
+        Args:
+            comment_items: comment item dict list
+        """
+        if not comment_items:
+            return
+        async with get_session() as session:
+            await bulk_upsert(session, KuaishouVideoComment, comment_items, conflict_key="comment_id")
+
 class KuaishouJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -154,6 +175,14 @@ class KuaishouJsonStoreImplement(AbstractStore):
     async def store_creator(self, creator: Dict):
         pass
 
+    async def flush(self):
+        """
+        flush buffered data to json file
+        Returns:
+
+        """
+        await self.writer.flush()
+
 
 class KuaishouSqliteStoreImplement(KuaishouDbStoreImplement):
     async def store_creator(self, creator: Dict):
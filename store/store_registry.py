@@ -0,0 +1,70 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 单次爬取过程中共享的存储实例注册表
+from typing import Dict, Optional, Tuple, Type
+
+from base.base_crawler import AbstractStore
+from tools import utils
+from var import crawler_type_var
+
+
+class StoreRegistry:
+    """
+    存储实例注册表，同一次爬取中每个存储实现类（按 crawler_type 区分）只创建一个实例，
+    各平台 StoreFactory.create_store 都从这里获取实例，爬虫结束时统一 flush 并清空
+    """
+
+    def __init__(self):
+        self._stores: Dict[Tuple[Type[AbstractStore], str], AbstractStore] = {}
+
+    def get_store(self, store_class: Type[AbstractStore]) -> AbstractStore:
+        """
+        获取存储实例，不存在时创建
+        Args:
+            store_class: 存储实现类
+
+        Returns:
+            AbstractStore
+        """
+        key = (store_class, crawler_type_var.get())
+        store: Optional[AbstractStore] = self._stores.get(key)
+        if store is None:
+            store = store_class()
+            self._stores[key] = store
+        return store
+
+    def open(self):
+        """
+        爬虫启动时调用，丢弃上一次运行遗留的实例
+        """
+        self._stores.clear()
+
+    async def close(self):
+        """
+        爬虫结束时调用，flush 所有存储实例中的缓冲数据并清空注册表
+        """
+        stores = list(self._stores.values())
+        self._stores.clear()
+        for store in stores:
+            try:
+                await store.flush()
+            except Exception as e:
+                utils.logger.error(f"[StoreRegistry.close] flush {store.__class__.__name__} error: {e}")
+        if stores:
+            utils.logger.info(f"[StoreRegistry.close] {len(stores)} store instance(s) flushed and closed")
+
+    def __len__(self) -> int:
+        return len(self._stores)
+
+
+store_registry = StoreRegistry()
@@ -14,6 +14,7 @@ from typing import List
 
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from var import source_keyword_var
+from store.store_registry import store_registry
 
 from ._store_impl import *
 
@@ -32,7 +33,7 @@ class TieBaStoreFactory:
         if not store_class:
             raise ValueError(
                 "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+        return store_registry.get_store(store_class)
 
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
@@ -79,8 +80,13 @@ async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaCom
     """
     if not comments:
         return
+    save_comment_items = []
     for comment_item in comments:
-        await update_tieba_note_comment(note_id, comment_item)
+        save_comment_item = comment_item.model_dump()
+        save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
+        utils.logger.info(f"[store.tieba.batch_update_tieba_note_comments] tieba note id: {note_id} comment:{save_comment_item}")
+        save_comment_items.append(save_comment_item)
+    await TieBaStoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
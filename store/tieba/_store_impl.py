@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -28,7 +28,7 @@ import config
 from base.base_crawler import AbstractStore
 from database.models import TiebaNote, TiebaComment, TiebaCreator
 from tools import utils, words
-from database.db_session import get_session
+from database.db_session import bulk_upsert, get_session
 from var import crawler_type_var
 from tools.async_file_writer import AsyncFileWriter
 
@@ -86,8 +86,18 @@ class TieBaCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="creators", item=creator)
 
+    async def flush(self):
+        """
+        flush buffered data to csv file
+        Returns:
+
+        """
+        await self.writer.flush()
+
 
 class TieBaDbStoreImplement(AbstractStore):
+    upserts_content = True
+
     async def store_content(self, content_item: Dict):
         """
         tieba content DB storage implementation
@@ -126,6 +136,17 @@ class TieBaDbStoreImplement(AbstractStore):
                 session.add(db_comment)
             await session.commit()
 
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        tieba comments DB batch storage implementation, one upsert statement per batch
+        Args:
+            comment_items: comment item dict list
+        """
+        if not comment_items:
+            return
+        async with get_session() as session:
+            await bulk_upsert(session, TiebaComment, comment_items, conflict_key="comment_id")
+
     async def store_creator(self, creator: Dict):
         """
         tieba content DB storage implementation
@@ -184,6 +205,14 @@ class TieBaJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="creators", item=creator)
 
+    async def flush(self):
+        """
+        flush buffered data to json file
+        Returns:
+
+        """
+        await self.writer.flush()
+
 
 class TieBaSqliteStoreImplement(TieBaDbStoreImplement):
     """
@@ -14,9 +14,10 @@
 # @Desc    :
 
 import re
-from typing import List
+from typing import List, Optional
 
 from var import source_keyword_var
+from store.store_registry import store_registry
 
 from .weibo_store_media import *
 from ._store_impl import *
@@ -35,7 +36,7 @@ class WeibostoreFactory:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+        return store_registry.get_store(store_class)
 
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
@@ -107,8 +108,14 @@ async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
+    save_comment_items = []
     for comment_item in comments:
-        await update_weibo_note_comment(note_id, comment_item)
+        save_comment_item = _build_weibo_note_comment_item(note_id, comment_item)
+        if not save_comment_item:
+            continue
+        utils.logger.info(f"[store.weibo.batch_update_weibo_note_comments] Weibo note comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content', '')[:24]} ...")
+        save_comment_items.append(save_comment_item)
+    await WeibostoreFactory.create_store().store_comments(save_comment_items)
 
 
 async def update_weibo_note_comment(note_id: str, comment_item: Dict):
@@ -121,8 +128,25 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
     Returns:
 
     """
-    if not comment_item or not note_id:
+    save_comment_item = _build_weibo_note_comment_item(note_id, comment_item)
+    if not save_comment_item:
         return
+    utils.logger.info(f"[store.weibo.update_weibo_note_comment] Weibo note comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content', '')[:24]} ...")
+    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+
+
+def _build_weibo_note_comment_item(note_id: str, comment_item: Dict) -> Optional[Dict]:
+    """
+    Convert weibo comment item to the storage fields
+    Args:
+        note_id: weibo note id
+        comment_item: weibo comment item
+
+    Returns:
+
+    """
+    if not comment_item or not note_id:
+        return None
     comment_id = str(comment_item.get("id"))
     user_info: Dict = comment_item.get("user")
     content_text = comment_item.get("text")
@@ -146,8 +170,7 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
         "profile_url": user_info.get("profile_url", ""),
         "avatar": user_info.get("profile_image_url", ""),
     }
-    utils.logger.info(f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
-    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -29,7 +29,7 @@ from base.base_crawler import AbstractStore
 from database.models import WeiboCreator, WeiboNote, WeiboNoteComment
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
-from database.db_session import get_session
+from database.db_session import bulk_upsert, get_session
 from var import crawler_type_var
 
 
@@ -86,8 +86,17 @@ class WeiboCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="creators", item=creator)
 
+    async def flush(self):
+        """
+        flush buffered data to csv file
+        Returns:
+
+        """
+        await self.writer.flush()
+
 
 class WeiboDbStoreImplement(AbstractStore):
+    upserts_content = True
 
     async def store_content(self, content_item: Dict):
         """
@@ -141,6 +150,17 @@ class WeiboDbStoreImplement(AbstractStore):
                 session.add(db_comment)
             await session.commit()
 
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Weibo comments DB batch storage implementation, one upsert statement per batch
+        Args:
+            comment_items: comment item dict list
+        """
+        if not comment_items:
+            return
+        async with get_session() as session:
+            await bulk_upsert(session, WeiboNoteComment, comment_items, conflict_key="comment_id")
+
     async def store_creator(self, creator: Dict):
         """
         Weibo creator DB storage implementation
@@ -206,6 +226,14 @@ class WeiboJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="creators", item=creator)
 
+    async def flush(self):
+        """
+        flush buffered data to json file
+        Returns:
+
+        """
+        await self.writer.flush()
+
 
 class WeiboSqliteStoreImplement(WeiboDbStoreImplement):
     """
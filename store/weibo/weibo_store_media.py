@@ -15,10 +15,10 @@
 import pathlib
 from typing import Dict
 
-import aiofiles
-
 from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
 from tools import utils
+from tools.media_store import save_media
+from tools.media_writer import MediaContent
 
 
 class WeiboStoreImage(AbstractStoreImage):
@@ -49,7 +49,7 @@ class WeiboStoreImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{picid}.{extension_file_name}"
 
-    async def save_image(self, picid: str, pic_content: str, extension_file_name="jpg"):
+    async def save_image(self, picid: str, pic_content: MediaContent, extension_file_name="jpg"):
         """
         save image to local
         
@@ -63,6 +63,5 @@ class WeiboStoreImage(AbstractStoreImage):
         """
         pathlib.Path(self.image_store_path).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(picid, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(pic_content)
-            utils.logger.info(f"[WeiboImageStoreImplement.save_image] save image {save_file_name} success ...")
+        await save_media(save_file_name, pic_content)
+        utils.logger.info(f"[WeiboImageStoreImplement.save_image] save image {save_file_name} success ...")
@@ -16,6 +16,7 @@ from typing import List
 
 import config
 from var import source_keyword_var
+from store.store_registry import store_registry
 
 from .xhs_store_media import *
 from ._store_impl import *
@@ -34,7 +35,7 @@ class XhsStoreFactory:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+        return store_registry.get_store(store_class)
 
 
 def get_video_url_arr(note_item: Dict) -> List:
@@ -124,8 +125,12 @@ async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
+    comment_items = []
     for comment_item in comments:
-        await update_xhs_note_comment(note_id, comment_item)
+        local_db_item = _build_xhs_note_comment_item(note_id, comment_item)
+        utils.logger.info(f"[store.xhs.batch_update_xhs_note_comments] xhs note comment:{local_db_item}")
+        comment_items.append(local_db_item)
+    await XhsStoreFactory.create_store().store_comments(comment_items)
 
 
 async def update_xhs_note_comment(note_id: str, comment_item: Dict):
@@ -137,6 +142,21 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
 
     Returns:
 
+    """
+    local_db_item = _build_xhs_note_comment_item(note_id, comment_item)
+    utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
+    await XhsStoreFactory.create_store().store_comment(local_db_item)
+
+
+def _build_xhs_note_comment_item(note_id: str, comment_item: Dict) -> Dict:
+    """
+    将接口返回的评论转换为存储使用的字段
+    Args:
+        note_id:
+        comment_item:
+
+    Returns:
+
     """
     user_info = comment_item.get("user_info", {})
     comment_id = comment_item.get("id")
@@ -157,8 +177,7 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
         "last_modify_ts": utils.get_current_timestamp(),  # 最后更新时间戳（MediaCrawler程序生成的，主要用途在db存储的时候记录一条记录最新更新时间）
         "like_count": comment_item.get("like_count", 0),
     }
-    utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
-    await XhsStoreFactory.create_store().store_comment(local_db_item)
+    return local_db_item
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -12,7 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from base.base_crawler import AbstractStore
-from database.db_session import get_session
+from database.db_session import bulk_upsert, get_session
 from database.models import XhsNote, XhsNoteComment, XhsCreator
 
 from tools.async_file_writer import AsyncFileWriter
@@ -60,8 +60,12 @@ class XhsCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="mall_analytics", item=analytics_item)
 
-    def flush(self):
-        pass
+    async def flush(self):
+        """
+        flush buffered data to csv file
+        :return:
+        """
+        await self.writer.flush()
 
 
 class XhsJsonStoreImplement(AbstractStore):
@@ -104,16 +108,18 @@ class XhsJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="mall_analytics", item=analytics_item)
 
-    def flush(self):
+    async def flush(self):
         """
-        flush data to json file
+        flush buffered data to json file
         :return:
         """
-        pass
+        await self.writer.flush()
 
 
 
 class XhsDbStoreImplement(AbstractStore):
+    upserts_content = True
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
@@ -187,10 +193,24 @@ class XhsDbStoreImplement(AbstractStore):
             else:
                 await self.add_comment(session, comment_item)
 
-    async def add_comment(self, session: AsyncSession, comment_item: Dict):
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        store comments to database, one upsert statement per batch
+        :param comment_items:
+        :return:
+        """
+        rows = [self.build_comment_row(item) for item in comment_items if item and item.get("comment_id")]
+        if not rows:
+            return
+        async with get_session() as session:
+            await bulk_upsert(session, XhsNoteComment, rows, conflict_key="comment_id",
+                              update_columns=["last_modify_ts", "like_count", "sub_comment_count"])
+
+    @staticmethod
+    def build_comment_row(comment_item: Dict) -> Dict:
         add_ts = int(get_current_timestamp())
         last_modify_ts = int(get_current_timestamp())
-        comment = XhsNoteComment(
+        return dict(
             user_id=comment_item.get("user_id"),
             nickname=comment_item.get("nickname"),
             avatar=comment_item.get("avatar"),
@@ -206,6 +226,9 @@ class XhsDbStoreImplement(AbstractStore):
             parent_comment_id=comment_item.get("parent_comment_id"),
             like_count=str(comment_item.get("like_count"))
         )
+
+    async def add_comment(self, session: AsyncSession, comment_item: Dict):
+        comment = XhsNoteComment(**self.build_comment_row(comment_item))
         session.add(comment)
 
     async def update_comment(self, session: AsyncSession, comment_item: Dict):
@@ -15,10 +15,10 @@
 import pathlib
 from typing import Dict
 
-import aiofiles
-
 from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
 from tools import utils
+from tools.media_store import save_media
+from tools.media_writer import MediaContent
 
 
 class XiaoHongShuImage(AbstractStoreImage):
@@ -49,7 +49,7 @@ class XiaoHongShuImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{notice_id}/{extension_file_name}"
 
-    async def save_image(self, notice_id: str, pic_content: str, extension_file_name):
+    async def save_image(self, notice_id: str, pic_content: MediaContent, extension_file_name):
         """
         save image to local
         
@@ -63,9 +63,8 @@ class XiaoHongShuImage(AbstractStoreImage):
         """
         pathlib.Path(self.image_store_path + "/" + notice_id).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(notice_id, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(pic_content)
-            utils.logger.info(f"[XiaoHongShuImageStoreImplement.save_image] save image {save_file_name} success ...")
+        await save_media(save_file_name, pic_content)
+        utils.logger.info(f"[XiaoHongShuImageStoreImplement.save_image] save image {save_file_name} success ...")
 
 
 class XiaoHongShuVideo(AbstractStoreVideo):
@@ -96,7 +95,7 @@ class XiaoHongShuVideo(AbstractStoreVideo):
         """
         return f"{self.video_store_path}/{notice_id}/{extension_file_name}"
 
-    async def save_video(self, notice_id: str, video_content: str, extension_file_name):
+    async def save_video(self, notice_id: str, video_content: MediaContent, extension_file_name):
         """
         save video to local
         
@@ -110,6 +109,5 @@ class XiaoHongShuVideo(AbstractStoreVideo):
         """
         pathlib.Path(self.video_store_path + "/" + notice_id).mkdir(parents=True, exist_ok=True)
         save_file_name = self.make_save_file_name(notice_id, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(video_content)
-            utils.logger.info(f"[XiaoHongShuVideoStoreImplement.save_video] save video {save_file_name} success ...")
+        await save_media(save_file_name, video_content)
+        utils.logger.info(f"[XiaoHongShuVideoStoreImplement.save_video] save video {save_file_name} success ...")
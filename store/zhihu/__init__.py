@@ -15,6 +15,7 @@ from typing import List
 import config
 from base.base_crawler import AbstractStore
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
+from store.store_registry import store_registry
 from ._store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuDbStoreImplement,
                                           ZhihuJsonStoreImplement,
@@ -36,7 +37,7 @@ class ZhihuStoreFactory:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+        return store_registry.get_store(store_class)
 
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
@@ -81,9 +82,14 @@ async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
     """
     if not comments:
         return
-    
+
+    local_db_items = []
     for comment_item in comments:
-        await update_zhihu_content_comment(comment_item)
+        local_db_item = comment_item.model_dump()
+        local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
+        utils.logger.info(f"[store.zhihu.batch_update_zhihu_note_comments] zhihu content comment:{local_db_item}")
+        local_db_items.append(local_db_item)
+    await ZhihuStoreFactory.create_store().store_comments(local_db_items)
 
 
 async def update_zhihu_content_comment(comment_item: ZhihuComment):
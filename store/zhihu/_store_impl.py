@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -26,7 +26,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from base.base_crawler import AbstractStore
-from database.db_session import get_session
+from database.db_session import bulk_upsert, get_session
 from database.models import ZhihuContent, ZhihuComment, ZhihuCreator
 from tools import utils, words
 from var import crawler_type_var
@@ -85,8 +85,18 @@ class ZhihuCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="creators", item=creator)
 
+    async def flush(self):
+        """
+        flush buffered data to csv file
+        Returns:
+
+        """
+        await self.writer.flush()
+
 
 class ZhihuDbStoreImplement(AbstractStore):
+    upserts_content = True
+
     async def store_content(self, content_item: Dict):
         """
         Zhihu content DB storage implementation
@@ -125,6 +135,17 @@ class ZhihuDbStoreImplement(AbstractStore):
                 session.add(new_comment)
             await session.commit()
 
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Zhihu comments DB batch storage implementation, one upsert statement per batch
+        Args:
+            comment_items: comment item dict list
+        """
+        if not comment_items:
+            return
+        async with get_session() as session:
+            await bulk_upsert(session, ZhihuComment, comment_items, conflict_key="comment_id")
+
     async def store_creator(self, creator: Dict):
         """
         Zhihu content DB storage implementation
@@ -183,6 +204,14 @@ class ZhihuJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="creators", item=creator)
 
+    async def flush(self):
+        """
+        flush buffered data to json file
+        Returns:
+
+        """
+        await self.writer.flush()
+
 
 class ZhihuSqliteStoreImplement(ZhihuDbStoreImplement):
     """
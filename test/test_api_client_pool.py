@@ -0,0 +1,120 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from base.base_crawler import AbstractApiClient
+from media_platform.tieba import TieBaCrawler
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _DemoClient(AbstractApiClient):
+
+    def __init__(self, proxy=None):
+        self.proxy = proxy
+
+    async def request(self, method, url, **kwargs):
+        client = self.get_http_client(self.proxy)
+        response = await client.request(method, url, **kwargs)
+        return response.json()
+
+    async def update_cookies(self, browser_context):
+        pass
+
+
+class TestApiClientPool(IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    async def test_connection_reused(self):
+        client = _DemoClient()
+        for _ in range(5):
+            self.assertEqual(await client.request("GET", self.url), {"ok": True})
+        self.assertIs(client.get_http_client(), client.get_http_client())
+        stats = client.get_http_stats()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["connections_reused"], 4)
+        await client.close()
+        self.assertEqual(client._http_clients, {})
+
+    async def test_client_per_proxy(self):
+        client = _DemoClient()
+        direct = client.get_http_client(None)
+        proxied = client.get_http_client("http://127.0.0.1:1")
+        self.assertIsNot(direct, proxied)
+        await client.close()
+        self.assertTrue(direct.is_closed)
+        self.assertTrue(proxied.is_closed)
+        # 关闭后再次获取会重新创建连接池
+        self.assertFalse(client.get_http_client().is_closed)
+        await client.close()
+
+    async def test_rotated_proxy_clients_closed(self):
+        client = _DemoClient()
+        first = client.get_http_client("http://127.0.0.1:1")
+        second = client.get_http_client("http://127.0.0.1:2")
+        # 上一个代理的连接池可能还有进行中的请求，暂时保留
+        self.assertFalse(first.is_closed)
+        self.assertIs(client.get_http_client("http://127.0.0.1:1"), first)
+        third = client.get_http_client("http://127.0.0.1:3")
+        await asyncio.sleep(0)
+        # 切回过的代理 1 成为上一个代理，更早的代理 2 被关闭
+        self.assertTrue(second.is_closed)
+        self.assertFalse(first.is_closed)
+        self.assertEqual(list(client._http_clients.values()), [first, third])
+        await client.close()
+        self.assertTrue(first.is_closed)
+        self.assertTrue(third.is_closed)
+
+    async def test_crawler_closes_client_when_crawl_fails(self):
+        crawler = TieBaCrawler()
+        http_clients = []
+
+        async def search():
+            http_clients.append(crawler.tieba_client.get_http_client())
+            raise RuntimeError("blocked")
+
+        crawler.search = search
+        with patch.object(config, "CRAWLER_TYPE", "search"), patch.object(config, "ENABLE_IP_PROXY", False):
+            with self.assertRaises(RuntimeError):
+                await crawler.start()
+        self.assertTrue(http_clients[0].is_closed)
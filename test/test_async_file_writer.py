@@ -0,0 +1,104 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import pathlib
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from tools.async_file_writer import AsyncFileWriter, compact_jsonl_to_json, flush_all_file_writers
+
+
+class TestAsyncFileWriter(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.origin_cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.origin_cwd)
+        self.tmp_dir.cleanup()
+
+    async def test_jsonl_append(self):
+        writer = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=True, buffered=False)
+        for i in range(3):
+            await writer.write_single_item_to_json({"comment_id": str(i), "content": "评论"}, "comments")
+
+        file_path = writer._get_file_path("jsonl", "comments")
+        with open(file_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[2])["comment_id"], "2")
+
+    async def test_compact_jsonl_to_json(self):
+        writer = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=True, buffered=False)
+        for i in range(3):
+            await writer.write_single_item_to_json({"comment_id": str(i)}, "comments")
+        file_path = writer._get_file_path("jsonl", "comments")
+        # 模拟进程中断时写了一半的最后一行
+        with open(file_path, "a", encoding="utf-8") as f:
+            f.write('{"comment_id": "3"')
+
+        json_path = compact_jsonl_to_json(file_path)
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual([item["comment_id"] for item in data], ["0", "1", "2"])
+
+    async def test_json_array_compatible(self):
+        writer = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=False, buffered=False)
+        await writer.write_single_item_to_json({"note_id": "1"}, "contents")
+        await writer.write_single_item_to_json({"note_id": "2"}, "contents")
+        with open(writer._get_file_path("json", "contents"), encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    async def test_buffered_csv(self):
+        writer = AsyncFileWriter(platform="xhs", crawler_type="search", buffered=True)
+        for i in range(5):
+            await writer.write_to_csv({"comment_id": str(i), "content": "评论"}, "comments")
+        file_path = writer._get_file_path("csv", "comments")
+        # 未达到缓冲阈值，数据还在内存中
+        self.assertFalse(os.path.exists(file_path) and os.path.getsize(file_path) > 0)
+
+        await writer.flush()
+        with open(file_path, encoding="utf-8-sig") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], "comment_id,content")
+        self.assertEqual(len(lines), 6)
+
+        # 再次写入时不会重复写表头
+        await writer.write_to_csv({"comment_id": "5", "content": "评论"}, "comments")
+        await flush_all_file_writers(close=True)
+        with open(file_path, encoding="utf-8-sig") as f:
+            self.assertEqual(len(f.read().splitlines()), 7)
+
+    async def test_buffered_jsonl(self):
+        writer = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=True, buffered=True)
+        for i in range(3):
+            await writer.write_single_item_to_json({"comment_id": str(i)}, "comments")
+        await flush_all_file_writers(close=True)
+        with open(writer._get_file_path("jsonl", "comments"), encoding="utf-8") as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+    async def test_file_path_cached(self):
+        writer = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=True, buffered=True)
+        with patch.object(pathlib.Path, "mkdir", autospec=True, wraps=pathlib.Path.mkdir) as mkdir:
+            for i in range(10):
+                await writer.write_single_item_to_json({"comment_id": str(i)}, "comments")
+            await writer.write_single_item_to_json({"note_id": "1"}, "contents")
+        # 同一 (文件类型, 数据类型, 日期) 只创建一次目录
+        self.assertEqual(mkdir.call_count, 2)
+        with patch("tools.async_file_writer.utils.get_current_date", return_value="2000-01-01"):
+            self.assertTrue(writer._get_file_path("jsonl", "comments").endswith("search_comments_2000-01-01.jsonl"))
+        await flush_all_file_writers(close=True)
@@ -0,0 +1,125 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import fnmatch
+from collections import Counter
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+
+from cache.redis_cache import AsyncRedisCache
+from cache.serializer import get_serializer
+
+
+class FakeRedisServer:
+    """
+    只实现了缓存用到的命令的 RESP2 服务端，用于测试，不依赖真实的 redis
+    """
+
+    def __init__(self):
+        self.data: Dict[bytes, bytes] = {}
+        self.commands = Counter()
+        self._server = None
+        self.port = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._execute(args))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _execute(self, args: List[bytes]) -> bytes:
+        command = args[0].upper().decode()
+        self.commands[command] += 1
+        if command in ("PING", "AUTH", "SELECT"):
+            return b"+OK\r\n"
+        if command == "SET":
+            self.data[args[1]] = args[2]
+            return b"+OK\r\n"
+        if command == "GET":
+            return self._bulk(self.data.get(args[1]))
+        if command == "MGET":
+            return self._array([self._bulk(self.data.get(key)) for key in args[1:]])
+        if command == "DEL":
+            return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in args[1:])
+        if command == "SCAN":
+            options = {args[i].upper(): args[i + 1] for i in range(2, len(args), 2)}
+            keys = sorted(self.data)
+            cursor, count = int(args[1]), int(options.get(b"COUNT", 10))
+            page = keys[cursor:cursor + count]
+            next_cursor = cursor + count if cursor + count < len(keys) else 0
+            pattern = options.get(b"MATCH", b"*").decode()
+            matched = [key for key in page if fnmatch.fnmatchcase(key.decode(), pattern)]
+            return self._array([self._bulk(str(next_cursor).encode()), self._array([self._bulk(key) for key in matched])])
+        return b"-ERR unknown command '%s'\r\n" % command.encode()
+
+    @staticmethod
+    def _bulk(value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    @staticmethod
+    def _array(items: List[bytes]) -> bytes:
+        return b"*%d\r\n" % len(items) + b"".join(items)
+
+
+class TestAsyncRedisCache(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = FakeRedisServer()
+        await self.server.start()
+        self.cache = AsyncRedisCache(host="127.0.0.1", port=self.server.port, db=0, password=None)
+
+    async def asyncTearDown(self):
+        await self.cache.close()
+        await self.server.stop()
+
+    async def test_set_get(self):
+        await self.cache.set("ip_1", {"ip": "1.1.1.1", "port": 80}, 60)
+        self.assertEqual(await self.cache.get("ip_1"), {"ip": "1.1.1.1", "port": 80})
+        self.assertIsNone(await self.cache.get("missing"))
+
+    async def test_bulk_uses_pipeline_and_mget(self):
+        await self.cache.mset({f"kuaidaili_{i}": i for i in range(50)}, 60)
+        await self.cache.set("wandou_1", 1, 60)
+        keys = await self.cache.keys("kuaidaili_*")
+        self.assertEqual(len(keys), 50)
+        values = await self.cache.mget(sorted(keys, key=lambda key: int(key.split("_")[1])) + ["missing"])
+        self.assertEqual(values, list(range(50)) + [None])
+        self.assertEqual(self.server.commands["MGET"], 1)
+        self.assertEqual(self.server.commands["KEYS"], 0)
+        self.assertEqual(await self.cache.delete(*keys), 50)
+
+    async def test_serializers(self):
+        for name in ("json", "pickle"):
+            serializer = get_serializer(name)
+            self.assertEqual(serializer.loads(serializer.dumps({"a": [1, "二"]})), {"a": [1, "二"]})
+        with self.assertRaises(ValueError):
+            get_serializer("yaml")
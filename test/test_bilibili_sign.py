@@ -0,0 +1,61 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.bilibili.help import BilibiliSign
+
+IMG_KEY = "7cd084941338484aae1ad9425b84077c"
+SUB_KEY = "4932caff0ff746eab6f01bf08b70ac45"
+
+
+class FakePage:
+
+    def __init__(self):
+        self.evaluate_count = 0
+
+    async def evaluate(self, expression: str):
+        self.evaluate_count += 1
+        await asyncio.sleep(0)
+        return {
+            "wbi_img_urls": f"https://i0.hdslb.com/bfs/wbi/{IMG_KEY}.png-https://i0.hdslb.com/bfs/wbi/{SUB_KEY}.png"
+        }
+
+
+class TestBilibiliSign(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.page = FakePage()
+        self.client = BilibiliClient(headers={}, playwright_page=self.page, cookie_dict={})
+
+    def test_sign(self):
+        signer = BilibiliSign(IMG_KEY, SUB_KEY)
+        self.assertEqual(signer.salt, "ea1db124af3c7062474693fa704f4ff8")
+        with patch("tools.utils.get_unix_timestamp", return_value=1702204169):
+            req_data = signer.sign({"foo": "one two", "bar": "五一四", "baz": "(x)!*'"})
+        self.assertEqual(req_data["baz"], "x")
+        self.assertEqual(req_data["w_rid"], "01d7c1f0f34beb9e4a5db04f0bc92d98")
+
+    async def test_keys_read_once_within_ttl(self):
+        results = await asyncio.gather(*[self.client.pre_request_data({"aid": i}) for i in range(10)])
+        self.assertEqual(len({r["w_rid"] for r in results}), 10)
+        self.assertEqual(self.page.evaluate_count, 1)
+        self.assertEqual(self.client._wbi_key_cache.stats["evaluations_avoided"], 9)
+
+    async def test_keys_reloaded_after_expire(self):
+        self.client._wbi_key_cache.ttl = 0
+        await self.client.pre_request_data({"aid": 1})
+        await self.client.pre_request_data({"aid": 2})
+        self.assertEqual(self.page.evaluate_count, 2)
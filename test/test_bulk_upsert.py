@@ -0,0 +1,102 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database.db_session import bulk_upsert
+from database.models import Base, BilibiliVideoComment
+
+
+def make_comment(comment_id: int, like_count: int):
+    return {
+        "comment_id": comment_id,
+        "video_id": 1,
+        "content": f"comment {comment_id}",
+        "like_count": str(like_count),
+        "last_modify_ts": 1,
+        "not_a_column": "ignored",
+    }
+
+
+class TestBulkUpsert(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmp_dir.name, "test.db")
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    async def _upsert_twice(self):
+        async with AsyncSession(self.engine) as session:
+            await bulk_upsert(session, BilibiliVideoComment, [make_comment(i, 0) for i in range(10)], "comment_id")
+            await session.commit()
+        async with AsyncSession(self.engine) as session:
+            # 前 5 条已存在需要更新，后 5 条是新数据
+            await bulk_upsert(session, BilibiliVideoComment, [make_comment(i, 9) for i in range(5, 15)], "comment_id")
+            await session.commit()
+
+        async with AsyncSession(self.engine) as session:
+            total = (await session.execute(select(func.count()).select_from(BilibiliVideoComment))).scalar()
+            liked = (await session.execute(
+                select(func.count()).select_from(BilibiliVideoComment).where(BilibiliVideoComment.like_count == "9")
+            )).scalar()
+            add_ts_missing = (await session.execute(
+                select(func.count()).select_from(BilibiliVideoComment).where(BilibiliVideoComment.add_ts.is_(None))
+            )).scalar()
+        self.assertEqual(total, 15)
+        self.assertEqual(liked, 10)
+        self.assertEqual(add_ts_missing, 0)
+
+    async def _upsert_partial_rows(self):
+        async with AsyncSession(self.engine) as session:
+            await bulk_upsert(session, BilibiliVideoComment, [make_comment(i, 1) for i in range(2)], "comment_id")
+            await session.commit()
+        partial = {"comment_id": 0, "like_count": "5"}
+        async with AsyncSession(self.engine) as session:
+            # 同一批中字段不同的行：缺失的字段不能被更新成 NULL
+            await bulk_upsert(session, BilibiliVideoComment, [partial, make_comment(1, 7), make_comment(2, 7)], "comment_id")
+            await session.commit()
+
+        async with AsyncSession(self.engine) as session:
+            rows = (await session.execute(
+                select(BilibiliVideoComment.comment_id, BilibiliVideoComment.content, BilibiliVideoComment.like_count)
+                .where(BilibiliVideoComment.comment_id < 3).order_by(BilibiliVideoComment.comment_id)
+            )).all()
+        self.assertEqual([tuple(row) for row in rows], [
+            (0, "comment 0", "5"),
+            (1, "comment 1", "7"),
+            (2, "comment 2", "7"),
+        ])
+
+    async def test_native_upsert(self):
+        await self._upsert_twice()
+
+    async def test_native_upsert_partial_rows(self):
+        await self._upsert_partial_rows()
+
+    async def test_fallback_without_unique_index(self):
+        # 模拟旧版本建的表：comment_id 上只有普通索引
+        async with self.engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_bilibili_video_comment_comment_id"))
+            await conn.execute(text("CREATE INDEX ix_bilibili_video_comment_comment_id ON bilibili_video_comment (comment_id)"))
+        await self._upsert_twice()
+        await self._upsert_partial_rows()
@@ -0,0 +1,71 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import random
+import unittest
+from statistics import mean, median
+
+import numpy as np
+
+from media_platform.xhs.mall import XiaoHongShuMallDataProcessor
+from tools.columnar_stats import RecordColumns, group_by, histogram, top_k_indices
+
+
+class TestColumnarStats(unittest.TestCase):
+
+    def test_top_k_matches_stable_sort(self):
+        rng = random.Random(0)
+        values = [rng.randint(0, 20) for _ in range(500)]
+        for k in (0, 1, 10, 499, 500, 600):
+            expected = sorted(range(len(values)), key=lambda i: values[i], reverse=True)[:k]
+            self.assertEqual(top_k_indices(np.array(values, dtype=np.float64), k).tolist(), expected)
+
+    def test_summary_matches_statistics(self):
+        records = [{"like_count": v, "view_count": v * 3} for v in (5, 1, 9, 4)]
+        summary = RecordColumns(records, ("like_count", "view_count")).summary()
+        likes = [5, 1, 9, 4]
+        self.assertEqual(summary["like_count"], {
+            "total": sum(likes), "average": round(mean(likes), 2), "median": median(likes), "max": 9, "min": 1,
+        })
+        self.assertEqual(summary["view_count"]["total"], 57)
+
+    def test_missing_values_count_as_zero(self):
+        records = [{"price": 10, "category": "a"}, {"price": None}, {"category": "b"}]
+        columns = RecordColumns(records, ("price",), key_fields={"category": "未分类"})
+        self.assertEqual(columns.column("price").tolist(), [10, 0, 0])
+        self.assertEqual(columns.keys["category"], ["a", "未分类", "b"])
+
+    def test_histogram_right_closed(self):
+        counts = histogram(np.array([0, 50, 50.5, 100, 500, 501]), (50, 100, 200, 500), ("0-50", "50-100", "100-200", "200-500", "500+"))
+        self.assertEqual(counts, {"0-50": 2, "50-100": 2, "100-200": 0, "200-500": 1, "500+": 1})
+
+    def test_group_by_keeps_first_seen_order(self):
+        groups, codes = group_by(["b", None, "a", "b", None])
+        self.assertEqual(groups, ["b", None, "a"])
+        self.assertEqual(codes.tolist(), [0, 1, 2, 0, 1])
+
+    def test_category_stats(self):
+        products = [
+            {"product_id": "p1", "category": "a", "price": 10, "sales_count": 3},
+            {"product_id": "p2", "category": "b", "price": 0, "sales_count": 1},
+            {"product_id": "p3", "category": "a", "price": 30, "sales_count": 2},
+            {"product_id": "p4", "price": 8, "sales_count": 5},
+        ]
+        stats = XiaoHongShuMallDataProcessor.generate_category_stats(products)
+        self.assertEqual(list(stats), ["a", "b", "未分类"])
+        self.assertEqual(stats["a"], {"count": 2, "total_sales": 5, "avg_price": 20.0, "product_ids": ["p1", "p3"]})
+        self.assertEqual(stats["b"]["avg_price"], 0)
+        self.assertEqual(stats["未分类"]["avg_price"], 8.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+
+from tools.comment_pipeline import CommentPipeline
+
+
+class TestCommentPipeline(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.saved: Dict[str, List[int]] = {}
+        self.write_calls = 0
+
+    async def slow_store(self, note_id: str, comments: List[int]):
+        self.write_calls += 1
+        await asyncio.sleep(0.01)
+        self.saved.setdefault(note_id, []).extend(comments)
+
+    async def test_all_pages_written_and_merged(self):
+        async with CommentPipeline(self.slow_store, queue_size=4, writers=1, batch_size=10) as pipeline:
+            for page in range(20):
+                await pipeline("note_1", [page * 2, page * 2 + 1])
+            stats = pipeline.get_stats()
+            self.assertLessEqual(stats["max_queue_depth"], 4)
+
+        self.assertEqual(self.saved["note_1"], list(range(40)))
+        self.assertLess(self.write_calls, 20)
+        stats = pipeline.get_stats()
+        self.assertEqual(stats["pages"], 20)
+        self.assertEqual(stats["items"], 40)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreater(stats["put_wait_sec"], 0)
+
+    async def test_different_args_not_merged(self):
+        batch = [("a", [1]), ("a", [2]), ("b", [3]), ("a", [4])]
+        merged = CommentPipeline._merge(batch)
+        self.assertEqual(merged, [(("a", [1, 2]), 2), (("b", [3]), 1), (("a", [4]), 1)])
+
+    async def flaky_store(self, note_id: str, comments: List[int]):
+        if note_id == "bad":
+            raise ValueError("db down")
+        self.saved.setdefault(note_id, []).extend(comments)
+
+    async def test_writer_error_raised_on_close(self):
+        with self.assertRaises(ValueError):
+            async with CommentPipeline(self.flaky_store, writers=2, batch_size=1) as pipeline:
+                await pipeline("bad", [1])
+                await pipeline("ok", [2])
+        # 出错的评论页不影响后续评论页的写入
+        self.assertEqual(self.saved, {"ok": [2]})
+        self.assertEqual(pipeline.get_stats()["errors"], 1)
+
+    async def test_direct_mode_raises(self):
+        async with CommentPipeline(self.flaky_store, writers=0) as pipeline:
+            with self.assertRaises(ValueError):
+                await pipeline("bad", [1])
+
+    async def test_direct_mode(self):
+        async with CommentPipeline(self.slow_store, writers=0) as pipeline:
+            await pipeline("note_1", [1])
+            self.assertEqual(self.saved["note_1"], [1])
+
+    async def test_after_written_waits_for_previous_pages(self):
+        cursors: List[str] = []
+        async with CommentPipeline(self.slow_store, writers=2, batch_size=1) as pipeline:
+            await pipeline("note_1", [1])
+            await pipeline("note_1", [2])
+            pipeline.after_written(lambda: cursors.append("c1"))
+            # 回调只在此前的评论页写入后执行
+            self.assertEqual(cursors, [])
+            self.assertNotIn("note_1", self.saved)
+            await pipeline("note_1", [3])
+            pipeline.after_written(lambda: cursors.append("c2"))
+        self.assertEqual(cursors, ["c1", "c2"])
+        self.assertEqual(sorted(self.saved["note_1"]), [1, 2, 3])
+
+    async def test_after_written_skipped_after_failed_write(self):
+        cursors: List[str] = []
+        with self.assertRaises(ValueError):
+            async with CommentPipeline(self.flaky_store, writers=1, batch_size=1) as pipeline:
+                await pipeline("ok", [1])
+                pipeline.after_written(lambda: cursors.append("c1"))
+                await pipeline("bad", [2])
+                pipeline.after_written(lambda: cursors.append("c2"))
+                await pipeline("ok", [3])
+                pipeline.after_written(lambda: cursors.append("c3"))
+        # 写入失败的评论页之后的游标都不保存，下次增量爬取从失败页重新开始
+        self.assertEqual(cursors, ["c1"])
+        self.assertEqual(self.saved, {"ok": [1, 3]})
+
+    async def test_after_written_direct_mode(self):
+        cursors: List[str] = []
+        async with CommentPipeline(self.slow_store, writers=0) as pipeline:
+            await pipeline("note_1", [1])
+            pipeline.after_written(lambda: cursors.append("c1"))
+            self.assertEqual(cursors, ["c1"])
+
+
+class TestCommentCursor(IsolatedAsyncioTestCase):
+
+    async def test_truncated_page_cursor_not_saved(self):
+        from media_platform.xhs.client import XiaoHongShuClient
+
+        pages = {
+            "": {"has_more": True, "cursor": "p2", "comments": [{"id": 1}, {"id": 2}]},
+            "p2": {"has_more": True, "cursor": "p3", "comments": [{"id": 3}, {"id": 4}]},
+        }
+        client = XiaoHongShuClient.__new__(XiaoHongShuClient)
+
+        async def get_note_comments(note_id, xsec_token, cursor):
+            return pages[cursor]
+
+        async def get_comments_all_sub_comments(comments, xsec_token, crawl_interval, callback):
+            return []
+
+        client.get_note_comments = get_note_comments
+        client.get_comments_all_sub_comments = get_comments_all_sub_comments
+        saved: List[List[Dict]] = []
+        cursors: List = []
+
+        async def store(note_id, comments):
+            saved.append(comments)
+
+        result = await client.get_note_all_comments(
+            note_id="n1", xsec_token="", crawl_interval=0, callback=store, max_count=3,
+            cursor_callback=lambda cursor, has_more: cursors.append((cursor, has_more)),
+        )
+        self.assertEqual(len(result), 3)
+        self.assertEqual(saved, [[{"id": 1}, {"id": 2}], [{"id": 3}]])
+        # 第二页被截断，游标停在第二页
+        self.assertEqual(cursors, [("p2", True)])
@@ -0,0 +1,90 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from tools.crawl_checkpoint import CrawlCheckpoint
+
+KEYWORDS = ["python", "golang", "rust"]
+
+
+class TestCrawlCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "xhs_search.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def new_checkpoint(self, resume: bool) -> CrawlCheckpoint:
+        return CrawlCheckpoint(self.path, "xhs", "search", resume=resume, flush_interval=60)
+
+    def crawl_until_interrupted(self):
+        checkpoint = self.new_checkpoint(resume=False)
+        for keyword in checkpoint.iter_tasks(KEYWORDS):
+            page = checkpoint.resume_page(1)
+            if keyword == "python":
+                checkpoint.finish_page(page + 1)
+                continue
+            checkpoint.save_page(page, ["n1", "n2", "n3"], search_id="sid")
+            checkpoint.save_comment_cursor("n1", "", False)
+            checkpoint.save_comment_cursor("n2", "cursor_2", True)
+            checkpoint.close()
+            return
+
+    def test_resume_from_interrupted_page(self):
+        self.crawl_until_interrupted()
+
+        checkpoint = self.new_checkpoint(resume=True)
+        keywords = checkpoint.iter_tasks(KEYWORDS)
+        self.assertEqual(next(keywords), "golang")
+        self.assertEqual(checkpoint.resume_page(1), 1)
+        self.assertEqual(checkpoint.resume_search_id("new_sid"), "sid")
+        self.assertEqual(checkpoint.pending_ids, ["n2", "n3"])
+        self.assertEqual(checkpoint.get_comment_state("n1"), (None, True))
+        self.assertEqual(checkpoint.get_comment_state("n2"), ("cursor_2", False))
+        self.assertEqual(checkpoint.get_comment_state("n3"), (None, False))
+
+        # 下一个关键词从头开始
+        self.assertEqual(next(keywords), "rust")
+        self.assertEqual(checkpoint.resume_page(1), 1)
+        self.assertEqual(checkpoint.resume_search_id("new_sid"), "new_sid")
+        self.assertEqual(checkpoint.pending_ids, [])
+
+    def test_changed_task_list_starts_over(self):
+        self.crawl_until_interrupted()
+
+        checkpoint = self.new_checkpoint(resume=True)
+        self.assertEqual(next(checkpoint.iter_tasks(["java"] + KEYWORDS)), "java")
+        self.assertEqual(checkpoint.resume_page(1), 1)
+
+    def test_without_resume_starts_over(self):
+        self.crawl_until_interrupted()
+
+        checkpoint = self.new_checkpoint(resume=False)
+        self.assertEqual(next(checkpoint.iter_tasks(KEYWORDS)), "python")
+
+    def test_finish_removes_checkpoint(self):
+        self.crawl_until_interrupted()
+        self.assertTrue(os.path.exists(self.path))
+
+        checkpoint = self.new_checkpoint(resume=True)
+        list(checkpoint.iter_tasks(KEYWORDS))
+        checkpoint.finish()
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
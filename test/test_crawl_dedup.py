@@ -0,0 +1,80 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.crawl_dedup import ContentDedup
+from var import source_keyword_var
+
+
+class TestContentDedup(IsolatedAsyncioTestCase):
+
+    async def test_concurrent_requests_coalesced(self):
+        dedup = ContentDedup()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"note_id": "n1"}
+
+        results = await asyncio.gather(*[dedup.run_once("detail", "n1", fetch) for _ in range(3)])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([fetched for _, fetched in results], [True, False, False])
+        self.assertTrue(all(detail == {"note_id": "n1"} for detail, _ in results))
+
+        # 之后的关键词再次命中直接返回缓存结果
+        detail, fetched = await dedup.run_once("detail", "n1", fetch)
+        self.assertEqual(detail, {"note_id": "n1"})
+        self.assertFalse(fetched)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(dedup.stats, {"detail": 3})
+        self.assertEqual(dedup.requests_saved, 3)
+
+    async def test_failure_not_cached(self):
+        dedup = ContentDedup()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise IOError("blocked")
+
+        results = await asyncio.gather(dedup.run_once("comments", "n1", fail), dedup.run_once("comments", "n1", fail), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, IOError) for result in results))
+
+        async def fetch():
+            return True
+
+        self.assertEqual(await dedup.run_once("comments", "n1", fetch), (True, True))
+
+    async def test_none_result_not_cached(self):
+        dedup = ContentDedup()
+        results = [None, {"note_id": "n1"}]
+
+        async def fetch():
+            # 详情任务出错时返回 None
+            return results.pop(0)
+
+        self.assertEqual(await dedup.run_once("detail", "n1", fetch), (None, True))
+        # 上一次失败，之后的关键词命中时重新请求
+        self.assertEqual(await dedup.run_once("detail", "n1", fetch), ({"note_id": "n1"}, True))
+        self.assertEqual(await dedup.run_once("detail", "n1", fetch), ({"note_id": "n1"}, False))
+
+    async def test_source_keywords_merged(self):
+        dedup = ContentDedup()
+        source_keyword_var.set("python")
+        with dedup.source_keywords("n1") as keywords:
+            self.assertEqual(keywords, "python")
+        source_keyword_var.set("golang")
+        with dedup.source_keywords("n1"):
+            self.assertEqual(source_keyword_var.get(), "python,golang")
+        self.assertEqual(source_keyword_var.get(), "golang")
@@ -0,0 +1,77 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from tools.crawl_index import CrawlIndex
+
+
+class TestCrawlIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "crawl_index.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_seen_persists_across_runs(self):
+        index = CrawlIndex(self.db_path)
+        self.assertFalse(index.is_seen("xhs", "note_1"))
+        index.mark_seen("xhs", "note_1")
+        index.close()
+
+        index = CrawlIndex(self.db_path)
+        self.assertTrue(index.is_seen("xhs", "note_1"))
+        self.assertFalse(index.is_seen("xhs", "note_2"))
+        self.assertFalse(index.is_seen("douyin", "note_1"))
+        self.assertEqual(index.stats["details_skipped"], 1)
+        index.close()
+
+    def test_comment_cursor_resume(self):
+        index = CrawlIndex(self.db_path)
+        self.assertEqual(index.get_comment_state("bilibili", 42), (None, False))
+        index.save_comment_cursor("bilibili", 42, 3, True)
+        index.close()
+
+        index = CrawlIndex(self.db_path)
+        self.assertEqual(index.get_comment_state("bilibili", 42), ("3", False))
+        index.save_comment_cursor("bilibili", 42, 7, False)
+        index.close()
+
+        index = CrawlIndex(self.db_path)
+        self.assertEqual(index.get_comment_state("bilibili", "42"), ("7", True))
+        self.assertEqual(index.stats["comments_skipped"], 1)
+        index.close()
+
+    def test_flush_in_batches(self):
+        index = CrawlIndex(self.db_path, flush_size=2)
+        index.mark_seen("xhs", "a")
+        index.mark_seen("xhs", "b")
+        count = index.open().execute("SELECT COUNT(*) FROM crawl_seen").fetchone()[0]
+        self.assertEqual(count, 2)
+        index.close()
+
+    def test_disabled_is_noop(self):
+        index = CrawlIndex(self.db_path, enabled=False)
+        index.mark_seen("xhs", "note_1")
+        index.save_comment_cursor("xhs", "note_1", "abc", True)
+        self.assertFalse(index.is_seen("xhs", "note_1"))
+        self.assertEqual(index.get_comment_state("xhs", "note_1"), (None, False))
+        index.close()
+        self.assertFalse(os.path.exists(self.db_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import csv
+import glob
+import os
+import tempfile
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from media_platform.douyin import DouYinCrawler
+from media_platform.xhs import XiaoHongShuCrawler
+from store.store_registry import store_registry
+from tools import async_file_writer, crawl_checkpoint, crawl_dedup
+
+
+class _FakeDouYinClient:
+    """
+    每个关键词的搜索结果都包含同一个作品
+    """
+
+    async def search_info_by_keyword(self, keyword: str, **kwargs) -> Dict:
+        return {"data": [{"aweme_info": {"aweme_id": "a1", "desc": f"hit by {keyword}"}}], "extra": {"logid": ""}}
+
+
+class _FakeXhsClient:
+    """
+    每个关键词的搜索结果都包含同一篇笔记
+    """
+
+    def __init__(self):
+        self.detail_calls = 0
+
+    async def get_note_by_keyword(self, keyword: str, **kwargs) -> Dict:
+        return {"has_more": True, "items": [{"id": "n1", "xsec_token": "t", "xsec_source": "pc_search"}]}
+
+    async def get_note_by_id(self, note_id: str, xsec_source: str, xsec_token: str) -> Dict:
+        self.detail_calls += 1
+        return {"note_id": note_id, "type": "normal", "title": "title", "desc": "desc", "user": {"user_id": "u1"}}
+
+
+async def _noop(*args, **kwargs):
+    pass
+
+
+def _read_content_rows(platform: str) -> List[Dict]:
+    rows = []
+    for file_path in glob.glob(f"data/{platform}/csv/*contents*.csv"):
+        with open(file_path, encoding="utf-8-sig") as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+class TestCrawlerDedup(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.origin_cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.origin_config = {
+            name: getattr(config, name)
+            for name in (
+                "PLATFORM", "KEYWORDS", "CRAWLER_MAX_NOTES_COUNT", "START_PAGE", "ENABLE_GET_MEIDAS", "CRAWLER_MAX_SLEEP_SEC",
+                "SAVE_DATA_OPTION",
+            )
+        }
+        config.PLATFORM = "dy"
+        config.KEYWORDS = "k1,k2"
+        config.CRAWLER_MAX_NOTES_COUNT = 10
+        config.START_PAGE = 1
+        config.ENABLE_GET_MEIDAS = True
+        config.CRAWLER_MAX_SLEEP_SEC = 0
+        crawl_dedup.close_content_dedup()
+        store_registry.open()
+
+    async def asyncTearDown(self):
+        await store_registry.close()
+        await async_file_writer.flush_all_file_writers(close=True)
+        crawl_dedup.close_content_dedup()
+        crawl_checkpoint.close_crawl_checkpoint()
+        for name, value in self.origin_config.items():
+            setattr(config, name, value)
+        os.chdir(self.origin_cwd)
+        self.tmp_dir.cleanup()
+
+    async def test_douyin_media_submitted_once(self):
+        crawler = DouYinCrawler.__new__(DouYinCrawler)
+        crawler.dy_client = _FakeDouYinClient()
+        videos: List[str] = []
+
+        async def get_aweme_video(aweme_item: Dict):
+            videos.append(aweme_item["aweme_id"])
+
+        crawler.get_aweme_video = get_aweme_video
+        crawler.batch_get_note_comments = _noop
+        with patch("store.douyin.update_douyin_aweme", side_effect=_noop):
+            await crawler.search()
+        # 两个关键词命中同一作品，媒体只提交一次
+        self.assertEqual(videos, ["a1"])
+        self.assertEqual(crawler.content_dedup.stats.get("media"), 1)
+
+    async def test_douyin_csv_store_content_saved_once(self):
+        config.SAVE_DATA_OPTION = "csv"
+        config.ENABLE_GET_MEIDAS = False
+        crawler = DouYinCrawler.__new__(DouYinCrawler)
+        crawler.dy_client = _FakeDouYinClient()
+        crawler.batch_get_note_comments = _noop
+        await crawler.search()
+        await async_file_writer.flush_all_file_writers(close=True)
+        # csv 只能追加，重复命中时不再写入重复的行
+        rows = _read_content_rows("douyin")
+        self.assertEqual([row["aweme_id"] for row in rows], ["a1"])
+
+    async def test_xhs_csv_store_content_saved_once(self):
+        config.PLATFORM = "xhs"
+        config.SAVE_DATA_OPTION = "csv"
+        config.CRAWLER_MAX_NOTES_COUNT = 20
+        crawler = XiaoHongShuCrawler.__new__(XiaoHongShuCrawler)
+        crawler.xhs_client = _FakeXhsClient()
+        crawler.batch_get_note_comments = _noop
+        crawler.get_notice_media = _noop
+        await crawler.search()
+        await async_file_writer.flush_all_file_writers(close=True)
+        self.assertEqual(crawler.xhs_client.detail_calls, 1)
+        rows = _read_content_rows("xhs")
+        self.assertEqual([row["note_id"] for row in rows], ["n1"])
+        self.assertEqual(rows[0]["source_keyword"], "k1")
+
+    async def test_db_store_content_resaved_with_all_keywords(self):
+        config.PLATFORM = "xhs"
+        config.SAVE_DATA_OPTION = "sqlite"
+        config.CRAWLER_MAX_NOTES_COUNT = 20
+        crawler = XiaoHongShuCrawler.__new__(XiaoHongShuCrawler)
+        crawler.xhs_client = _FakeXhsClient()
+        crawler.batch_get_note_comments = _noop
+        crawler.get_notice_media = _noop
+        saved: List[Dict] = []
+
+        async def store_content(content_item: Dict):
+            saved.append(content_item)
+
+        with patch("store.xhs._store_impl.XhsSqliteStoreImplement.store_content", side_effect=store_content):
+            await crawler.search()
+        # 数据库存储按内容 ID 覆盖，重复命中时重新保存以记录所有关键词
+        self.assertEqual([item["source_keyword"] for item in saved], ["k1", "k1,k2"])
@@ -0,0 +1,59 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from sqlalchemy import text
+
+import config
+from config.db_config import sqlite_db_config
+from database import db_session
+
+
+class TestDbSession(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.origin_option = config.SAVE_DATA_OPTION
+        self.origin_db_path = sqlite_db_config["db_path"]
+        config.SAVE_DATA_OPTION = "sqlite"
+        sqlite_db_config["db_path"] = os.path.join(self.tmp_dir.name, "test.db")
+        await db_session.create_tables("sqlite")
+
+    async def asyncTearDown(self):
+        await db_session.dispose_engines()
+        config.SAVE_DATA_OPTION = self.origin_option
+        sqlite_db_config["db_path"] = self.origin_db_path
+        self.tmp_dir.cleanup()
+
+    async def test_session_factory_cached(self):
+        self.assertIs(db_session.get_session_factory("sqlite"), db_session.get_session_factory("sqlite"))
+
+    async def test_sqlite_pragma(self):
+        async with db_session.get_session() as session:
+            journal_mode = (await session.execute(text("PRAGMA journal_mode"))).scalar()
+            synchronous = (await session.execute(text("PRAGMA synchronous"))).scalar()
+        self.assertEqual(journal_mode.lower(), "wal")
+        self.assertEqual(synchronous, 1)  # NORMAL
+
+    async def test_writer_session(self):
+        async with db_session.writer_session():
+            async with db_session.get_session() as first:
+                pass
+            async with db_session.get_session() as second:
+                pass
+            self.assertIs(first, second)
+            self.assertTrue(db_session.get_pool_metrics()["writer_session"])
+        self.assertEqual(db_session.get_pool_metrics()["checkouts"], 2)
+        self.assertFalse(db_session.get_pool_metrics()["writer_session"])
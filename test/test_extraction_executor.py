@@ -0,0 +1,52 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+from media_platform.tieba.help import TieBaExtractor
+from tools.extraction_executor import ExtractionExecutor
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media_platform", "tieba", "test_data")
+
+
+class TestExtractionExecutor(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        with open(os.path.join(TEST_DATA_DIR, "tieba_note_list.html"), "r", encoding="utf-8") as f:
+            self.page_content = f.read()
+        self.extractor = TieBaExtractor()
+
+    async def test_small_page_parsed_inline(self):
+        executor = ExtractionExecutor(max_workers=1, min_page_size=len(self.page_content) + 1)
+        notes = await executor.run(self.extractor.extract_tieba_note_list, self.page_content)
+        self.assertEqual(executor.stats, {"pool": 0, "inline": 1})
+        self.assertTrue(notes)
+        executor.shutdown()
+
+    async def test_large_page_parsed_in_pool(self):
+        executor = ExtractionExecutor(max_workers=1, min_page_size=1024)
+        try:
+            notes = await executor.run(self.extractor.extract_tieba_note_list, self.page_content)
+        finally:
+            executor.shutdown()
+        self.assertEqual(executor.stats, {"pool": 1, "inline": 0})
+        self.assertEqual(notes, self.extractor.extract_tieba_note_list(self.page_content))
+
+    async def test_disabled_pool(self):
+        executor = ExtractionExecutor(max_workers=0, min_page_size=0)
+        await executor.run(self.extractor.extract_tieba_note_list, self.page_content)
+        self.assertEqual(executor.stats, {"pool": 0, "inline": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
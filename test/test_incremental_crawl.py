@@ -0,0 +1,125 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from media_platform.kuaishou import KuaishouCrawler
+from media_platform.weibo.client import WeiboClient
+from store.store_registry import store_registry
+from tools import crawl_checkpoint, crawl_dedup, crawl_index
+
+
+class _FakeKuaishouClient:
+    """
+    搜索结果固定包含同一个视频，第一次抓取评论时只抓到第一页
+    """
+
+    def __init__(self):
+        self.comment_cursors: List[str] = []
+
+    async def search_info_by_keyword(self, keyword: str, **kwargs) -> Dict:
+        return {"visionSearchPhoto": {"result": 1, "searchSessionId": "", "feeds": [{"photo": {"id": "v1"}}]}}
+
+    async def get_video_all_comments(self, photo_id: str, cursor: str = "", cursor_callback=None, **kwargs):
+        self.comment_cursors.append(cursor)
+        cursor_callback("pc2", True)
+
+
+async def _noop(*args, **kwargs):
+    pass
+
+
+class TestIncrementalCrawl(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.origin_cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.origin_config = {
+            name: getattr(config, name)
+            for name in (
+                "PLATFORM", "KEYWORDS", "CRAWLER_MAX_NOTES_COUNT", "START_PAGE", "CRAWLER_MAX_SLEEP_SEC",
+                "ENABLE_INCREMENTAL_CRAWL", "ENABLE_GET_COMMENTS", "ENABLE_GET_SUB_COMMENTS",
+            )
+        }
+        config.PLATFORM = "ks"
+        config.KEYWORDS = "k1"
+        config.CRAWLER_MAX_NOTES_COUNT = 20
+        config.START_PAGE = 1
+        config.CRAWLER_MAX_SLEEP_SEC = 0
+        config.ENABLE_INCREMENTAL_CRAWL = True
+        config.ENABLE_GET_COMMENTS = True
+        config.ENABLE_GET_SUB_COMMENTS = False
+        crawl_index.close_crawl_index()
+        crawl_dedup.close_content_dedup()
+        store_registry.open()
+
+    async def asyncTearDown(self):
+        await store_registry.close()
+        crawl_index.close_crawl_index()
+        crawl_dedup.close_content_dedup()
+        crawl_checkpoint.close_crawl_checkpoint()
+        for name, value in self.origin_config.items():
+            setattr(config, name, value)
+        os.chdir(self.origin_cwd)
+        self.tmp_dir.cleanup()
+
+    async def test_kuaishou_search_skips_seen_and_resumes_comments(self):
+        client = _FakeKuaishouClient()
+        saved: List[str] = []
+
+        async def update_kuaishou_video(video_item: Dict):
+            saved.append(video_item["photo"]["id"])
+
+        for _ in range(2):
+            crawler = KuaishouCrawler.__new__(KuaishouCrawler)
+            crawler.ks_client = client
+            with patch("store.kuaishou.update_kuaishou_video", side_effect=update_kuaishou_video):
+                await crawler.search()
+            # 模拟下一次运行：索引落盘后重新读取
+            crawl_index.close_crawl_index()
+            crawl_dedup.close_content_dedup()
+            crawl_checkpoint.close_crawl_checkpoint()
+
+        self.assertEqual(saved, ["v1"])
+        self.assertEqual(client.comment_cursors, ["", "pc2"])
+
+    async def test_weibo_comment_cursor_round_trip(self):
+        client = WeiboClient.__new__(WeiboClient)
+        requests: List[tuple] = []
+        pages = [
+            {"max_id": 111, "max_id_type": 1, "data": [{"id": "c1"}]},
+            {"max_id": 0, "max_id_type": 0, "data": [{"id": "c2"}]},
+        ]
+
+        async def get_note_comments(note_id: str, max_id: int, max_id_type: int = 0) -> Dict:
+            requests.append((max_id, max_id_type))
+            return pages[len(requests) - 1]
+
+        client.get_note_comments = get_note_comments
+        cursors: List[tuple] = []
+        await client.get_note_all_comments(
+            "m1", crawl_interval=0, max_count=1, cursor_callback=lambda cursor, has_more: cursors.append((cursor, has_more))
+        )
+        self.assertEqual(cursors, [("111:1", True)])
+
+        await client.get_note_all_comments(
+            "m1", crawl_interval=0, max_count=10, cursor=cursors[-1][0],
+            cursor_callback=lambda cursor, has_more: cursors.append((cursor, has_more)),
+        )
+        self.assertEqual(requests, [(-1, 0), (111, 1)])
+        self.assertEqual(cursors[-1], ("0:0", False))
@@ -0,0 +1,101 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools.js_worker_pool import JsWorkerError, JsWorkerPool
+
+TEST_JS = """
+const crypto = require('crypto');
+function add(a, b) {
+    console.log("noise");
+    return a + b;
+}
+function md5(s) {
+    return crypto.createHash('md5').update(s).digest('hex');
+}
+function boom() {
+    throw new Error("boom");
+}
+function hang() {
+    while (true) {}
+}
+"""
+
+
+@unittest.skipUnless(JsWorkerPool.is_available(), "node is not installed")
+class TestJsWorkerPool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.script_path = os.path.join(self.tmp_dir.name, "test.js")
+        with open(self.script_path, "w", encoding="utf-8-sig") as f:
+            f.write(TEST_JS)
+        self.pool = JsWorkerPool(self.script_path, size=2, queue_size=4, call_timeout=2)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        self.tmp_dir.cleanup()
+
+    async def test_call(self):
+        results = await asyncio.gather(*[self.pool.call("add", i, 1) for i in range(20)])
+        self.assertEqual(results, [i + 1 for i in range(20)])
+        self.assertEqual(await self.pool.call("md5", "abc"), "900150983cd24fb0d6963f7d28e17f72")
+        self.assertEqual(self.pool.get_stats()["calls"], 21)
+
+    async def test_js_error_keeps_worker(self):
+        with self.assertRaises(JsWorkerError):
+            await self.pool.call("boom")
+        self.assertEqual(await self.pool.call("add", 1, 2), 3)
+        self.assertEqual(self.pool.get_stats()["restarts"], 0)
+
+    async def test_timeout_restarts_worker(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.pool.call("hang")
+        self.assertEqual(await self.pool.call("add", 2, 2), 4)
+        self.assertEqual(self.pool.get_stats()["restarts"], 1)
+
+    async def test_restart_failure_keeps_consumers(self):
+        self.pool.restart_max_backoff = 0.01
+        self.assertEqual(await self.pool.call("add", 1, 1), 2)
+        # 进程被杀死且无法重新启动（如 node 被删除）
+        for worker in self.pool._workers:
+            worker.node_path = os.path.join(self.tmp_dir.name, "missing-node")
+            worker.process.kill()
+            await worker.process.wait()
+        for _ in range(3):
+            with self.assertRaises(ConnectionError):
+                await self.pool.call("add", 1, 1)
+        self.assertTrue(all(not task.done() for task in self.pool._tasks))
+        self.assertGreaterEqual(self.pool.get_stats()["restart_failures"], 3)
+
+        # node 恢复后继续提供服务
+        for worker in self.pool._workers:
+            worker.node_path = self.pool.node_path
+        self.assertEqual(await self.pool.call("add", 2, 3), 5)
+
+    async def test_call_wait_timeout(self):
+        pool = JsWorkerPool(self.script_path, size=1, call_timeout=2, wait_timeout=0.3)
+        try:
+            hang = asyncio.create_task(pool.call("hang"))
+            await asyncio.sleep(0.05)
+            # 唯一的 worker 被占用，排队的调用在 wait_timeout 后以超时结束
+            with self.assertRaises(asyncio.TimeoutError):
+                await pool.call("add", 1, 1)
+            with self.assertRaises(asyncio.TimeoutError):
+                await hang
+        finally:
+            await pool.close()
@@ -0,0 +1,71 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import patch
+
+from cache.cache_factory import CacheFactory
+from cache.lru_cache import LRUExpiringCache
+
+
+class TestLRUExpiringCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch("cache.lru_cache.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = LRUExpiringCache(max_size=3)
+
+    def test_factory(self):
+        self.assertIsInstance(CacheFactory.create_cache("memory"), LRUExpiringCache)
+
+    def test_set_get_and_expire(self):
+        self.cache.set("key", "value", 10)
+        self.assertEqual(self.cache.get("key"), "value")
+        self.now += 11
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.keys("*"), [])
+
+    def test_overwrite_extends_expire(self):
+        self.cache.set("key", "v1", 10)
+        self.now += 5
+        self.cache.set("key", "v2", 10)
+        self.now += 6
+        self.assertEqual(self.cache.get("key"), "v2")
+
+    def test_lru_eviction(self):
+        for key in ("a", "b", "c"):
+            self.cache.set(key, key, 60)
+        self.cache.get("a")
+        self.cache.set("d", "d", 60)
+        self.assertEqual(self.cache.mget(["a", "b", "c", "d"]), ["a", None, "c", "d"])
+        self.assertEqual(self.cache.keys("*"), ["a", "c", "d"])
+
+    def test_glob_keys(self):
+        cache = LRUExpiringCache(max_size=100)
+        for key in ("kuaidaili_1.1.1.1", "kuaidaili_2.2.2.2", "wandou_1.1.1.1", "xkuaidaili_3"):
+            cache.set(key, key, 60)
+        self.assertEqual(cache.keys("kuaidaili_*"), ["kuaidaili_1.1.1.1", "kuaidaili_2.2.2.2"])
+        self.assertEqual(cache.keys("*_1.1.1.1"), ["kuaidaili_1.1.1.1", "wandou_1.1.1.1"])
+        self.assertEqual(cache.keys("kuaidaili_?.2.2.2"), ["kuaidaili_2.2.2.2"])
+        self.assertEqual(cache.keys("wandou_1.1.1.1"), ["wandou_1.1.1.1"])
+
+    def test_heap_stays_bounded(self):
+        for i in range(1000):
+            self.cache.set("key", i, 60)
+        self.assertLess(len(self.cache._expire_heap), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
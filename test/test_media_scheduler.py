@@ -0,0 +1,85 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from collections import Counter
+from typing import List
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from tools.media_scheduler import MediaDownloadScheduler
+from tools.media_writer import MediaSource
+
+
+def source(url: str) -> MediaSource:
+    async def stream(offset: int):
+        yield b""
+
+    return MediaSource(url, stream)
+
+
+def status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://img.test/a.jpg")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+
+class TestMediaDownloadScheduler(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.saved: List[str] = []
+        self.running = Counter()
+        self.max_running = Counter()
+
+    async def slow_save(self, note_id: str, content: MediaSource, file_name: str):
+        host = content.url.split("/")[2]
+        self.running[host] += 1
+        self.max_running[host] = max(self.max_running[host], self.running[host])
+        await asyncio.sleep(0.01)
+        self.running[host] -= 1
+        self.saved.append(f"{note_id}/{file_name}")
+
+    async def test_submit_returns_before_download_and_drain_waits(self):
+        scheduler = MediaDownloadScheduler(workers=4, per_host=2, max_sleep=0)
+        for i in range(6):
+            await scheduler.submit(self.slow_save, "note", source(f"http://a.test/{i}.jpg"), f"{i}.jpg")
+            await scheduler.submit(self.slow_save, "note", source(f"http://b.test/{i}.jpg"), f"b{i}.jpg")
+        self.assertLess(len(self.saved), 12)
+        await scheduler.drain()
+        self.assertEqual(len(self.saved), 12)
+        self.assertEqual(self.max_running["a.test"], 2)
+        self.assertEqual(self.max_running["b.test"], 2)
+        stats = scheduler.get_stats()
+        self.assertEqual((stats["submitted"], stats["completed"], stats["queued"]), (12, 12, 0))
+
+    async def test_retry_policy(self):
+        attempts = Counter()
+
+        async def flaky_save(note_id: str, content: MediaSource, file_name: str):
+            attempts[note_id] += 1
+            if note_id == "server_error" and attempts[note_id] < 3:
+                raise status_error(502)
+            if note_id == "not_found":
+                raise status_error(404)
+
+        scheduler = MediaDownloadScheduler(workers=2, max_retries=3, retry_backoff=0, max_sleep=0)
+        await scheduler.submit(flaky_save, "server_error", source("http://a.test/1.jpg"), "1.jpg")
+        await scheduler.submit(flaky_save, "not_found", source("http://a.test/2.jpg"), "2.jpg")
+        await scheduler.drain()
+        self.assertEqual(attempts, {"server_error": 3, "not_found": 1})
+        stats = scheduler.get_stats()
+        self.assertEqual((stats["completed"], stats["failed"], stats["retries"]), (1, 1, 2))
+
+    async def test_direct_mode(self):
+        scheduler = MediaDownloadScheduler(workers=0, max_sleep=0)
+        await scheduler.submit(self.slow_save, "note", source("http://a.test/0.jpg"), "0.jpg")
+        self.assertEqual(self.saved, ["note/0.jpg"])
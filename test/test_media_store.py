@@ -0,0 +1,91 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from typing import List
+from unittest import IsolatedAsyncioTestCase
+
+from tools.media_store import MediaStore
+from tools.media_writer import MediaSource
+
+CONTENT = bytes(range(256)) * 64
+
+
+class FakeServer:
+    """
+    模拟支持 Range 的媒体服务器，fail_at 指定第一次请求在第几个字节处断开
+    """
+
+    def __init__(self, fail_at: int = -1):
+        self.fail_at = fail_at
+        self.offsets: List[int] = []
+
+    def source(self, url: str, content: bytes = CONTENT) -> MediaSource:
+        async def stream(offset: int):
+            self.offsets.append(offset)
+            for start in range(offset, len(content), 1024):
+                if self.fail_at >= 0 and start >= self.fail_at:
+                    self.fail_at = -1
+                    raise IOError("connection reset")
+                yield content[start:start + 1024]
+
+        return MediaSource(url, stream)
+
+
+class TestMediaStore(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = MediaStore(os.path.join(self.tmp_dir.name, ".media_store"))
+
+    async def asyncTearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp_dir.name, "images", name)
+
+    async def test_skip_known_url(self):
+        server = FakeServer()
+        await self.store.save(self.path("a/0.jpg"), server.source("http://cdn/1.jpg"))
+        await self.store.save(self.path("a/0.jpg"), server.source("http://cdn/1.jpg"))
+        await self.store.save(self.path("b/0.jpg"), server.source("http://cdn/1.jpg"))
+        self.assertEqual(server.offsets, [0])
+        self.assertTrue(os.path.samefile(self.path("a/0.jpg"), self.path("b/0.jpg")))
+        stats = self.store.get_stats()
+        self.assertEqual((stats["downloaded"], stats["skipped"]), (1, 2))
+
+    async def test_dedup_same_content_by_hardlink(self):
+        server = FakeServer()
+        await self.store.save(self.path("a/0.jpg"), server.source("http://cdn/1.jpg?sign=1"))
+        await self.store.save(self.path("b/0.jpg"), server.source("http://cdn/1.jpg?sign=2"))
+        self.assertTrue(os.path.samefile(self.path("a/0.jpg"), self.path("b/0.jpg")))
+        self.assertEqual(self.store.get_stats()["deduped"], 1)
+
+    async def test_resume_with_range(self):
+        server = FakeServer(fail_at=4096)
+        with self.assertRaises(IOError):
+            await self.store.save(self.path("a/0.jpg"), server.source("http://cdn/1.jpg"))
+        self.assertFalse(os.path.exists(self.path("a/0.jpg")))
+
+        size = await self.store.save(self.path("a/0.jpg"), server.source("http://cdn/1.jpg"))
+        self.assertEqual(server.offsets, [0, 4096])
+        self.assertEqual(size, len(CONTENT))
+        with open(self.path("a/0.jpg"), "rb") as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertEqual(self.store.get_stats()["resumed"], 1)
+
+    async def test_bytes_content(self):
+        await self.store.save(self.path("a/0.jpg"), b"abc")
+        await self.store.save(self.path("b/0.jpg"), b"abc")
+        self.assertTrue(os.path.samefile(self.path("a/0.jpg"), self.path("b/0.jpg")))
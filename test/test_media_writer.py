@@ -0,0 +1,53 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from tools.media_writer import TEMP_FILE_SUFFIX, write_media_file
+
+
+async def chunks(count: int, fail_at: int = -1):
+    for i in range(count):
+        if i == fail_at:
+            raise IOError("connection reset")
+        yield bytes([i]) * 1024
+
+
+class TestMediaWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "note_1", "0.jpg")
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_write_bytes(self):
+        size = await write_media_file(self.file_path, b"abc")
+        self.assertEqual(size, 3)
+        with open(self.file_path, "rb") as f:
+            self.assertEqual(f.read(), b"abc")
+
+    async def test_write_stream(self):
+        size = await write_media_file(self.file_path, chunks(8))
+        self.assertEqual(size, 8 * 1024)
+        self.assertFalse(os.path.exists(self.file_path + TEMP_FILE_SUFFIX))
+        with open(self.file_path, "rb") as f:
+            self.assertEqual(f.read(), b"".join(bytes([i]) * 1024 for i in range(8)))
+
+    async def test_failed_stream_leaves_no_file(self):
+        with self.assertRaises(IOError):
+            await write_media_file(self.file_path, chunks(8, fail_at=3))
+        self.assertFalse(os.path.exists(self.file_path))
+        self.assertFalse(os.path.exists(self.file_path + TEMP_FILE_SUFFIX))
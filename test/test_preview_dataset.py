@@ -0,0 +1,154 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from tools.preview_dataset import PreviewDataset, PreviewLoader, iter_json_records, snapshot_path
+
+
+class TestPreviewDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.platform_dir = Path(self.tmp_dir.name) / "douyin"
+        (self.platform_dir / "csv").mkdir(parents=True)
+        (self.platform_dir / "json").mkdir()
+        (self.platform_dir / "csv" / "search_contents_2024.csv").write_text(
+            "aweme_id,title,desc,nickname,create_time\n"
+            "7300000000000000001,,a long description,author1,1700000000\n"
+            "7300000000000000002,title2,desc2,author2,1700000001\n",
+            encoding="utf-8",
+        )
+        (self.platform_dir / "csv" / "search_comments_2024.csv").write_text(
+            "aweme_id,comment_id,content,nickname,ip_label,like_count\n"
+            "7300000000000000002,c1,hello,u1,广东,1\n"
+            "7300000000000000001,c2,abc,u2,,2\n"
+            "7300000000000000002,c3,hi,u3,北京,3\n",
+            encoding="utf-8",
+        )
+        comments = [
+            {"aweme_id": "7300000000000000002", "comment_id": "c4", "content": "xyzw", "ip_label": "广东", "like_count": 4},
+            {"aweme_id": "7300000000000000003", "comment_id": "c5", "content": None, "ip_label": None},
+        ]
+        (self.platform_dir / "json" / "search_comments_2024.json").write_text(json.dumps(comments), encoding="utf-8")
+
+        self.dataset = PreviewDataset()
+        self.loaded_files = self.dataset.load_platform(self.platform_dir)
+        self.dataset.build()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_contents_normalized(self):
+        self.assertEqual(self.loaded_files, 3)
+        first = self.dataset.content_at(0)
+        self.assertEqual(first["id"], "7300000000000000001")
+        self.assertEqual(first["title"], "a long description")
+        self.assertEqual(first["author"], "author1")
+        self.assertEqual(first["platform"], "douyin")
+
+    def test_comments_indexed_by_content(self):
+        comments = self.dataset.comments_of("7300000000000000002")
+        # 同一内容的评论保持文件中的顺序
+        self.assertEqual(comments["comment_id"].tolist(), ["c1", "c3", "c4"])
+        self.assertEqual(self.dataset.comments_of("7300000000000000002", limit=2)["comment_id"].tolist(), ["c1", "c3"])
+        self.assertEqual(self.dataset.comment_summary("7300000000000000002"), (3, 11 / 3))
+        self.assertEqual(self.dataset.comment_summary("missing"), (0, 0.0))
+        self.assertEqual(self.dataset.comment_texts("7300000000000000003"), [""])
+
+    def test_comment_items_keyed_by_row_without_comment_id(self):
+        comments_file = self.platform_dir / "json" / "search_comments_2025.jsonl"
+        comments_file.write_text("\n".join(json.dumps(
+            {"aweme_id": "7300000000000000009", "comment_id": "", "content": "same"}
+        ) for _ in range(3)), encoding="utf-8")
+        dataset = PreviewDataset()
+        dataset.load_platform(self.platform_dir, chunk_rows=2)
+        dataset.build()
+        # 没有评论 ID 时按 文件:行号 区分，内容相同的评论不会合并
+        self.assertEqual(
+            [key for key, _ in dataset.comment_items("7300000000000000009")],
+            [f"{comments_file}:{row}" for row in range(3)],
+        )
+        self.assertEqual(dataset.comment_items("7300000000000000001"), [("douyin:c2", "abc")])
+
+    def test_ip_counter_uses_ip_label(self):
+        ip_counter = self.dataset.ip_counter("7300000000000000002")
+        self.assertEqual(ip_counter.most_common(), [("广东", 2), ("北京", 1)])
+        self.assertFalse(self.dataset.ip_counter("7300000000000000001"))
+
+    def test_build_appends(self):
+        self.dataset.load_platform(self.platform_dir)
+        self.dataset.build()
+        self.assertEqual(len(self.dataset), 4)
+        self.assertEqual(self.dataset.comment_count("7300000000000000002"), 6)
+
+
+    def test_stream_json_records(self):
+        records = [{"id": i, "text": "x" * (i % 7) + "]},{"} for i in range(25)]
+        json_path = Path(self.tmp_dir.name) / "records.json"
+        json_path.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding="utf-8")
+        chunks = list(iter_json_records(json_path, chunk_rows=10, block_chars=16))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual([record for chunk in chunks for record in chunk], records)
+
+        jsonl_path = Path(self.tmp_dir.name) / "records.jsonl"
+        jsonl_path.write_text("\n".join(json.dumps(r) for r in records[:3]) + "\n{broken\n", encoding="utf-8")
+        self.assertEqual(list(iter_json_records(jsonl_path, chunk_rows=10)), [records[:3]])
+
+    def run_loader(self, **kwargs):
+        loader = PreviewLoader(Path(self.tmp_dir.name), **kwargs)
+        loader.start()
+        loader.join(10)
+        dataset = PreviewDataset()
+        messages = loader.drain(max_messages=1000)
+        for message in messages:
+            if message[0] == "contents":
+                dataset.add_contents(message[1])
+            elif message[0] == "comments":
+                dataset.add_comments(message[1])
+        dataset.build()
+        return dataset, messages
+
+    def test_loader_writes_and_reuses_snapshot(self):
+        dataset, messages = self.run_loader(chunk_rows=1, use_snapshot=True)
+        self.assertEqual(messages[-1], ("done", 3, False))
+        self.assertEqual(dataset.comment_count("7300000000000000002"), 3)
+        comments_file = self.platform_dir / "csv" / "search_comments_2024.csv"
+        self.assertTrue(snapshot_path(comments_file).exists())
+
+        # 第二次加载直接读快照，每个文件只有一批数据
+        dataset, messages = self.run_loader(chunk_rows=1, use_snapshot=True)
+        self.assertEqual(sum(1 for message in messages if message[0] in ("contents", "comments")), 3)
+        self.assertEqual(dataset.comments_of("7300000000000000002")["comment_id"].tolist(), ["c1", "c3", "c4"])
+
+        # 源文件修改后快照失效
+        old_snapshot = snapshot_path(comments_file)
+        with open(comments_file, "a", encoding="utf-8") as f:
+            f.write("7300000000000000002,c6,new,u6,上海,6\n")
+        dataset, _ = self.run_loader(chunk_rows=1, use_snapshot=True)
+        self.assertEqual(dataset.comment_count("7300000000000000002"), 4)
+        self.assertFalse(old_snapshot.exists())
+
+    def test_loader_cancel(self):
+        loader = PreviewLoader(Path(self.tmp_dir.name), chunk_rows=1, use_snapshot=True)
+        loader.cancel()
+        loader.start()
+        loader.join(10)
+        self.assertEqual(loader.drain()[-1], ("done", 0, True))
+        self.assertFalse(snapshot_path(self.platform_dir / "csv" / "search_contents_2024.csv").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
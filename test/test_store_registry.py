@@ -0,0 +1,63 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+import config
+from store.store_registry import store_registry
+from store.tieba import TieBaStoreFactory
+from store.xhs import XhsStoreFactory
+from tools import async_file_writer
+from var import crawler_type_var
+
+
+class TestStoreRegistry(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.origin_cwd = os.getcwd()
+        self.origin_option = config.SAVE_DATA_OPTION
+        os.chdir(self.tmp_dir.name)
+        config.SAVE_DATA_OPTION = "csv"
+        crawler_type_var.set("search")
+        store_registry.open()
+
+    async def asyncTearDown(self):
+        await store_registry.close()
+        await async_file_writer.flush_all_file_writers(close=True)
+        config.SAVE_DATA_OPTION = self.origin_option
+        os.chdir(self.origin_cwd)
+        self.tmp_dir.cleanup()
+
+    async def test_store_reused(self):
+        store = XhsStoreFactory.create_store()
+        self.assertIs(store, XhsStoreFactory.create_store())
+        self.assertIsNot(store, TieBaStoreFactory.create_store())
+        self.assertEqual(len(store_registry), 2)
+
+        config.SAVE_DATA_OPTION = "json"
+        self.assertIsNot(store, XhsStoreFactory.create_store())
+
+    async def test_close_flush_buffered_data(self):
+        store = XhsStoreFactory.create_store()
+        await store.store_content({"note_id": "1", "title": "hello"})
+        await store_registry.close()
+        self.assertEqual(len(store_registry), 0)
+
+        csv_dir = os.path.join("data", "xhs", "csv")
+        files = os.listdir(csv_dir)
+        self.assertEqual(len(files), 1)
+        with open(os.path.join(csv_dir, files[0]), encoding="utf-8-sig") as f:
+            self.assertIn("hello", f.read())
+        self.assertIsNot(store, XhsStoreFactory.create_store())
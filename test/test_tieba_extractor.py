@@ -0,0 +1,59 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+from parsel import Selector
+
+from media_platform.tieba.help import TieBaExtractor
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media_platform", "tieba", "test_data")
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(TEST_DATA_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class TestTieBaExtractor(unittest.TestCase):
+
+    def setUp(self):
+        self.extractor = TieBaExtractor()
+
+    def test_parment_comments(self):
+        comments = self.extractor.extract_tieba_note_parment_comments(read_fixture("note_comments.html"), "123456")
+        self.assertEqual(len(comments), 30)
+        self.assertEqual((comments[1].ip_location, comments[1].publish_time), ("福建", "2024-08-06 22:10"))
+        self.assertEqual({comment.tieba_name for comment in comments}, {"网球风云吧"})
+        self.assertTrue(all(comment.publish_time for comment in comments))
+
+    def test_tail_info_matches_html_regex(self):
+        page_content = read_fixture("note_comments.html")
+        for comment in Selector(text=page_content).xpath("//div[@class='post-tail-wrap']/.."):
+            self.assertEqual(
+                self.extractor.extract_tail_ip_and_pub_time(comment.root),
+                self.extractor.extract_ip_and_pub_time(comment.xpath(".//div[@class='post-tail-wrap']").get()),
+            )
+
+    def test_note_list_shares_page_fields(self):
+        notes = self.extractor.extract_tieba_note_list(read_fixture("tieba_note_list.html"))
+        self.assertEqual(len(notes), 48)
+        self.assertEqual(len({(note.tieba_name, note.tieba_link) for note in notes}), 1)
+
+    def test_note_detail(self):
+        note = self.extractor.extract_note_detail(read_fixture("note_detail.html"))
+        self.assertEqual((note.ip_location, note.publish_time), ("广东", "2024-08-05 16:56"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+from unittest import mock
+
+from tools import words
+from tools.words import WordFrequencyService
+
+
+class TestWordFrequencyService(unittest.TestCase):
+
+    def setUp(self):
+        self.service = WordFrequencyService(stop_words={"的"}, custom_words=["高频词"], max_workers=1)
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_each_comment_tokenized_once(self):
+        comments = [("c1", "今天的天气很好"), ("c2", "高频词 高频词")]
+        with mock.patch.object(words, "_tokenize_texts", wraps=words._tokenize_texts) as tokenize:
+            first = self.service.word_frequency(comments)
+            second = self.service.word_frequency(comments + [("c3", "天气")])
+        self.assertEqual([len(call.args[0]) for call in tokenize.call_args_list], [2, 1])
+        self.assertEqual(first["高频词"], 2)
+        self.assertNotIn("的", first)
+        self.assertNotIn(" ", first)
+        self.assertEqual(second["天气"], first["天气"] + 1)
+
+    def test_keyed_frequency_merges_only_new_comments(self):
+        self.service.word_frequency([("c1", "天气很好")], key="note")
+        total = self.service.word_frequency([("c1", "天气很好"), ("c2", "天气")], key="note")
+        self.assertEqual(total["天气"], 2)
+        # 返回副本，修改结果不影响累计值
+        total["天气"] = 100
+        self.assertEqual(self.service.word_frequency([("c2", "天气")], key="note")["天气"], 2)
+
+    def test_cache_size_bounded(self):
+        service = WordFrequencyService(stop_words=set(), custom_words=[], max_workers=1, cache_size=2)
+        comments = [("c1", "天气"), ("c2", "天气"), ("c3", "天气")]
+        # 单次统计的评论数超过缓存上限时结果仍然完整
+        self.assertEqual(service.word_frequency(comments)["天气"], 3)
+        self.assertEqual(list(service._token_counts), ["c2", "c3"])
+        service.close()
+        self.assertEqual(service._token_counts, {})
+
+    def test_close_word_frequency_service_releases_singleton(self):
+        with mock.patch.object(words, "WordFrequencyService", return_value=self.service):
+            self.assertIs(words.get_word_frequency_service(), self.service)
+        self.service.word_frequency([("c1", "天气")], key="note")
+        words.close_word_frequency_service()
+        self.assertIsNone(words._word_frequency_service)
+        self.assertEqual(self.service._token_counts, {})
+        self.assertEqual(self.service._aggregates, {})
+
+    def test_process_pool_matches_inline(self):
+        comments = [(f"c{i}", f"第{i}条评论说天气很好") for i in range(20)]
+        parallel = WordFrequencyService(stop_words={"的"}, custom_words=[], max_workers=2, parallel_min_texts=1, batch_size=3)
+        try:
+            self.assertEqual(parallel.word_frequency(comments), self.service.word_frequency(comments))
+        finally:
+            parallel.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.xhs.signer import XiaoHongShuSignService
+
+
+class _FakePage:
+    """
+    模拟 playwright Page.evaluate 执行批量签名脚本
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    async def evaluate(self, expression, arg=None):
+        self.calls.append(arg)
+        await asyncio.sleep(0.01)
+        items, with_storage = arg
+        results = []
+        for url, data in items:
+            if url == "/bad":
+                results.append({"error": "sign failed"})
+            else:
+                results.append({"ok": {"X-s": f"xs:{url}", "X-t": 1}})
+        return {"results": results, "storage": {"b1": "b1-value"} if with_storage else None}
+
+
+class TestXiaoHongShuSignService(IsolatedAsyncioTestCase):
+
+    async def test_concurrent_signs_batched(self):
+        page = _FakePage()
+        service = XiaoHongShuSignService(page, batch_window_ms=5, max_batch_size=16)
+        results = await asyncio.gather(*[service.sign(f"/api/{i}", None) for i in range(10)])
+
+        self.assertEqual(len(page.calls), 1)
+        for i, (encrypt_params, local_storage) in enumerate(results):
+            self.assertEqual(encrypt_params["X-s"], f"xs:/api/{i}")
+            self.assertEqual(local_storage["b1"], "b1-value")
+        stats = service.get_stats()
+        self.assertEqual(stats["signs"], 10)
+        self.assertEqual(stats["latency"]["count"], 10)
+        await service.close()
+
+    async def test_local_storage_cached_until_invalidate(self):
+        page = _FakePage()
+        service = XiaoHongShuSignService(page, batch_window_ms=0)
+        await service.sign("/a")
+        await service.sign("/b")
+        self.assertEqual([with_storage for _, with_storage in page.calls], [True, False])
+
+        service.invalidate()
+        await service.sign("/c")
+        self.assertTrue(page.calls[-1][1])
+        await service.close()
+
+    async def test_max_batch_size_and_error(self):
+        page = _FakePage()
+        service = XiaoHongShuSignService(page, batch_window_ms=5, max_batch_size=4)
+        tasks = [service.sign(f"/api/{i}") for i in range(9)] + [service.sign("/bad")]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.assertEqual(len(page.calls), 3)
+        self.assertTrue(all(len(items) <= 4 for items, _ in page.calls))
+        self.assertIsInstance(results[-1], Exception)
+        self.assertEqual(results[0][0]["X-s"], "xs:/api/0")
+        await service.close()
+
+    async def test_invalidate_during_batch_keeps_signed_storage(self):
+        page = _FakePage()
+        service = XiaoHongShuSignService(page, batch_window_ms=0)
+        await service.sign("/a")
+        task = asyncio.create_task(service.sign("/b"))
+        await asyncio.sleep(0.005)
+        # evaluate 进行中 cookie 更新，调用方仍拿到这一批签名时使用的 localStorage
+        service.invalidate()
+        _, local_storage = await task
+        self.assertEqual(local_storage, {"b1": "b1-value"})
+        await service.sign("/c")
+        self.assertTrue(page.calls[-1][1])
+        await service.close()
+
+    async def test_malformed_batch_result_fails_all_callers(self):
+        class _BadPage:
+            def __init__(self, result):
+                self.result = result
+
+            async def evaluate(self, expression, arg=None):
+                return self.result
+
+        for result in (None, "oops", {"results": None}, {"results": [None, {"ok": {"X-s": "xs"}}]}):
+            service = XiaoHongShuSignService(_BadPage(result), batch_window_ms=5)
+            results = await asyncio.wait_for(
+                asyncio.gather(service.sign("/a"), service.sign("/b"), return_exceptions=True), timeout=1
+            )
+            # 结果格式不对的请求都以异常结束，不会一直等待
+            self.assertIsInstance(results[0], Exception)
+            if result == {"results": [None, {"ok": {"X-s": "xs"}}]}:
+                self.assertEqual(results[1][0], {"X-s": "xs"})
+            else:
+                self.assertIsInstance(results[1], Exception)
+            await service.close()
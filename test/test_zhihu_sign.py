@@ -0,0 +1,140 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+from typing import List
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from media_platform.zhihu import help as zhihu_help
+
+COOKIES = "_xsrf=x; d_c0=d_c0_value; z_c0=z"
+
+
+class _FailingPool:
+    """
+    模拟调用失败的 node 进程池
+    """
+
+    async def call(self, *args):
+        raise RuntimeError("node crashed")
+
+    async def close(self):
+        pass
+
+
+class TestZhihuAsyncSign(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.now = 1000.0
+        self.sign_calls: List[str] = []
+        self.origin_ttl = config.ZHIHU_SIGN_CACHE_TTL
+        self.origin_max_size = config.ZHIHU_SIGN_CACHE_MAX_SIZE
+        self.origin_enable_pool = config.ENABLE_JS_WORKER_POOL
+        # 默认不启用 node 进程池，签名走 execjs 回退路径
+        config.ENABLE_JS_WORKER_POOL = False
+        zhihu_help._sign_memo.clear()
+        zhihu_help._sign_memo_stats.update(hits=0, misses=0)
+
+        def fake_sign(url: str, cookies: str):
+            self.sign_calls.append(url)
+            return {"x-zse-96": f"sign:{url}", "x-zst-81": ""}
+
+        for patcher in (
+            patch("media_platform.zhihu.help.time.monotonic", side_effect=lambda: self.now),
+            patch("media_platform.zhihu.help.sign", side_effect=fake_sign),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        config.ZHIHU_SIGN_CACHE_TTL = self.origin_ttl
+        config.ZHIHU_SIGN_CACHE_MAX_SIZE = self.origin_max_size
+        config.ENABLE_JS_WORKER_POOL = self.origin_enable_pool
+        zhihu_help._sign_memo.clear()
+        await zhihu_help.close_sign_pool()
+
+    async def test_memo_hit_same_url_and_d_c0(self):
+        config.ZHIHU_SIGN_CACHE_TTL = 60
+        first = await zhihu_help.async_sign("/api/a", COOKIES)
+        # 其他 cookie 变化不影响签名，只要 d_c0 相同即可复用
+        second = await zhihu_help.async_sign("/api/a", "other=1; d_c0=d_c0_value")
+        self.assertEqual(first, second)
+        self.assertEqual(self.sign_calls, ["/api/a"])
+
+        await zhihu_help.async_sign("/api/a", "d_c0=another")
+        self.assertEqual(self.sign_calls, ["/api/a", "/api/a"])
+        stats = zhihu_help.get_sign_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    async def test_memo_miss_after_ttl(self):
+        config.ZHIHU_SIGN_CACHE_TTL = 60
+        await zhihu_help.async_sign("/api/a", COOKIES)
+        self.now += 59
+        await zhihu_help.async_sign("/api/a", COOKIES)
+        self.assertEqual(len(self.sign_calls), 1)
+        self.now += 1
+        await zhihu_help.async_sign("/api/a", COOKIES)
+        self.assertEqual(len(self.sign_calls), 2)
+
+    async def test_memo_eviction_at_max_size(self):
+        config.ZHIHU_SIGN_CACHE_TTL = 60
+        config.ZHIHU_SIGN_CACHE_MAX_SIZE = 4
+        for i in range(4):
+            await zhihu_help.async_sign(f"/api/{i}", COOKIES)
+        self.assertEqual(len(zhihu_help._sign_memo), 4)
+
+        # 达到上限时丢弃最早写入的一半
+        await zhihu_help.async_sign("/api/4", COOKIES)
+        self.assertLessEqual(len(zhihu_help._sign_memo), config.ZHIHU_SIGN_CACHE_MAX_SIZE)
+        self.assertNotIn(("/api/0", "d_c0_value"), zhihu_help._sign_memo)
+        self.assertIn(("/api/4", "d_c0_value"), zhihu_help._sign_memo)
+
+        await zhihu_help.async_sign("/api/0", COOKIES)
+        self.assertEqual(self.sign_calls.count("/api/0"), 2)
+
+    async def test_memo_eviction_drops_expired_first(self):
+        config.ZHIHU_SIGN_CACHE_TTL = 60
+        config.ZHIHU_SIGN_CACHE_MAX_SIZE = 4
+        await zhihu_help.async_sign("/api/old", COOKIES)
+        self.now += 30
+        for i in range(3):
+            await zhihu_help.async_sign(f"/api/{i}", COOKIES)
+        self.now += 30
+        await zhihu_help.async_sign("/api/new", COOKIES)
+        self.assertEqual(
+            set(zhihu_help._sign_memo),
+            {(f"/api/{i}", "d_c0_value") for i in range(3)} | {("/api/new", "d_c0_value")},
+        )
+
+    async def test_ttl_zero_disables_memo(self):
+        config.ZHIHU_SIGN_CACHE_TTL = 0
+        await zhihu_help.async_sign("/api/a", COOKIES)
+        await zhihu_help.async_sign("/api/a", COOKIES)
+        self.assertEqual(self.sign_calls, ["/api/a", "/api/a"])
+        self.assertEqual(len(zhihu_help._sign_memo), 0)
+
+    async def test_fallback_to_execjs_when_pool_unavailable(self):
+        config.ENABLE_JS_WORKER_POOL = True
+        with patch.object(zhihu_help.JsWorkerPool, "is_available", return_value=False):
+            result = await zhihu_help.async_sign("/api/a", COOKIES)
+        self.assertEqual(result["x-zse-96"], "sign:/api/a")
+        self.assertEqual(self.sign_calls, ["/api/a"])
+        self.assertIsNone(zhihu_help._zhihu_sign_pool)
+
+    async def test_fallback_to_execjs_when_pool_call_fails(self):
+        config.ENABLE_JS_WORKER_POOL = True
+        with patch.object(zhihu_help.JsWorkerPool, "is_available", return_value=True), \
+                patch.object(zhihu_help, "_zhihu_sign_pool", _FailingPool()):
+            result = await zhihu_help.async_sign("/api/a", COOKIES)
+        self.assertEqual(result["x-zse-96"], "sign:/api/a")
+        self.assertEqual(self.sign_calls, ["/api/a"])
@@ -1,25 +1,210 @@
 import asyncio
 import csv
+import io
 import json
 import os
 import pathlib
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Tuple
 import aiofiles
+
+import config
 from tools.utils import utils
 
+
+class BufferedFile:
+    """
+    单个输出文件（platform + item_type + 日期）的写入缓冲区，
+    文件句柄在整个爬取过程中保持打开，数据先缓存在内存中，批量写入
+    """
+
+    def __init__(self, file_path: str, file_type: str):
+        self.file_path = file_path
+        self.file_type = file_type  # csv | json | jsonl
+        self.rows: List[Dict] = []
+        self.lock = asyncio.Lock()
+        self.last_flush_time = time.monotonic()
+        self._handle: Optional[io.TextIOWrapper] = None
+
+    def _open(self) -> io.TextIOWrapper:
+        if self._handle is None or self._handle.closed:
+            if self.file_type == "csv":
+                self._handle = open(self.file_path, 'a', newline='', encoding='utf-8-sig')
+            else:
+                self._handle = open(self.file_path, 'a', encoding='utf-8')
+        return self._handle
+
+    def _write_csv(self, rows: List[Dict]):
+        f = self._open()
+        buffer = io.StringIO()
+        header_written = f.tell() > 0
+        for row in rows:
+            writer = csv.DictWriter(buffer, fieldnames=row.keys())
+            if not header_written:
+                writer.writeheader()
+                header_written = True
+            writer.writerow(row)
+        f.write(buffer.getvalue())
+        f.flush()
+
+    def _write_jsonl(self, rows: List[Dict]):
+        f = self._open()
+        f.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
+        f.flush()
+
+    def _write_json_array(self, rows: List[Dict]):
+        # JSON 数组格式无法追加，只能整体重写，缓冲后每批重写一次；
+        # 每次 flush 的开销仍与文件已有大小成正比（O(n)），数据量大时应开启 ENABLE_JSONL_MODE
+        existing_data = []
+        if os.path.exists(self.file_path) and os.path.getsize(self.file_path) > 0:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                try:
+                    existing_data = json.load(f)
+                    if not isinstance(existing_data, list):
+                        existing_data = [existing_data]
+                except json.JSONDecodeError:
+                    existing_data = []
+        existing_data.extend(rows)
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
+
+    def write_rows(self, rows: List[Dict]):
+        if not rows:
+            return
+        if self.file_type == "csv":
+            self._write_csv(rows)
+        elif self.file_type == "jsonl":
+            self._write_jsonl(rows)
+        else:
+            self._write_json_array(rows)
+
+    async def flush(self):
+        async with self.lock:
+            rows, self.rows = self.rows, []
+            self.last_flush_time = time.monotonic()
+            if rows:
+                await asyncio.to_thread(self.write_rows, rows)
+
+    def flush_sync(self):
+        """事件循环已经停止时（如 Ctrl+C 退出）使用的同步写入"""
+        rows, self.rows = self.rows, []
+        self.write_rows(rows)
+
+    def close(self):
+        if self._handle is not None and not self._handle.closed:
+            self._handle.close()
+        self._handle = None
+
+
+# 以文件路径为 key 的全局缓冲区，同一个文件的所有 AsyncFileWriter 共享同一个缓冲区
+_buffered_files: Dict[str, BufferedFile] = {}
+_flush_task: Optional[asyncio.Task] = None
+
+
+async def _periodic_flush():
+    """后台定时任务：把超过 FILE_WRITE_FLUSH_INTERVAL 秒未写入的缓冲区写入文件"""
+    interval = max(config.FILE_WRITE_FLUSH_INTERVAL, 0.1)
+    while True:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        for buffered_file in list(_buffered_files.values()):
+            if buffered_file.rows and now - buffered_file.last_flush_time >= interval:
+                try:
+                    await buffered_file.flush()
+                except Exception as e:
+                    utils.logger.error(f"[AsyncFileWriter._periodic_flush] flush {buffered_file.file_path} error: {e}")
+
+
+def _ensure_flush_task():
+    global _flush_task
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.get_running_loop().create_task(_periodic_flush())
+
+
+async def flush_all_file_writers(close: bool = False):
+    """
+    将所有缓冲区中的数据写入文件
+    Args:
+        close: 是否同时关闭文件句柄并停止后台定时写入任务（爬虫结束时使用）
+
+    Returns:
+
+    """
+    global _flush_task
+    for buffered_file in list(_buffered_files.values()):
+        await buffered_file.flush()
+        if close:
+            buffered_file.close()
+    if close:
+        _buffered_files.clear()
+        if _flush_task is not None:
+            _flush_task.cancel()
+            _flush_task = None
+
+
+def close_all_file_writers_sync():
+    """同步写入所有缓冲区并关闭文件，用于事件循环已经退出的场景"""
+    global _flush_task
+    for buffered_file in list(_buffered_files.values()):
+        try:
+            buffered_file.flush_sync()
+        finally:
+            buffered_file.close()
+    _buffered_files.clear()
+    _flush_task = None
+
+
 class AsyncFileWriter:
-    def __init__(self, platform: str, crawler_type: str):
+    def __init__(self, platform: str, crawler_type: str, json_lines: Optional[bool] = None,
+                 buffered: Optional[bool] = None):
         self.lock = asyncio.Lock()
         self.platform = platform
         self.crawler_type = crawler_type
+        # json_lines 为 None 时跟随全局配置 ENABLE_JSONL_MODE
+        self.json_lines = config.ENABLE_JSONL_MODE if json_lines is None else json_lines
+        # buffered 为 None 时跟随全局配置 ENABLE_FILE_WRITE_BUFFER
+        self.buffered = config.ENABLE_FILE_WRITE_BUFFER if buffered is None else buffered
+        # (file_type, item_type, 日期) -> 文件路径，目录只在第一次用到时创建
+        self._file_paths: Dict[Tuple[str, str, str], str] = {}
 
     def _get_file_path(self, file_type: str, item_type: str) -> str:
-        base_path = f"data/{self.platform}/{file_type}"
-        pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
-        file_name = f"{self.crawler_type}_{item_type}_{utils.get_current_date()}.{file_type}"
-        return f"{base_path}/{file_name}"
+        current_date = utils.get_current_date()
+        key = (file_type, item_type, current_date)
+        file_path = self._file_paths.get(key)
+        if file_path is None:
+            base_path = f"data/{self.platform}/{file_type}"
+            pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
+            file_path = f"{base_path}/{self.crawler_type}_{item_type}_{current_date}.{file_type}"
+            self._file_paths[key] = file_path
+        return file_path
+
+    async def _write_buffered(self, item: Dict, item_type: str, file_type: str):
+        file_path = self._get_file_path(file_type, item_type)
+        buffered_file = _buffered_files.get(file_path)
+        if buffered_file is None:
+            buffered_file = BufferedFile(file_path, file_type)
+            _buffered_files[file_path] = buffered_file
+        buffered_file.rows.append(item)
+        _ensure_flush_task()
+        if len(buffered_file.rows) >= config.FILE_WRITE_BUFFER_SIZE:
+            await buffered_file.flush()
+
+    async def flush(self):
+        """
+        将当前平台的缓冲数据写入文件
+        Returns:
+
+        """
+        prefix = f"data/{self.platform}/"
+        for file_path, buffered_file in list(_buffered_files.items()):
+            if file_path.startswith(prefix):
+                await buffered_file.flush()
 
     async def write_to_csv(self, item: Dict, item_type: str):
+        if self.buffered:
+            await self._write_buffered(item, item_type, 'csv')
+            return
+
         file_path = self._get_file_path('csv', item_type)
         async with self.lock:
             file_exists = os.path.exists(file_path)
@@ -30,6 +215,13 @@ class AsyncFileWriter:
                 writer.writerow(item)
 
     async def write_single_item_to_json(self, item: Dict, item_type: str):
+        if self.json_lines:
+            await self.write_single_item_to_jsonl(item, item_type)
+            return
+        if self.buffered:
+            await self._write_buffered(item, item_type, 'json')
+            return
+
         file_path = self._get_file_path('json', item_type)
         async with self.lock:
             existing_data = []
@@ -47,4 +239,82 @@ class AsyncFileWriter:
             existing_data.append(item)
 
             async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
\ No newline at end of file
+                await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
+
+    async def write_single_item_to_jsonl(self, item: Dict, item_type: str):
+        """
+        以 JSON Lines 格式追加写入单条数据（每行一个 JSON 对象），
+        写入开销与文件已有大小无关
+        Args:
+            item: 数据
+            item_type: 数据类型，如 contents、comments
+
+        Returns:
+
+        """
+        if self.buffered:
+            await self._write_buffered(item, item_type, 'jsonl')
+            return
+
+        file_path = self._get_file_path('jsonl', item_type)
+        line = json.dumps(item, ensure_ascii=False) + "\n"
+        async with self.lock:
+            async with aiofiles.open(file_path, 'a', encoding='utf-8') as f:
+                await f.write(line)
+
+
+def compact_jsonl_to_json(jsonl_path: str, json_path: Optional[str] = None) -> str:
+    """
+    将 JSON Lines 文件离线转换为旧版的 JSON 数组格式，逐行流式处理，内存占用与文件大小无关
+    Args:
+        jsonl_path: jsonl 文件路径
+        json_path: 输出的 json 文件路径，默认与 jsonl 文件同名（后缀改为 .json）
+
+    Returns:
+        输出的 json 文件路径
+    """
+    if not json_path:
+        json_path = os.path.splitext(jsonl_path)[0] + ".json"
+
+    with open(jsonl_path, 'r', encoding='utf-8') as src, open(json_path, 'w', encoding='utf-8') as dst:
+        dst.write("[")
+        first = True
+        for line in src:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                # 进程被中断时最后一行可能只写了一半，跳过即可
+                utils.logger.warning(f"[compact_jsonl_to_json] skip broken line in {jsonl_path}: {line[:100]}")
+                continue
+            dst.write("\n" if first else ",\n")
+            dst.write(json.dumps(item, ensure_ascii=False, indent=4))
+            first = False
+        dst.write("\n]" if not first else "]")
+    return json_path
+
+
+def compact_jsonl_dir(jsonl_dir: str) -> List[str]:
+    """
+    将目录下所有的 jsonl 文件转换为 JSON 数组格式
+    Args:
+        jsonl_dir: jsonl 文件目录，如 data/xhs/jsonl
+
+    Returns:
+        输出的 json 文件路径列表
+    """
+    return [compact_jsonl_to_json(str(path)) for path in sorted(pathlib.Path(jsonl_dir).glob("*.jsonl"))]
+
+
+if __name__ == '__main__':
+    # 用法: python -m tools.async_file_writer data/xhs/jsonl [data/douyin/jsonl/xxx.jsonl ...]
+    import sys
+
+    for target in sys.argv[1:]:
+        if os.path.isdir(target):
+            for output in compact_jsonl_dir(target):
+                print(f"compacted -> {output}")
+        else:
+            print(f"compacted -> {compact_jsonl_to_json(target)}")
@@ -0,0 +1,182 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 列式统计：把记录列表一次性读入 NumPy 数组（随 pandas 一起安装），汇总、中位数、区间分布、Top-K、分组统计都在数组上完成，
+#            不再对记录列表做多次 Python 循环
+
+import operator
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Number = Union[int, float]
+
+
+def to_number(value) -> Number:
+    """
+    NumPy 标量转换为 Python 数值，整数值返回 int，保证结果可以直接 json 序列化
+    """
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class RecordColumns:
+    """
+    记录（字典、NamedTuple 或普通对象）的列式视图，构造时把所有数值字段读入一个 n x len(fields) 的矩阵，
+    之后的统计都在矩阵上完成。每个字段通过 itemgetter/attrgetter + np.fromiter 在 C 层读取，
+    遇到缺失或为 None 的值时该字段退回逐条读取并按 0 处理
+    """
+
+    def __init__(self, records: Sequence[Any], fields: Sequence[str], key_fields: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            records: 记录列表
+            fields: 需要统计的数值字段
+            key_fields: 非数值字段及其缺省值，例如分组用的分类、商品 ID，读入 self.keys
+        """
+        self.records = records
+        self.fields = list(fields)
+        self._field_index = {field: index for index, field in enumerate(self.fields)}
+        self._is_dict = bool(records) and isinstance(records[0], dict)
+        self.matrix = np.empty((len(records), len(self.fields)), dtype=np.float64)
+        for index, field in enumerate(self.fields):
+            try:
+                self.matrix[:, index] = np.fromiter(map(self._getter(field), records), dtype=np.float64, count=len(records))
+            except (KeyError, AttributeError, TypeError, ValueError):
+                self.matrix[:, index] = [self._get(record, field, 0) or 0 for record in records]
+        self.keys: Dict[str, List[Any]] = {}
+        for field, default in (key_fields or {}).items():
+            try:
+                self.keys[field] = list(map(self._getter(field), records))
+            except (KeyError, AttributeError):
+                self.keys[field] = [self._get(record, field, default) for record in records]
+
+    def _getter(self, field: str):
+        return operator.itemgetter(field) if self._is_dict else operator.attrgetter(field)
+
+    def _get(self, record: Any, field: str, default: Any) -> Any:
+        return record.get(field, default) if self._is_dict else getattr(record, field, default)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def column(self, field: str) -> np.ndarray:
+        return self.matrix[:, self._field_index[field]]
+
+    def summary(self, fields: Optional[Sequence[str]] = None, round_digits: int = 2) -> Dict[str, Dict[str, Number]]:
+        """
+        各字段的合计、平均值、中位数、最大值、最小值，所有字段在矩阵上按列一次算完
+        Args:
+            fields: 需要汇总的字段，默认全部
+            round_digits: 平均值保留的小数位
+
+        Returns:
+            {字段: {"total", "average", "median", "max", "min"}}
+        """
+        fields = list(fields or self.fields)
+        if not len(self):
+            return {field: {"total": 0, "average": 0, "median": 0, "max": 0, "min": 0} for field in fields}
+        matrix = self.matrix[:, [self._field_index[field] for field in fields]]
+        totals = matrix.sum(axis=0)
+        averages = matrix.mean(axis=0)
+        medians = np.median(matrix, axis=0)
+        maxes = matrix.max(axis=0)
+        mins = matrix.min(axis=0)
+        return {
+            field: {
+                "total": to_number(totals[i]),
+                "average": round(float(averages[i]), round_digits),
+                "median": to_number(medians[i]),
+                "max": to_number(maxes[i]),
+                "min": to_number(mins[i]),
+            }
+            for i, field in enumerate(fields)
+        }
+
+    def top_k(self, values: Union[str, np.ndarray], k: int) -> List[Any]:
+        """
+        按值从大到小取前 k 条记录，相同值保持原有顺序（与 sorted(..., reverse=True)[:k] 结果一致）
+        Args:
+            values: 字段名或与记录一一对应的数组
+            k: 数量
+
+        Returns:
+            记录列表
+        """
+        if isinstance(values, str):
+            values = self.column(values)
+        return [self.records[i] for i in top_k_indices(values, k)]
+
+    def histogram(self, field: str, edges: Sequence[Number], labels: Sequence[str]) -> Dict[str, int]:
+        """
+        左开右闭区间分布，labels 比 edges 多一个：(-inf, edges[0]], (edges[0], edges[1]], ..., (edges[-1], +inf)
+        """
+        return histogram(self.column(field), edges, labels)
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    前 k 大元素的下标，先用 argpartition 在 O(n) 内找到第 k 大的值，只对候选的 k 个元素排序；
+    与第 k 大的值相等的元素按下标取靠前的，保证结果稳定
+    """
+    n = len(values)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        kth_value = values[np.argpartition(values, n - k)[n - k]]
+        greater = np.flatnonzero(values > kth_value)
+        equal = np.flatnonzero(values == kth_value)[:k - len(greater)]
+        candidates = np.concatenate([greater, equal])
+    else:
+        candidates = np.arange(n)
+    return candidates[np.lexsort((candidates, -values[candidates]))]
+
+
+def histogram(values: np.ndarray, edges: Sequence[Number], labels: Sequence[str]) -> Dict[str, int]:
+    """
+    左开右闭区间计数
+    Args:
+        values: 数值数组
+        edges: 升序的区间边界
+        labels: 区间名称，比 edges 多一个
+
+    Returns:
+        {区间名称: 数量}
+    """
+    bucket = np.searchsorted(np.asarray(edges), values, side="left")
+    counts = np.bincount(bucket, minlength=len(labels))
+    return {label: int(count) for label, count in zip(labels, counts)}
+
+
+def group_by(keys: Sequence[Any]) -> Tuple[List[Any], np.ndarray]:
+    """
+    分组编码，分组按首次出现的顺序排列
+    Args:
+        keys: 与记录一一对应的分组键
+
+    Returns:
+        (分组键列表, 每条记录所属分组的下标数组)
+    """
+    index: Dict[Any, int] = {}
+    codes = np.array([index.setdefault(key, len(index)) for key in keys], dtype=np.intp)
+    return list(index), codes
+
+
+def group_members(codes: np.ndarray, group_count: int, values: Sequence[Any]) -> List[List[Any]]:
+    """
+    按分组收集 values，组内保持原有顺序
+    """
+    order = np.argsort(codes, kind="stable")
+    boundaries = np.cumsum(np.bincount(codes, minlength=group_count))[:-1]
+    values = np.asarray(values, dtype=object)[order]
+    return [members.tolist() for members in np.split(values, boundaries)]
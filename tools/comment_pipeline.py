@@ -0,0 +1,220 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 评论流水线：抓取协程把评论页放入有界队列，写入协程批量取出后调用存储回调，
+#            使网络请求与磁盘/数据库写入并行进行
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import config
+from tools import utils
+
+
+class CommentPipeline:
+    """
+    评论流水线，实例本身可以直接作为各平台 *_all_comments 方法的 callback 使用：
+
+        async with CommentPipeline(xhs_store.batch_update_xhs_note_comments, name="xhs") as pipeline:
+            await xhs_client.get_note_all_comments(..., callback=pipeline)
+
+    - 队列满时 callback 会等待（背压），避免存储较慢时评论在内存中无限堆积
+    - 写入协程每次最多取 batch_size 页，参数除最后一个（评论列表）外相同的相邻页合并成一次存储调用
+    - writers 为 0 时退化为直接调用存储回调，存储异常直接抛给抓取协程
+    - 写入协程中的存储异常会记录下来，不影响后续评论页的写入，close 时抛出第一个异常，使本次爬取以失败结束
+    - after_written 注册的回调（如保存评论游标）在此前放入的评论页全部写入成功后才执行，
+      有评论页写入失败时其后注册的回调都不再执行
+    """
+
+    def __init__(
+        self,
+        writer: Callable[..., Awaitable],
+        name: str = "",
+        queue_size: int = config.COMMENT_PIPELINE_QUEUE_SIZE,
+        writers: int = config.COMMENT_PIPELINE_WRITERS,
+        batch_size: int = config.COMMENT_PIPELINE_BATCH_SIZE,
+    ):
+        self.writer = writer
+        self.name = name or getattr(writer, "__name__", "comment_pipeline")
+        self.queue_size = queue_size
+        self.writers = max(0, writers)
+        self.batch_size = max(1, batch_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._start_time = 0.0
+        self._error: Optional[BaseException] = None
+        # 评论页按放入顺序编号，序号小于 _written_seq 的评论页都已写入成功
+        self._next_seq = 0
+        self._written_seq = 0
+        self._written_ahead: Set[int] = set()
+        self._after_written: Deque[Tuple[int, Callable[[], None]]] = deque()
+        self.stats: Dict[str, float] = {
+            "pages": 0,
+            "items": 0,
+            "writes": 0,
+            "errors": 0,
+            "max_queue_depth": 0,
+            "put_wait_sec": 0.0,
+        }
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # with 块内已经有异常时不再用写入异常覆盖它
+        await self.close(raise_error=exc_type is None)
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        if self.writers and not self._tasks:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [asyncio.create_task(self._drain()) for _ in range(self.writers)]
+
+    async def __call__(self, *args):
+        """
+        抓取协程调用，放入一页评论，队列满时等待
+        """
+        if not self._tasks:
+            await self._write(args, 1, raise_error=True)
+            return
+        begin = time.perf_counter()
+        seq = self._next_seq
+        self._next_seq += 1
+        await self._queue.put((seq, args))
+        self.stats["put_wait_sec"] += time.perf_counter() - begin
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._queue.qsize())
+
+    async def _drain(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                seqs = [seq for seq, _ in batch]
+                offset = 0
+                for args, pages in self._merge([args for _, args in batch]):
+                    if await self._write(args, pages):
+                        self._mark_written(seqs[offset:offset + pages])
+                    offset += pages
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _merge(batch: List[Tuple]) -> List[Tuple[Tuple, int]]:
+        """
+        合并相邻的、除最后一个参数外都相同的评论页，返回 [(合并后的参数, 页数)]
+        """
+        merged: List[Tuple[Tuple, int]] = []
+        for args in batch:
+            if (
+                merged
+                and args
+                and isinstance(args[-1], list)
+                and isinstance(merged[-1][0][-1], list)
+                and merged[-1][0][:-1] == args[:-1]
+            ):
+                last_args, pages = merged[-1]
+                merged[-1] = (last_args[:-1] + (last_args[-1] + args[-1],), pages + 1)
+            else:
+                merged.append((args, 1))
+        return merged
+
+    async def _write(self, args: Tuple, pages: int, raise_error: bool = False) -> bool:
+        """
+        调用存储回调，返回是否写入成功
+        :param args: 存储回调的参数
+        :param pages: 合并的评论页数
+        :param raise_error: 是否直接抛出存储异常，为 False 时记录第一个异常，在 close 时抛出
+        :return:
+        """
+        try:
+            await self.writer(*args)
+        except Exception as e:
+            self.stats["errors"] += 1
+            utils.logger.error(f"[CommentPipeline] {self.name} write error: {e}")
+            if raise_error:
+                raise
+            if self._error is None:
+                self._error = e
+            return False
+        self.stats["pages"] += pages
+        self.stats["writes"] += 1
+        if args and isinstance(args[-1], list):
+            self.stats["items"] += len(args[-1])
+        return True
+
+    def after_written(self, fn: Callable[[], None]):
+        """
+        此前放入的评论页全部写入成功后调用 fn，直接写入模式下立即调用
+        :param fn: 无参回调
+        :return:
+        """
+        if not self._tasks or self._next_seq <= self._written_seq:
+            fn()
+            return
+        self._after_written.append((self._next_seq, fn))
+
+    def _mark_written(self, seqs: List[int]):
+        """
+        记录写入成功的评论页，推进连续写入的序号并执行已满足条件的回调
+        """
+        self._written_ahead.update(seqs)
+        while self._written_seq in self._written_ahead:
+            self._written_ahead.remove(self._written_seq)
+            self._written_seq += 1
+        while self._after_written and self._after_written[0][0] <= self._written_seq:
+            _, fn = self._after_written.popleft()
+            try:
+                fn()
+            except Exception as e:
+                utils.logger.error(f"[CommentPipeline] {self.name} after_written callback error: {e}")
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def get_stats(self) -> Dict:
+        """
+        当前队列深度、最大深度、写入的页数/评论数以及平均写入速率（条/秒）
+        """
+        elapsed = time.perf_counter() - self._start_time if self._start_time else 0
+        return {
+            **self.stats,
+            "put_wait_sec": round(self.stats["put_wait_sec"], 3),
+            "queue_depth": self.queue_depth,
+            "drain_rate": round(self.stats["items"] / elapsed, 2) if elapsed else 0,
+        }
+
+    async def close(self, raise_error: bool = True):
+        """
+        等待队列中的评论全部写入后停止写入协程
+        :param raise_error: 写入协程中出现过存储异常时是否抛出第一个异常
+        :return:
+        """
+        if self._tasks:
+            await self._queue.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+        if self._after_written:
+            utils.logger.warning(
+                f"[CommentPipeline.close] {self.name} skip {len(self._after_written)} callbacks after failed writes"
+            )
+            self._after_written.clear()
+        utils.logger.info(f"[CommentPipeline.close] {self.name} stats: {self.get_stats()}")
+        if raise_error and self._error is not None:
+            error, self._error = self._error, None
+            raise error
@@ -0,0 +1,241 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬取断点：记录当前的关键词（或创作者）序号、页码、search_id、当前页中还未抓取完评论的内容 ID 以及评论游标，
+#            进程崩溃、登录失效或 Ctrl+C 中断后，--resume 从记录的位置继续
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import config
+from tools import utils
+
+CHECKPOINT_VERSION = 1
+
+
+class CrawlCheckpoint:
+    """
+    断点状态只保存当前位置，体积很小，每次写入都是写临时文件后 os.replace 整体替换，
+    翻页时立即写入，评论游标的变化按 flush_interval 节流写入
+    """
+
+    def __init__(
+        self,
+        path: str,
+        platform: str,
+        crawler_type: str,
+        resume: bool = False,
+        enabled: bool = True,
+        flush_interval: float = config.CRAWL_CHECKPOINT_INTERVAL_SEC,
+    ):
+        self.path = path
+        self.platform = platform
+        self.crawler_type = crawler_type
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self._state: Dict[str, Any] = self._new_state([])
+        self._dirty = False
+        self._last_flush = 0.0
+        # 断点中记录的位置，iter_tasks 恢复到该位置后清空
+        self._resume_state: Optional[Dict[str, Any]] = self._load() if enabled and resume else None
+
+    def _new_state(self, tasks: List[str]) -> Dict[str, Any]:
+        return {
+            "version": CHECKPOINT_VERSION,
+            "platform": self.platform,
+            "crawler_type": self.crawler_type,
+            "tasks": tasks,
+            "task_index": 0,
+            "page": None,
+            "search_id": "",
+            "pending_ids": [],
+            "done_ids": [],
+            "comment_cursors": {},
+            "updated_at": 0,
+        }
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            utils.logger.info(f"[CrawlCheckpoint] No checkpoint found at {self.path}, start from the beginning")
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            utils.logger.warning(f"[CrawlCheckpoint] Failed to load checkpoint {self.path}, start from the beginning: {e}")
+            return None
+        if state.get("version") != CHECKPOINT_VERSION:
+            return None
+        return state
+
+    @property
+    def task_index(self) -> int:
+        return self._state["task_index"]
+
+    @property
+    def pending_ids(self) -> List[str]:
+        """
+        断点中记录的还未抓取完评论的内容 ID，先收集多页内容再统一抓取评论的平台恢复时需要取回
+        """
+        return list(self._state["pending_ids"])
+
+    def iter_tasks(self, tasks: List[str]) -> Iterator[str]:
+        """
+        遍历关键词或创作者 ID 列表，恢复断点时跳过已完成的部分，每开始一个新任务都会写入断点
+        :param tasks: 关键词或创作者 ID 列表
+        :return:
+        """
+        tasks = [str(task) for task in tasks]
+        resume_state, self._resume_state = self._resume_state, None
+        if resume_state is not None and resume_state.get("tasks") == tasks:
+            self._state = resume_state
+            utils.logger.info(
+                f"[CrawlCheckpoint] Resume from task {self._state['task_index'] + 1}/{len(tasks)}, page: {self._state['page']}, "
+                f"pending contents: {len(self._state['pending_ids'])}"
+            )
+        else:
+            if resume_state is not None:
+                utils.logger.warning("[CrawlCheckpoint] The task list changed since the checkpoint was saved, start from the beginning")
+            self._state = self._new_state(tasks)
+        for index in range(self._state["task_index"], len(tasks)):
+            if index != self._state["task_index"]:
+                self._state.update(self._new_state(tasks), task_index=index)
+                self.flush()
+            yield tasks[index]
+
+    def resume_page(self, default_page: int) -> int:
+        """
+        当前任务在断点中记录的页码，没有记录时返回 default_page
+        """
+        page = self._state["page"]
+        return default_page if page is None else max(page, default_page)
+
+    def resume_search_id(self, default_search_id: str) -> str:
+        """
+        当前任务在断点中记录的 search_id，保证恢复后翻页结果与中断前一致
+        """
+        return self._state["search_id"] or default_search_id
+
+    def save_page(self, page: int, content_ids: List[str], search_id: str = ""):
+        """
+        获取到一页内容后调用，content_ids 为这一页中接下来要抓取评论的内容
+        :param page: 当前页码，中断后从这一页重新开始
+        :param content_ids: 当前页的内容 ID
+        :param search_id: 平台分页使用的 search_id
+        :return:
+        """
+        self._state["page"] = page
+        self._state["search_id"] = search_id or self._state["search_id"]
+        done_ids = set(self._state["done_ids"])
+        self._state["pending_ids"] = [str(content_id) for content_id in content_ids if str(content_id) not in done_ids]
+        self.flush()
+
+    def finish_page(self, next_page: int):
+        """
+        当前页的内容和评论都处理完后调用，清空这一页的评论进度
+        :param next_page: 下一页页码
+        :return:
+        """
+        self._state.update(page=next_page, pending_ids=[], done_ids=[], comment_cursors={})
+        self.flush()
+
+    def get_comment_state(self, content_id: str) -> Tuple[Optional[str], bool]:
+        """
+        当前页中内容的评论进度
+        :param content_id: 内容 ID
+        :return: (上次抓取到的游标，None 表示从头开始, 评论是否已全部抓取)
+        """
+        content_id = str(content_id)
+        return self._state["comment_cursors"].get(content_id), content_id in self._state["done_ids"]
+
+    def save_comment_cursor(self, content_id: str, cursor, has_more: bool):
+        """
+        每抓取完一页评论调用，记录下一页的游标，评论抓取完成后把内容从待抓取列表中移除
+        :param content_id: 内容 ID
+        :param cursor: 下一页的游标
+        :param has_more: 是否还有更多评论
+        :return:
+        """
+        content_id = str(content_id)
+        if has_more:
+            self._state["comment_cursors"][content_id] = None if cursor is None else str(cursor)
+        else:
+            self._state["comment_cursors"].pop(content_id, None)
+            if content_id in self._state["pending_ids"]:
+                self._state["pending_ids"].remove(content_id)
+            self._state["done_ids"].append(content_id)
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        写临时文件后原子替换，中途崩溃也不会留下损坏的断点文件
+        """
+        if not self.enabled:
+            return
+        self._state["updated_at"] = utils.get_unix_timestamp()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """
+        进程退出前写入尚未落盘的评论游标
+        """
+        if self._dirty:
+            self.flush()
+
+    def finish(self):
+        """
+        爬取正常结束后删除断点文件
+        """
+        self._dirty = False
+        if self.enabled and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+_crawl_checkpoint: Optional[CrawlCheckpoint] = None
+
+
+def get_crawl_checkpoint() -> CrawlCheckpoint:
+    global _crawl_checkpoint
+    if _crawl_checkpoint is None:
+        path = os.path.join(config.CRAWL_CHECKPOINT_DIR, f"{config.PLATFORM}_{config.CRAWLER_TYPE}.json")
+        _crawl_checkpoint = CrawlCheckpoint(path, config.PLATFORM, config.CRAWLER_TYPE, resume=config.RESUME_CRAWL)
+    return _crawl_checkpoint
+
+
+def finish_crawl_checkpoint():
+    """
+    爬取正常结束时调用，删除断点文件
+    """
+    global _crawl_checkpoint
+    if _crawl_checkpoint is not None:
+        _crawl_checkpoint.finish()
+        _crawl_checkpoint = None
+
+
+def close_crawl_checkpoint():
+    """
+    爬取中断时调用，保留断点文件供下次 --resume 使用
+    """
+    global _crawl_checkpoint
+    if _crawl_checkpoint is not None:
+        _crawl_checkpoint.close()
+        _crawl_checkpoint = None
@@ -0,0 +1,119 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 单次运行内的内容去重：多个关键词搜到同一条内容时，详情和评论只请求一次，
+#            同一内容的并发请求合并为一个（single-flight），并记录命中该内容的所有关键词
+
+import asyncio
+import contextlib
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from tools import utils
+from var import source_keyword_var
+
+
+class ContentDedup:
+    """
+    - 第一次请求某内容时执行请求并缓存结果，之后同一内容直接返回缓存结果
+    - 请求进行中时再次请求同一内容，等待进行中的请求完成并共享其结果
+    - 请求失败不缓存，异常同时抛给所有等待者，之后的调用会重新请求
+    - fetch 返回 None 也视为失败（详情任务出错时返回 None），不缓存，之后的调用会重新请求
+    """
+
+    def __init__(self):
+        self._results: Dict[Tuple[str, str], Any] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._source_keywords: Dict[str, List[str]] = {}
+        # kind -> 因去重省下的调用次数，comments 的一次调用对应一条内容的全部评论页
+        self.stats: Dict[str, int] = {}
+
+    async def run_once(self, kind: str, content_id: str, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        同一 kind 和 content_id 在本次运行中只执行一次 fetch
+        :param kind: 请求类型，例如 detail、comments、media
+        :param content_id: 内容 ID
+        :param fetch: 实际发起请求的协程函数，成功时不能返回 None
+        :return: (fetch 的结果, 是否为本次调用实际请求的)
+        """
+        key = (kind, str(content_id))
+        if key in self._results:
+            self.stats[kind] = self.stats.get(kind, 0) + 1
+            return self._results[key], False
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats[kind] = self.stats.get(kind, 0) + 1
+            return await asyncio.shield(future), False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有等待者时取出异常，避免 "Future exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            if result is not None:
+                self._results[key] = result
+            future.set_result(result)
+            return result, True
+        finally:
+            self._inflight.pop(key, None)
+
+    @contextlib.contextmanager
+    def source_keywords(self, content_id: str) -> Iterator[str]:
+        """
+        记录当前关键词命中了该内容，在 with 块内把 source_keyword 设置为命中过的所有关键词，
+        重复命中的内容用缓存的详情重新保存一次，不需要再请求
+        :param content_id: 内容 ID
+        :return:
+        """
+        keywords = self._source_keywords.setdefault(str(content_id), [])
+        keyword = source_keyword_var.get()
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+        token = source_keyword_var.set(",".join(keywords))
+        try:
+            yield source_keyword_var.get()
+        finally:
+            source_keyword_var.reset(token)
+
+    @property
+    def requests_saved(self) -> int:
+        return sum(self.stats.values())
+
+
+_content_dedup: Optional[ContentDedup] = None
+
+
+def get_content_dedup() -> ContentDedup:
+    global _content_dedup
+    if _content_dedup is None:
+        _content_dedup = ContentDedup()
+    return _content_dedup
+
+
+def close_content_dedup():
+    """
+    爬虫结束时调用，输出本次运行因去重节省的请求数
+    """
+    global _content_dedup
+    if _content_dedup is not None:
+        if _content_dedup.requests_saved:
+            utils.logger.info(
+                f"[ContentDedup] Requests saved by cross-keyword dedup: {_content_dedup.requests_saved}, {_content_dedup.stats}"
+            )
+        _content_dedup = None
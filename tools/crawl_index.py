@@ -0,0 +1,192 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 增量爬取索引：记录各平台已爬取过的内容 ID 以及评论抓取到的游标，跨多次运行保存在本地 SQLite 中，
+#            再次爬取同一关键词时跳过已获取过详情的内容，评论从上次的游标继续
+
+import os
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+import config
+from tools import utils
+
+CRAWL_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_seen (
+    platform TEXT NOT NULL,
+    content_id TEXT NOT NULL,
+    comment_cursor TEXT,
+    comments_done INTEGER NOT NULL DEFAULT 0,
+    last_seen_ts INTEGER NOT NULL,
+    PRIMARY KEY (platform, content_id)
+);
+"""
+
+
+class CrawlIndex:
+    """
+    增量爬取索引，ENABLE_INCREMENTAL_CRAWL 关闭时所有查询都返回"未见过"，写入不生效，调用方不需要判断开关
+
+    - 每个平台的索引在第一次查询时整体读入内存，之后的查询不再访问数据库
+    - 写入先放在内存中，累计 flush_size 条或关闭时批量写入
+    """
+
+    def __init__(
+        self,
+        db_path: str = config.CRAWL_INDEX_PATH,
+        enabled: bool = True,
+        flush_size: int = 100,
+    ):
+        self.db_path = db_path
+        self.enabled = enabled
+        self.flush_size = flush_size
+        self._conn: Optional[sqlite3.Connection] = None
+        # platform -> content_id -> [comment_cursor, comments_done, last_seen_ts]
+        self._entries: Dict[str, Dict[str, List]] = {}
+        self._pending: Dict[Tuple[str, str], List] = {}
+        self.stats: Dict[str, int] = {
+            "details_skipped": 0,
+            "comments_skipped": 0,
+            "comments_resumed": 0,
+            "marked": 0,
+        }
+
+    def open(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(CRAWL_INDEX_SCHEMA)
+        return self._conn
+
+    def _platform_entries(self, platform: str) -> Dict[str, List]:
+        entries = self._entries.get(platform)
+        if entries is None:
+            rows = self.open().execute(
+                "SELECT content_id, comment_cursor, comments_done, last_seen_ts FROM crawl_seen WHERE platform = ?", (platform,)
+            )
+            entries = {content_id: [cursor, bool(done), ts] for content_id, cursor, done, ts in rows}
+            self._entries[platform] = entries
+        return entries
+
+    def is_seen(self, platform: str, content_id: str) -> bool:
+        """
+        内容是否在之前的运行中已经获取过详情，返回 True 时调用方跳过详情请求
+        :param platform: 平台
+        :param content_id: 内容 ID
+        :return:
+        """
+        if not self.enabled or not content_id:
+            return False
+        seen = str(content_id) in self._platform_entries(platform)
+        if seen:
+            self.stats["details_skipped"] += 1
+        return seen
+
+    def mark_seen(self, platform: str, content_id: str):
+        """
+        详情保存完成后调用，记录内容已爬取
+        :param platform: 平台
+        :param content_id: 内容 ID
+        :return:
+        """
+        if not self.enabled or not content_id:
+            return
+        entry = self._platform_entries(platform).setdefault(str(content_id), [None, False, 0])
+        entry[2] = utils.get_unix_timestamp()
+        self.stats["marked"] += 1
+        self._add_pending(platform, str(content_id), entry)
+
+    def get_comment_state(self, platform: str, content_id: str) -> Tuple[Optional[str], bool]:
+        """
+        获取上次评论抓取的状态
+        :param platform: 平台
+        :param content_id: 内容 ID
+        :return: (上次抓取到的游标，None 表示从头开始, 评论是否已全部抓取)
+        """
+        if not self.enabled:
+            return None, False
+        entry = self._platform_entries(platform).get(str(content_id))
+        if entry is None:
+            return None, False
+        cursor, done = entry[0], entry[1]
+        if done:
+            self.stats["comments_skipped"] += 1
+        elif cursor is not None:
+            self.stats["comments_resumed"] += 1
+        return cursor, done
+
+    def save_comment_cursor(self, platform: str, content_id: str, cursor, has_more: bool):
+        """
+        每抓取完一页评论调用，记录下一页的游标
+        :param platform: 平台
+        :param content_id: 内容 ID
+        :param cursor: 下一页的游标
+        :param has_more: 是否还有更多评论
+        :return:
+        """
+        if not self.enabled:
+            return
+        entry = self._platform_entries(platform).setdefault(str(content_id), [None, False, utils.get_unix_timestamp()])
+        entry[0] = None if cursor is None else str(cursor)
+        entry[1] = not has_more
+        self._add_pending(platform, str(content_id), entry)
+
+    def _add_pending(self, platform: str, content_id: str, entry: List):
+        self._pending[(platform, content_id)] = entry
+        if len(self._pending) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        conn = self.open()
+        conn.executemany(
+            "INSERT INTO crawl_seen (platform, content_id, comment_cursor, comments_done, last_seen_ts) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (platform, content_id) DO UPDATE SET comment_cursor = excluded.comment_cursor, "
+            "comments_done = excluded.comments_done, last_seen_ts = excluded.last_seen_ts",
+            [
+                (platform, content_id, entry[0], int(entry[1]), entry[2])
+                for (platform, content_id), entry in self._pending.items()
+            ],
+        )
+        conn.commit()
+        self._pending.clear()
+
+    def close(self):
+        if self._conn is None and not self._pending:
+            return
+        self.flush()
+        self._conn.close()
+        self._conn = None
+        self._entries.clear()
+        utils.logger.info(f"[CrawlIndex.close] crawl index stats: {self.stats}")
+
+
+_crawl_index: Optional[CrawlIndex] = None
+
+
+def get_crawl_index() -> CrawlIndex:
+    global _crawl_index
+    if _crawl_index is None:
+        _crawl_index = CrawlIndex(enabled=config.ENABLE_INCREMENTAL_CRAWL)
+    return _crawl_index
+
+
+def close_crawl_index():
+    """
+    将未写入的索引落盘并关闭连接，爬虫结束时调用
+    """
+    global _crawl_index
+    if _crawl_index is not None:
+        _crawl_index.close()
+        _crawl_index = None
@@ -0,0 +1,99 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 页面解析执行器：CPU 密集的 HTML/JSON 解析放到进程池中执行，解析大页面时事件循环上的其它请求不会停顿
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+import config
+from tools import utils
+
+T = TypeVar("T")
+
+
+class ExtractionExecutor:
+    """
+    - 解析函数和参数需要可以 pickle：模块级函数，或者无状态的 Extractor 实例的方法
+    - 字符串参数的总长度小于 min_page_size 时在当前线程直接执行，避免小页面的进程间传输开销
+    - 进程池使用 spawn 方式启动，不从已经运行事件循环和浏览器连接线程的主进程 fork
+    - 子进程异常退出（BrokenProcessPool）时重建进程池，本次调用改为在当前线程执行
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, min_page_size: Optional[int] = None):
+        """
+        Args:
+            max_workers: 进程数，默认 config.EXTRACTION_WORKERS，为 0 时不使用进程池
+            min_page_size: 使用进程池的最小页面字符数，默认 config.EXTRACTION_MIN_PAGE_SIZE
+        """
+        self.max_workers = config.EXTRACTION_WORKERS if max_workers is None else max_workers
+        self.min_page_size = config.EXTRACTION_MIN_PAGE_SIZE if min_page_size is None else min_page_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # 在进程池 / 当前线程中执行的次数
+        self.stats = {"pool": 0, "inline": 0}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def _use_pool(self, args) -> bool:
+        if self.max_workers <= 0:
+            return False
+        return sum(len(arg) for arg in args if isinstance(arg, (str, bytes))) >= self.min_page_size
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        执行解析函数，页面较大时在进程池中执行
+        :param func: 解析函数
+        :param args: 解析函数的参数，其中的字符串参数（页面内容）决定是否使用进程池
+        :return: 解析函数的返回值
+        """
+        if not self._use_pool(args):
+            self.stats["inline"] += 1
+            return func(*args)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_pool(), func, *args)
+        except BrokenProcessPool as e:
+            utils.logger.warning(f"[ExtractionExecutor.run] process pool is broken, parse in current process: {e}")
+            self.shutdown(wait=False)
+            self.stats["inline"] += 1
+            return func(*args)
+        self.stats["pool"] += 1
+        return result
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+_extraction_executor: Optional[ExtractionExecutor] = None
+
+
+def get_extraction_executor() -> ExtractionExecutor:
+    global _extraction_executor
+    if _extraction_executor is None:
+        _extraction_executor = ExtractionExecutor()
+    return _extraction_executor
+
+
+def close_extraction_executor():
+    global _extraction_executor
+    if _extraction_executor is not None:
+        _extraction_executor.shutdown()
+        _extraction_executor = None
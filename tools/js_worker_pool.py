@@ -0,0 +1,290 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 常驻 Node.js 进程池，替代 execjs 每次调用都启动一个新进程的方式执行签名 JS
+import asyncio
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from tools import utils
+from tools.latency_histogram import LatencyHistogram
+
+# worker 启动脚本：加载目标 JS 文件后，按行读取 {"id", "fn", "args"} 请求，按行返回 {"id", "result"/"error"}
+NODE_WORKER_BOOTSTRAP = r"""
+const fs = require('fs');
+const vm = require('vm');
+const readline = require('readline');
+globalThis.require = require;
+// 目标脚本中的 console.log 输出到 stderr，避免破坏 stdout 上的通信协议
+console.log = console.error;
+let source = fs.readFileSync(process.argv[1], 'utf-8');
+if (source.charCodeAt(0) === 0xFEFF) {
+    source = source.slice(1);
+}
+vm.runInThisContext(source, {filename: process.argv[1]});
+const rl = readline.createInterface({input: process.stdin});
+rl.on('line', (line) => {
+    let req;
+    try {
+        req = JSON.parse(line);
+    } catch (e) {
+        return;
+    }
+    let resp;
+    try {
+        const fn = vm.runInThisContext(req.fn);
+        resp = {id: req.id, result: fn(...req.args)};
+    } catch (e) {
+        resp = {id: req.id, error: String((e && e.stack) || e)};
+    }
+    process.stdout.write(JSON.stringify(resp) + '\n');
+});
+rl.on('close', () => process.exit(0));
+"""
+
+
+class JsWorkerError(Exception):
+    """JS 函数执行出错，worker 进程本身仍然可用"""
+    pass
+
+
+class JsWorker:
+    """
+    单个常驻 Node.js 进程，同一时间只处理一个调用
+    """
+
+    def __init__(self, script_path: str, node_path: str = "node"):
+        self.script_path = os.path.abspath(script_path)
+        self.node_path = node_path
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._seq = 0
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            self.node_path, "-e", NODE_WORKER_BOOTSTRAP, self.script_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=4 * 1024 * 1024,
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def call(self, fn: str, args: List[Any], timeout: float) -> Any:
+        """
+        调用 JS 中的全局函数
+        Args:
+            fn: 函数名
+            args: 参数列表，需可 JSON 序列化
+            timeout: 超时时间（秒）
+
+        Returns:
+            函数返回值
+        """
+        self._seq += 1
+        request_id = self._seq
+        line = json.dumps({"id": request_id, "fn": fn, "args": args}, ensure_ascii=False) + "\n"
+        self.process.stdin.write(line.encode("utf-8"))
+        await self.process.stdin.drain()
+        raw = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not raw:
+            raise ConnectionError(f"[JsWorker.call] worker exited, returncode: {self.process.returncode}")
+        resp: Dict = json.loads(raw)
+        if resp.get("id") != request_id:
+            raise ConnectionError(f"[JsWorker.call] response id mismatch: {resp.get('id')} != {request_id}")
+        if "error" in resp:
+            raise JsWorkerError(resp["error"])
+        return resp.get("result")
+
+    async def close(self):
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), 2)
+        except Exception:
+            self.process.kill()
+            await self.process.wait()
+
+
+class JsWorkerPool:
+    """
+    Node.js worker 进程池：调用先进入有界队列（队列满时调用方等待，形成背压），
+    每个 worker 对应一个消费任务；worker 异常退出或超时时自动重启，
+    重启失败时当前调用以异常结束，消费任务退避后再次尝试重启，调用方最多等待 wait_timeout 秒
+    """
+
+    def __init__(
+        self,
+        script_path: str,
+        size: int = config.JS_WORKER_POOL_SIZE,
+        queue_size: int = config.JS_WORKER_QUEUE_SIZE,
+        call_timeout: float = config.JS_WORKER_CALL_TIMEOUT,
+        node_path: str = config.JS_WORKER_NODE_PATH,
+        name: str = "",
+        wait_timeout: float = config.JS_WORKER_WAIT_TIMEOUT,
+        restart_max_backoff: float = config.JS_WORKER_RESTART_MAX_BACKOFF,
+    ):
+        self.script_path = script_path
+        self.size = max(1, size)
+        self.queue_size = queue_size
+        self.call_timeout = call_timeout
+        self.node_path = node_path
+        self.wait_timeout = wait_timeout
+        self.restart_max_backoff = restart_max_backoff
+        self.name = name or os.path.basename(script_path)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[JsWorker] = []
+        self._tasks: List[asyncio.Task] = []
+        self._start_lock = asyncio.Lock()
+        self.latency = LatencyHistogram(self.name)
+        self.stats: Dict[str, int] = {"calls": 0, "errors": 0, "restarts": 0, "restart_failures": 0}
+
+    @staticmethod
+    def is_available(node_path: str = config.JS_WORKER_NODE_PATH) -> bool:
+        """
+        是否能找到 node 可执行文件
+        """
+        return shutil.which(node_path) is not None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        async with self._start_lock:
+            if self.started:
+                return
+            if not self.is_available(self.node_path):
+                raise FileNotFoundError(f"[JsWorkerPool.start] node executable not found: {self.node_path}")
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            for _ in range(self.size):
+                worker = JsWorker(self.script_path, self.node_path)
+                await worker.start()
+                self._workers.append(worker)
+                self._tasks.append(asyncio.create_task(self._consume(worker)))
+            utils.logger.info(f"[JsWorkerPool.start] {self.name} started {self.size} node worker(s)")
+
+    async def call(self, fn: str, *args) -> Any:
+        """
+        在 worker 中调用 JS 全局函数，未启动时自动启动
+        Args:
+            fn: 函数名
+            *args: 参数
+
+        Returns:
+            函数返回值
+
+        Raises:
+            asyncio.TimeoutError: 排队加执行超过 wait_timeout 秒
+        """
+        if not self.started:
+            await self.start()
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(self._submit(fn, list(args)), self.wait_timeout)
+        finally:
+            self.latency.record(time.perf_counter() - start)
+
+    async def _submit(self, fn: str, args: List[Any]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((fn, args, future))
+        # 超时被取消时 future 随之取消，消费任务会跳过该调用
+        return await future
+
+    async def _consume(self, worker: JsWorker):
+        restart_failures = 0
+        while True:
+            fn, args, future = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                if not worker.alive:
+                    if restart_failures:
+                        # 上次重启失败，退避一段时间后再尝试
+                        await asyncio.sleep(min(0.5 * 2 ** (restart_failures - 1), self.restart_max_backoff))
+                    if not await self._restart(worker):
+                        restart_failures += 1
+                        if not future.done():
+                            future.set_exception(ConnectionError(f"[JsWorkerPool] {self.name} node worker unavailable"))
+                        continue
+                    restart_failures = 0
+                result = await worker.call(fn, args, self.call_timeout)
+                self.stats["calls"] += 1
+                if not future.done():
+                    future.set_result(result)
+            except JsWorkerError as e:
+                self.stats["errors"] += 1
+                if not future.done():
+                    future.set_exception(e)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                # 超时、进程退出或协议错乱，当前进程状态不可信，重启后继续服务
+                self.stats["errors"] += 1
+                if not future.done():
+                    future.set_exception(e)
+                if not await self._restart(worker):
+                    restart_failures += 1
+            finally:
+                self._queue.task_done()
+
+    async def _restart(self, worker: JsWorker) -> bool:
+        """
+        重启 worker 进程，失败时（如 node 被删除、创建进程时内存不足）记录日志并返回 False，
+        worker 保持不可用状态，下一个调用到来时再次尝试
+        """
+        self.stats["restarts"] += 1
+        utils.logger.warning(f"[JsWorkerPool._restart] {self.name} restart node worker")
+        try:
+            await worker.close()
+        except Exception:
+            pass
+        try:
+            await worker.start()
+        except Exception as e:
+            self.stats["restart_failures"] += 1
+            worker.process = None
+            utils.logger.error(f"[JsWorkerPool._restart] {self.name} restart node worker failed: {e}")
+            return False
+        return True
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "workers": len(self._workers),
+            "queue_size": self._queue.qsize() if self._queue else 0,
+            "latency": self.latency.summary(),
+        }
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+        for worker in self._workers:
+            await worker.close()
+        self._workers.clear()
+        utils.logger.info(f"[JsWorkerPool.close] {self.name} closed, stats: {self.get_stats()}")
@@ -0,0 +1,90 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 固定分桶的耗时直方图，用于统计签名、请求等环节的延迟分布
+import bisect
+from typing import Dict, List, Optional, Sequence
+
+# 默认分桶上界（毫秒），最后一个桶收集所有更大的值
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """
+    耗时直方图，只记录各分桶的计数以及总数、总和、最大值，内存占用固定
+    """
+
+    def __init__(self, name: str = "", buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.name = name
+        self.buckets_ms: List[float] = sorted(buckets_ms)
+        self.counts: List[int] = [0] * (len(self.buckets_ms) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        """
+        记录一次耗时
+        Args:
+            seconds: 耗时（秒）
+        """
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        估算分位数，返回所在分桶的上界（毫秒），超出最大分桶时返回最大值
+        Args:
+            p: 0 ~ 100
+
+        Returns:
+            耗时（毫秒），没有数据时返回 None
+        """
+        if not self.total:
+            return None
+        target = self.total * p / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                if index < len(self.buckets_ms):
+                    return round(min(self.buckets_ms[index], self.max_ms), 2)
+                return round(self.max_ms, 2)
+        return round(self.max_ms, 2)
+
+    def summary(self) -> Dict:
+        """
+        汇总信息，便于打印日志
+        """
+        return {
+            "count": self.total,
+            "avg_ms": round(self.sum_ms / self.total, 2) if self.total else 0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": {
+                (f"<={bound}" if index < len(self.buckets_ms) else f">{self.buckets_ms[-1]}"): count
+                for index, (bound, count) in enumerate(zip(self.buckets_ms + [None], self.counts))
+                if count
+            },
+        }
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
@@ -0,0 +1,183 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 媒体下载调度器：爬虫把下载任务放入后台队列后继续抓取笔记，下载协程按域名限制并发、
+#            失败重试，并统计下载进度，爬虫结束前调用 drain 等待全部下载完成
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+import config
+from tools import utils
+from tools.media_writer import MediaSource
+
+# 每完成多少个下载任务打印一次进度
+PROGRESS_LOG_INTERVAL = 20
+
+
+class MediaDownloadScheduler:
+    """
+    媒体下载调度器，submit 的参数与各平台媒体存储函数一致：
+
+        await get_media_scheduler().submit(xhs_store.update_xhs_note_image, note_id, xhs_client.stream_note_media(url), "0.jpg")
+
+    - 参数中的 MediaSource 决定任务所属的域名，同一个域名同时最多 per_host 个下载
+    - 存储函数抛出网络错误、5xx、408、429 时按 retry_backoff * 2^n 秒退避后重试，
+      MediaSource 每次重试重新打开，配合媒体库从已下载的位置续传
+    - workers 为 0 时在调用方协程中直接下载
+    """
+
+    def __init__(
+        self,
+        workers: int = config.MEDIA_DOWNLOAD_WORKERS,
+        per_host: int = config.MEDIA_DOWNLOAD_PER_HOST,
+        queue_size: int = config.MEDIA_DOWNLOAD_QUEUE_SIZE,
+        max_retries: int = config.MEDIA_DOWNLOAD_MAX_RETRIES,
+        retry_backoff: float = config.MEDIA_DOWNLOAD_RETRY_BACKOFF_SEC,
+        max_sleep: float = config.MEDIA_DOWNLOAD_MAX_SLEEP_SEC,
+    ):
+        self.workers = max(0, workers)
+        self.per_host = max(1, per_host)
+        self.queue_size = queue_size
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self.max_sleep = max_sleep
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight = 0
+        self._start_time = 0.0
+        self.stats: Dict[str, int] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retries": 0,
+            "max_queue_depth": 0,
+        }
+
+    def start(self):
+        if not self._start_time:
+            self._start_time = time.perf_counter()
+        if self.workers and not self._tasks:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, save: Callable[..., Awaitable], *args):
+        """
+        提交一个下载任务，队列满时等待
+        Args:
+            save: 媒体存储函数，例如 xhs_store.update_xhs_note_image
+            *args: 存储函数的参数，其中媒体内容应为 MediaSource 以便重试
+        """
+        self.start()
+        self.stats["submitted"] += 1
+        if not self._tasks:
+            await self._run(save, args)
+            return
+        await self._queue.put((save, args))
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._queue.qsize())
+
+    async def _worker(self):
+        while True:
+            save, args = await self._queue.get()
+            try:
+                await self._run(save, args)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, save: Callable[..., Awaitable], args: Tuple):
+        url = next((arg.url for arg in args if isinstance(arg, MediaSource)), "")
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            self._in_flight += 1
+            try:
+                await self._download(save, args, url)
+            finally:
+                self._in_flight -= 1
+            if self.max_sleep:
+                await asyncio.sleep(random.random() * self.max_sleep)
+
+    async def _download(self, save: Callable[..., Awaitable], args: Tuple, url: str):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await save(*args)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._should_retry(e):
+                    self.stats["failed"] += 1
+                    utils.logger.error(f"[MediaDownloadScheduler] download {url} failed after {attempt + 1} attempts: {e}")
+                    return
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+                continue
+            self.stats["completed"] += 1
+            if self.stats["completed"] % PROGRESS_LOG_INTERVAL == 0:
+                utils.logger.info(f"[MediaDownloadScheduler] progress: {self.get_stats()}")
+            return
+
+    @staticmethod
+    def _should_retry(e: Exception) -> bool:
+        if isinstance(e, httpx.HTTPStatusError):
+            status_code = e.response.status_code
+            return status_code >= 500 or status_code in (408, 429)
+        return isinstance(e, (httpx.HTTPError, OSError))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def get_stats(self) -> Dict:
+        """
+        提交、完成、失败、重试的任务数，当前排队和正在下载的任务数以及完成速率（个/秒）
+        """
+        elapsed = time.perf_counter() - self._start_time if self._start_time else 0
+        return {
+            **self.stats,
+            "queued": self.queue_depth,
+            "in_flight": self._in_flight,
+            "rate": round(self.stats["completed"] / elapsed, 2) if elapsed else 0,
+        }
+
+    async def drain(self):
+        """
+        等待队列中的下载任务全部完成后停止下载协程，爬虫关闭 API 客户端之前调用
+        """
+        if self._tasks:
+            await self._queue.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+        if self.stats["submitted"]:
+            utils.logger.info(f"[MediaDownloadScheduler.drain] media download stats: {self.get_stats()}")
+
+
+_media_scheduler: Optional[MediaDownloadScheduler] = None
+
+
+def get_media_scheduler() -> MediaDownloadScheduler:
+    global _media_scheduler
+    if _media_scheduler is None:
+        _media_scheduler = MediaDownloadScheduler()
+    return _media_scheduler
+
+
+async def drain_media_downloads():
+    """
+    等待所有已提交的媒体下载完成
+    """
+    if _media_scheduler is not None:
+        await _media_scheduler.drain()
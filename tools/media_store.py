@@ -0,0 +1,285 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 内容寻址的媒体库：媒体文件按 sha256 保存一份，笔记目录下的文件硬链接到它，
+#            SQLite 索引记录 url -> hash、path -> hash，重复爬取时已下载的媒体不再消耗带宽
+import asyncio
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+import httpx
+
+import config
+from tools import utils
+from tools.media_writer import TEMP_FILE_SUFFIX, MediaContent, MediaSource, write_media_file
+
+MEDIA_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media_blob (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    add_ts INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS media_url (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS media_path (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+"""
+
+# 读取未完成下载计算哈希时的分块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class MediaStore:
+    """
+    媒体库目录结构：
+        blobs/<hash[:2]>/<hash>   按内容哈希保存的媒体文件
+        partial/<sha1(path)>      未完成的下载，下次以 Range 请求续传
+        index.db                  SQLite 索引
+
+    save 的处理顺序：
+    1. URL 已在索引中，或目标文件已存在且在索引中：不下载，必要时从 blob 硬链接出目标文件
+    2. 存在未完成的下载且内容是 MediaSource：从已下载的字节数开始续传
+    3. 下载完成后计算哈希，blob 已存在（其他笔记的同一张图）时丢弃本次下载，只建立硬链接
+    """
+
+    def __init__(self, root_dir: str = config.MEDIA_STORE_DIR):
+        self.root_dir = root_dir
+        self.blob_dir = os.path.join(root_dir, "blobs")
+        self.partial_dir = os.path.join(root_dir, "partial")
+        self.index_path = os.path.join(root_dir, "index.db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._inflight: Dict[str, asyncio.Event] = {}
+        self.stats: Dict[str, int] = {
+            "downloaded": 0,
+            "skipped": 0,
+            "resumed": 0,
+            "deduped": 0,
+            "bytes_downloaded": 0,
+            "bytes_saved": 0,
+        }
+
+    def open(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.blob_dir, exist_ok=True)
+            os.makedirs(self.partial_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.index_path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(MEDIA_STORE_SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            utils.logger.info(f"[MediaStore.close] media store stats: {self.stats}")
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.blob_dir, content_hash[:2], content_hash)
+
+    def _partial_path(self, file_path: str) -> str:
+        return os.path.join(self.partial_dir, hashlib.sha1(file_path.encode("utf-8")).hexdigest())
+
+    async def save(self, file_path: str, content: MediaContent) -> int:
+        """
+        保存媒体文件到 file_path
+        Args:
+            file_path: 目标文件路径
+            content: bytes、分块异步迭代器或 MediaSource，只有 MediaSource 支持按 URL 跳过和断点续传
+
+        Returns:
+            文件大小
+        """
+        self.open()
+        url = content.url if isinstance(content, MediaSource) else None
+        # 同一个 URL 同时只下载一次，后到的协程等前一个完成后直接命中索引
+        key = url or file_path
+        while key in self._inflight:
+            await self._inflight[key].wait()
+        self._inflight[key] = asyncio.Event()
+        try:
+            hit = self._lookup(url, file_path)
+            if hit:
+                content_hash, size = hit
+                if hasattr(content, "aclose"):
+                    await content.aclose()
+                self._link(content_hash, file_path)
+                self._record(content_hash, size, url, file_path)
+                self.stats["skipped"] += 1
+                self.stats["bytes_saved"] += size
+                return size
+
+            content_hash, size, partial_path = await self._download(file_path, content)
+            blob_path = self._blob_path(content_hash)
+            if os.path.exists(blob_path):
+                os.remove(partial_path)
+                self.stats["deduped"] += 1
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(partial_path, blob_path)
+            self.stats["downloaded"] += 1
+            self._link(content_hash, file_path)
+            self._record(content_hash, size, url, file_path)
+            return size
+        finally:
+            self._inflight.pop(key).set()
+
+    def _lookup(self, url: Optional[str], file_path: str) -> Optional[Tuple[str, int]]:
+        """
+        查询索引，返回 (hash, size)；URL 命中要求 blob 仍然存在，路径命中要求目标文件仍然存在
+        """
+        conn = self.open()
+        if url:
+            row = conn.execute(
+                "SELECT b.hash, b.size FROM media_url u JOIN media_blob b ON u.hash = b.hash WHERE u.url = ?", (url,)
+            ).fetchone()
+            if row and os.path.exists(self._blob_path(row[0])):
+                return row[0], row[1]
+        row = conn.execute(
+            "SELECT b.hash, b.size FROM media_path p JOIN media_blob b ON p.hash = b.hash WHERE p.path = ?", (file_path,)
+        ).fetchone()
+        if row and os.path.exists(file_path):
+            return row[0], row[1]
+        return None
+
+    async def _download(self, file_path: str, content: MediaContent) -> Tuple[str, int, str]:
+        """
+        下载到 partial 目录并计算 sha256。MediaSource 下载失败时保留已下载的部分，下次续传
+        Returns:
+            (hash, size, partial_path)
+        """
+        partial_path = self._partial_path(file_path)
+        resumable = isinstance(content, MediaSource)
+        digest = hashlib.sha256()
+        offset = await self._hash_partial(partial_path, digest) if resumable else 0
+        try:
+            try:
+                size = await self._write_partial(partial_path, content, offset, digest)
+            except httpx.HTTPStatusError as e:
+                # 416：本地的部分文件与服务端不一致，丢弃后从头下载
+                if not offset or e.response.status_code != 416:
+                    raise
+                digest, offset = hashlib.sha256(), 0
+                size = await self._write_partial(partial_path, content, offset, digest)
+        except BaseException:
+            if not resumable and os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        if offset:
+            self.stats["resumed"] += 1
+            self.stats["bytes_saved"] += offset
+        self.stats["bytes_downloaded"] += size - offset
+        return digest.hexdigest(), size, partial_path
+
+    @staticmethod
+    async def _hash_partial(partial_path: str, digest) -> int:
+        if not os.path.exists(partial_path):
+            return 0
+        size = 0
+        async with aiofiles.open(partial_path, "rb") as f:
+            while True:
+                chunk = await f.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+        return size
+
+    @staticmethod
+    async def _write_partial(partial_path: str, content: MediaContent, offset: int, digest) -> int:
+        size = offset
+        stream = content.open(offset) if isinstance(content, MediaSource) else content
+        async with aiofiles.open(partial_path, "ab" if offset else "wb") as f:
+            if isinstance(stream, (bytes, bytearray)):
+                await f.write(stream)
+                digest.update(stream)
+                return size + len(stream)
+            try:
+                async for chunk in stream:
+                    await f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            finally:
+                if hasattr(stream, "aclose"):
+                    await stream.aclose()
+        return size
+
+    def _link(self, content_hash: str, file_path: str):
+        """
+        让 file_path 指向 blob：优先硬链接，文件系统不支持时复制
+        """
+        blob_path = self._blob_path(content_hash)
+        if os.path.exists(file_path) and (not os.path.exists(blob_path) or os.path.samefile(blob_path, file_path)):
+            return
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        temp_path = file_path + TEMP_FILE_SUFFIX
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        try:
+            os.link(blob_path, temp_path)
+        except OSError:
+            shutil.copyfile(blob_path, temp_path)
+        os.replace(temp_path, file_path)
+
+    def _record(self, content_hash: str, size: int, url: Optional[str], file_path: str):
+        conn = self.open()
+        conn.execute("INSERT OR IGNORE INTO media_blob (hash, size, add_ts) VALUES (?, ?, ?)", (content_hash, size, int(time.time())))
+        if url:
+            conn.execute("INSERT OR REPLACE INTO media_url (url, hash) VALUES (?, ?)", (url, content_hash))
+        conn.execute("INSERT OR REPLACE INTO media_path (path, hash) VALUES (?, ?)", (file_path, content_hash))
+        conn.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+
+_media_store: Optional[MediaStore] = None
+
+
+def get_media_store() -> MediaStore:
+    global _media_store
+    if _media_store is None:
+        _media_store = MediaStore()
+    return _media_store
+
+
+async def save_media(file_path: str, content: MediaContent) -> int:
+    """
+    各平台媒体存储的统一入口，ENABLE_MEDIA_STORE 关闭时直接写入目标文件
+    Args:
+        file_path: 目标文件路径
+        content: bytes、分块异步迭代器或 MediaSource
+
+    Returns:
+        文件大小
+    """
+    if not config.ENABLE_MEDIA_STORE:
+        return await write_media_file(file_path, content)
+    return await get_media_store().save(file_path, content)
+
+
+def close_media_store():
+    """
+    关闭媒体库索引连接，爬虫结束时调用
+    """
+    global _media_store
+    if _media_store is not None:
+        _media_store.close()
+        _media_store = None
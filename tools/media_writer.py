@@ -0,0 +1,70 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 媒体文件写入：支持一次性写入 bytes，也支持边下载边写入分块流，写完后原子重命名
+import os
+import pathlib
+from typing import AsyncIterator, Callable, Union
+
+import aiofiles
+
+
+class MediaSource:
+    """
+    可续传的媒体来源：url 用于媒体库去重，open(offset) 返回从 offset 字节开始的分块流，
+    由 AbstractApiClient.media_source 创建
+    """
+
+    def __init__(self, url: str, open: Callable[[int], AsyncIterator[bytes]]):
+        self.url = url
+        self.open = open
+
+
+# 媒体内容：完整的 bytes、API 客户端 stream_media 返回的分块异步迭代器，或者可续传的 MediaSource
+MediaContent = Union[bytes, AsyncIterator[bytes], MediaSource]
+
+TEMP_FILE_SUFFIX = ".part"
+
+
+async def write_media_file(file_path: str, content: MediaContent) -> int:
+    """
+    将媒体内容写入 file_path。数据先写入同目录下的 .part 临时文件，全部写完后再重命名为目标文件，
+    下载中断时不会留下不完整的目标文件；传入分块流时内存占用只与分块大小有关
+    Args:
+        file_path: 目标文件路径
+        content: bytes、分块异步迭代器或 MediaSource
+
+    Returns:
+        写入的字节数
+    """
+    if isinstance(content, MediaSource):
+        content = content.open(0)
+    pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    temp_path = file_path + TEMP_FILE_SUFFIX
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            if isinstance(content, (bytes, bytearray)):
+                await f.write(content)
+                size = len(content)
+            else:
+                async for chunk in content:
+                    await f.write(chunk)
+                    size += len(chunk)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if hasattr(content, "aclose"):
+            await content.aclose()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size
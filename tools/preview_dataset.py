@@ -0,0 +1,493 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 内容预览窗口的数据层：CSV/JSON 文件整列读入 pandas DataFrame，评论按 content_id 稳定排序后
+#            建立 content_id -> 评论行区间的索引，选中某条内容时只访问这条内容自己的评论
+
+import glob
+import json
+import os
+import queue
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+
+try:
+    import pyarrow  # noqa: F401
+    SNAPSHOT_SUFFIX = ".parquet"
+except ImportError:
+    # 没有安装 pyarrow 时快照使用 pandas 自带的 pickle 格式
+    SNAPSHOT_SUFFIX = ".pkl"
+
+# 各平台内容 ID 字段，按顺序取第一个存在的列
+CONTENT_ID_FIELDS = ("note_id", "aweme_id", "video_id", "content_id")
+CONTENT_COLUMNS = ["platform", "id", "title", "desc", "author", "create_time", "ip_location", "file_path"]
+COMMENT_COLUMNS = [
+    "platform", "content_id", "comment_id", "content", "nickname", "create_time", "ip_location", "like_count", "file_path",
+    "row_index",
+]
+# (文件名匹配规则, 数据类型)
+PREVIEW_FILE_PATTERNS = (
+    ("*contents*.csv", "contents"),
+    ("*contents*.json", "contents"),
+    ("*contents*.jsonl", "contents"),
+    ("*comments*.csv", "comments"),
+    ("*comments*.json", "comments"),
+    ("*comments*.jsonl", "comments"),
+)
+# 快照保存在源文件所在目录下的该子目录中
+SNAPSHOT_DIR_NAME = ".preview_cache"
+# 标题为空时用描述代替，截取的长度
+TITLE_MAX_LENGTH = 50
+
+
+def _text_column(df: pd.DataFrame, fields: Sequence[str], default: str = "") -> pd.Series:
+    """
+    取 fields 中第一个存在的列并转换为字符串列，缺失值为空串
+    """
+    for field in fields:
+        if field in df.columns:
+            return df[field].fillna(default).astype(str)
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def _or_else(primary: pd.Series, fallback: pd.Series) -> pd.Series:
+    """
+    primary 为空串的位置取 fallback
+    """
+    return primary.where(primary != "", fallback)
+
+
+def normalize_contents(df: pd.DataFrame, platform: str, file_path: str) -> pd.DataFrame:
+    """
+    把平台原始的内容表转换为 CONTENT_COLUMNS 列，整列操作，不逐行构造字典
+    :param df: 内容表
+    :param platform: 平台目录名
+    :param file_path: 来源文件
+    :return:
+    """
+    desc = _text_column(df, ("desc",))
+    return pd.DataFrame({
+        "platform": platform,
+        "id": _text_column(df, CONTENT_ID_FIELDS),
+        "title": _or_else(_text_column(df, ("title",)), desc).str.slice(0, TITLE_MAX_LENGTH),
+        "desc": desc,
+        "author": _text_column(df, ("nickname",)),
+        "create_time": _text_column(df, ("create_time",)),
+        "ip_location": _text_column(df, ("ip_location",)),
+        "file_path": file_path,
+    }, index=df.index, columns=CONTENT_COLUMNS)
+
+
+def normalize_comments(df: pd.DataFrame, platform: str, file_path: str) -> pd.DataFrame:
+    """
+    把平台原始的评论表转换为 COMMENT_COLUMNS 列，抖音评论的 IP 位置字段为 ip_label，
+    row_index 取评论表的行索引（iter_file_chunks 返回的行索引即评论在文件中的行号）
+    :param df: 评论表
+    :param platform: 平台目录名
+    :param file_path: 来源文件
+    :return:
+    """
+    ip_location = _text_column(df, ("ip_location",))
+    if platform == "douyin":
+        ip_location = _or_else(ip_location, _text_column(df, ("ip_label",)))
+    return pd.DataFrame({
+        "platform": platform,
+        "content_id": _text_column(df, CONTENT_ID_FIELDS),
+        "comment_id": _text_column(df, ("comment_id",)),
+        "content": _text_column(df, ("content",)),
+        "nickname": _text_column(df, ("nickname",)),
+        "create_time": _text_column(df, ("create_time",)),
+        "ip_location": ip_location,
+        "like_count": _text_column(df, ("like_count",), "0"),
+        "file_path": file_path,
+        "row_index": df.index.to_numpy(dtype=np.int64),
+    }, index=df.index, columns=COMMENT_COLUMNS)
+
+
+def iter_json_records(file_path: Path, chunk_rows: int, block_chars: int = 1 << 20) -> Iterator[List[Dict]]:
+    """
+    流式读取 json 数组或 jsonl 文件，每次返回最多 chunk_rows 条记录，不把整个文件读入内存后再解析；
+    json 文件顶层不是数组时不返回任何记录，jsonl 中无法解析的行跳过
+    :param file_path: 文件路径
+    :param chunk_rows: 每批记录数
+    :param block_chars: json 数组每次从文件读取的字符数
+    :return:
+    """
+    records: List[Dict] = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        if file_path.suffix == ".jsonl":
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"跳过无法解析的行 {file_path}: {line[:100]}")
+                    continue
+                if len(records) >= chunk_rows:
+                    yield records
+                    records = []
+        else:
+            decoder = json.JSONDecoder()
+            buffer = f.read(block_chars).lstrip()
+            if not buffer.startswith("["):
+                return
+            pos, eof = 1, False
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) and buffer[pos] == "]":
+                    break
+                try:
+                    record, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # 缓冲区末尾的记录不完整，读入下一块后重新解析
+                    if eof:
+                        raise
+                    block = f.read(block_chars)
+                    eof = not block
+                    buffer = buffer[pos:] + block
+                    pos = 0
+                    continue
+                records.append(record)
+                if len(records) >= chunk_rows:
+                    yield records
+                    records = []
+    if records:
+        yield records
+
+
+def iter_file_chunks(file_path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    分批读取 CSV/JSON/JSONL 文件，CSV 所有列按字符串读取，避免数字 ID 被推断成 int/float 后丢失精度，
+    各批的行索引连续，为记录在文件中的序号
+    """
+    if file_path.suffix == ".csv":
+        with pd.read_csv(file_path, encoding="utf-8", dtype=str, keep_default_na=False, chunksize=chunk_rows) as reader:
+            yield from reader
+    else:
+        offset = 0
+        for records in iter_json_records(file_path, chunk_rows):
+            yield pd.DataFrame.from_records(records, index=pd.RangeIndex(offset, offset + len(records)))
+            offset += len(records)
+
+
+def find_preview_files(platform_dir: Path) -> List[Tuple[Path, str]]:
+    """
+    递归查找平台目录下的内容和评论文件
+    :return: [(文件路径, contents 或 comments)]
+    """
+    return [
+        (file_path, kind)
+        for pattern, kind in PREVIEW_FILE_PATTERNS
+        for file_path in sorted(platform_dir.rglob(pattern))
+    ]
+
+
+def snapshot_path(file_path: Path) -> Path:
+    """
+    源文件解析结果的快照路径，文件名带上源文件的修改时间和大小，源文件变化后旧快照自然失效
+    """
+    stat = file_path.stat()
+    return file_path.parent / SNAPSHOT_DIR_NAME / f"{file_path.name}.{stat.st_mtime_ns}-{stat.st_size}{SNAPSHOT_SUFFIX}"
+
+
+def read_snapshot(path: Path) -> pd.DataFrame:
+    if SNAPSHOT_SUFFIX == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def write_snapshot(path: Path, df: pd.DataFrame):
+    """
+    写入快照（先写临时文件再替换），并删除同一源文件的旧快照；写入失败只输出日志
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        if SNAPSHOT_SUFFIX == ".parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        source_name = path.name[:-len(SNAPSHOT_SUFFIX)].rsplit(".", 1)[0]
+        for stale in path.parent.glob(glob.escape(source_name) + ".*" + SNAPSHOT_SUFFIX):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+    except Exception as e:
+        print(f"写入数据快照失败 {path}: {e}")
+
+
+def iter_normalized_chunks(file_path: Path, kind: str, platform: str, chunk_rows: int,
+                           use_snapshot: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    分批读取并规范化一个数据文件；开启快照时优先读取未过期的快照，没有快照时完整读完文件后写入快照，
+    中途停止迭代（取消加载）时不写快照
+    :param file_path: 数据文件
+    :param kind: contents 或 comments
+    :param platform: 平台目录名
+    :param chunk_rows: 每批行数
+    :param use_snapshot: 是否使用快照
+    :return:
+    """
+    normalize = normalize_contents if kind == "contents" else normalize_comments
+    columns = CONTENT_COLUMNS if kind == "contents" else COMMENT_COLUMNS
+    snapshot = snapshot_path(file_path) if use_snapshot else None
+    if snapshot is not None and snapshot.exists():
+        try:
+            df = read_snapshot(snapshot)
+        except Exception as e:
+            print(f"读取数据快照失败 {snapshot}: {e}")
+        else:
+            # 旧版本写入的快照缺少新增的列时重新解析源文件
+            if set(columns).issubset(df.columns):
+                df["platform"] = platform
+                df["file_path"] = str(file_path)
+                yield df
+                return
+    frames = []
+    for chunk in iter_file_chunks(file_path, chunk_rows):
+        df = normalize(chunk, platform, str(file_path))
+        frames.append(df)
+        yield df
+    if snapshot is not None:
+        write_snapshot(snapshot, pd.concat(frames, ignore_index=True) if frames else normalize(pd.DataFrame(), platform, str(file_path)))
+
+
+class PreviewDataset:
+    """
+    预览数据集：contents 为内容表，comments 为按 content_id 稳定排序的评论表（同一内容的评论保持文件中的顺序），
+    build 时一次性建立 content_id -> [start, end) 行区间索引和评论长度列，之后按内容取评论、统计都只访问该区间
+    """
+
+    def __init__(self):
+        self.contents = pd.DataFrame(columns=CONTENT_COLUMNS)
+        self.comments = pd.DataFrame(columns=COMMENT_COLUMNS)
+        self._content_frames: List[pd.DataFrame] = []
+        self._comment_frames: List[pd.DataFrame] = []
+        self._comment_ranges: Dict[str, Tuple[int, int]] = {}
+        self._comment_lengths = np.empty(0, dtype=np.int64)
+
+    def clear(self):
+        self.__init__()
+
+    def add_contents(self, df: pd.DataFrame):
+        """
+        追加已经 normalize_contents 的内容表，调用 build 后生效
+        """
+        self._content_frames.append(df)
+
+    def add_comments(self, df: pd.DataFrame):
+        """
+        追加已经 normalize_comments 的评论表，调用 build 后生效
+        """
+        self._comment_frames.append(df)
+
+    def load_platform(self, platform_dir: Path, chunk_rows: Optional[int] = None, use_snapshot: bool = False) -> int:
+        """
+        在当前线程读取平台目录下（递归）所有内容和评论文件，单个文件读取失败时跳过
+        :param platform_dir: 平台数据目录，目录名即平台名
+        :param chunk_rows: 每批读取的行数
+        :param use_snapshot: 是否使用快照
+        :return: 成功读取的文件数
+        """
+        loaded_files = 0
+        for file_path, kind in find_preview_files(platform_dir):
+            add = self.add_contents if kind == "contents" else self.add_comments
+            try:
+                for df in iter_normalized_chunks(file_path, kind, platform_dir.name,
+                                                 chunk_rows or config.PREVIEW_CHUNK_ROWS, use_snapshot):
+                    add(df)
+            except Exception as e:
+                print(f"加载数据文件失败 {file_path}: {e}")
+                continue
+            loaded_files += 1
+            print(f"成功加载数据文件: {file_path}")
+        return loaded_files
+
+    def build(self, partial: bool = False):
+        """
+        合并追加的数据并重建评论索引
+        :param partial: 加载过程中的部分合并，评论只在新增行数不少于已有行数时合并，
+                        边加载边合并时排序和建索引的总开销与一次性合并同阶
+        :return:
+        """
+        if self._content_frames:
+            self.contents = pd.concat([self.contents, *self._content_frames], ignore_index=True)
+            self._content_frames.clear()
+        pending_rows = sum(len(df) for df in self._comment_frames)
+        if pending_rows and (not partial or pending_rows >= len(self.comments)):
+            comments = pd.concat([self.comments, *self._comment_frames], ignore_index=True)
+            self._comment_frames.clear()
+            self.comments = comments.sort_values("content_id", kind="stable", ignore_index=True)
+            self._build_comment_index()
+
+    def _build_comment_index(self):
+        content_ids = self.comments["content_id"].to_numpy()
+        count = len(content_ids)
+        self._comment_lengths = self.comments["content"].str.len().to_numpy(dtype=np.int64)
+        if not count:
+            self._comment_ranges = {}
+            return
+        starts = np.flatnonzero(np.concatenate(([True], content_ids[1:] != content_ids[:-1])))
+        ends = np.append(starts[1:], count)
+        self._comment_ranges = {
+            content_ids[start]: (int(start), int(end)) for start, end in zip(starts.tolist(), ends.tolist())
+        }
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def content_at(self, index: int) -> Dict:
+        """
+        第 index 条内容，返回字典
+        """
+        return self.contents.iloc[index].to_dict()
+
+    def iter_contents(self, start: int = 0) -> Iterable[Dict]:
+        """
+        从第 start 条开始的内容
+        """
+        return self.contents.iloc[start:].to_dict("records")
+
+    def comment_range(self, content_id: str) -> Tuple[int, int]:
+        return self._comment_ranges.get(str(content_id), (0, 0))
+
+    def comments_of(self, content_id: str, limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        某条内容的评论，按行区间切片
+        :param content_id: 内容 ID
+        :param limit: 最多返回的条数
+        :return:
+        """
+        start, end = self.comment_range(content_id)
+        if limit is not None:
+            end = min(end, start + limit)
+        return self.comments.iloc[start:end]
+
+    def comment_count(self, content_id: str) -> int:
+        start, end = self.comment_range(content_id)
+        return end - start
+
+    def comment_summary(self, content_id: str) -> Tuple[int, float]:
+        """
+        :return: (评论数量, 评论平均长度)
+        """
+        start, end = self.comment_range(content_id)
+        if start == end:
+            return 0, 0.0
+        return end - start, float(self._comment_lengths[start:end].mean())
+
+    def comment_texts(self, content_id: str) -> List[str]:
+        return self.comments_of(content_id)["content"].tolist()
+
+    def comment_items(self, content_id: str) -> List[Tuple[str, str]]:
+        """
+        某条内容的 [(评论缓存键, 评论内容)]，用于按评论缓存分词结果；缓存键为 平台:评论ID，
+        没有评论 ID 时为 文件路径:行号，内容相同的不同评论分别计数
+        """
+        comments = self.comments_of(content_id)
+        return [
+            (f"{platform}:{comment_id}" if comment_id else f"{file_path}:{row_index}", content)
+            for platform, comment_id, file_path, row_index, content in zip(
+                comments["platform"].tolist(), comments["comment_id"].tolist(), comments["file_path"].tolist(),
+                comments["row_index"].tolist(), comments["content"].tolist(),
+            )
+        ]
+
+    def ip_counter(self, content_id: str) -> Counter:
+        """
+        某条内容评论的 IP 属地分布，空值不计入，相同数量的地区按首次出现的顺序排列
+        """
+        return Counter(ip for ip in self.comments_of(content_id)["ip_location"].tolist() if ip)
+
+
+class PreviewLoader:
+    """
+    后台线程加载数据目录，文件分批读取，每批数据通过 messages 队列交给界面线程（tkinter 只能在主线程操作），
+    界面用 after 定时调用 drain 取出。消息格式：
+    ("files", 文件总数) / ("contents", DataFrame) / ("comments", DataFrame) /
+    ("progress", 已处理文件数, 文件总数, 文件路径) / ("done", 成功读取的文件数, 是否已取消)
+    """
+
+    def __init__(self, data_dir: Path, chunk_rows: Optional[int] = None, use_snapshot: Optional[bool] = None):
+        self.data_dir = Path(data_dir)
+        self.chunk_rows = chunk_rows or config.PREVIEW_CHUNK_ROWS
+        self.use_snapshot = config.PREVIEW_SNAPSHOT_ENABLED if use_snapshot is None else use_snapshot
+        self.messages: "queue.Queue[Tuple]" = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="PreviewLoader", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """
+        请求取消，后台线程在读完当前批次后停止并发送 done 消息
+        """
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def drain(self, max_messages: int = 100) -> List[Tuple]:
+        """
+        非阻塞地取出最多 max_messages 条消息
+        """
+        messages = []
+        while len(messages) < max_messages:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                break
+        return messages
+
+    def _run(self):
+        loaded_files = 0
+        try:
+            files = [
+                (platform_dir.name, file_path, kind)
+                for platform_dir in sorted(self.data_dir.iterdir()) if platform_dir.is_dir()
+                for file_path, kind in find_preview_files(platform_dir)
+            ]
+            self.messages.put(("files", len(files)))
+            for done_files, (platform, file_path, kind) in enumerate(files, 1):
+                if self.cancelled:
+                    break
+                try:
+                    for df in iter_normalized_chunks(file_path, kind, platform, self.chunk_rows, self.use_snapshot):
+                        self.messages.put((kind, df))
+                        if self.cancelled:
+                            break
+                    else:
+                        loaded_files += 1
+                except Exception as e:
+                    print(f"加载数据文件失败 {file_path}: {e}")
+                self.messages.put(("progress", done_files, len(files), str(file_path)))
+        except Exception as e:
+            print(f"扫描数据目录失败 {self.data_dir}: {e}")
+        finally:
+            self.messages.put(("done", loaded_files, self.cancelled))
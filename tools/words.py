@@ -9,14 +9,24 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
+# -*- coding: utf-8 -*-
+# @Desc    : 评论词频统计和词云生成：每条评论只分词一次并按评论 ID 缓存词频，统计时增量合并，
+#            评论多时在进程池中分词，词云在线程中渲染，不阻塞事件循环
+
 import asyncio
 import json
 import logging
+import multiprocessing
+import os
+import threading
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 import aiofiles
 import jieba
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from wordcloud import WordCloud
 
 import config
@@ -24,24 +34,193 @@ from tools import utils
 
 plot_lock = asyncio.Lock()
 
+
+def load_stop_words(stop_words_file: str) -> Set[str]:
+    with open(stop_words_file, 'r', encoding='utf-8') as f:
+        return set(f.read().strip().split('\n'))
+
+
+def _init_tokenizer(custom_words: Iterable[str]):
+    """
+    进程池 worker 的初始化函数，加载自定义词语
+    """
+    logging.getLogger('jieba').setLevel(logging.WARNING)
+    for word in custom_words:
+        jieba.add_word(word)
+
+
+def _tokenize_texts(texts: Sequence[str], stop_words: Set[str]) -> List[Counter]:
+    """
+    逐条分词，去掉停用词和空白词，返回每条文本的词频
+    """
+    return [
+        Counter(word for word in jieba.lcut(text) if word not in stop_words and word.strip())
+        for text in texts
+    ]
+
+
+class WordFrequencyService:
+    """
+    评论词频服务：
+    - 每条评论分词后的词频按评论 ID 缓存，同一条评论不会再次分词，最多缓存 cache_size 条，超出时丢弃最早缓存的评论
+    - 按 key（例如一个内容或一个输出文件）累计词频，再次统计时只合并新出现的评论
+    - 待分词的评论不少于 parallel_min_texts 条时分批提交到进程池，否则在当前进程分词
+    - 线程安全，可以在界面的后台线程或 asyncio.to_thread 中调用
+    """
+
+    def __init__(self, stop_words: Optional[Set[str]] = None, custom_words: Optional[Iterable[str]] = None,
+                 max_workers: Optional[int] = None, parallel_min_texts: Optional[int] = None, batch_size: int = 500,
+                 cache_size: Optional[int] = None):
+        """
+        Args:
+            stop_words: 停用词，默认读取 config.STOP_WORDS_FILE
+            custom_words: 自定义词语，默认 config.CUSTOM_WORDS
+            max_workers: 进程数，默认 config.WORD_FREQ_WORKERS，为 0 时使用 CPU 核数
+            parallel_min_texts: 使用进程池的最少评论数，默认 config.WORD_FREQ_PARALLEL_MIN_COMMENTS
+            batch_size: 每个进程池任务包含的评论数
+            cache_size: 最多缓存分词结果的评论数，默认 config.WORD_FREQ_CACHE_SIZE
+        """
+        self.stop_words = load_stop_words(config.STOP_WORDS_FILE) if stop_words is None else set(stop_words)
+        self.custom_words = list(config.CUSTOM_WORDS if custom_words is None else custom_words)
+        self.max_workers = (config.WORD_FREQ_WORKERS if max_workers is None else max_workers) or os.cpu_count() or 1
+        self.parallel_min_texts = config.WORD_FREQ_PARALLEL_MIN_COMMENTS if parallel_min_texts is None else parallel_min_texts
+        self.batch_size = batch_size
+        self.cache_size = config.WORD_FREQ_CACHE_SIZE if cache_size is None else cache_size
+        _init_tokenizer(self.custom_words)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._token_counts: Dict[str, Counter] = {}
+        # key -> (已合并的评论 ID, 累计词频)
+        self._aggregates: Dict[str, Tuple[Set[str], Counter]] = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # 进程池在 GUI/事件循环的工作线程中创建，使用 spawn 方式启动，避免 fork 时复制其他线程持有的锁导致死锁
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_tokenizer,
+                initargs=(self.custom_words,),
+            )
+        return self._pool
+
+    def _lookup(self, comments: Sequence[Tuple[str, str]]) -> Dict[str, Counter]:
+        """
+        取出每条评论的词频，未缓存的评论先分词；返回本次用到的词频，缓存淘汰不影响本次统计
+        """
+        found: Dict[str, Counter] = {}
+        missing: Dict[str, str] = {}
+        for comment_id, text in comments:
+            if comment_id in found or comment_id in missing:
+                continue
+            counter = self._token_counts.get(comment_id)
+            if counter is None:
+                missing[comment_id] = text or ""
+            else:
+                found[comment_id] = counter
+        if not missing:
+            return found
+        comment_ids, texts = list(missing), list(missing.values())
+        if len(texts) >= self.parallel_min_texts and self.max_workers > 1:
+            batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+            pool = self._get_pool()
+            counters = [
+                counter
+                for batch_counters in pool.map(_tokenize_texts, batches, [self.stop_words] * len(batches))
+                for counter in batch_counters
+            ]
+        else:
+            counters = _tokenize_texts(texts, self.stop_words)
+        tokenized = dict(zip(comment_ids, counters))
+        found.update(tokenized)
+        self._token_counts.update(tokenized)
+        overflow = len(self._token_counts) - self.cache_size
+        if overflow > 0:
+            for comment_id in list(islice(self._token_counts, overflow)):
+                del self._token_counts[comment_id]
+        return found
+
+    def token_counts(self, comments: Sequence[Tuple[str, str]]) -> List[Counter]:
+        """
+        每条评论的词频，未缓存的评论先分词
+        :param comments: [(评论 ID, 评论内容)]
+        :return: 与 comments 顺序一致的词频列表
+        """
+        with self._lock:
+            counts = self._lookup(comments)
+            return [counts[comment_id] for comment_id, _ in comments]
+
+    def word_frequency(self, comments: Sequence[Tuple[str, str]], key: Optional[str] = None) -> Counter:
+        """
+        一组评论的合计词频
+        :param comments: [(评论 ID, 评论内容)]
+        :param key: 累计的键，为空时每次按 comments 重新合并（仍然使用分词缓存）；
+                    不为空时在该键上一次的结果上只合并新出现的评论，comments 应包含之前传入过的评论
+        :return: 词频，key 不为空时返回副本
+        """
+        with self._lock:
+            counts = self._lookup(comments)
+            if key is None:
+                merged_ids: Set[str] = set()
+                total = Counter()
+            else:
+                merged_ids, total = self._aggregates.setdefault(key, (set(), Counter()))
+            for comment_id, _ in comments:
+                if comment_id not in merged_ids:
+                    merged_ids.add(comment_id)
+                    total.update(counts[comment_id])
+            return total.copy() if key is not None else total
+
+    async def async_word_frequency(self, comments: Sequence[Tuple[str, str]], key: Optional[str] = None) -> Counter:
+        """
+        在线程中执行 word_frequency，不阻塞事件循环
+        """
+        return await asyncio.to_thread(self.word_frequency, comments, key)
+
+    def clear(self):
+        with self._lock:
+            self._token_counts.clear()
+            self._aggregates.clear()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        self.clear()
+
+
+_word_frequency_service: Optional[WordFrequencyService] = None
+_word_frequency_service_lock = threading.Lock()
+
+
+def get_word_frequency_service() -> WordFrequencyService:
+    global _word_frequency_service
+    with _word_frequency_service_lock:
+        if _word_frequency_service is None:
+            _word_frequency_service = WordFrequencyService()
+        return _word_frequency_service
+
+
+def close_word_frequency_service():
+    global _word_frequency_service
+    with _word_frequency_service_lock:
+        if _word_frequency_service is not None:
+            _word_frequency_service.close()
+            _word_frequency_service = None
+
+
 class AsyncWordCloudGenerator:
     def __init__(self):
-        logging.getLogger('jieba').setLevel(logging.WARNING)
-        self.stop_words_file = config.STOP_WORDS_FILE
-        self.lock = asyncio.Lock()
-        self.stop_words = self.load_stop_words()
-        self.custom_words = config.CUSTOM_WORDS
-        for word, group in self.custom_words.items():
-            jieba.add_word(word)
-
-    def load_stop_words(self):
-        with open(self.stop_words_file, 'r', encoding='utf-8') as f:
-            return set(f.read().strip().split('\n'))
+        self.word_frequency_service = get_word_frequency_service()
+        self.stop_words = self.word_frequency_service.stop_words
 
     async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
-        all_text = ' '.join(item['content'] for item in data)
-        words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
-        word_freq = Counter(words)
+        # 没有评论 ID 时用 前缀:行号 作为缓存键，内容相同的不同评论分别计数
+        comments = [
+            (str(item.get('comment_id') or f"{save_words_prefix}:{index}"), item['content'])
+            for index, item in enumerate(data)
+        ]
+        word_freq = await self.word_frequency_service.async_word_frequency(comments, key=save_words_prefix)
 
         # Save word frequency to file
         freq_file = f"{save_words_prefix}_word_freq.json"
@@ -56,9 +235,16 @@ class AsyncWordCloudGenerator:
         await self.generate_word_cloud(word_freq, save_words_prefix)
 
     async def generate_word_cloud(self, word_freq, save_words_prefix):
-        await plot_lock.acquire()
-        top_20_word_freq = {word: freq for word, freq in
-                            sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
+        async with plot_lock:
+            await asyncio.to_thread(self.render_word_cloud, word_freq, save_words_prefix)
+
+    def render_word_cloud(self, word_freq, save_words_prefix):
+        """
+        生成并保存词云图片，在线程中执行；使用 Figure 而不是 pyplot，避免在非主线程中操作全局的 pyplot 状态
+        """
+        top_20_word_freq = dict(Counter(word_freq).most_common(20))
+        if not top_20_word_freq:
+            return
         wordcloud = WordCloud(
             font_path=config.FONT_PATH,
             width=800,
@@ -72,12 +258,9 @@ class AsyncWordCloudGenerator:
         ).generate_from_frequencies(top_20_word_freq)
 
         # Save word cloud image
-        plt.figure(figsize=(10, 5), facecolor='white')
-        plt.imshow(wordcloud, interpolation='bilinear')
-
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        plt.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)
-        plt.close()
-
-        plot_lock.release()
\ No newline at end of file
+        fig = Figure(figsize=(10, 5), facecolor='white')
+        ax = fig.subplots()
+        ax.imshow(wordcloud, interpolation='bilinear')
+        ax.axis('off')
+        fig.tight_layout(pad=0)
+        fig.savefig(f"{save_words_prefix}_word_cloud.png", format='png', dpi=300)